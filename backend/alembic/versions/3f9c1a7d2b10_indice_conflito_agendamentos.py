@@ -0,0 +1,33 @@
+"""indice composto para conflito de agendamentos
+
+Revision ID: 3f9c1a7d2b10
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c1a7d2b10'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_agendamentos_profissional_periodo',
+        'agendamentos',
+        ['profissional_id', 'data_hora_inicio', 'data_hora_fim'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_agendamentos_profissional_periodo', table_name='agendamentos')
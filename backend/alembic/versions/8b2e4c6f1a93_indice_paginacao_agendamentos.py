@@ -0,0 +1,28 @@
+"""indice para paginacao por cursor de agendamentos
+
+Revision ID: 8b2e4c6f1a93
+Revises: 3f9c1a7d2b10
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4c6f1a93'
+down_revision: Union[str, Sequence[str], None] = '3f9c1a7d2b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_agendamentos_inicio_id', 'agendamentos', ['data_hora_inicio', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_agendamentos_inicio_id', table_name='agendamentos')
@@ -0,0 +1,48 @@
+"""fila de tarefas em segundo plano
+
+Revision ID: a6c2e8f0d193
+Revises: f5b7d9e2c481
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6c2e8f0d193'
+down_revision: Union[str, Sequence[str], None] = 'f5b7d9e2c481'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'tarefas',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tipo', sa.String(length=100), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=True),
+        sa.Column('status', sa.Enum('pendente', 'executando', 'concluida', 'falhou'), nullable=False),
+        sa.Column('tentativas', sa.Integer(), nullable=False),
+        sa.Column('max_tentativas', sa.Integer(), nullable=False),
+        sa.Column('executar_em', sa.DateTime(), nullable=False),
+        sa.Column('bloqueada_ate', sa.DateTime(), nullable=True),
+        sa.Column('chave', sa.String(length=255), nullable=True),
+        sa.Column('erro', sa.Text(), nullable=True),
+        sa.Column('criado_em', sa.DateTime(), nullable=True),
+        sa.Column('atualizado_em', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('chave'),
+    )
+    op.create_index('ix_tarefas_id', 'tarefas', ['id'], unique=False)
+    op.create_index('ix_tarefas_status_executar_em', 'tarefas', ['status', 'executar_em'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tarefas_status_executar_em', table_name='tarefas')
+    op.drop_index('ix_tarefas_id', table_name='tarefas')
+    op.drop_table('tarefas')
@@ -0,0 +1,33 @@
+"""indices compostos iniciando por salao_id
+
+Revision ID: b83d1f5a7e20
+Revises: a6c2e8f0d193
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b83d1f5a7e20'
+down_revision: Union[str, Sequence[str], None] = 'a6c2e8f0d193'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_profissionais_salao_id', 'profissionais', ['salao_id', 'id'], unique=False)
+    op.create_index('ix_servicos_salao_id', 'servicos', ['salao_id', 'id'], unique=False)
+    op.create_index(
+        'ix_agendamentos_salao_inicio_id', 'agendamentos', ['salao_id', 'data_hora_inicio', 'id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_agendamentos_salao_inicio_id', table_name='agendamentos')
+    op.drop_index('ix_servicos_salao_id', table_name='servicos')
+    op.drop_index('ix_profissionais_salao_id', table_name='profissionais')
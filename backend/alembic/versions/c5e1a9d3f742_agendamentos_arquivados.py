@@ -0,0 +1,65 @@
+"""tabela de agendamentos arquivados
+
+Revision ID: c5e1a9d3f742
+Revises: b83d1f5a7e20
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e1a9d3f742'
+down_revision: Union[str, Sequence[str], None] = 'b83d1f5a7e20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Depois do upgrade, mova o histórico com: python -m app.arquivamento
+    op.create_table(
+        'agendamentos_arquivados',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('salao_id', sa.Integer(), nullable=False),
+        sa.Column('cliente_id', sa.Integer(), nullable=False),
+        sa.Column('profissional_id', sa.Integer(), nullable=False),
+        sa.Column('servico_id', sa.Integer(), nullable=False),
+        sa.Column('data_hora_inicio', sa.DateTime(), nullable=False),
+        sa.Column('data_hora_fim', sa.DateTime(), nullable=False),
+        sa.Column('status', sa.Enum('agendado', 'confirmado', 'cancelado', 'concluido'), nullable=False),
+        sa.Column('observacoes', sa.Text(), nullable=True),
+        sa.Column('serie_id', sa.Integer(), nullable=True),
+        sa.Column('criado_em', sa.DateTime(), nullable=True),
+        sa.Column('atualizado_em', sa.DateTime(), nullable=True),
+        sa.Column('arquivado_em', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['salao_id'], ['saloes.id']),
+        sa.ForeignKeyConstraint(['cliente_id'], ['clientes.id']),
+        sa.ForeignKeyConstraint(['profissional_id'], ['profissionais.id']),
+        sa.ForeignKeyConstraint(['servico_id'], ['servicos.id']),
+        sa.ForeignKeyConstraint(['serie_id'], ['series_agendamentos.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_agendamentos_arquivados_salao_inicio_id',
+        'agendamentos_arquivados',
+        ['salao_id', 'data_hora_inicio', 'id'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_agendamentos_arquivados_cliente_inicio',
+        'agendamentos_arquivados',
+        ['cliente_id', 'data_hora_inicio'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Os agendamentos arquivados se perdem: devolva-os a agendamentos antes, se precisar deles
+    op.drop_index('ix_agendamentos_arquivados_cliente_inicio', table_name='agendamentos_arquivados')
+    op.drop_index('ix_agendamentos_arquivados_salao_inicio_id', table_name='agendamentos_arquivados')
+    op.drop_table('agendamentos_arquivados')
@@ -0,0 +1,36 @@
+"""indices para busca de profissionais
+
+Revision ID: c71d5e2a9f04
+Revises: 8b2e4c6f1a93
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c71d5e2a9f04'
+down_revision: Union[str, Sequence[str], None] = '8b2e4c6f1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_profissionais_salao_especialidade',
+        'profissionais',
+        ['salao_id', 'especialidade'],
+        unique=False,
+    )
+    # FULLTEXT no MySQL; em outros bancos o prefixo é ignorado e o índice é comum
+    op.create_index('ix_profissionais_nome_fulltext', 'profissionais', ['nome'], mysql_prefix='FULLTEXT')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_profissionais_nome_fulltext', table_name='profissionais')
+    op.drop_index('ix_profissionais_salao_especialidade', table_name='profissionais')
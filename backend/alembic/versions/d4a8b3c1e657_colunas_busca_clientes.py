@@ -0,0 +1,71 @@
+"""colunas normalizadas para busca de clientes
+
+Revision ID: d4a8b3c1e657
+Revises: c71d5e2a9f04
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.normalizacao import normalizar_email, normalizar_telefone
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a8b3c1e657'
+down_revision: Union[str, Sequence[str], None] = 'c71d5e2a9f04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Clientes preenchidos por vez no backfill (evita carregar a tabela inteira na memória)
+LOTE_BACKFILL = 5000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('clientes', sa.Column('telefone_normalizado', sa.String(length=15), nullable=True))
+    op.add_column('clientes', sa.Column('email_normalizado', sa.String(length=255), nullable=True))
+
+    # Backfill antes dos índices: atualizar a coluna sem índice é mais barato
+    conexao = op.get_bind()
+    clientes = sa.table(
+        'clientes',
+        sa.column('id', sa.Integer),
+        sa.column('telefone', sa.String),
+        sa.column('email', sa.String),
+        sa.column('telefone_normalizado', sa.String),
+        sa.column('email_normalizado', sa.String),
+    )
+    atualizar = (
+        clientes.update()
+        .where(clientes.c.id == sa.bindparam('b_id'))
+        .values(telefone_normalizado=sa.bindparam('b_telefone'), email_normalizado=sa.bindparam('b_email'))
+    )
+    ultimo_id = 0
+    while True:
+        linhas = conexao.execute(
+            sa.select(clientes.c.id, clientes.c.telefone, clientes.c.email)
+            .where(clientes.c.id > ultimo_id)
+            .order_by(clientes.c.id)
+            .limit(LOTE_BACKFILL)
+        ).all()
+        if not linhas:
+            break
+        conexao.execute(atualizar, [
+            {'b_id': id_, 'b_telefone': normalizar_telefone(telefone), 'b_email': normalizar_email(email)}
+            for id_, telefone, email in linhas
+        ])
+        ultimo_id = linhas[-1][0]
+
+    op.create_index('ix_clientes_telefone_normalizado', 'clientes', ['telefone_normalizado'], unique=False)
+    op.create_index('ix_clientes_email_normalizado', 'clientes', ['email_normalizado'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_clientes_email_normalizado', table_name='clientes')
+    op.drop_index('ix_clientes_telefone_normalizado', table_name='clientes')
+    op.drop_column('clientes', 'email_normalizado')
+    op.drop_column('clientes', 'telefone_normalizado')
@@ -0,0 +1,60 @@
+"""versoes da agenda e lapides para sincronizacao incremental
+
+Revision ID: d9b3f7c1e285
+Revises: c5e1a9d3f742
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9b3f7c1e285'
+down_revision: Union[str, Sequence[str], None] = 'c5e1a9d3f742'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'versoes_agenda',
+        sa.Column('salao_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('versao', sa.Integer(), nullable=False),
+        sa.Column('removidos_ate', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('salao_id'),
+    )
+    op.create_table(
+        'agendamentos_removidos',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('agendamento_id', sa.Integer(), nullable=False),
+        sa.Column('salao_id', sa.Integer(), nullable=False),
+        sa.Column('versao', sa.Integer(), nullable=False),
+        sa.Column('removido_em', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_agendamentos_removidos_id', 'agendamentos_removidos', ['id'], unique=False)
+    op.create_index(
+        'ix_agendamentos_removidos_salao_versao',
+        'agendamentos_removidos',
+        ['salao_id', 'versao', 'agendamento_id'],
+        unique=False,
+    )
+    # Agendamentos existentes ficam na versão 0: entram na primeira sincronização (sem token)
+    op.add_column('agendamentos', sa.Column('versao', sa.Integer(), nullable=False, server_default='0'))
+    op.create_index('ix_agendamentos_salao_versao_id', 'agendamentos', ['salao_id', 'versao', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_agendamentos_salao_versao_id', table_name='agendamentos')
+    # batch: no SQLite a coluna só sai recriando a tabela
+    with op.batch_alter_table('agendamentos') as batch_op:
+        batch_op.drop_column('versao')
+    op.drop_index('ix_agendamentos_removidos_salao_versao', table_name='agendamentos_removidos')
+    op.drop_index('ix_agendamentos_removidos_id', table_name='agendamentos_removidos')
+    op.drop_table('agendamentos_removidos')
+    op.drop_table('versoes_agenda')
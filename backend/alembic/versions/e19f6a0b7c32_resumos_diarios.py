@@ -0,0 +1,51 @@
+"""tabela de resumos diarios para relatorios
+
+Revision ID: e19f6a0b7c32
+Revises: d4a8b3c1e657
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e19f6a0b7c32'
+down_revision: Union[str, Sequence[str], None] = 'd4a8b3c1e657'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Depois do upgrade, preencha a tabela com: python -m app.relatorios
+    op.create_table(
+        'resumos_diarios',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('salao_id', sa.Integer(), nullable=False),
+        sa.Column('profissional_id', sa.Integer(), nullable=False),
+        sa.Column('servico_id', sa.Integer(), nullable=False),
+        sa.Column('data', sa.Date(), nullable=False),
+        sa.Column('agendados', sa.Integer(), nullable=False),
+        sa.Column('confirmados', sa.Integer(), nullable=False),
+        sa.Column('cancelados', sa.Integer(), nullable=False),
+        sa.Column('concluidos', sa.Integer(), nullable=False),
+        sa.Column('minutos_ocupados', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_resumos_diarios_id', 'resumos_diarios', ['id'], unique=False)
+    op.create_index(
+        'ux_resumos_diarios_chave',
+        'resumos_diarios',
+        ['salao_id', 'data', 'profissional_id', 'servico_id'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ux_resumos_diarios_chave', table_name='resumos_diarios')
+    op.drop_index('ix_resumos_diarios_id', table_name='resumos_diarios')
+    op.drop_table('resumos_diarios')
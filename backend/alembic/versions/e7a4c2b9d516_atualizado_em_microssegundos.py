@@ -0,0 +1,39 @@
+"""atualizado_em do catalogo com microssegundos (versao das ETags)
+
+Revision ID: e7a4c2b9d516
+Revises: d9b3f7c1e285
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a4c2b9d516'
+down_revision: Union[str, Sequence[str], None] = 'd9b3f7c1e285'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABELAS = ('saloes', 'profissionais', 'servicos')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Só o MySQL trunca DATETIME em segundos; o SQLite já guarda os microssegundos
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    for tabela in TABELAS:
+        op.alter_column(tabela, 'atualizado_em', type_=mysql.DATETIME(fsp=6),
+                        existing_type=mysql.DATETIME(), existing_nullable=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    for tabela in TABELAS:
+        op.alter_column(tabela, 'atualizado_em', type_=mysql.DATETIME(),
+                        existing_type=mysql.DATETIME(fsp=6), existing_nullable=True)
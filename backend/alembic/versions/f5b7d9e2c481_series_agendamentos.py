@@ -0,0 +1,62 @@
+"""series de agendamentos recorrentes
+
+Revision ID: f5b7d9e2c481
+Revises: e19f6a0b7c32
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5b7d9e2c481'
+down_revision: Union[str, Sequence[str], None] = 'e19f6a0b7c32'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'series_agendamentos',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('salao_id', sa.Integer(), nullable=False),
+        sa.Column('cliente_id', sa.Integer(), nullable=False),
+        sa.Column('profissional_id', sa.Integer(), nullable=False),
+        sa.Column('servico_id', sa.Integer(), nullable=False),
+        sa.Column('regra', sa.String(length=255), nullable=False),
+        sa.Column('data_hora_inicio', sa.DateTime(), nullable=False),
+        sa.Column('duracao_minutos', sa.Integer(), nullable=False),
+        sa.Column('ate', sa.Date(), nullable=True),
+        sa.Column('materializada_ate', sa.DateTime(), nullable=True),
+        sa.Column('status', sa.Enum('ativa', 'encerrada', 'cancelada'), nullable=True),
+        sa.Column('observacoes', sa.Text(), nullable=True),
+        sa.Column('criado_em', sa.DateTime(), nullable=True),
+        sa.Column('atualizado_em', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['salao_id'], ['saloes.id']),
+        sa.ForeignKeyConstraint(['cliente_id'], ['clientes.id']),
+        sa.ForeignKeyConstraint(['profissional_id'], ['profissionais.id']),
+        sa.ForeignKeyConstraint(['servico_id'], ['servicos.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_series_agendamentos_id', 'series_agendamentos', ['id'], unique=False)
+    # batch: no SQLite a chave estrangeira só entra recriando a tabela
+    with op.batch_alter_table('agendamentos') as batch_op:
+        batch_op.add_column(sa.Column('serie_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(
+            'fk_agendamentos_serie_id', 'series_agendamentos', ['serie_id'], ['id']
+        )
+        batch_op.create_index('ix_agendamentos_serie_inicio', ['serie_id', 'data_hora_inicio'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('agendamentos') as batch_op:
+        batch_op.drop_index('ix_agendamentos_serie_inicio')
+        batch_op.drop_constraint('fk_agendamentos_serie_id', type_='foreignkey')
+        batch_op.drop_column('serie_id')
+    op.drop_index('ix_series_agendamentos_id', table_name='series_agendamentos')
+    op.drop_table('series_agendamentos')
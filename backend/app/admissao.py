@@ -0,0 +1,457 @@
+# backend/app/admissao.py
+# Controle de admissão: protege o pool de conexões quando um salão (ou cliente) manda
+# requisições demais, por exemplo numa promoção. Três camadas, nesta ordem:
+#   1. limite de taxa por salão (token bucket). O salão vem do caminho
+#      (/saloes/{salao_id}/...), do salao_id do corpo JSON das escritas, do cabeçalho
+#      X-Salao-Id ou de ?salao_id=, nesta ordem. Com ADMISSAO_LIMITAR_POR_IP (padrão
+#      quando há proxies confiáveis), cada IP de cliente tem também o seu balde
+#      (ADMISSAO_TAXA_IP, mais largo), que vale para requisições sem salão: trocar ou
+#      omitir o salão a cada requisição não escapa do limite. Acima da taxa a
+#      requisição recebe 429 com Retry-After na hora;
+#   2. teto global de requisições em andamento nas rotas que usam o banco
+#      (ADMISSAO_CONCORRENCIA_MAX, por padrão o tamanho do pool + overflow), do qual
+#      um salão sozinho só ocupa uma parte (ADMISSAO_CONCORRENCIA_POR_SALAO): o
+#      excedente dele recebe 429 na hora, sem tomar as vagas dos outros;
+#   3. orçamento de espera: quem esperaria mais de ADMISSAO_ESPERA_MAX segundos por uma
+#      vaga recebe 503 com Retry-After, em vez de segurar o worker numa fila longa.
+#
+# Os baldes ficam em memória (cada worker tem os seus) ou no Redis
+# (ADMISSAO_BACKEND=redis), compartilhados entre workers e máquinas. O teto de
+# concorrência é sempre por processo, como o pool de conexões que ele protege.
+import asyncio
+import ipaddress
+import logging
+import math
+import os
+import re
+import threading
+import time
+import weakref
+from collections import Counter, OrderedDict
+from urllib.parse import parse_qsl
+
+import orjson
+from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+
+from .database import DB_MAX_OVERFLOW, DB_POOL_SIZE
+
+load_dotenv()
+
+logger = logging.getLogger("agendanet.admissao")
+
+ADMISSAO_HABILITADA = os.getenv("ADMISSAO_HABILITADA", "true").lower() in ("1", "true", "sim", "yes")
+# Requisições por segundo por salão (ou cliente) e tamanho da rajada aceita; taxa 0 desliga o limite
+ADMISSAO_TAXA = float(os.getenv("ADMISSAO_TAXA", "20"))
+ADMISSAO_RAJADA = float(os.getenv("ADMISSAO_RAJADA", "40"))
+# Requisições em andamento, por processo, nas rotas que usam o banco; 0 desliga o teto
+ADMISSAO_CONCORRENCIA_MAX = int(os.getenv("ADMISSAO_CONCORRENCIA_MAX", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+# Vagas do teto que um mesmo salão (ou IP) pode ocupar ao mesmo tempo; padrão: metade
+ADMISSAO_CONCORRENCIA_POR_SALAO = int(os.getenv(
+    "ADMISSAO_CONCORRENCIA_POR_SALAO", str(max(1, ADMISSAO_CONCORRENCIA_MAX // 2))
+))
+# Espera máxima (segundos) por uma vaga antes de recusar com 503
+ADMISSAO_ESPERA_MAX = float(os.getenv("ADMISSAO_ESPERA_MAX", "0.5"))
+ADMISSAO_BACKEND = os.getenv("ADMISSAO_BACKEND", "memoria").lower()
+ADMISSAO_REDIS_URL = os.getenv("ADMISSAO_REDIS_URL", os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0"))
+ADMISSAO_PREFIXO = os.getenv("ADMISSAO_PREFIXO", "agendanet:admissao:")
+# Limite também por IP do cliente. Atrás de um proxy reverso, liste-o em
+# ADMISSAO_PROXIES_CONFIAVEIS (IPs ou redes, separados por vírgula): o IP do cliente
+# passa a vir do X-Forwarded-For, senão todos dividiriam o balde do proxy.
+ADMISSAO_PROXIES_CONFIAVEIS = [
+    ipaddress.ip_network(rede.strip(), strict=False)
+    for rede in os.getenv("ADMISSAO_PROXIES_CONFIAVEIS", "").split(",") if rede.strip()
+]
+# Padrão: ligado só com proxies configurados. Sem eles, atrás de um balanceador todo o
+# tráfego chegaria do mesmo IP e um único balde limitaria todos os salões.
+ADMISSAO_LIMITAR_POR_IP = os.getenv(
+    "ADMISSAO_LIMITAR_POR_IP", "true" if ADMISSAO_PROXIES_CONFIAVEIS else "false"
+).lower() in ("1", "true", "sim", "yes")
+if ADMISSAO_HABILITADA and ADMISSAO_LIMITAR_POR_IP and not ADMISSAO_PROXIES_CONFIAVEIS:
+    logger.warning(
+        "ADMISSAO_LIMITAR_POR_IP ligado sem ADMISSAO_PROXIES_CONFIAVEIS: atrás de um proxy "
+        "reverso todas as requisições dividem o balde do IP dele"
+    )
+# Balde por IP: padrão, cinco salões no ritmo máximo; taxa 0 desliga
+ADMISSAO_TAXA_IP = float(os.getenv("ADMISSAO_TAXA_IP", str(5 * ADMISSAO_TAXA)))
+ADMISSAO_RAJADA_IP = float(os.getenv("ADMISSAO_RAJADA_IP", str(5 * ADMISSAO_RAJADA)))
+# Corpos JSON até este tamanho (bytes) são lidos para achar o salao_id das escritas
+ADMISSAO_CORPO_MAX = int(os.getenv("ADMISSAO_CORPO_MAX", "65536"))
+# Baldes guardados no backend em memória (os menos usados saem primeiro)
+ADMISSAO_MAX_CHAVES = int(os.getenv("ADMISSAO_MAX_CHAVES", "10000"))
+
+# Rotas que não passam pela admissão: sem banco, ou o monitoramento, que precisa
+# responder justamente quando a API está sobrecarregada
+ROTAS_LIVRES = {"/", "/docs", "/redoc", "/openapi.json"}
+PREFIXOS_LIVRES = ("/metrics",)
+
+
+class BaldesMemoria:
+    """Token buckets no próprio processo, thread-safe."""
+
+    bloqueante = False
+
+    def __init__(self, max_chaves: int = ADMISSAO_MAX_CHAVES):
+        self.max_chaves = max_chaves
+        self._baldes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consumir(self, chave: str, taxa: float, rajada: float) -> float:
+        """Retira uma ficha do balde. Devolve 0 se havia ficha, senão os segundos até a próxima."""
+        agora = time.monotonic()
+        with self._lock:
+            fichas, antes = self._baldes.pop(chave, (rajada, agora))
+            fichas = min(rajada, fichas + (agora - antes) * taxa)
+            espera = 0.0
+            if fichas >= 1:
+                fichas -= 1
+            else:
+                espera = (1 - fichas) / taxa
+            self._baldes[chave] = (fichas, agora)
+            while len(self._baldes) > self.max_chaves:
+                self._baldes.popitem(last=False)
+        return espera
+
+
+# Mesmo algoritmo de BaldesMemoria, atômico no Redis
+_SCRIPT_BALDE = """
+local taxa = tonumber(ARGV[1])
+local rajada = tonumber(ARGV[2])
+local agora = tonumber(ARGV[3])
+local estado = redis.call('HMGET', KEYS[1], 'fichas', 'em')
+local fichas = tonumber(estado[1]) or rajada
+local antes = tonumber(estado[2]) or agora
+fichas = math.min(rajada, fichas + math.max(0, agora - antes) * taxa)
+local espera = 0
+if fichas >= 1 then
+    fichas = fichas - 1
+else
+    espera = (1 - fichas) / taxa
+end
+redis.call('HSET', KEYS[1], 'fichas', tostring(fichas), 'em', tostring(agora))
+redis.call('EXPIRE', KEYS[1], math.ceil(rajada / taxa) + 1)
+return tostring(espera)
+"""
+
+
+class BaldesRedis:
+    """Token buckets compartilhados num Redis (qualquer cliente com register_script).
+
+    Em testes, um fake local (ex.: fakeredis.FakeRedis()) pode ser passado como `cliente`.
+    """
+
+    bloqueante = True
+
+    def __init__(self, cliente=None, prefixo: str = ADMISSAO_PREFIXO):
+        if cliente is None:
+            import redis # type: ignore
+            cliente = redis.Redis.from_url(ADMISSAO_REDIS_URL)
+        self.cliente = cliente
+        self.prefixo = prefixo
+        self._script = cliente.register_script(_SCRIPT_BALDE)
+
+    def consumir(self, chave: str, taxa: float, rajada: float) -> float:
+        # Relógio de parede: o mesmo em todos os workers que dividem o balde
+        return float(self._script(keys=[self.prefixo + chave], args=[taxa, rajada, time.time()]))
+
+
+class Admissao:
+    """Limite de taxa por chave, teto de concorrência e contadores de recusas."""
+
+    def __init__(self, baldes=None, taxa: float = ADMISSAO_TAXA, rajada: float = ADMISSAO_RAJADA,
+                 concorrencia_max: int = ADMISSAO_CONCORRENCIA_MAX,
+                 concorrencia_por_salao: int = ADMISSAO_CONCORRENCIA_POR_SALAO,
+                 espera_max: float = ADMISSAO_ESPERA_MAX,
+                 taxa_ip: float = ADMISSAO_TAXA_IP, rajada_ip: float = ADMISSAO_RAJADA_IP):
+        self.baldes = baldes
+        self.taxa = taxa
+        self.rajada = rajada
+        self.taxa_ip = taxa_ip
+        self.rajada_ip = rajada_ip
+        self.concorrencia_max = concorrencia_max
+        self.concorrencia_por_salao = concorrencia_por_salao
+        self.espera_max = espera_max
+        # Vagas ocupadas por chave (salão ou IP)
+        self._por_chave = Counter()
+        # Um semáforo por event loop (em produção há um só por worker)
+        self._semaforos = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.admitidas = 0
+        self.limitadas = 0
+        self.sobrecarregadas = 0
+        self.erros = 0
+        self.em_andamento = 0
+
+    def _contar(self, campo: str, valor: int = 1):
+        with self._lock:
+            setattr(self, campo, getattr(self, campo) + valor)
+
+    async def verificar_taxa(self, chave, taxa: float = None, rajada: float = None) -> float:
+        """Segundos até a chave ter ficha de novo (0: pode seguir)."""
+        taxa = self.taxa if taxa is None else taxa
+        rajada = self.rajada if rajada is None else rajada
+        if chave is None or self.baldes is None or taxa <= 0:
+            return 0.0
+        try:
+            if self.baldes.bloqueante:
+                return await run_in_threadpool(self.baldes.consumir, chave, taxa, rajada)
+            return self.baldes.consumir(chave, taxa, rajada)
+        except Exception:
+            # Backend fora do ar (ex.: Redis): deixa passar, o teto de concorrência ainda protege
+            self._contar("erros")
+            return 0.0
+
+    def _semaforo(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaforo = self._semaforos.get(loop)
+        if semaforo is None:
+            semaforo = self._semaforos[loop] = asyncio.Semaphore(self.concorrencia_max)
+        return semaforo
+
+    def reservar(self, chave) -> bool:
+        """Conta uma vaga para a chave; False se ela já ocupa a sua parte do teto."""
+        if chave is None:
+            return True
+        with self._lock:
+            if self._por_chave[chave] >= self.concorrencia_por_salao:
+                return False
+            self._por_chave[chave] += 1
+        return True
+
+    def liberar(self, chave):
+        if chave is None:
+            return
+        with self._lock:
+            self._por_chave[chave] -= 1
+            if self._por_chave[chave] <= 0:
+                del self._por_chave[chave]
+
+    async def entrar(self):
+        """Ocupa uma vaga; devolve o semáforo (para `sair`) ou None se a espera estourou o orçamento."""
+        semaforo = self._semaforo()
+        # Fila vazia e vaga livre: entra sem criar um timeout
+        if not semaforo.locked():
+            await semaforo.acquire()
+        else:
+            # asyncio.timeout cancela o próprio acquire, que devolve a vaga se ela chegou junto
+            # com o cancelamento (wait_for, no 3.11, pode perdê-la nessa corrida)
+            obtida = False
+            try:
+                async with asyncio.timeout(self.espera_max):
+                    await semaforo.acquire()
+                    obtida = True
+            except TimeoutError:
+                if not obtida:
+                    return None
+            except asyncio.CancelledError:
+                # Requisição cancelada (ex.: cliente desconectou) depois de obter a vaga
+                if obtida:
+                    semaforo.release()
+                raise
+        self._contar("em_andamento")
+        return semaforo
+
+    def sair(self, semaforo: asyncio.Semaphore):
+        self._contar("em_andamento", -1)
+        semaforo.release()
+
+    def estatisticas(self) -> dict:
+        return {
+            "backend": type(self.baldes).__name__ if self.baldes is not None else None,
+            "taxa": self.taxa,
+            "rajada": self.rajada,
+            "taxa_ip": self.taxa_ip,
+            "rajada_ip": self.rajada_ip,
+            "concorrencia_max": self.concorrencia_max,
+            "concorrencia_por_salao": self.concorrencia_por_salao,
+            "espera_max": self.espera_max,
+            "em_andamento": self.em_andamento,
+            "admitidas": self.admitidas,
+            "limitadas": self.limitadas,
+            "sobrecarregadas": self.sobrecarregadas,
+            "erros": self.erros,
+        }
+
+
+def _criar_baldes():
+    if ADMISSAO_BACKEND == "redis":
+        return BaldesRedis()
+    return BaldesMemoria()
+
+
+controle = Admissao(_criar_baldes())
+
+
+def configurar(baldes=None, **opcoes):
+    """Troca o controle de admissão (ex.: BaldesRedis com um cliente fake, ou outros limites)."""
+    global controle
+    controle = Admissao(baldes, **opcoes)
+    return controle
+
+
+_CAMINHO_SALAO = re.compile(r"^/saloes/(\d+)(?:/|$)")
+METODOS_COM_CORPO = ("POST", "PUT", "PATCH")
+
+
+def _cabecalho(scope, nome: bytes):
+    for chave, valor in scope["headers"]:
+        if chave == nome and valor:
+            return valor.decode("latin-1")
+    return None
+
+
+def salao_do_corpo(corpo: bytes):
+    """salao_id de um corpo JSON (objeto), ou None."""
+    try:
+        dados = orjson.loads(corpo)
+    except orjson.JSONDecodeError:
+        return None
+    salao_id = dados.get("salao_id") if isinstance(dados, dict) else None
+    return salao_id if isinstance(salao_id, int) and not isinstance(salao_id, bool) else None
+
+
+def _inteiro(texto):
+    # Como em salao_do_corpo: só ids inteiros viram chave, para um valor qualquer
+    # (ex.: "1 ", "01", "abc") não abrir um balde novo a cada requisição
+    return int(texto) if texto and texto.isascii() and texto.isdigit() else None
+
+
+def salao_da_query(scope):
+    """Primeiro ?salao_id= inteiro da query string, ou None."""
+    consulta = scope.get("query_string", b"").decode("latin-1")
+    for nome, valor in parse_qsl(consulta):
+        if nome == "salao_id":
+            return _inteiro(valor)
+    return None
+
+
+def chave_limite(scope, corpo: bytes = None):
+    """Salão da requisição (caminho, corpo, cabeçalho X-Salao-Id ou ?salao_id=), ou None."""
+    encontrado = _CAMINHO_SALAO.match(scope["path"])
+    salao_id = int(encontrado.group(1)) if encontrado else None
+    if salao_id is None and corpo:
+        salao_id = salao_do_corpo(corpo)
+    if salao_id is None:
+        salao_id = _inteiro(_cabecalho(scope, b"x-salao-id"))
+    if salao_id is None:
+        salao_id = salao_da_query(scope)
+    return None if salao_id is None else f"salao:{salao_id}"
+
+
+def _confiavel(endereco: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(endereco.strip())
+    except ValueError:
+        return False
+    return any(ip in rede for rede in ADMISSAO_PROXIES_CONFIAVEIS)
+
+
+def chave_cliente(scope):
+    """IP do cliente (atravessando os proxies confiáveis pelo X-Forwarded-For), ou None."""
+    cliente = scope.get("client")
+    if not ADMISSAO_LIMITAR_POR_IP or not cliente:
+        return None
+    endereco = cliente[0]
+    if _confiavel(endereco):
+        # Da direita para a esquerda: o primeiro endereço que não é um proxy nosso.
+        # Os da esquerda foram escritos pelo próprio cliente e não valem como chave.
+        encaminhados = (_cabecalho(scope, b"x-forwarded-for") or "").split(",")
+        for anterior in reversed([item.strip() for item in encaminhados if item.strip()]):
+            endereco = anterior
+            if not _confiavel(anterior):
+                break
+    return f"cliente:{endereco}"
+
+
+async def ler_corpo(scope, receive):
+    """(mensagens lidas, corpo JSON ou None) das escritas com corpo de até ADMISSAO_CORPO_MAX bytes.
+
+    As mensagens lidas são entregues de novo à aplicação por `repetir`.
+    """
+    if (scope.get("method") not in METODOS_COM_CORPO
+            or not (_cabecalho(scope, b"content-type") or "").startswith("application/json")):
+        return [], None
+    mensagens, partes, tamanho = [], [], 0
+    while True:
+        mensagem = await receive()
+        mensagens.append(mensagem)
+        if mensagem["type"] != "http.request":
+            return mensagens, None
+        partes.append(mensagem.get("body", b""))
+        tamanho += len(partes[-1])
+        if tamanho > ADMISSAO_CORPO_MAX:
+            # Corpo grande (ex.: importação): o resto segue direto para a aplicação
+            return mensagens, None
+        if not mensagem.get("more_body"):
+            return mensagens, b"".join(partes)
+
+
+def repetir(mensagens, receive):
+    pendentes = list(mensagens)
+
+    async def receber():
+        if pendentes:
+            return pendentes.pop(0)
+        return await receive()
+    return receber
+
+
+MENSAGEM_LIMITE = "Muitas requisições deste salão, tente novamente"
+
+
+def _recusa(status: int, detalhe: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        status_code=status,
+        content={"detail": detalhe},
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class MiddlewareAdmissao:
+    """Middleware ASGI que aplica `controle` a toda requisição HTTP fora de ROTAS_LIVRES."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or not ADMISSAO_HABILITADA
+                or scope["path"] in ROTAS_LIVRES or scope["path"].startswith(PREFIXOS_LIVRES)):
+            await self.app(scope, receive, send)
+            return
+        atual = controle
+        mensagens, corpo = await ler_corpo(scope, receive)
+        if mensagens:
+            receive = repetir(mensagens, receive)
+        salao, cliente = chave_limite(scope, corpo), chave_cliente(scope)
+        espera = await atual.verificar_taxa(salao)
+        if espera <= 0:
+            espera = await atual.verificar_taxa(cliente, atual.taxa_ip, atual.rajada_ip)
+        # A parte do teto de concorrência é do salão; sem salão, do IP
+        chave = salao or cliente
+        if espera > 0:
+            atual._contar("limitadas")
+            await _recusa(429, MENSAGEM_LIMITE, espera)(scope, receive, send)
+            return
+        if atual.concorrencia_max <= 0:
+            atual._contar("admitidas")
+            await self.app(scope, receive, send)
+            return
+        if not atual.reservar(chave):
+            atual._contar("limitadas")
+            await _recusa(429, MENSAGEM_LIMITE, atual.espera_max)(scope, receive, send)
+            return
+        try:
+            semaforo = await atual.entrar()
+            if semaforo is None:
+                atual._contar("sobrecarregadas")
+                await _recusa(503, "Serviço temporariamente sobrecarregado, tente novamente",
+                              atual.espera_max)(scope, receive, send)
+                return
+            atual._contar("admitidas")
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                atual.sair(semaforo)
+        finally:
+            atual.liberar(chave)
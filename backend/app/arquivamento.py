@@ -0,0 +1,139 @@
+# backend/app/arquivamento.py
+# Arquivamento do histórico: agendamentos concluídos ou cancelados que começaram há
+# mais de ARQUIVAMENTO_HORIZONTE_DIAS saem de `agendamentos` para
+# `agendamentos_arquivados`. A tabela quente (e os seus índices) fica do tamanho da
+# agenda viva, e escritas e consultas por período não pagam pelos anos de histórico.
+#
+# - A cópia e a exclusão são feitas em lotes de ARQUIVAMENTO_LOTE linhas, cada lote na
+#   sua própria transação: nenhuma trava longa na tabela quente, e uma interrupção
+#   só deixa de arquivar o que faltava (a próxima execução continua de onde parou).
+# - Os resumos diários (relatorios.py) não mudam: o agendamento arquivado continua
+#   contando nos relatórios, e a reconstrução lê as duas tabelas.
+# - Leituras de histórico (exportação, histórico do cliente, reconstrução dos
+#   relatórios) usam select_historico(), que une as duas tabelas.
+#
+# Execução: tarefa periódica "agendamentos.arquivar" (tarefas.py) ou
+#   python -m app.arquivamento [--horizonte-dias N] [--salao-id N]
+import argparse
+import os
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+from sqlalchemy import delete, insert, select, union_all # type: ignore
+
+from . import models, tarefas
+
+load_dotenv()
+
+# Agendamentos que começaram há mais que isso (e já terminaram) vão para o arquivo
+ARQUIVAMENTO_HORIZONTE_DIAS = int(os.getenv("ARQUIVAMENTO_HORIZONTE_DIAS", "365"))
+# Linhas movidas por transação
+ARQUIVAMENTO_LOTE = int(os.getenv("ARQUIVAMENTO_LOTE", "1000"))
+
+STATUS_ARQUIVAVEIS = ("concluido", "cancelado")
+# Colunas comuns às duas tabelas, na ordem de schemas.Agendamento
+COLUNAS = (
+    "id", "salao_id", "cliente_id", "profissional_id", "servico_id", "data_hora_inicio",
+    "data_hora_fim", "status", "observacoes", "criado_em", "atualizado_em", "serie_id",
+)
+
+
+def _arquivaveis(limite: datetime, salao_id: int = None):
+    agendamento = models.Agendamento
+    criterios = [agendamento.status.in_(STATUS_ARQUIVAVEIS), agendamento.data_hora_inicio < limite]
+    if salao_id is not None:
+        criterios.append(agendamento.salao_id == salao_id)
+    return criterios
+
+
+def arquivar_lote(db, limite: datetime, lote: int = ARQUIVAMENTO_LOTE, salao_id: int = None):
+    """Move até `lote` agendamentos arquiváveis anteriores a `limite` e faz commit.
+
+    Devolve (selecionados, movidos): um selecionado pode não ser movido se foi reaberto
+    entre a seleção e a cópia.
+    """
+    agendamento, arquivado = models.Agendamento, models.AgendamentoArquivado
+    # SKIP LOCKED (MySQL 8): linhas sendo alteradas agora ficam para o próximo lote
+    ids = db.execute(
+        select(agendamento.id).where(*_arquivaveis(limite, salao_id))
+        .order_by(agendamento.data_hora_inicio, agendamento.id)
+        .limit(lote).with_for_update(skip_locked=True)
+    ).scalars().all()
+    if not ids:
+        db.rollback()
+        return 0, 0
+    # As condições repetidas na cópia: um agendamento reaberto entre a seleção e a
+    # cópia (SQLite, sem FOR UPDATE) continua na tabela quente
+    db.execute(insert(arquivado).from_select(
+        COLUNAS,
+        select(*(getattr(agendamento, coluna) for coluna in COLUNAS))
+        .where(agendamento.id.in_(ids), *_arquivaveis(limite, salao_id)),
+    ))
+    # Apaga só o que foi copiado
+    movidos = db.execute(delete(agendamento).where(
+        agendamento.id.in_(select(arquivado.id).where(arquivado.id.in_(ids)))
+    ).execution_options(synchronize_session=False)).rowcount
+    db.commit()
+    return len(ids), movidos
+
+
+def arquivar(db, horizonte_dias: int = ARQUIVAMENTO_HORIZONTE_DIAS, lote: int = ARQUIVAMENTO_LOTE,
+             salao_id: int = None, agora: datetime = None) -> int:
+    """Arquiva, lote a lote, tudo o que passou do horizonte. Devolve o total movido."""
+    limite = (agora or datetime.now()) - timedelta(days=horizonte_dias)
+    total = 0
+    while True:
+        selecionados, movidos = arquivar_lote(db, limite, lote, salao_id)
+        total += movidos
+        # Lote incompleto: acabou o que arquivar. Pelo número selecionado, não pelo
+        # movido: linhas reabertas no meio do lote não encerram o arquivamento cedo.
+        # Lote sem nenhuma linha movida também para, para não repetir a mesma seleção.
+        if selecionados < lote or movidos == 0:
+            return total
+
+
+def select_historico(colunas=COLUNAS, salao_id: int = None, cliente_id: int = None, desde=None, ate=None):
+    """Subconsulta com `colunas` dos agendamentos das duas tabelas (UNION ALL), já filtrados.
+
+    Os filtros vão para dentro de cada parte, para cada tabela usar os seus índices.
+    """
+    partes = []
+    for modelo in (models.Agendamento, models.AgendamentoArquivado):
+        stmt = select(*(getattr(modelo, coluna) for coluna in colunas))
+        if salao_id is not None:
+            stmt = stmt.where(modelo.salao_id == salao_id)
+        if cliente_id is not None:
+            stmt = stmt.where(modelo.cliente_id == cliente_id)
+        if desde is not None:
+            stmt = stmt.where(modelo.data_hora_inicio >= desde)
+        if ate is not None:
+            stmt = stmt.where(modelo.data_hora_inicio < ate)
+        partes.append(stmt)
+    return union_all(*partes).subquery("historico")
+
+
+@tarefas.tarefa("agendamentos.arquivar", periodica_a_cada=24 * 3600)
+def arquivar_periodico(db, payload):
+    # Idempotente: uma nova execução só encontra o que ainda não foi movido
+    arquivar(db, horizonte_dias=payload.get("horizonte_dias", ARQUIVAMENTO_HORIZONTE_DIAS),
+             salao_id=payload.get("salao_id"))
+
+
+def _main():
+    parser = argparse.ArgumentParser(description="Move agendamentos antigos concluídos ou cancelados para o arquivo.")
+    parser.add_argument("--horizonte-dias", type=int, default=ARQUIVAMENTO_HORIZONTE_DIAS,
+                        help="arquiva o que começou há mais que isso")
+    parser.add_argument("--salao-id", type=int, default=None, help="arquiva só este salão")
+    parser.add_argument("--lote", type=int, default=ARQUIVAMENTO_LOTE, help="linhas por transação")
+    args = parser.parse_args()
+
+    from . import database
+    total = 0
+    # O banco do salão, ou o padrão e cada shard
+    for db in database.sessoes_dos_bancos(args.salao_id):
+        total += arquivar(db, horizonte_dias=args.horizonte_dias, lote=args.lote, salao_id=args.salao_id)
+    print(f"{total} agendamentos arquivados")
+
+
+if __name__ == "__main__":
+    _main()
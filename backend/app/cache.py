@@ -0,0 +1,306 @@
+# backend/app/cache.py
+# Cache de leitura (read-through) para o catálogo: salões, serviços e profissionais.
+# Esses dados mudam poucas vezes por dia, mas são lidos em quase toda requisição.
+#
+# Backends:
+#   memoria (padrão) - LRU com TTL dentro do processo; cada worker tem o seu
+#   redis            - compartilhado entre workers (requer `pip install redis`)
+#   nenhum           - desliga o cache
+# As entradas são invalidadas explicitamente nos update_*/delete_* de crud.py e
+# crud_async.py; o TTL limita a defasagem entre workers no backend em memória.
+#
+# Uma falta lê do banco fora de qualquer trava: se um update fizer commit e invalidar
+# a chave nesse meio-tempo, guardar o resultado devolveria ao cache a linha anterior.
+# Cada backend tem uma geração que a invalidação avança; o valor lido só é guardado se
+# a geração ainda for a de antes da leitura no banco (comparação e escrita atômicas).
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+
+from dotenv import load_dotenv
+from sqlalchemy import DECIMAL, DateTime # type: ignore
+
+load_dotenv()
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memoria").lower()
+# Tempo de vida das entradas, em segundos
+CACHE_TTL = int(os.getenv("CACHE_TTL", "300"))
+# Máximo de entradas no backend em memória (as menos usadas saem primeiro)
+CACHE_MAX_ITENS = int(os.getenv("CACHE_MAX_ITENS", "10000"))
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_PREFIXO = os.getenv("CACHE_PREFIXO", "agendanet:")
+
+# Colunas que nunca vão para o cache (não são usadas pelas leituras e não devem sair do banco)
+COLUNAS_NAO_CACHEADAS = {"senha_hash"}
+
+
+class CacheMemoria:
+    """LRU com TTL, thread-safe, guardado no próprio processo."""
+
+    def __init__(self, max_itens: int = CACHE_MAX_ITENS, ttl: int = CACHE_TTL):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        # Uma geração para todas as chaves: invalidações são raras, e uma falta que cruzar
+        # com qualquer uma delas só deixa de guardar o valor
+        self._geracao = 0
+
+    def get(self, chave: str):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            expira_em, valor = item
+            if expira_em <= time.monotonic():
+                del self._itens[chave]
+                return None
+            self._itens.move_to_end(chave)
+            return valor
+
+    def set(self, chave: str, valor):
+        with self._lock:
+            self._set(chave, valor)
+
+    def _set(self, chave: str, valor):
+        self._itens[chave] = (time.monotonic() + self.ttl, valor)
+        self._itens.move_to_end(chave)
+        while len(self._itens) > self.max_itens:
+            self._itens.popitem(last=False)
+
+    def delete(self, chave: str):
+        with self._lock:
+            self._itens.pop(chave, None)
+
+    def geracao(self, chave: str):
+        return self._geracao
+
+    def set_se_geracao(self, chave: str, valor, geracao) -> bool:
+        """Guarda `valor` só se nenhuma invalidação aconteceu desde `geracao()`."""
+        with self._lock:
+            if self._geracao != geracao:
+                return False
+            self._set(chave, valor)
+            return True
+
+    def invalidar(self, chave: str):
+        with self._lock:
+            self._geracao += 1
+            self._itens.pop(chave, None)
+
+    def tamanho(self) -> int:
+        return len(self._itens)
+
+
+# Geração por chave em "<prefixo>geracao:<chave>". A geração vive tanto quanto as
+# entradas (ttl): uma falta que leva mais que isso no banco é a única brecha.
+_SCRIPT_GUARDAR = """
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+_SCRIPT_INVALIDAR = """
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+redis.call('DEL', KEYS[1])
+"""
+
+
+class CacheRedis:
+    """Backend sobre qualquer cliente compatível com Redis (get / set com ex / delete / register_script).
+
+    Em testes, um fake local (ex.: fakeredis.FakeRedis()) pode ser passado como `cliente`.
+    """
+
+    def __init__(self, cliente=None, ttl: int = CACHE_TTL, prefixo: str = CACHE_PREFIXO):
+        if cliente is None:
+            import redis # type: ignore
+            cliente = redis.Redis.from_url(CACHE_REDIS_URL)
+        self.cliente = cliente
+        self.ttl = ttl
+        self.prefixo = prefixo
+        self._guardar = cliente.register_script(_SCRIPT_GUARDAR)
+        self._invalidar = cliente.register_script(_SCRIPT_INVALIDAR)
+
+    def _chaves(self, chave: str):
+        return [self.prefixo + chave, f"{self.prefixo}geracao:{chave}"]
+
+    def get(self, chave: str):
+        valor = self.cliente.get(self.prefixo + chave)
+        return None if valor is None else json.loads(valor)
+
+    def set(self, chave: str, valor):
+        self.cliente.set(self.prefixo + chave, json.dumps(valor), ex=self.ttl)
+
+    def delete(self, chave: str):
+        self.cliente.delete(self.prefixo + chave)
+
+    def geracao(self, chave: str):
+        valor = self.cliente.get(self._chaves(chave)[1])
+        return valor.decode() if isinstance(valor, bytes) else (valor or "")
+
+    def set_se_geracao(self, chave: str, valor, geracao) -> bool:
+        return bool(self._guardar(keys=self._chaves(chave), args=[geracao, json.dumps(valor), self.ttl]))
+
+    def invalidar(self, chave: str):
+        self._invalidar(keys=self._chaves(chave), args=[self.ttl])
+
+    def tamanho(self):
+        return None
+
+
+def _para_dict(obj) -> dict:
+    # Só tipos JSON, para o mesmo formato servir ao backend em memória e ao Redis
+    dados = {}
+    for coluna in obj.__table__.columns:
+        if coluna.key in COLUNAS_NAO_CACHEADAS:
+            continue
+        valor = getattr(obj, coluna.key)
+        if isinstance(valor, datetime):
+            valor = valor.isoformat()
+        elif isinstance(valor, Decimal):
+            valor = str(valor)
+        dados[coluna.key] = valor
+    return dados
+
+
+def _de_dict(model, dados: dict):
+    # Cada leitura recebe uma instância nova (fora da sessão): alterar o objeto
+    # devolvido não afeta o cache nem o banco
+    valores = {}
+    for coluna in model.__table__.columns:
+        if coluna.key not in dados:
+            continue
+        valor = dados[coluna.key]
+        if valor is not None and isinstance(coluna.type, DateTime):
+            valor = datetime.fromisoformat(valor)
+        elif valor is not None and isinstance(coluna.type, DECIMAL):
+            valor = Decimal(valor)
+        valores[coluna.key] = valor
+    return model(**valores)
+
+
+class CacheLeitura:
+    """Read-through por (modelo, id) com contadores de acerto e falha."""
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidacoes = 0
+        # Faltas não guardadas porque a chave foi invalidada durante a leitura no banco
+        self.descartados = 0
+        self.erros = 0
+
+    def _contar(self, campo: str):
+        with self._lock:
+            setattr(self, campo, getattr(self, campo) + 1)
+
+    @staticmethod
+    def _chave(model, id_: int, shard: str = None) -> str:
+        # Ids se repetem entre shards: cada shard tem as suas entradas
+        chave = f"{model.__tablename__}:{id_}"
+        return f"{shard}/{chave}" if shard else chave
+
+    def obter(self, model, id_: int, carregar, shard: str = None):
+        """Devolve o objeto do cache ou chama `carregar()` e guarda o resultado.
+
+        Ausências (None) não são guardadas: um registro recém-criado aparece na hora.
+        Se o backend falhar (ex.: Redis fora do ar), a leitura vai direto ao banco.
+        """
+        if self.backend is None:
+            return carregar()
+        chave = self._chave(model, id_, shard)
+        situacao, obj, geracao = self._ler(model, chave)
+        if situacao == "acerto":
+            return obj
+        obj = carregar()
+        if situacao == "falta":
+            self._guardar(chave, obj, geracao)
+        return obj
+
+    async def obter_async(self, model, id_: int, carregar, shard: str = None):
+        """Mesmo que `obter`, com `carregar` assíncrono (crud_async)."""
+        if self.backend is None:
+            return await carregar()
+        chave = self._chave(model, id_, shard)
+        situacao, obj, geracao = self._ler(model, chave)
+        if situacao == "acerto":
+            return obj
+        obj = await carregar()
+        if situacao == "falta":
+            self._guardar(chave, obj, geracao)
+        return obj
+
+    def _ler(self, model, chave: str):
+        # ("acerto", objeto, None), ("falta", None, geração) ou ("erro", None, None) com o
+        # backend fora do ar. Numa falta a geração é lida antes de `carregar()` ir ao banco.
+        try:
+            dados = self.backend.get(chave)
+            if dados is None:
+                geracao = self.backend.geracao(chave)
+        except Exception:
+            self._contar("erros")
+            return "erro", None, None
+        if dados is None:
+            self._contar("misses")
+            return "falta", None, geracao
+        self._contar("hits")
+        return "acerto", _de_dict(model, dados), None
+
+    def _guardar(self, chave: str, obj, geracao):
+        if obj is None:
+            return
+        try:
+            if not self.backend.set_se_geracao(chave, _para_dict(obj), geracao):
+                self._contar("descartados")
+        except Exception:
+            self._contar("erros")
+
+    def invalidar(self, model, id_: int, shard: str = None):
+        if self.backend is None:
+            return
+        try:
+            self.backend.invalidar(self._chave(model, id_, shard))
+        except Exception:
+            self._contar("erros")
+        self._contar("invalidacoes")
+
+    def estatisticas(self) -> dict:
+        consultas = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__ if self.backend is not None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "taxa_acerto": self.hits / consultas if consultas else 0.0,
+            "invalidacoes": self.invalidacoes,
+            "descartados": self.descartados,
+            "erros": self.erros,
+            "itens": self.backend.tamanho() if self.backend is not None else 0,
+        }
+
+
+def _criar_backend():
+    if CACHE_BACKEND == "redis":
+        return CacheRedis()
+    if CACHE_BACKEND == "nenhum":
+        return None
+    return CacheMemoria()
+
+
+catalogo = CacheLeitura(_criar_backend())
+
+
+def configurar(backend):
+    """Troca o backend do cache de catálogo (ex.: CacheRedis com um cliente fake em testes)."""
+    global catalogo
+    catalogo = CacheLeitura(backend)
+    return catalogo
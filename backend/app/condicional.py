@@ -0,0 +1,120 @@
+# backend/app/condicional.py
+# Requisições condicionais (ETag / If-None-Match, Last-Modified / If-Modified-Since)
+# e Cache-Control por rota para as leituras do catálogo.
+#
+# A versão de um objeto é o seu `atualizado_em`; a de uma coleção é o par
+# count/max(atualizado_em) da tabela, mais a query string (página pedida). Assim o
+# 304 é decidido antes de carregar e serializar as linhas. O salão do cabeçalho
+# X-Salao-Id (escopo.py) também entra na ETag: a mesma URL muda de conteúdo por salão.
+# atualizado_em do catálogo tem microssegundos também no MySQL (models.DataHoraPrecisa).
+# Last-Modified só tem segundos: só é enviado depois que o segundo da última alteração
+# terminou, senão uma segunda alteração no mesmo segundo responderia 304 com dados velhos.
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from dotenv import load_dotenv
+from fastapi import Request, Response
+
+load_dotenv()
+
+# Política padrão: o cliente guarda a resposta, mas revalida sempre (barato com 304)
+CACHE_CONTROL_PADRAO = os.getenv("CACHE_CONTROL_PADRAO", "private, no-cache")
+
+# Política por rota; cada uma pode ser trocada por CACHE_CONTROL_<ROTA> no .env
+# (ex.: CACHE_CONTROL_SERVICOS="public, max-age=300")
+ROTAS_CACHE = ("salao", "saloes", "profissional", "profissionais", "servico", "servicos")
+POLITICAS_CACHE = {
+    rota: os.getenv(f"CACHE_CONTROL_{rota.upper()}", CACHE_CONTROL_PADRAO) for rota in ROTAS_CACHE
+}
+
+
+def _etag(*partes) -> str:
+    resumo = hashlib.sha1("|".join(str(parte) for parte in partes).encode()).hexdigest()[:20]
+    # Fraco: a representação pode variar (ex.: formatação do JSON) sem mudar o conteúdo
+    return f'W/"{resumo}"'
+
+
+def _escopo(request: Request):
+    # Sem X-Salao-Id a ETag fica igual à de antes do escopo por salão
+    salao = request.headers.get("x-salao-id")
+    return (salao,) if salao else ()
+
+
+def _data_http(momento: datetime) -> str:
+    # atualizado_em é gravado em hora local sem fuso (datetime.now)
+    return format_datetime(momento.astimezone(timezone.utc).replace(microsecond=0), usegmt=True)
+
+
+def _segundo_encerrado(momento: datetime) -> bool:
+    # Alterações feitas depois de agora caem num segundo posterior ao de `momento`
+    return datetime.now() >= momento.replace(microsecond=0) + timedelta(seconds=1)
+
+
+def _etag_confere(request: Request, etag: str) -> bool:
+    cabecalho = request.headers.get("if-none-match")
+    if not cabecalho:
+        return False
+    if cabecalho.strip() == "*":
+        return True
+    # Comparação fraca: ignora o prefixo W/
+    recebidas = {valor.strip().removeprefix("W/") for valor in cabecalho.split(",")}
+    return etag.removeprefix("W/") in recebidas
+
+
+def _nao_modificado_desde(request: Request, momento: datetime) -> bool:
+    cabecalho = request.headers.get("if-modified-since")
+    if not cabecalho:
+        return False
+    try:
+        desde = parsedate_to_datetime(cabecalho)
+    except (TypeError, ValueError):
+        return False
+    if desde.tzinfo is None:
+        desde = desde.replace(tzinfo=timezone.utc)
+    return momento.astimezone(timezone.utc).replace(microsecond=0) <= desde
+
+
+def _responder(request: Request, response: Response, rota: str, etag: str,
+               ultima_modificacao: datetime = None, usar_data: bool = True):
+    cabecalhos = {
+        "ETag": etag,
+        "Cache-Control": POLITICAS_CACHE.get(rota, CACHE_CONTROL_PADRAO),
+        "Vary": "X-Salao-Id",
+    }
+    if ultima_modificacao is not None and not _segundo_encerrado(ultima_modificacao):
+        ultima_modificacao = None
+    if ultima_modificacao is not None:
+        cabecalhos["Last-Modified"] = _data_http(ultima_modificacao)
+    # If-None-Match tem precedência; If-Modified-Since só vale quando ele não vem
+    if "if-none-match" in request.headers:
+        nao_modificado = _etag_confere(request, etag)
+    else:
+        nao_modificado = (usar_data and ultima_modificacao is not None
+                          and _nao_modificado_desde(request, ultima_modificacao))
+    if nao_modificado:
+        return Response(status_code=304, headers=cabecalhos)
+    response.headers.update(cabecalhos)
+    return None
+
+
+def responder_objeto(request: Request, response: Response, rota: str, obj):
+    """Devolve um 304 se o cliente já tem a versão atual de `obj`; senão define os cabeçalhos e devolve None."""
+    return _responder(
+        request, response, rota,
+        _etag(obj.__tablename__, obj.id, obj.atualizado_em.isoformat(), *_escopo(request)),
+        obj.atualizado_em,
+    )
+
+
+def responder_colecao(request: Request, response: Response, rota: str, model, versao):
+    """Como responder_objeto, para uma listagem: `versao` é (count, max(atualizado_em)) da tabela."""
+    total, ultima_modificacao = versao
+    etag = _etag(
+        model.__tablename__, total,
+        ultima_modificacao.isoformat() if ultima_modificacao else "", request.url.query,
+        *_escopo(request),
+    )
+    # Exclusões não mudam max(atualizado_em): só a ETag (que inclui o count) decide o 304
+    return _responder(request, response, rota, etag, ultima_modificacao, usar_data=False)
@@ -1,27 +1,149 @@
 # backend/app/crud.py
-from sqlalchemy.orm import Session # type: ignore
-from . import models, schemas
-from passlib.context import CryptContext # type: ignore # Para hash de senhas
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+import re
+from bisect import bisect_left
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+from itertools import accumulate
+from typing import List
+from sqlalchemy import and_, bindparam, case, func, insert, or_, select, update # type: ignore
+from sqlalchemy.orm import Session, joinedload, noload, selectinload # type: ignore
+from . import arquivamento, cache, database, escopo, hashing, models, recorrencia, relatorios, schemas, sincronizacao
+from .normalizacao import normalizar_email, normalizar_telefone, prefixos_telefone
+from .paginacao import Pagina, aplicar_paginacao, filtro_apos, montar_pagina, paginar
 
+# O bcrypt roda no pool de processos de hashing.py, fora do worker da API
 def get_password_hash(password: str):
-    return pwd_context.hash(password)
+    return hashing.hash_senha(password)
 
 def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
+    return hashing.verificar_senha(plain_password, hashed_password)
+
+# Consultas das leituras mais frequentes (por id, por e-mail, conflito de horário)
+# montadas uma vez só, com bindparam no lugar dos valores. O select() pronto é imutável
+# e memoriza a própria chave do cache de compilação do SQLAlchemy: cada chamada só
+# passa os parâmetros, sem montar a consulta nem recalcular a chave, e o SQL já
+# compilado sai do cache do engine (acertos e faltas em /metrics, metricas.py).
+@lru_cache(maxsize=None)
+def select_por(model, coluna: str = "id", travar: bool = False):
+    stmt = select(model).where(getattr(model, coluna) == bindparam("valor")).limit(1)
+    # Uma leitura travada vale pelo que está no banco, não pelo objeto que a sessão já tinha
+    return stmt.with_for_update().execution_options(populate_existing=True) if travar else stmt
+
+def buscar_por(db: Session, model, valor, coluna: str = "id", travar: bool = False):
+    return db.execute(select_por(model, coluna, travar), {"valor": valor}).scalars().first()
+
+def _carregar(db: Session, model, id_: int):
+    return buscar_por(db, model, id_)
+
+def filtrar_salao(query, model, salao_id: int = None):
+    # Listagem de um salão: faixa no índice que começa por salao_id, sem varrer os outros salões
+    return query if salao_id is None else query.filter(model.salao_id == salao_id)
+
+# Versão de uma tabela para ETag de listagens: (count, max(atualizado_em)), sem carregar as linhas
+def select_versao_tabela(model, salao_id: int = None):
+    return filtrar_salao(select(func.count(model.id), func.max(model.atualizado_em)), model, salao_id)
+
+def get_versao_tabela(db: Session, model, salao_id: int = None):
+    return tuple(db.execute(select_versao_tabela(model, salao_id)).one())
+
+# Listagens das rotas (GET /saloes/, /agendamentos/...): SELECT só das colunas da
+# resposta, na ordem dos campos dos schemas de leitura, devolvidas como dicts prontos
+# para serializacao.RespostaORJSON, sem objetos ORM nem um modelo Pydantic por linha.
+# Paginação e escopo são os mesmos das funções get_* que devolvem objetos.
+CAMPOS_LISTAGEM = {
+    models.Salao: ("nome", "endereco", "telefone", "email", "id", "criado_em", "atualizado_em"),
+    models.Profissional: ("nome", "especialidade", "telefone", "email", "id", "salao_id",
+                          "criado_em", "atualizado_em"),
+    models.Servico: ("nome", "descricao", "duracao_minutos", "preco", "id", "salao_id",
+                     "criado_em", "atualizado_em"),
+    models.Cliente: ("nome", "telefone", "email", "id", "criado_em", "atualizado_em"),
+    models.Agendamento: ("salao_id", "cliente_id", "profissional_id", "servico_id", "data_hora_inicio",
+                         "data_hora_fim", "status", "observacoes", "id", "criado_em", "atualizado_em",
+                         "serie_id"),
+}
+
+def colunas_listagem(model):
+    return [getattr(model, nome) for nome in CAMPOS_LISTAGEM[model]]
+
+def ordem_listagem(model):
+    if model is models.Agendamento:
+        return [models.Agendamento.data_hora_inicio, models.Agendamento.id]
+    return [model.id]
+
+def select_listagem(model, skip: int = 0, limit: int = 100, cursor: str = None, salao_id: int = None):
+    stmt = filtrar_salao(select(*colunas_listagem(model)), model, salao_id)
+    return aplicar_paginacao(stmt, ordem_listagem(model), skip, limit, cursor)
+
+def montar_listagem(model, linhas, limit: int) -> Pagina:
+    next_cursor = montar_pagina(linhas, ordem_listagem(model), limit).next_cursor
+    nomes = CAMPOS_LISTAGEM[model]
+    return Pagina([dict(zip(nomes, linha)) for linha in linhas], next_cursor)
+
+def get_listagem(db: Session, model, skip: int = 0, limit: int = 100, cursor: str = None,
+                 salao_id: int = None) -> Pagina:
+    linhas = db.execute(select_listagem(model, skip, limit, cursor, salao_id)).all()
+    return montar_listagem(model, linhas, limit)
+
+# Atualização parcial (PATCH): um único UPDATE ... WHERE id com só as colunas enviadas,
+# sem carregar o objeto antes. atualizado_em entra pelo onupdate da coluna.
+def statement_patch(model, id_: int, valores: dict, returning: bool):
+    stmt = update(model).where(model.id == id_).values(**valores).execution_options(
+        synchronize_session=False
+    )
+    # Onde o banco suporta (SQLite >= 3.35, PostgreSQL, MariaDB), a linha atualizada
+    # volta na própria instrução
+    return stmt.returning(*model.__table__.columns) if returning else stmt
+
+def montar_objeto(model, linha):
+    # Objeto fora da sessão montado a partir da linha: o commit não o expira,
+    # então serializar a resposta não dispara outro SELECT
+    return model(**linha._mapping)
+
+def _patch(db: Session, model, id_: int, valores: dict, invalidar: bool = False):
+    """Devolve o objeto atualizado ou None se o id não existe. Corpo vazio só lê a linha."""
+    if not valores:
+        return _carregar(db, model, id_)
+    returning = db.get_bind().dialect.update_returning
+    result = db.execute(statement_patch(model, id_, valores, returning))
+    linha = result.first() if returning else None
+    # Sem RETURNING (MySQL), o rowcount (linhas encontradas) decide o 404
+    if (returning and linha is None) or (not returning and result.rowcount == 0):
+        db.rollback()
+        return None
+    db.commit()
+    if invalidar:
+        cache.catalogo.invalidar(model, id_, escopo.shard_da_sessao(db))
+    if linha is None:
+        linha = db.execute(select(*model.__table__.columns).where(model.id == id_)).first()
+    return montar_objeto(model, linha)
+
+# Leituras de catálogo passam pelo cache (cache.py). O objeto devolvido fica fora da
+# sessão; update_*/delete_* carregam do banco com _carregar e invalidam a entrada.
+def _ler_catalogo(db: Session, model, id_: int):
+    def carregar():
+        if not db.info.get("replica"):
+            return _carregar(db, model, id_)
+        # O cache é compartilhado: preenchido por uma réplica atrasada, guardaria um valor
+        # anterior à última escrita (já invalidada). A falta, que é rara, vai ao primário.
+        with database.sessao_primaria(db) as primario:
+            return _carregar(primario, model, id_)
+
+    obj = cache.catalogo.obter(model, id_, carregar, escopo.shard_da_sessao(db))
+    # Um acerto no cache não passa pela consulta: o escopo do salão é conferido aqui
+    return escopo.visivel(db, obj)
 
 def get_salao(db: Session, salao_id: int):
-    return db.query(models.Salao).filter(models.Salao.id == salao_id).first()
+    return _ler_catalogo(db, models.Salao, salao_id)
 
 def get_salao_by_email(db: Session, email: str):
-    return db.query(models.Salao).filter(models.Salao.email == email).first()
+    return buscar_por(db, models.Salao, email, "email")
 
-def get_saloes(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Salao).offset(skip).limit(limit).all()
+def get_saloes(db: Session, skip: int = 0, limit: int = 100, cursor: str = None):
+    return paginar(db.query(models.Salao), [models.Salao.id], skip, limit, cursor)
 
-def create_salao(db: Session, salao: schemas.SalaoCreate):
-    hashed_password = get_password_hash(salao.senha)
+def create_salao(db: Session, salao: schemas.SalaoCreate, senha_hash: str = None):
+    # senha_hash permite que a rota calcule o hash antes (de forma assíncrona)
+    hashed_password = senha_hash or get_password_hash(salao.senha)
     db_salao = models.Salao(
         nome=salao.nome,
         endereco=salao.endereco,
@@ -34,8 +156,8 @@ def create_salao(db: Session, salao: schemas.SalaoCreate):
     db.refresh(db_salao)
     return db_salao
 
-def update_salao(db: Session, salao_id: int, salao: schemas.SalaoUpdate):
-    db_salao = get_salao(db, salao_id)
+def update_salao(db: Session, salao_id: int, salao: schemas.SalaoUpdate, senha_hash: str = None):
+    db_salao = _carregar(db, models.Salao, salao_id)
     if not db_salao:
         return None
     
@@ -47,19 +169,27 @@ def update_salao(db: Session, salao_id: int, salao: schemas.SalaoUpdate):
         db_salao.telefone = salao.telefone
     if salao.email:
         db_salao.email = salao.email
-    if salao.senha:
+    if senha_hash:
+        db_salao.senha_hash = senha_hash
+    elif salao.senha:
         db_salao.senha_hash = get_password_hash(salao.senha)
     
     db.commit()
+    cache.catalogo.invalidar(models.Salao, salao_id, escopo.shard_da_sessao(db))
     db.refresh(db_salao)
     return db_salao
 
+def patch_salao(db: Session, salao_id: int, dados: dict):
+    # `dados` vem de schemas.SalaoPatch com exclude_unset; a rota troca senha por senha_hash
+    return _patch(db, models.Salao, salao_id, dados, invalidar=True)
+
 def delete_salao(db: Session, salao_id: int):
-    db_salao = get_salao(db, salao_id)
+    db_salao = _carregar(db, models.Salao, salao_id)
     if not db_salao:
         return None
     db.delete(db_salao)
     db.commit()
+    cache.catalogo.invalidar(models.Salao, salao_id, escopo.shard_da_sessao(db))
     return db_salao
 
 
@@ -67,10 +197,10 @@ def delete_salao(db: Session, salao_id: int):
 ############################### PROFISSIONAIS
 
 def get_profissional(db: Session, profissional_id: int):
-    return db.query(models.Profissional).filter(models.Profissional.id == profissional_id).first()
+    return _ler_catalogo(db, models.Profissional, profissional_id)
 
 def get_profissional_by_email(db: Session, email: str):
-    return db.query(models.Profissional).filter(models.Profissional.email == email).first()
+    return buscar_por(db, models.Profissional, email, "email")
 
 def get_profissional_by_salao(db: Session, salao_id: int):
     return db.query(models.Profissional).filter(models.Profissional.salao_id == salao_id).all()
@@ -102,8 +232,49 @@ def get_profissionais_by_salao_and_especialidade_and_nome(db: Session, salao_id:
     
 
 
-def get_profissionais(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Profissional).offset(skip).limit(limit).all()
+def get_profissionais(db: Session, skip: int = 0, limit: int = 100, cursor: str = None, salao_id: int = None):
+    query = filtrar_salao(db.query(models.Profissional), models.Profissional, salao_id)
+    return paginar(query, [models.Profissional.id], skip, limit, cursor)
+
+# Busca de profissionais (GET /profissionais/search).
+# salao_id/especialidade usam o índice composto ix_profissionais_salao_especialidade.
+# No MySQL o texto usa o índice FULLTEXT de nome (MATCH ... AGAINST em modo booleano,
+# cada palavra como prefixo) e o ranking é a relevância do FULLTEXT; nos demais bancos
+# (SQLite em desenvolvimento) cai para prefixo de palavra com LIKE.
+LIMITE_BUSCA_PROFISSIONAIS = 100
+
+def _termos_busca(q: str):
+    return re.findall(r"[^\W_]+", (q or "").lower())
+
+def select_busca_profissionais(dialeto: str, salao_id: int = None, especialidade: str = None,
+                               q: str = None, skip: int = 0, limit: int = 20):
+    nome = models.Profissional.nome
+    stmt = select(models.Profissional)
+    if salao_id is not None:
+        stmt = stmt.where(models.Profissional.salao_id == salao_id)
+    if especialidade:
+        stmt = stmt.where(models.Profissional.especialidade == especialidade)
+
+    termos = _termos_busca(q)
+    ordem = [nome, models.Profissional.id]
+    if termos:
+        # Bônus para nomes que começam com o texto buscado
+        comeca_com = case((nome.ilike(f"{termos[0]}%"), 1), else_=0)
+        if dialeto == "mysql":
+            relevancia = nome.match(" ".join(f"+{termo}*" for termo in termos))
+            stmt = stmt.where(relevancia > 0)
+            ordem = [comeca_com.desc(), relevancia.desc()] + ordem
+        else:
+            # ' ' + nome: um único LIKE cobre o início do nome e o início de cada palavra
+            palavras = " " + nome
+            stmt = stmt.where(and_(*(palavras.ilike(f"% {termo}%") for termo in termos)))
+            ordem = [comeca_com.desc()] + ordem
+    return stmt.order_by(*ordem).offset(skip).limit(min(limit, LIMITE_BUSCA_PROFISSIONAIS))
+
+def buscar_profissionais(db: Session, salao_id: int = None, especialidade: str = None,
+                         q: str = None, skip: int = 0, limit: int = 20):
+    stmt = select_busca_profissionais(db.get_bind().dialect.name, salao_id, especialidade, q, skip, limit)
+    return db.execute(stmt).scalars().all()
 
 def create_profissional(db: Session, profissional: schemas.ProfissionalCreate):
     db_profissional = models.Profissional(
@@ -119,7 +290,7 @@ def create_profissional(db: Session, profissional: schemas.ProfissionalCreate):
     return db_profissional
 
 def update_profissional(db: Session, profissional_id: int, profissional: schemas.ProfissionalUpdate):
-    db_profissional = get_profissional(db, profissional_id)
+    db_profissional = _carregar(db, models.Profissional, profissional_id)
     if not db_profissional:
         return None
     
@@ -133,22 +304,28 @@ def update_profissional(db: Session, profissional_id: int, profissional: schemas
         db_profissional.email = profissional.email
     
     db.commit()
+    cache.catalogo.invalidar(models.Profissional, profissional_id, escopo.shard_da_sessao(db))
     db.refresh(db_profissional)
     return db_profissional
 
+def patch_profissional(db: Session, profissional_id: int, dados: dict):
+    return _patch(db, models.Profissional, profissional_id, dados, invalidar=True)
+
 def delete_profissional(db: Session, profissional_id: int):
-    db_profissional = get_profissional(db, profissional_id)
+    db_profissional = _carregar(db, models.Profissional, profissional_id)
     if not db_profissional:
         return None
     db.delete(db_profissional)
     db.commit()
+    cache.catalogo.invalidar(models.Profissional, profissional_id, escopo.shard_da_sessao(db))
     return db_profissional
 
 ############################### SERVIÇOS
 def get_servico(db: Session, servico_id: int):
-    return db.query(models.Servico).filter(models.Servico.id == servico_id).first()
-def get_servicos(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Servico).offset(skip).limit(limit).all()
+    return _ler_catalogo(db, models.Servico, servico_id)
+def get_servicos(db: Session, skip: int = 0, limit: int = 100, cursor: str = None, salao_id: int = None):
+    query = filtrar_salao(db.query(models.Servico), models.Servico, salao_id)
+    return paginar(query, [models.Servico.id], skip, limit, cursor)
 def create_servico(db: Session, servico: schemas.ServicoCreate):
     db_servico = models.Servico(
         salao_id=servico.salao_id,
@@ -162,7 +339,7 @@ def create_servico(db: Session, servico: schemas.ServicoCreate):
     db.refresh(db_servico)
     return db_servico
 def update_servico(db: Session, servico_id: int, servico: schemas.ServicoUpdate):
-    db_servico = get_servico(db, servico_id)
+    db_servico = _carregar(db, models.Servico, servico_id)
     if not db_servico:
         return None
     
@@ -176,26 +353,85 @@ def update_servico(db: Session, servico_id: int, servico: schemas.ServicoUpdate)
         db_servico.preco = servico.preco
     
     db.commit()
+    cache.catalogo.invalidar(models.Servico, servico_id, escopo.shard_da_sessao(db))
     db.refresh(db_servico)
     return db_servico
+def patch_servico(db: Session, servico_id: int, dados: dict):
+    return _patch(db, models.Servico, servico_id, dados, invalidar=True)
 def delete_servico(db: Session, servico_id: int):
-    db_servico = get_servico(db, servico_id)
+    db_servico = _carregar(db, models.Servico, servico_id)
     if not db_servico:
         return None
     db.delete(db_servico)
     db.commit()
+    cache.catalogo.invalidar(models.Servico, servico_id, escopo.shard_da_sessao(db))
     return db_servico
 
 ############################### CLIENTES
 def get_cliente(db: Session, cliente_id: int):
-    return db.query(models.Cliente).filter(models.Cliente.id == cliente_id).first()
-def get_clientes(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Cliente).offset(skip).limit(limit).all()
+    return buscar_por(db, models.Cliente, cliente_id)
+def get_clientes(db: Session, skip: int = 0, limit: int = 100, cursor: str = None):
+    return paginar(db.query(models.Cliente), [models.Cliente.id], skip, limit, cursor)
+
+# Colunas de busca de clientes (telefone_normalizado / email_normalizado)
+def campos_busca_cliente(telefone: str, email: str) -> dict:
+    return {"telefone_normalizado": normalizar_telefone(telefone), "email_normalizado": normalizar_email(email)}
+
+LIMITE_BUSCA_CLIENTES = 50
+
+def _filtro_prefixo(coluna, prefixo: str):
+    # Faixa [prefixo, prefixo com o último caractere + 1): usa o índice B-tree em qualquer
+    # banco, ao contrário de LIKE 'prefixo%', que no SQLite não usa índice
+    proximo = prefixo[:-1] + chr(ord(prefixo[-1]) + 1)
+    return and_(coluna >= prefixo, coluna < proximo)
+
+def select_busca_clientes(telefone: str = None, email: str = None, limit: int = 20):
+    """Busca por prefixo de telefone e/ou e-mail, já normalizados como nas colunas de busca."""
+    stmt = select(models.Cliente)
+    ordem = []
+    if telefone:
+        prefixos = prefixos_telefone(telefone)
+        stmt = stmt.where(or_(*(_filtro_prefixo(models.Cliente.telefone_normalizado, p) for p in prefixos)))
+        ordem.append(models.Cliente.telefone_normalizado)
+    email = normalizar_email(email)
+    if email:
+        stmt = stmt.where(_filtro_prefixo(models.Cliente.email_normalizado, email))
+        ordem.append(models.Cliente.email_normalizado)
+    return stmt.order_by(*ordem, models.Cliente.id).limit(min(limit, LIMITE_BUSCA_CLIENTES))
+
+def buscar_clientes(db: Session, telefone: str = None, email: str = None, limit: int = 20):
+    return db.execute(select_busca_clientes(telefone, email, limit)).scalars().all()
+
+def select_cliente_por_contato(telefone: str = None, email: str = None):
+    """Cliente com exatamente este telefone (ou, sem telefone, este e-mail): igualdade no índice."""
+    telefone_normalizado = normalizar_telefone(telefone)
+    if telefone_normalizado:
+        condicao = models.Cliente.telefone_normalizado == telefone_normalizado
+    else:
+        email_normalizado = normalizar_email(email)
+        if not email_normalizado:
+            return None
+        condicao = models.Cliente.email_normalizado == email_normalizado
+    return select(models.Cliente).where(condicao).order_by(models.Cliente.id).limit(1)
+
+def find_or_create_cliente(db: Session, cliente: schemas.ClienteCreate):
+    """Devolve (cliente, criado). O telefone tem prioridade sobre o e-mail na identificação.
+
+    Sem índice único, duas chamadas simultâneas para o mesmo contato novo podem criar
+    dois clientes; o fluxo de agendamento tolera isso melhor do que recusar o cadastro.
+    """
+    stmt = select_cliente_por_contato(cliente.telefone, cliente.email)
+    if stmt is not None:
+        existente = db.execute(stmt).scalars().first()
+        if existente is not None:
+            return existente, False
+    return create_cliente(db, cliente), True
 def create_cliente(db: Session, cliente: schemas.ClienteCreate):
     db_cliente = models.Cliente(
         nome=cliente.nome,
         telefone=cliente.telefone,
-        email=cliente.email
+        email=cliente.email,
+        **campos_busca_cliente(cliente.telefone, cliente.email)
     )
     db.add(db_cliente)
     db.commit()
@@ -210,12 +446,24 @@ def update_cliente(db: Session, cliente_id: int, cliente: schemas.ClienteUpdate)
         db_cliente.nome = cliente.nome
     if cliente.telefone:
         db_cliente.telefone = cliente.telefone
+        db_cliente.telefone_normalizado = normalizar_telefone(cliente.telefone)
     if cliente.email:
         db_cliente.email = cliente.email
+        db_cliente.email_normalizado = normalizar_email(cliente.email)
     
     db.commit()
     db.refresh(db_cliente)
     return db_cliente
+def valores_patch_cliente(dados: dict) -> dict:
+    # Telefone e e-mail alterados levam junto as colunas de busca
+    valores = dict(dados)
+    if "telefone" in dados:
+        valores["telefone_normalizado"] = normalizar_telefone(dados["telefone"])
+    if "email" in dados:
+        valores["email_normalizado"] = normalizar_email(dados["email"])
+    return valores
+def patch_cliente(db: Session, cliente_id: int, dados: dict):
+    return _patch(db, models.Cliente, cliente_id, valores_patch_cliente(dados))
 def delete_cliente(db: Session, cliente_id: int):
     db_cliente = get_cliente(db, cliente_id)
     if not db_cliente:
@@ -225,11 +473,242 @@ def delete_cliente(db: Session, cliente_id: int):
     return db_cliente
 
 ############################### AGENDAMENTOS
-def get_agendamento(db: Session, agendamento_id: int):
-    return db.query(models.Agendamento).filter(models.Agendamento.id == agendamento_id).first()
-def get_agendamentos(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Agendamento).offset(skip).limit(limit).all()
+
+# Duração máxima aceita para um agendamento. Serve de limite inferior na busca
+# por conflitos: qualquer agendamento que sobreponha [inicio, fim) precisa ter
+# começado depois de inicio - DURACAO_MAXIMA_AGENDAMENTO, então a consulta lê
+# apenas uma faixa curta do índice (profissional_id, data_hora_inicio, data_hora_fim).
+DURACAO_MAXIMA_AGENDAMENTO = timedelta(hours=12)
+
+class HorarioIndisponivelError(Exception):
+    """O profissional já possui um agendamento ativo que sobrepõe o horário pedido."""
+
+class IntervaloInvalidoError(ValueError):
+    """Término não posterior ao início ou duração acima de DURACAO_MAXIMA_AGENDAMENTO."""
+
+def verificar_intervalo_agendamento(data_hora_inicio, data_hora_fim):
+    if data_hora_fim <= data_hora_inicio:
+        raise IntervaloInvalidoError("O horário de término deve ser posterior ao de início")
+    if data_hora_fim - data_hora_inicio > DURACAO_MAXIMA_AGENDAMENTO:
+        raise IntervaloInvalidoError("Duração do agendamento excede o máximo permitido")
+
+def bloquear_profissional(db: Session, profissional_id: int):
+    # SELECT ... FOR UPDATE na linha do profissional: serializa as reservas do mesmo
+    # profissional, de modo que duas transações concorrentes não passem juntas pela
+    # verificação de conflito. Em bancos sem FOR UPDATE (SQLite) vira um SELECT comum.
+    return buscar_por(db, models.Profissional, profissional_id, travar=True)
+
+@lru_cache(maxsize=None)
+def select_agendamento_conflitante(ignorar: bool = False):
+    # Pré-montada como select_por: roda em toda criação e remarcação de agendamento
+    stmt = select(models.Agendamento.id).where(
+        models.Agendamento.profissional_id == bindparam("profissional_id"),
+        models.Agendamento.data_hora_inicio > bindparam("inicio_minimo"),
+        models.Agendamento.data_hora_inicio < bindparam("fim"),
+        models.Agendamento.data_hora_fim > bindparam("inicio"),
+        models.Agendamento.status != "cancelado",
+    )
+    if ignorar:
+        stmt = stmt.where(models.Agendamento.id != bindparam("ignorar_id"))
+    return stmt.limit(1)
+
+def parametros_conflito(profissional_id: int, data_hora_inicio, data_hora_fim, ignorar_agendamento_id: int = None):
+    return {
+        "profissional_id": profissional_id,
+        "inicio_minimo": data_hora_inicio - DURACAO_MAXIMA_AGENDAMENTO,
+        "fim": data_hora_fim,
+        "inicio": data_hora_inicio,
+        "ignorar_id": ignorar_agendamento_id,
+    }
+
+def get_agendamento_conflitante(db: Session, profissional_id: int, data_hora_inicio, data_hora_fim,
+                                ignorar_agendamento_id: int = None):
+    return db.execute(
+        select_agendamento_conflitante(ignorar_agendamento_id is not None),
+        parametros_conflito(profissional_id, data_hora_inicio, data_hora_fim, ignorar_agendamento_id),
+    ).first()
+
+def get_ocupacoes(db: Session, profissional_ids: List[int], inicio, fim):
+    """Busca, em uma única consulta, os intervalos ocupados dos profissionais no período."""
+    if not profissional_ids:
+        return []
+    return db.query(
+        models.Agendamento.profissional_id,
+        models.Agendamento.data_hora_inicio,
+        models.Agendamento.data_hora_fim,
+    ).filter(
+        models.Agendamento.profissional_id.in_(profissional_ids),
+        models.Agendamento.data_hora_inicio > inicio - DURACAO_MAXIMA_AGENDAMENTO,
+        models.Agendamento.data_hora_inicio < fim,
+        models.Agendamento.data_hora_fim > inicio,
+        models.Agendamento.status != "cancelado",
+    ).all()
+
+def separar_conflitos(ocupacoes, candidatos):
+    """Divide `candidatos` [(inicio, fim, ...)] em (aceitos, recusados), em ordem de início.
+
+    Um candidato é recusado se sobrepõe alguma das `ocupacoes` [(inicio, fim)] já gravadas
+    ou um candidato aceito antes dele. Tudo em memória, depois de uma única consulta.
+    """
+    existentes = sorted(ocupacoes)
+    inicios = [inicio for inicio, _ in existentes]
+    # maior término entre as ocupações que começam até cada posição
+    maior_fim = list(accumulate((fim for _, fim in existentes), max))
+    aceitos, recusados = [], []
+    fim_aceitos = None
+    for candidato in sorted(candidatos, key=lambda item: item[0]):
+        inicio, fim = candidato[0], candidato[1]
+        posicao = bisect_left(inicios, fim)
+        conflita_banco = posicao > 0 and maior_fim[posicao - 1] > inicio
+        conflita_lote = fim_aceitos is not None and inicio < fim_aceitos
+        if conflita_banco or conflita_lote:
+            recusados.append(candidato)
+            continue
+        fim_aceitos = max(fim_aceitos or fim, fim)
+        aceitos.append(candidato)
+    return aceitos, recusados
+
+def verificar_conflito_agendamento(db: Session, profissional_id: int, data_hora_inicio, data_hora_fim,
+                                   ignorar_agendamento_id: int = None):
+    bloquear_profissional(db, profissional_id)
+    conflito = get_agendamento_conflitante(
+        db, profissional_id, data_hora_inicio, data_hora_fim, ignorar_agendamento_id
+    )
+    if conflito:
+        db.rollback()
+        raise HorarioIndisponivelError(conflito.id)
+
+# Relacionamentos que podem ser incluídos na leitura de agendamentos (?expand=)
+RELACIONAMENTOS_AGENDAMENTO = ("salao", "cliente", "profissional", "servico")
+
+def opcoes_expansao_agendamento(expand, carregador=selectinload):
+    """Carrega de uma vez os relacionamentos pedidos e marca os demais como não carregados.
+
+    Sem isso, serializar schemas.AgendamentoExpandido dispararia um lazy load por
+    relacionamento e por linha (N+1). Os não pedidos ficam None em vez de ir ao banco.
+    """
+    return [
+        carregador(getattr(models.Agendamento, nome)) if nome in expand
+        else noload(getattr(models.Agendamento, nome))
+        for nome in RELACIONAMENTOS_AGENDAMENTO
+    ]
+
+@lru_cache(maxsize=None)
+def select_agendamento(expand: frozenset = None):
+    # Uma instrução pronta por combinação de ?expand= (no máximo 2^4)
+    stmt = select_por(models.Agendamento)
+    if expand is not None:
+        # Uma linha só: joinedload traz tudo na mesma consulta
+        stmt = stmt.options(*opcoes_expansao_agendamento(expand, joinedload))
+    return stmt
+
+def get_agendamento(db: Session, agendamento_id: int, expand=None):
+    stmt = select_agendamento(frozenset(expand) if expand is not None else None)
+    return db.execute(stmt, {"valor": agendamento_id}).scalars().first()
+def get_agendamentos(db: Session, skip: int = 0, limit: int = 100, cursor: str = None, expand=None,
+                     salao_id: int = None):
+    query = filtrar_salao(db.query(models.Agendamento), models.Agendamento, salao_id)
+    if expand is not None:
+        # selectinload: uma consulta IN por relacionamento, cada cliente/profissional/serviço
+        # vem uma vez só, por mais agendamentos da página que apontem para ele
+        query = query.options(*opcoes_expansao_agendamento(expand))
+    return paginar(
+        query,
+        [models.Agendamento.data_hora_inicio, models.Agendamento.id],
+        skip, limit, cursor,
+    )
+
+# Relacionamentos de ?expand= na listagem rápida: como o selectinload, uma consulta IN
+# por relacionamento pedido; os não pedidos vêm como None (mesmo JSON do schema expandido)
+def _modelo_relacionado(nome: str):
+    return models.Agendamento.__mapper__.relationships[nome].mapper.class_
+
+def select_expansao(nome: str, agendamentos):
+    model = _modelo_relacionado(nome)
+    ids = {agendamento[f"{nome}_id"] for agendamento in agendamentos}
+    return select(*colunas_listagem(model)).where(model.id.in_(ids))
+
+def anexar_expansao(agendamentos, nome: str, linhas=()):
+    nomes = CAMPOS_LISTAGEM[_modelo_relacionado(nome)]
+    por_id = {linha.id: dict(zip(nomes, linha)) for linha in linhas}
+    chave = f"{nome}_id"
+    for agendamento in agendamentos:
+        agendamento[nome] = por_id.get(agendamento[chave])
+
+def expandir_agendamento(agendamento, expand) -> dict:
+    """Agendamento com só os relacionamentos de `expand` (rotas com response_model_exclude_unset).
+
+    Sem expand o JSON é o de schemas.Agendamento, sem as chaves dos relacionamentos.
+    """
+    def campos(obj):
+        return None if obj is None else {nome: getattr(obj, nome) for nome in CAMPOS_LISTAGEM[type(obj)]}
+    resultado = campos(agendamento)
+    for nome in expand:
+        resultado[nome] = campos(getattr(agendamento, nome))
+    return resultado
+
+def get_listagem_agendamentos(db: Session, skip: int = 0, limit: int = 100, cursor: str = None, expand=(),
+                              salao_id: int = None) -> Pagina:
+    agendamentos = get_listagem(db, models.Agendamento, skip, limit, cursor, salao_id)
+    # Só os relacionamentos pedidos ganham chave: sem expand, o JSON de sempre
+    for nome in RELACIONAMENTOS_AGENDAMENTO:
+        if nome in expand:
+            linhas = db.execute(select_expansao(nome, agendamentos)).all() if agendamentos else ()
+            anexar_expansao(agendamentos, nome, linhas)
+    return agendamentos
+
+# Leituras de histórico: agendamentos da tabela quente e do arquivo (arquivamento.py)
+def select_agendamentos_exportacao(desde=None, ate=None, salao_id: int = None):
+    # SELECT de colunas (tuplas) na ordem dos campos de schemas.Agendamento, sem montar
+    # objetos ORM, ordenado por (data_hora_inicio, id); cada tabela filtra pelo seu índice
+    historico = arquivamento.select_historico(salao_id=salao_id, desde=desde, ate=ate)
+    return select(*historico.c).order_by(historico.c.data_hora_inicio, historico.c.id)
+
+def get_historico_cliente(db: Session, cliente_id: int, skip: int = 0, limit: int = 100, cursor: str = None,
+                          salao_id: int = None) -> Pagina:
+    # Os filtros entram em cada parte do UNION; numa sessão com escopo vale o salão dela
+    if salao_id is None:
+        salao_id = escopo.salao_da_sessao(db)
+    historico = arquivamento.select_historico(
+        CAMPOS_LISTAGEM[models.Agendamento], salao_id=salao_id, cliente_id=cliente_id
+    )
+    ordem = [historico.c.data_hora_inicio, historico.c.id]
+    linhas = db.execute(aplicar_paginacao(select(*historico.c), ordem, skip, limit, cursor)).all()
+    next_cursor = montar_pagina(linhas, ordem, limit).next_cursor
+    return Pagina([dict(linha._mapping) for linha in linhas], next_cursor)
+
+# Sincronização incremental (sincronizacao.py): linhas alteradas e lápides depois do
+# token, cada leitura na ordem (versao, id) do seu índice e limitada a limit + 1
+def select_mudancas_agendamentos(salao_id: int, apos=None, limit: int = 100):
+    agendamento, removido = models.Agendamento, models.AgendamentoRemovido
+    alterados = select(agendamento.versao, *colunas_listagem(agendamento)).where(agendamento.salao_id == salao_id)
+    removidos = select(removido.versao, removido.agendamento_id).where(removido.salao_id == salao_id)
+    if apos is not None:
+        alterados = alterados.where(filtro_apos(sincronizacao.CHAVE, apos))
+        removidos = removidos.where(filtro_apos(sincronizacao.CHAVE_REMOVIDOS, apos))
+    return (
+        alterados.order_by(*sincronizacao.CHAVE).limit(limit + 1),
+        removidos.order_by(*sincronizacao.CHAVE_REMOVIDOS).limit(limit + 1),
+    )
+
+def get_mudancas_agendamentos(db: Session, salao_id: int, token: str = None, limit: int = 100) -> dict:
+    """Mudanças da agenda do salão depois de `token` (sem token, a agenda inteira), até `limit`.
+
+    Levanta sincronizacao.TokenExpiradoError se as lápides posteriores ao token já foram apagadas.
+    """
+    apos = sincronizacao.decodificar_token(token)
+    if apos is not None:
+        sincronizacao.verificar_token(apos, db.execute(sincronizacao.select_removidos_ate(salao_id)).scalar())
+    alterados, removidos = select_mudancas_agendamentos(salao_id, apos, limit)
+    return sincronizacao.montar_mudancas(
+        db.execute(alterados).all(), db.execute(removidos).all(), CAMPOS_LISTAGEM[models.Agendamento], limit, token
+    )
+
 def create_agendamento(db: Session, agendamento: schemas.AgendamentoCreate):
+    if agendamento.status != "cancelado":
+        verificar_conflito_agendamento(
+            db, agendamento.profissional_id, agendamento.data_hora_inicio, agendamento.data_hora_fim
+        )
     db_agendamento = models.Agendamento(
         salao_id=agendamento.salao_id,
         cliente_id=agendamento.cliente_id,
@@ -241,13 +720,22 @@ def create_agendamento(db: Session, agendamento: schemas.AgendamentoCreate):
         observacoes=agendamento.observacoes
     )
     db.add(db_agendamento)
+    # O resumo diário (relatorios.py) e a versão da agenda (sincronizacao.py) são
+    # atualizados na mesma transação
+    relatorios.registrar(db, adicionadas=[relatorios.contribuicao(db_agendamento)])
+    sincronizacao.incrementar(db, db_agendamento.salao_id)
+    db_agendamento.versao = sincronizacao.versao_do_salao(db_agendamento.salao_id)
     db.commit()
     db.refresh(db_agendamento)
     return db_agendamento
 def update_agendamento(db: Session, agendamento_id: int, agendamento: schemas.AgendamentoUpdate):
-    db_agendamento = get_agendamento(db, agendamento_id)
+    # Travada até o commit: duas escritas simultâneas não descontam a mesma contribuição
+    # do resumo (como patch_agendamento com select_agenda_para_patch)
+    db_agendamento = buscar_por(db, models.Agendamento, agendamento_id, travar=True)
     if not db_agendamento:
+        db.rollback()
         return None
+    anterior = relatorios.contribuicao(db_agendamento)
     
     if agendamento.profissional_id:
         db_agendamento.profissional_id = agendamento.profissional_id
@@ -263,19 +751,436 @@ def update_agendamento(db: Session, agendamento_id: int, agendamento: schemas.Ag
         db_agendamento.status = agendamento.status
     if agendamento.observacoes:
         db_agendamento.observacoes = agendamento.observacoes
+
+    if db_agendamento.status != "cancelado":
+        verificar_conflito_agendamento(
+            db, db_agendamento.profissional_id, db_agendamento.data_hora_inicio,
+            db_agendamento.data_hora_fim, ignorar_agendamento_id=agendamento_id
+        )
+    relatorios.registrar(db, removidas=[anterior], adicionadas=[relatorios.contribuicao(db_agendamento)])
+    sincronizacao.incrementar(db, db_agendamento.salao_id)
+    db_agendamento.versao = sincronizacao.versao_do_salao(db_agendamento.salao_id)
     
     db.commit()
     db.refresh(db_agendamento)
     return db_agendamento
+# Campos que mudam o conflito de horário ou o resumo diário. Um PATCH sem nenhum
+# deles (ex.: só observações ou cliente) é um UPDATE direto; com algum, a linha
+# atual é lida com FOR UPDATE para validar o resultado e ajustar o resumo.
+CAMPOS_AGENDA = ("salao_id", "profissional_id", "servico_id", "data_hora_inicio", "data_hora_fim", "status")
+
+def select_agenda_para_patch(agendamento_id: int):
+    return select(*(getattr(models.Agendamento, campo) for campo in CAMPOS_AGENDA)).where(
+        models.Agendamento.id == agendamento_id
+    ).with_for_update()
+
+def mesclar_patch_agendamento(atual, dados: dict):
+    """(anterior, nova) como dicts dos CAMPOS_AGENDA; valida o intervalo resultante."""
+    anterior = dict(atual._mapping)
+    nova = {campo: dados.get(campo, anterior[campo]) for campo in CAMPOS_AGENDA}
+    verificar_intervalo_agendamento(nova["data_hora_inicio"], nova["data_hora_fim"])
+    return anterior, nova
+
+@lru_cache(maxsize=None)
+def select_salao_agendamento():
+    return select(models.Agendamento.salao_id).where(models.Agendamento.id == bindparam("valor"))
+
+def versionar_patch(agendamento_id: int, anterior: dict, nova: dict, dados: dict):
+    """(salões a incrementar, dados com a versão, lápides): trocar de salão tira o
+    agendamento da agenda do anterior."""
+    lapides = []
+    if anterior["salao_id"] != nova["salao_id"]:
+        lapides.append(sincronizacao.statement_remocao(agendamento_id, anterior["salao_id"]))
+    saloes = sorted({anterior["salao_id"], nova["salao_id"]})
+    return saloes, dict(dados, versao=sincronizacao.versao_do_salao(nova["salao_id"])), lapides
+
+def patch_agendamento(db: Session, agendamento_id: int, dados: dict):
+    if not set(CAMPOS_AGENDA) & dados.keys():
+        # Incrementa o contador pelo salão da linha e grava a versão no mesmo UPDATE
+        # direto: uma instrução a mais, sem ler o salão antes
+        stmt = sincronizacao.statement_incrementar_por_agendamento(agendamento_id)
+        if db.execute(stmt).rowcount == 0:
+            # Agendamento inexistente ou primeira escrita do salão
+            salao_id = db.execute(select_salao_agendamento(), {"valor": agendamento_id}).scalar()
+            if salao_id is None:
+                db.rollback()
+                return None
+            sincronizacao.incrementar(db, salao_id)
+        return _patch(db, models.Agendamento, agendamento_id, dict(dados, versao=sincronizacao.versao_da_linha()))
+    atual = db.execute(select_agenda_para_patch(agendamento_id)).first()
+    if atual is None:
+        db.rollback()
+        return None
+    try:
+        anterior, nova = mesclar_patch_agendamento(atual, dados)
+    except IntervaloInvalidoError:
+        db.rollback()
+        raise
+    if nova["status"] != "cancelado":
+        verificar_conflito_agendamento(
+            db, nova["profissional_id"], nova["data_hora_inicio"], nova["data_hora_fim"],
+            ignorar_agendamento_id=agendamento_id
+        )
+    relatorios.registrar(db, removidas=[relatorios.contribuicao(anterior)],
+                         adicionadas=[relatorios.contribuicao(nova)])
+    saloes, dados, lapides = versionar_patch(agendamento_id, anterior, nova, dados)
+    # Em ordem de salao_id: duas transações com os mesmos salões não se travam em ordem inversa
+    for salao_id in saloes:
+        sincronizacao.incrementar(db, salao_id)
+    for lapide in lapides:
+        db.execute(lapide)
+    # A linha está travada desde a leitura: o UPDATE sempre a encontra
+    return _patch(db, models.Agendamento, agendamento_id, dados)
 def delete_agendamento(db: Session, agendamento_id: int):
-    db_agendamento = get_agendamento(db, agendamento_id)
+    # Travada como em update_agendamento: um segundo DELETE simultâneo não acha mais a linha
+    db_agendamento = buscar_por(db, models.Agendamento, agendamento_id, travar=True)
     if not db_agendamento:
+        db.rollback()
         return None
     db.delete(db_agendamento)
+    relatorios.registrar(db, removidas=[relatorios.contribuicao(db_agendamento)])
+    sincronizacao.registrar_remocao(db, agendamento_id, db_agendamento.salao_id)
     db.commit()
     return db_agendamento
 
 
+############################### SÉRIES RECORRENTES
+# Uma série grava suas ocorrências em agendamentos de uma vez (um INSERT de várias
+# linhas, conflitos verificados com uma consulta de ocupações) até o horizonte de
+# recorrencia.py. Séries sem fim avançam o horizonte sob demanda (get_serie_agendamento)
+# ou pela tarefa periódica "recorrencia.estender".
+
+# Status de ocorrências que ainda podem ser editadas ou canceladas pela série
+STATUS_ATIVOS = ("agendado", "confirmado")
+
+class SerieConflitanteError(Exception):
+    """Ocorrências da série que sobrepõem agendamentos do profissional (lista de inícios)."""
+
+    def __init__(self, conflitos):
+        super().__init__(conflitos)
+        self.conflitos = conflitos
+
+def _fim_serie(serie):
+    return datetime.combine(serie.ate, time.max) if serie.ate else None
+
+def _materializar_serie(db: Session, serie: models.SerieAgendamento, recusar_conflitos: bool,
+                        agora: datetime = None):
+    """Grava as ocorrências da série até o horizonte, sem commit. Devolve (gravadas, conflitos).
+
+    Com `recusar_conflitos` (criação da série), qualquer conflito desfaz tudo; na extensão
+    de uma série existente, as ocorrências em conflito são puladas.
+    """
+    limite = (agora or datetime.now()) + recorrencia.HORIZONTE
+    fim_serie = _fim_serie(serie)
+    ate = min(limite, fim_serie) if fim_serie else limite
+    duracao = timedelta(minutes=serie.duracao_minutos)
+    candidatos = [
+        (inicio, inicio + duracao)
+        for inicio in recorrencia.ocorrencias(serie.regra, serie.data_hora_inicio,
+                                              desde=serie.materializada_ate, ate=ate)
+    ]
+    aceitos, conflitos = [], []
+    if candidatos:
+        bloquear_profissional(db, serie.profissional_id)
+        ocupacoes = get_ocupacoes(db, [serie.profissional_id], candidatos[0][0], candidatos[-1][1])
+        aceitos, conflitos = separar_conflitos([(inicio, fim) for _, inicio, fim in ocupacoes], candidatos)
+        if conflitos and recusar_conflitos:
+            db.rollback()
+            raise SerieConflitanteError([inicio for inicio, _ in conflitos])
+    linhas = [
+        {
+            "salao_id": serie.salao_id,
+            "cliente_id": serie.cliente_id,
+            "profissional_id": serie.profissional_id,
+            "servico_id": serie.servico_id,
+            "data_hora_inicio": inicio,
+            "data_hora_fim": fim,
+            "status": "agendado",
+            "observacoes": serie.observacoes,
+            "serie_id": serie.id,
+        }
+        for inicio, fim in aceitos
+    ]
+    if linhas:
+        relatorios.registrar(db, adicionadas=[relatorios.contribuicao(linha) for linha in linhas])
+        versao = sincronizacao.proxima_versao(db, serie.salao_id)
+        db.execute(insert(models.Agendamento), [dict(linha, versao=versao) for linha in linhas])
+    serie.materializada_ate = max(filter(None, (serie.materializada_ate, ate)))
+    proxima = next(recorrencia.ocorrencias(serie.regra, serie.data_hora_inicio,
+                                           desde=serie.materializada_ate, ate=fim_serie), None)
+    if proxima is None:
+        serie.status = "encerrada"
+    return len(linhas), [inicio for inicio, _ in conflitos]
+
+def get_ocorrencias_serie(db: Session, serie_id: int, desde: datetime):
+    return db.query(models.Agendamento).filter(
+        models.Agendamento.serie_id == serie_id,
+        models.Agendamento.data_hora_inicio >= desde,
+    ).order_by(models.Agendamento.data_hora_inicio).all()
+
+def create_serie_agendamento(db: Session, serie: schemas.SerieAgendamentoCreate):
+    """Cria a série e grava as ocorrências do horizonte em uma transação.
+
+    Levanta recorrencia.RegraInvalidaError se a regra não gera nenhuma ocorrência e
+    SerieConflitanteError se alguma delas sobrepõe um agendamento do profissional.
+    """
+    if next(recorrencia.ocorrencias(serie.regra, serie.data_hora_inicio,
+                                    ate=_fim_serie(serie)), None) is None:
+        raise recorrencia.RegraInvalidaError("A regra não gera nenhuma ocorrência")
+    db_serie = models.SerieAgendamento(
+        salao_id=serie.salao_id,
+        cliente_id=serie.cliente_id,
+        profissional_id=serie.profissional_id,
+        servico_id=serie.servico_id,
+        regra=serie.regra,
+        data_hora_inicio=serie.data_hora_inicio,
+        duracao_minutos=int((serie.data_hora_fim - serie.data_hora_inicio).total_seconds() // 60),
+        ate=serie.ate,
+        observacoes=serie.observacoes,
+    )
+    db.add(db_serie)
+    db.flush()
+    _materializar_serie(db, db_serie, recusar_conflitos=True)
+    db.commit()
+    db.refresh(db_serie)
+    return db_serie
+
+def _travar_serie(db: Session, serie_id: int):
+    # Serializa extensão, edição e cancelamento da mesma série
+    return db.query(models.SerieAgendamento).filter(
+        models.SerieAgendamento.id == serie_id
+    ).with_for_update().populate_existing().first()
+
+def get_serie_agendamento(db: Session, serie_id: int):
+    """Devolve a série, antes estendendo as ocorrências até o horizonte se ela ainda estiver aberta."""
+    agora = datetime.now()
+    db_serie = buscar_por(db, models.SerieAgendamento, serie_id)
+    if db_serie is None or db_serie.status != "ativa" or db_serie.materializada_ate >= agora + recorrencia.HORIZONTE:
+        return db_serie
+    db_serie = _travar_serie(db, serie_id)
+    _materializar_serie(db, db_serie, recusar_conflitos=False, agora=agora)
+    db.commit()
+    db.refresh(db_serie)
+    return db_serie
+
+def estender_series_agendamento(db: Session, agora: datetime = None):
+    """Avança o horizonte de todas as séries ativas. Devolve (séries estendidas, agendamentos gravados)."""
+    agora = agora or datetime.now()
+    ids = [linha[0] for linha in db.query(models.SerieAgendamento.id).filter(
+        models.SerieAgendamento.status == "ativa",
+        models.SerieAgendamento.materializada_ate < agora + recorrencia.HORIZONTE,
+    ).order_by(models.SerieAgendamento.id)]
+    gravados = 0
+    for serie_id in ids:
+        # Uma transação por série, para não travar todos os profissionais de uma vez
+        db_serie = _travar_serie(db, serie_id)
+        gravados += _materializar_serie(db, db_serie, recusar_conflitos=False, agora=agora)[0]
+        db.commit()
+    return len(ids), gravados
+
+def _filtro_ocorrencias_futuras(serie_id: int, a_partir_de: datetime):
+    return and_(
+        models.Agendamento.serie_id == serie_id,
+        models.Agendamento.data_hora_inicio >= a_partir_de,
+        models.Agendamento.status.in_(STATUS_ATIVOS),
+    )
+
+def _alterar_ocorrencias_futuras(db: Session, db_serie: models.SerieAgendamento, a_partir_de: datetime,
+                                 dados: dict):
+    """Aplica `dados` às ocorrências ativas a partir de `a_partir_de` com um único UPDATE, sem commit.
+
+    As linhas afetadas são lidas uma vez (travadas) para ajustar o resumo diário e,
+    se o profissional muda, para verificar conflitos do novo profissional em conjunto.
+    """
+    filtro = _filtro_ocorrencias_futuras(db_serie.id, a_partir_de)
+    afetadas = [dict(linha._mapping) for linha in db.execute(
+        select(*(getattr(models.Agendamento, campo) for campo in CAMPOS_AGENDA))
+        .where(filtro).with_for_update()
+    )]
+    if not afetadas:
+        return 0
+    novas = [dict(linha, **{campo: valor for campo, valor in dados.items() if campo in CAMPOS_AGENDA})
+             for linha in afetadas]
+
+    profissional_id = dados.get("profissional_id")
+    if profissional_id is not None and dados.get("status") != "cancelado":
+        bloquear_profissional(db, profissional_id)
+        inicio = min(linha["data_hora_inicio"] for linha in afetadas)
+        fim = max(linha["data_hora_fim"] for linha in afetadas)
+        # Ocupações do novo profissional, sem contar as próprias ocorrências que vão mudar
+        ocupacoes = db.query(models.Agendamento.data_hora_inicio, models.Agendamento.data_hora_fim).filter(
+            models.Agendamento.profissional_id == profissional_id,
+            models.Agendamento.data_hora_inicio > inicio - DURACAO_MAXIMA_AGENDAMENTO,
+            models.Agendamento.data_hora_inicio < fim,
+            models.Agendamento.data_hora_fim > inicio,
+            models.Agendamento.status != "cancelado",
+            # serie_id nulo deixaria ~filtro nulo (e a linha de fora): avulsos entram explicitamente
+            or_(models.Agendamento.serie_id.is_(None), ~filtro),
+        ).all()
+        _, conflitos = separar_conflitos(
+            [tuple(ocupacao) for ocupacao in ocupacoes],
+            [(linha["data_hora_inicio"], linha["data_hora_fim"]) for linha in novas],
+        )
+        if conflitos:
+            db.rollback()
+            raise SerieConflitanteError([inicio for inicio, _ in conflitos])
+
+    relatorios.registrar(
+        db,
+        removidas=[relatorios.contribuicao(linha) for linha in afetadas],
+        adicionadas=[relatorios.contribuicao(linha) for linha in novas],
+    )
+    sincronizacao.incrementar(db, db_serie.salao_id)
+    versao = sincronizacao.versao_do_salao(db_serie.salao_id)
+    return db.execute(
+        update(models.Agendamento).where(filtro).values(**dados, versao=versao)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+def update_serie_agendamento(db: Session, serie_id: int, dados: dict, a_partir_de: datetime = None):
+    """Edita em lote as ocorrências futuras da série e a própria série (próximas ocorrências).
+
+    Devolve o número de ocorrências alteradas ou None se a série não existe.
+    """
+    db_serie = _travar_serie(db, serie_id)
+    if db_serie is None:
+        return None
+    alterados = _alterar_ocorrencias_futuras(db, db_serie, a_partir_de or datetime.now(), dados)
+    for campo in ("profissional_id", "servico_id", "observacoes"):
+        if campo in dados:
+            setattr(db_serie, campo, dados[campo])
+    db.commit()
+    return alterados
+
+def cancelar_serie_agendamento(db: Session, serie_id: int, a_partir_de: datetime = None):
+    """Cancela as ocorrências futuras e encerra a série. Devolve quantas foram canceladas ou None."""
+    db_serie = _travar_serie(db, serie_id)
+    if db_serie is None:
+        return None
+    cancelados = _alterar_ocorrencias_futuras(
+        db, db_serie, a_partir_de or datetime.now(), {"status": "cancelado"}
+    )
+    db_serie.status = "cancelada"
+    db.commit()
+    return cancelados
+
+############################### IMPORTAÇÃO EM LOTE
+# Cada função recebe um lote já validado pelos schemas, insere tudo com um único
+# INSERT de várias linhas em uma transação e devolve [(indice_no_lote, mensagem)]
+# para as linhas recusadas.
+
+def _ids_existentes(db: Session, coluna_id, ids):
+    if not ids:
+        return set()
+    return {linha[0] for linha in db.query(coluna_id).filter(coluna_id.in_(set(ids)))}
+
+def _inserir_lote(db: Session, model, linhas: List[dict]):
+    if linhas:
+        db.execute(insert(model), linhas)
+    db.commit()
+
+def create_clientes_em_lote(db: Session, clientes: List[schemas.ClienteCreate]):
+    _inserir_lote(db, models.Cliente, [
+        {"nome": cliente.nome, "telefone": cliente.telefone, "email": cliente.email,
+         **campos_busca_cliente(cliente.telefone, cliente.email)}
+        for cliente in clientes
+    ])
+    return []
+
+def create_servicos_em_lote(db: Session, servicos: List[schemas.ServicoCreate]):
+    saloes = _ids_existentes(db, models.Salao.id, [servico.salao_id for servico in servicos])
+    erros = []
+    linhas = []
+    for indice, servico in enumerate(servicos):
+        if servico.salao_id not in saloes:
+            erros.append((indice, "Salão não encontrado"))
+            continue
+        linhas.append({
+            "salao_id": servico.salao_id,
+            "nome": servico.nome,
+            "descricao": servico.descricao,
+            "duracao_minutos": servico.duracao_minutos,
+            "preco": servico.preco,
+        })
+    _inserir_lote(db, models.Servico, linhas)
+    return erros
+
+def create_agendamentos_em_lote(db: Session, agendamentos: List[schemas.AgendamentoCreate]):
+    erros = {}
+
+    # Referências: uma consulta por tabela para o lote inteiro
+    referencias = [
+        ("salao_id", models.Salao.id, "Salão não encontrado"),
+        ("cliente_id", models.Cliente.id, "Cliente não encontrado"),
+        ("profissional_id", models.Profissional.id, "Profissional não encontrado"),
+        ("servico_id", models.Servico.id, "Serviço não encontrado"),
+    ]
+    for campo, coluna_id, mensagem in referencias:
+        existentes = _ids_existentes(db, coluna_id, [getattr(a, campo) for a in agendamentos])
+        for indice, agendamento in enumerate(agendamentos):
+            if indice not in erros and getattr(agendamento, campo) not in existentes:
+                erros[indice] = mensagem
+
+    for indice, agendamento in enumerate(agendamentos):
+        if indice in erros:
+            continue
+        duracao = agendamento.data_hora_fim - agendamento.data_hora_inicio
+        if agendamento.status not in models.Agendamento.status.type.enums:
+            erros[indice] = "Status inválido"
+        elif duracao <= timedelta(0):
+            erros[indice] = "O horário de término deve ser posterior ao de início"
+        elif duracao > DURACAO_MAXIMA_AGENDAMENTO:
+            erros[indice] = "Duração do agendamento excede o máximo permitido"
+
+    # Conflitos, de forma conjunta: trava os profissionais envolvidos (em ordem de id,
+    # para evitar deadlock), busca as ocupações de todos em uma consulta e compara em memória
+    ativos = [
+        (indice, agendamento) for indice, agendamento in enumerate(agendamentos)
+        if indice not in erros and agendamento.status != "cancelado"
+    ]
+    if ativos:
+        profissional_ids = sorted({a.profissional_id for _, a in ativos})
+        db.query(models.Profissional.id).filter(
+            models.Profissional.id.in_(profissional_ids)
+        ).order_by(models.Profissional.id).with_for_update().all()
+        ocupacoes = {profissional_id: [] for profissional_id in profissional_ids}
+        for profissional_id, inicio, fim in get_ocupacoes(
+            db, profissional_ids,
+            min(a.data_hora_inicio for _, a in ativos),
+            max(a.data_hora_fim for _, a in ativos),
+        ):
+            ocupacoes[profissional_id].append((inicio, fim))
+
+        por_profissional = {}
+        for indice, agendamento in ativos:
+            por_profissional.setdefault(agendamento.profissional_id, []).append(
+                (agendamento.data_hora_inicio, agendamento.data_hora_fim, indice)
+            )
+
+        for profissional_id, candidatos in por_profissional.items():
+            _, recusados = separar_conflitos(ocupacoes[profissional_id], candidatos)
+            for _, _, indice in recusados:
+                erros[indice] = "Profissional já possui agendamento neste horário"
+
+    linhas = [
+        {
+            "salao_id": agendamento.salao_id,
+            "cliente_id": agendamento.cliente_id,
+            "profissional_id": agendamento.profissional_id,
+            "servico_id": agendamento.servico_id,
+            "data_hora_inicio": agendamento.data_hora_inicio,
+            "data_hora_fim": agendamento.data_hora_fim,
+            "status": agendamento.status,
+            "observacoes": agendamento.observacoes,
+        }
+        for indice, agendamento in enumerate(agendamentos)
+        if indice not in erros
+    ]
+    relatorios.registrar(db, adicionadas=[relatorios.contribuicao(linha) for linha in linhas])
+    versoes = sincronizacao.versoes_por_salao(db, [linha["salao_id"] for linha in linhas])
+    _inserir_lote(db, models.Agendamento, [dict(linha, versao=versoes[linha["salao_id"]]) for linha in linhas])
+    return sorted(erros.items())
+
 
 
 # Você também adicionará funções para atualizar e deletar salões,
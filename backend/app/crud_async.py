@@ -0,0 +1,441 @@
+# backend/app/crud_async.py
+# Versões assíncronas das funções de crud.py, usadas quando DB_MODO=async.
+# Seguem as mesmas regras (inclusive a verificação de conflito de horário) e
+# retornam os mesmos tipos, para que as rotas possam trocar de modo sem mudar o contrato.
+from sqlalchemy import select # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession # type: ignore
+from . import cache, database, escopo, hashing, models, relatorios, schemas, sincronizacao
+from .crud import (
+    CAMPOS_AGENDA, CAMPOS_LISTAGEM, RELACIONAMENTOS_AGENDAMENTO, HorarioIndisponivelError, IntervaloInvalidoError,
+    anexar_expansao, campos_busca_cliente, filtrar_salao, mesclar_patch_agendamento, montar_listagem, montar_objeto,
+    opcoes_expansao_agendamento, parametros_conflito, select_agenda_para_patch, select_agendamento,
+    select_agendamento_conflitante, select_busca_clientes, select_busca_profissionais, select_cliente_por_contato,
+    select_expansao, select_listagem, select_mudancas_agendamentos, select_por, select_salao_agendamento,
+    select_versao_tabela, statement_patch, valores_patch_cliente, versionar_patch,
+)
+from .normalizacao import normalizar_email, normalizar_telefone
+from .paginacao import aplicar_paginacao, montar_pagina
+
+
+async def _primeiro(db: AsyncSession, stmt, parametros: dict = None):
+    result = await db.execute(stmt, parametros)
+    return result.scalars().first()
+
+# Mesmas consultas pré-montadas de crud.select_por
+async def _buscar_por(db: AsyncSession, model, valor, coluna: str = "id", travar: bool = False):
+    return await _primeiro(db, select_por(model, coluna, travar), {"valor": valor})
+
+async def _paginar(db: AsyncSession, model, colunas, skip: int, limit: int, cursor: str, opcoes=(),
+                   salao_id: int = None):
+    stmt = filtrar_salao(select(model).options(*opcoes), model, salao_id)
+    stmt = aplicar_paginacao(stmt, colunas, skip, limit, cursor)
+    result = await db.execute(stmt)
+    return montar_pagina(result.scalars().all(), colunas, limit)
+
+# Listagens das rotas: dicts só com as colunas da resposta (ver crud.CAMPOS_LISTAGEM)
+async def get_listagem(db: AsyncSession, model, skip: int = 0, limit: int = 100, cursor: str = None,
+                       salao_id: int = None):
+    result = await db.execute(select_listagem(model, skip, limit, cursor, salao_id))
+    return montar_listagem(model, result.all(), limit)
+
+async def get_versao_tabela(db: AsyncSession, model, salao_id: int = None):
+    return tuple((await db.execute(select_versao_tabela(model, salao_id))).one())
+
+async def _hash_senha(senha: str):
+    # bcrypt é CPU puro: roda no pool de processos de hashing.py, fora do event loop
+    return await hashing.hash_senha_async(senha)
+
+async def verify_password(plain_password: str, hashed_password: str):
+    return await hashing.verificar_senha_async(plain_password, hashed_password)
+
+async def _registrar_resumo(db: AsyncSession, removidas=(), adicionadas=()):
+    # Mesmo resumo diário de crud.py, na transação corrente
+    for stmt in relatorios.statements_resumo(db.get_bind().dialect.name, removidas, adicionadas):
+        await db.execute(stmt)
+
+async def _incrementar_versao(db: AsyncSession, salao_id: int):
+    # Mesmo contador de sincronizacao.incrementar, travado até o commit
+    incrementar, criar = sincronizacao.statements_versao(salao_id)
+    if (await db.execute(incrementar)).rowcount == 0:
+        await db.execute(criar)
+        await db.execute(incrementar)
+
+async def _salvar(db: AsyncSession, obj, invalidar: bool = False):
+    db.add(obj)
+    await db.commit()
+    if invalidar:
+        # Mantém o cache de catálogo (compartilhado quando o backend é Redis) coerente
+        cache.catalogo.invalidar(type(obj), obj.id, escopo.shard_da_sessao(db))
+    await db.refresh(obj)
+    return obj
+
+async def _remover(db: AsyncSession, obj, invalidar: bool = False):
+    if not obj:
+        return None
+    await db.delete(obj)
+    await db.commit()
+    if invalidar:
+        cache.catalogo.invalidar(type(obj), obj.id, escopo.shard_da_sessao(db))
+    return obj
+
+async def _patch(db: AsyncSession, model, id_: int, valores: dict, invalidar: bool = False):
+    # Mesmo UPDATE ... WHERE id (com RETURNING quando suportado) de crud._patch
+    if not valores:
+        return await _buscar_por(db, model, id_)
+    returning = db.get_bind().dialect.update_returning
+    result = await db.execute(statement_patch(model, id_, valores, returning))
+    linha = result.first() if returning else None
+    if (returning and linha is None) or (not returning and result.rowcount == 0):
+        await db.rollback()
+        return None
+    await db.commit()
+    if invalidar:
+        cache.catalogo.invalidar(model, id_, escopo.shard_da_sessao(db))
+    if linha is None:
+        linha = (await db.execute(select(*model.__table__.columns).where(model.id == id_))).first()
+    return montar_objeto(model, linha)
+
+# Leituras de catálogo pelo cache, como crud._ler_catalogo. update_*/delete_* carregam
+# do banco com _buscar_por: o objeto do cache fica fora da sessão.
+async def _ler_catalogo(db: AsyncSession, model, id_: int):
+    async def carregar():
+        if not db.info.get("replica"):
+            return await _buscar_por(db, model, id_)
+        # Falta numa réplica vai ao primário (ver crud._ler_catalogo)
+        async with database.sessao_primaria_async(db) as primario:
+            return await _buscar_por(primario, model, id_)
+
+    obj = await cache.catalogo.obter_async(model, id_, carregar, escopo.shard_da_sessao(db))
+    return escopo.visivel(db, obj)
+
+############################### SALÕES
+async def get_salao(db: AsyncSession, salao_id: int):
+    return await _ler_catalogo(db, models.Salao, salao_id)
+
+async def get_salao_by_email(db: AsyncSession, email: str):
+    return await _buscar_por(db, models.Salao, email, "email")
+
+async def get_saloes(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: str = None):
+    return await _paginar(db, models.Salao, [models.Salao.id], skip, limit, cursor)
+
+async def create_salao(db: AsyncSession, salao: schemas.SalaoCreate, senha_hash: str = None):
+    db_salao = models.Salao(
+        nome=salao.nome,
+        endereco=salao.endereco,
+        telefone=salao.telefone,
+        email=salao.email,
+        senha_hash=senha_hash or await _hash_senha(salao.senha)
+    )
+    return await _salvar(db, db_salao)
+
+async def update_salao(db: AsyncSession, salao_id: int, salao: schemas.SalaoUpdate, senha_hash: str = None):
+    db_salao = await _buscar_por(db, models.Salao, salao_id)
+    if not db_salao:
+        return None
+
+    if salao.nome:
+        db_salao.nome = salao.nome
+    if salao.endereco:
+        db_salao.endereco = salao.endereco
+    if salao.telefone:
+        db_salao.telefone = salao.telefone
+    if salao.email:
+        db_salao.email = salao.email
+    if senha_hash:
+        db_salao.senha_hash = senha_hash
+    elif salao.senha:
+        db_salao.senha_hash = await _hash_senha(salao.senha)
+
+    return await _salvar(db, db_salao, invalidar=True)
+
+async def patch_salao(db: AsyncSession, salao_id: int, dados: dict):
+    return await _patch(db, models.Salao, salao_id, dados, invalidar=True)
+
+async def delete_salao(db: AsyncSession, salao_id: int):
+    return await _remover(db, await _buscar_por(db, models.Salao, salao_id), invalidar=True)
+
+############################### PROFISSIONAIS
+async def get_profissional(db: AsyncSession, profissional_id: int):
+    return await _ler_catalogo(db, models.Profissional, profissional_id)
+
+async def get_profissional_by_email(db: AsyncSession, email: str):
+    return await _buscar_por(db, models.Profissional, email, "email")
+
+async def get_profissionais(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: str = None,
+                            salao_id: int = None):
+    return await _paginar(db, models.Profissional, [models.Profissional.id], skip, limit, cursor,
+                          salao_id=salao_id)
+
+async def buscar_profissionais(db: AsyncSession, salao_id: int = None, especialidade: str = None,
+                               q: str = None, skip: int = 0, limit: int = 20):
+    stmt = select_busca_profissionais(db.get_bind().dialect.name, salao_id, especialidade, q, skip, limit)
+    return (await db.execute(stmt)).scalars().all()
+
+async def create_profissional(db: AsyncSession, profissional: schemas.ProfissionalCreate):
+    db_profissional = models.Profissional(
+        salao_id=profissional.salao_id,
+        nome=profissional.nome,
+        especialidade=profissional.especialidade,
+        telefone=profissional.telefone,
+        email=profissional.email
+    )
+    return await _salvar(db, db_profissional)
+
+async def update_profissional(db: AsyncSession, profissional_id: int, profissional: schemas.ProfissionalUpdate):
+    db_profissional = await _buscar_por(db, models.Profissional, profissional_id)
+    if not db_profissional:
+        return None
+
+    if profissional.nome:
+        db_profissional.nome = profissional.nome
+    if profissional.especialidade:
+        db_profissional.especialidade = profissional.especialidade
+    if profissional.telefone:
+        db_profissional.telefone = profissional.telefone
+    if profissional.email:
+        db_profissional.email = profissional.email
+
+    return await _salvar(db, db_profissional, invalidar=True)
+
+async def patch_profissional(db: AsyncSession, profissional_id: int, dados: dict):
+    return await _patch(db, models.Profissional, profissional_id, dados, invalidar=True)
+
+async def delete_profissional(db: AsyncSession, profissional_id: int):
+    return await _remover(db, await _buscar_por(db, models.Profissional, profissional_id), invalidar=True)
+
+############################### SERVIÇOS
+async def get_servico(db: AsyncSession, servico_id: int):
+    return await _ler_catalogo(db, models.Servico, servico_id)
+
+async def get_servicos(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: str = None,
+                       salao_id: int = None):
+    return await _paginar(db, models.Servico, [models.Servico.id], skip, limit, cursor, salao_id=salao_id)
+
+async def create_servico(db: AsyncSession, servico: schemas.ServicoCreate):
+    db_servico = models.Servico(
+        salao_id=servico.salao_id,
+        nome=servico.nome,
+        descricao=servico.descricao,
+        duracao_minutos=servico.duracao_minutos,
+        preco=servico.preco
+    )
+    return await _salvar(db, db_servico)
+
+async def update_servico(db: AsyncSession, servico_id: int, servico: schemas.ServicoUpdate):
+    db_servico = await _buscar_por(db, models.Servico, servico_id)
+    if not db_servico:
+        return None
+
+    if servico.nome:
+        db_servico.nome = servico.nome
+    if servico.descricao:
+        db_servico.descricao = servico.descricao
+    if servico.duracao_minutos:
+        db_servico.duracao_minutos = servico.duracao_minutos
+    if servico.preco:
+        db_servico.preco = servico.preco
+
+    return await _salvar(db, db_servico, invalidar=True)
+
+async def patch_servico(db: AsyncSession, servico_id: int, dados: dict):
+    return await _patch(db, models.Servico, servico_id, dados, invalidar=True)
+
+async def delete_servico(db: AsyncSession, servico_id: int):
+    return await _remover(db, await _buscar_por(db, models.Servico, servico_id), invalidar=True)
+
+############################### CLIENTES
+async def get_cliente(db: AsyncSession, cliente_id: int):
+    return await _buscar_por(db, models.Cliente, cliente_id)
+
+async def get_clientes(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: str = None):
+    return await _paginar(db, models.Cliente, [models.Cliente.id], skip, limit, cursor)
+
+async def buscar_clientes(db: AsyncSession, telefone: str = None, email: str = None, limit: int = 20):
+    return (await db.execute(select_busca_clientes(telefone, email, limit))).scalars().all()
+
+async def create_cliente(db: AsyncSession, cliente: schemas.ClienteCreate):
+    db_cliente = models.Cliente(
+        nome=cliente.nome,
+        telefone=cliente.telefone,
+        email=cliente.email,
+        **campos_busca_cliente(cliente.telefone, cliente.email)
+    )
+    return await _salvar(db, db_cliente)
+
+async def find_or_create_cliente(db: AsyncSession, cliente: schemas.ClienteCreate):
+    stmt = select_cliente_por_contato(cliente.telefone, cliente.email)
+    if stmt is not None:
+        existente = await _primeiro(db, stmt)
+        if existente is not None:
+            return existente, False
+    return await create_cliente(db, cliente), True
+
+async def update_cliente(db: AsyncSession, cliente_id: int, cliente: schemas.ClienteUpdate):
+    db_cliente = await get_cliente(db, cliente_id)
+    if not db_cliente:
+        return None
+
+    if cliente.nome:
+        db_cliente.nome = cliente.nome
+    if cliente.telefone:
+        db_cliente.telefone = cliente.telefone
+        db_cliente.telefone_normalizado = normalizar_telefone(cliente.telefone)
+    if cliente.email:
+        db_cliente.email = cliente.email
+        db_cliente.email_normalizado = normalizar_email(cliente.email)
+
+    return await _salvar(db, db_cliente)
+
+async def patch_cliente(db: AsyncSession, cliente_id: int, dados: dict):
+    return await _patch(db, models.Cliente, cliente_id, valores_patch_cliente(dados))
+
+async def delete_cliente(db: AsyncSession, cliente_id: int):
+    return await _remover(db, await get_cliente(db, cliente_id))
+
+############################### AGENDAMENTOS
+async def verificar_conflito_agendamento(db: AsyncSession, profissional_id: int, data_hora_inicio,
+                                         data_hora_fim, ignorar_agendamento_id: int = None):
+    # Mesma estratégia de crud.verificar_conflito_agendamento: trava a linha do
+    # profissional e procura sobreposição apenas na janela de tempo relevante
+    await db.execute(select_por(models.Profissional, travar=True), {"valor": profissional_id})
+    conflito = (await db.execute(
+        select_agendamento_conflitante(ignorar_agendamento_id is not None),
+        parametros_conflito(profissional_id, data_hora_inicio, data_hora_fim, ignorar_agendamento_id),
+    )).scalar()
+    if conflito:
+        await db.rollback()
+        raise HorarioIndisponivelError(conflito)
+
+async def get_agendamento(db: AsyncSession, agendamento_id: int, expand=None):
+    # No modo assíncrono lazy load nem é possível: com expand, tudo vem carregado (joinedload)
+    stmt = select_agendamento(frozenset(expand) if expand is not None else None)
+    return await _primeiro(db, stmt, {"valor": agendamento_id})
+
+async def get_agendamentos(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: str = None, expand=None,
+                           salao_id: int = None):
+    return await _paginar(
+        db, models.Agendamento,
+        [models.Agendamento.data_hora_inicio, models.Agendamento.id],
+        skip, limit, cursor,
+        opcoes=opcoes_expansao_agendamento(expand) if expand is not None else (),
+        salao_id=salao_id,
+    )
+
+async def get_listagem_agendamentos(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: str = None,
+                                    expand=(), salao_id: int = None):
+    agendamentos = await get_listagem(db, models.Agendamento, skip, limit, cursor, salao_id)
+    for nome in RELACIONAMENTOS_AGENDAMENTO:
+        if nome in expand:
+            linhas = (await db.execute(select_expansao(nome, agendamentos))).all() if agendamentos else ()
+            anexar_expansao(agendamentos, nome, linhas)
+    return agendamentos
+
+async def create_agendamento(db: AsyncSession, agendamento: schemas.AgendamentoCreate):
+    if agendamento.status != "cancelado":
+        await verificar_conflito_agendamento(
+            db, agendamento.profissional_id, agendamento.data_hora_inicio, agendamento.data_hora_fim
+        )
+    db_agendamento = models.Agendamento(
+        salao_id=agendamento.salao_id,
+        cliente_id=agendamento.cliente_id,
+        profissional_id=agendamento.profissional_id,
+        servico_id=agendamento.servico_id,
+        data_hora_inicio=agendamento.data_hora_inicio,
+        data_hora_fim=agendamento.data_hora_fim,
+        status=agendamento.status,
+        observacoes=agendamento.observacoes
+    )
+    await _registrar_resumo(db, adicionadas=[relatorios.contribuicao(db_agendamento)])
+    await _incrementar_versao(db, db_agendamento.salao_id)
+    db_agendamento.versao = sincronizacao.versao_do_salao(db_agendamento.salao_id)
+    return await _salvar(db, db_agendamento)
+
+async def update_agendamento(db: AsyncSession, agendamento_id: int, agendamento: schemas.AgendamentoUpdate):
+    # Linha travada antes de calcular a contribuição anterior (ver crud.update_agendamento)
+    db_agendamento = await _buscar_por(db, models.Agendamento, agendamento_id, travar=True)
+    if not db_agendamento:
+        await db.rollback()
+        return None
+    anterior = relatorios.contribuicao(db_agendamento)
+
+    if agendamento.profissional_id:
+        db_agendamento.profissional_id = agendamento.profissional_id
+    if agendamento.servico_id:
+        db_agendamento.servico_id = agendamento.servico_id
+    if agendamento.cliente_id:
+        db_agendamento.cliente_id = agendamento.cliente_id
+    if agendamento.data_hora_inicio:
+        db_agendamento.data_hora_inicio = agendamento.data_hora_inicio
+    if agendamento.data_hora_fim:
+        db_agendamento.data_hora_fim = agendamento.data_hora_fim
+    if agendamento.status:
+        db_agendamento.status = agendamento.status
+    if agendamento.observacoes:
+        db_agendamento.observacoes = agendamento.observacoes
+
+    if db_agendamento.status != "cancelado":
+        await verificar_conflito_agendamento(
+            db, db_agendamento.profissional_id, db_agendamento.data_hora_inicio,
+            db_agendamento.data_hora_fim, ignorar_agendamento_id=agendamento_id
+        )
+    await _registrar_resumo(db, removidas=[anterior], adicionadas=[relatorios.contribuicao(db_agendamento)])
+    await _incrementar_versao(db, db_agendamento.salao_id)
+    db_agendamento.versao = sincronizacao.versao_do_salao(db_agendamento.salao_id)
+
+    return await _salvar(db, db_agendamento)
+
+async def patch_agendamento(db: AsyncSession, agendamento_id: int, dados: dict):
+    if not set(CAMPOS_AGENDA) & dados.keys():
+        stmt = sincronizacao.statement_incrementar_por_agendamento(agendamento_id)
+        if (await db.execute(stmt)).rowcount == 0:
+            salao_id = (await db.execute(select_salao_agendamento(), {"valor": agendamento_id})).scalar()
+            if salao_id is None:
+                await db.rollback()
+                return None
+            await _incrementar_versao(db, salao_id)
+        dados = dict(dados, versao=sincronizacao.versao_da_linha())
+        return await _patch(db, models.Agendamento, agendamento_id, dados)
+    atual = (await db.execute(select_agenda_para_patch(agendamento_id))).first()
+    if atual is None:
+        await db.rollback()
+        return None
+    try:
+        anterior, nova = mesclar_patch_agendamento(atual, dados)
+    except IntervaloInvalidoError:
+        await db.rollback()
+        raise
+    if nova["status"] != "cancelado":
+        await verificar_conflito_agendamento(
+            db, nova["profissional_id"], nova["data_hora_inicio"], nova["data_hora_fim"],
+            ignorar_agendamento_id=agendamento_id
+        )
+    await _registrar_resumo(db, removidas=[relatorios.contribuicao(anterior)],
+                            adicionadas=[relatorios.contribuicao(nova)])
+    saloes, dados, lapides = versionar_patch(agendamento_id, anterior, nova, dados)
+    for salao_id in saloes:
+        await _incrementar_versao(db, salao_id)
+    for lapide in lapides:
+        await db.execute(lapide)
+    return await _patch(db, models.Agendamento, agendamento_id, dados)
+
+async def delete_agendamento(db: AsyncSession, agendamento_id: int):
+    db_agendamento = await _buscar_por(db, models.Agendamento, agendamento_id, travar=True)
+    if not db_agendamento:
+        await db.rollback()
+    else:
+        await _registrar_resumo(db, removidas=[relatorios.contribuicao(db_agendamento)])
+        await _incrementar_versao(db, db_agendamento.salao_id)
+        await db.execute(sincronizacao.statement_remocao(agendamento_id, db_agendamento.salao_id))
+    return await _remover(db, db_agendamento)
+
+async def get_mudancas_agendamentos(db: AsyncSession, salao_id: int, token: str = None, limit: int = 100) -> dict:
+    # Mesmas leituras de crud.get_mudancas_agendamentos
+    apos = sincronizacao.decodificar_token(token)
+    if apos is not None:
+        removidos_ate = (await db.execute(sincronizacao.select_removidos_ate(salao_id))).scalar()
+        sincronizacao.verificar_token(apos, removidos_ate)
+    alterados, removidos = select_mudancas_agendamentos(salao_id, apos, limit)
+    return sincronizacao.montar_mudancas(
+        (await db.execute(alterados)).all(), (await db.execute(removidos)).all(),
+        CAMPOS_LISTAGEM[models.Agendamento], limit, token,
+    )
@@ -1,8 +1,15 @@
+import itertools
+import math
 import os
+import threading
+import time
+from typing import Optional
 from dotenv import load_dotenv
-from sqlalchemy import create_engine # type: ignore
+from fastapi import Header, Request, Response
+from sqlalchemy import create_engine, event, text # type: ignore
 from sqlalchemy.ext.declarative import declarative_base # type: ignore
-from sqlalchemy.orm import sessionmaker # type: ignore
+from sqlalchemy.orm import Session, sessionmaker # type: ignore
+from .metricas_pool import AsyncQueuePoolMedido, QueuePoolMedido
 
 
 load_dotenv() # Carrega as variáveis do .env - **Esta linha deve vir antes de usar os.getenv()**
@@ -16,18 +23,404 @@ MYSQL_DB = os.getenv("MYSQL_DB", "salao_agendamento_db")
 
 # Restante do seu código de database.py...
 # String de conexão para SQLAlchemy com mysqlclient
-SQLALCHEMY_DATABASE_URL = (
-    f"mysql+mysqlconnector://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
+# DATABASE_URL permite apontar para outro banco (ex.: sqlite:///./local.db para testes locais)
+SQLALCHEMY_DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"mysql+mysqlconnector://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}",
 )
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# Modo de acesso ao banco, escolhido na inicialização: "sync" (padrão) ou "async".
+# No modo async as rotas de CRUD passam a usar AsyncSession (aiomysql / aiosqlite).
+DB_MODO = os.getenv("DB_MODO", "sync").lower()
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL",
+    f"mysql+aiomysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}",
+)
+
+# Configuração do pool de conexões - também lida do .env
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Recicla conexões antes do wait_timeout do MySQL (8h por padrão) derrubá-las
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "sim", "yes")
+
+# Réplicas de leitura do banco padrão, separadas por vírgula (ASYNC_* no modo async).
+# GET/HEAD vão para elas em rodízio; escritas, e leituras logo após uma escrita do
+# mesmo cliente, vão para o primário. Sem réplicas, tudo continua no primário.
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+ASYNC_DATABASE_REPLICA_URLS = [
+    url.strip() for url in os.getenv("ASYNC_DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+]
+# Intervalo, em segundos, entre verificações de cada réplica (conexão e atraso)
+REPLICA_VERIFICACAO_SEGUNDOS = float(os.getenv("REPLICA_VERIFICACAO_SEGUNDOS", "10"))
+# Atraso de replicação (MySQL) acima do qual a réplica deixa de receber leituras
+REPLICA_ATRASO_MAXIMO = float(os.getenv("REPLICA_ATRASO_MAXIMO", "5"))
+# Read-your-writes: segundos, depois de uma escrita, em que as leituras do cliente vão ao primário
+REPLICA_JANELA_ESCRITA = float(os.getenv("REPLICA_JANELA_ESCRITA", "5"))
+COOKIE_ESCRITA = "agendanet_escrita"
+
+# Shards: salões que moram em outro banco, com o mesmo schema.
+#   DB_SHARDS=norte,sul                  - nomes dos shards
+#   DATABASE_URL_NORTE=...               - URL de cada um (e ASYNC_DATABASE_URL_NORTE no modo async)
+#   DB_SHARD_SALOES=3:norte,8:sul        - salão -> shard; os demais ficam no banco padrão
+# O roteamento pode ser trocado por uma função própria com definir_roteador_shard().
+DB_SHARDS = [nome.strip() for nome in os.getenv("DB_SHARDS", "").split(",") if nome.strip()]
+DB_SHARD_SALOES = {
+    int(salao_id): nome.strip()
+    for salao_id, _, nome in (
+        item.partition(":") for item in os.getenv("DB_SHARD_SALOES", "").split(",") if item.strip()
+    )
+}
+
+def _connect_args(url: str):
+    # O SQLite por padrão só aceita a conexão na thread que a criou
+    return {"check_same_thread": False} if url.startswith("sqlite") else {}
+
+def _opcoes_pool(url: str, poolclass):
+    opcoes = {"pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE}
+    if url.startswith("sqlite"):
+        # SQLite mantém o pool padrão do SQLAlchemy (sem fila nem overflow)
+        return opcoes
+    return dict(
+        opcoes,
+        poolclass=poolclass,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args=_connect_args(SQLALCHEMY_DATABASE_URL),
+    **_opcoes_pool(SQLALCHEMY_DATABASE_URL, QueuePoolMedido),
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+class EscritaEmReplicaError(RuntimeError):
+    """Uma sessão aberta numa réplica de leitura tentou gravar."""
+
+def _atraso_replicacao(conexao) -> Optional[float]:
+    # Só o MySQL informa o atraso; nos demais bancos a réplica é considerada em dia
+    if conexao.dialect.name != "mysql":
+        return 0.0
+    linha = conexao.exec_driver_sql("SHOW REPLICA STATUS").mappings().first()
+    if linha is None:
+        return None
+    atraso = linha.get("Seconds_Behind_Source")
+    return None if atraso is None else float(atraso)
+
+class Replicas:
+    """Réplicas de leitura em rodízio (round-robin), pulando as que estão fora do ar ou atrasadas.
+
+    Cada réplica é verificada no máximo uma vez a cada REPLICA_VERIFICACAO_SEGUNDOS, na
+    própria escolha; um erro de conexão durante o uso a tira do rodízio na hora.
+    """
+
+    def __init__(self, engines, fabrica_sessao):
+        self.itens = [
+            {"engine": engine_, "sessionmaker": fabrica_sessao(engine_), "saudavel": True,
+             "verificar_em": 0.0, "falhas": 0, "atraso": None}
+            for engine_ in engines
+        ]
+        self._rodizio = itertools.count()
+        self._lock = threading.Lock()
+        for item in self.itens:
+            sync_engine = getattr(item["engine"], "sync_engine", item["engine"])
+            event.listen(sync_engine, "handle_error", self._ao_erro(item))
+
+    def _ao_erro(self, item):
+        def ouvir(contexto):
+            # connection None: a falha foi ao conectar
+            if contexto.is_disconnect or contexto.connection is None:
+                self._marcar(item, False)
+        return ouvir
+
+    def _marcar(self, item, saudavel: bool, atraso: float = None):
+        with self._lock:
+            item["saudavel"] = saudavel
+            item["atraso"] = atraso
+            item["verificar_em"] = time.monotonic() + REPLICA_VERIFICACAO_SEGUNDOS
+            if not saudavel:
+                item["falhas"] += 1
+
+    def _resultado_verificacao(self, item, atraso):
+        saudavel = atraso is not None and atraso <= REPLICA_ATRASO_MAXIMO
+        self._marcar(item, saudavel, atraso)
+        return saudavel
+
+    def _verificar(self, item) -> bool:
+        try:
+            with item["engine"].connect() as conexao:
+                conexao.execute(text("SELECT 1"))
+                atraso = _atraso_replicacao(conexao)
+        except Exception:
+            self._marcar(item, False)
+            return False
+        return self._resultado_verificacao(item, atraso)
+
+    async def _verificar_async(self, item) -> bool:
+        try:
+            async with item["engine"].connect() as conexao:
+                await conexao.execute(text("SELECT 1"))
+                atraso = await conexao.run_sync(_atraso_replicacao)
+        except Exception:
+            self._marcar(item, False)
+            return False
+        return self._resultado_verificacao(item, atraso)
+
+    def _proxima(self):
+        # Rodízio só entre as saudáveis: a vez de uma réplica fora do ar não cai na seguinte
+        saudaveis = [item for item in self.itens if item["saudavel"]]
+        if not saudaveis:
+            return None
+        return saudaveis[next(self._rodizio) % len(saudaveis)]["sessionmaker"]
+
+    def escolher(self):
+        """sessionmaker da próxima réplica disponível, ou None se nenhuma estiver (usa o primário)."""
+        for item in self.itens:
+            if time.monotonic() >= item["verificar_em"]:
+                self._verificar(item)
+        return self._proxima()
+
+    async def escolher_async(self):
+        for item in self.itens:
+            if time.monotonic() >= item["verificar_em"]:
+                await self._verificar_async(item)
+        return self._proxima()
+
+    def estatisticas(self):
+        return [
+            {
+                "url": item["engine"].url.render_as_string(hide_password=True),
+                "saudavel": item["saudavel"],
+                "atraso_segundos": item["atraso"],
+                "falhas": item["falhas"],
+            }
+            for item in self.itens
+        ]
+
+replicas = None
+
+def configurar_replicas(urls):
+    """(Re)cria o conjunto de réplicas síncronas do banco padrão; lista vazia desliga."""
+    global replicas
+    engines = [
+        create_engine(url, connect_args=_connect_args(url), **_opcoes_pool(url, QueuePoolMedido))
+        for url in urls
+    ]
+    replicas = Replicas(
+        engines, lambda engine_: sessionmaker(autocommit=False, autoflush=False, bind=engine_)
+    ) if engines else None
+    return replicas
+
+configurar_replicas(DATABASE_REPLICA_URLS)
+
+# Sessões de réplica só leem: uma escrita nelas é erro de roteamento (rota GET que grava
+# precisa de get_db_primario), não algo a ser replicado
+@event.listens_for(Session, "before_flush")
+def _recusar_flush_em_replica(sessao, contexto, instancias):
+    if sessao.info.get("replica") and (sessao.new or sessao.dirty or sessao.deleted):
+        raise EscritaEmReplicaError("Escrita em sessão de réplica de leitura")
+
+@event.listens_for(Session, "do_orm_execute")
+def _recusar_dml_em_replica(estado):
+    if estado.session.info.get("replica") and (estado.is_insert or estado.is_update or estado.is_delete):
+        raise EscritaEmReplicaError("Escrita em sessão de réplica de leitura")
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+class ShardDesconhecidoError(LookupError):
+    """O roteador mandou o salão para um shard que não foi registrado."""
+
+# nome -> {"engine", "sessionmaker", "async_engine", "async_sessionmaker"}
+_shards = {}
+
+def registrar_shard(nome: str, url: str = None, async_url: str = None, engine_=None, async_engine_=None):
+    """Registra um shard pela URL ou por engines já criadas (ex.: SQLite em testes)."""
+    if engine_ is None and url is not None:
+        engine_ = create_engine(url, connect_args=_connect_args(url), **_opcoes_pool(url, QueuePoolMedido))
+    shard = {"engine": engine_, "async_engine": async_engine_}
+    if engine_ is not None:
+        shard["sessionmaker"] = sessionmaker(autocommit=False, autoflush=False, bind=engine_)
+    if async_engine_ is None and async_url is not None and DB_MODO == "async":
+        from sqlalchemy.ext.asyncio import create_async_engine # type: ignore
+        async_engine_ = shard["async_engine"] = create_async_engine(
+            async_url, **_opcoes_pool(async_url, AsyncQueuePoolMedido)
+        )
+    if async_engine_ is not None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker # type: ignore
+        shard["async_sessionmaker"] = async_sessionmaker(async_engine_, autoflush=False, expire_on_commit=False)
+    _shards[nome] = shard
+    return shard
+
+for _nome in DB_SHARDS:
+    registrar_shard(
+        _nome,
+        url=os.getenv(f"DATABASE_URL_{_nome.upper()}"),
+        async_url=os.getenv(f"ASYNC_DATABASE_URL_{_nome.upper()}"),
+    )
+
+def rotear_por_mapa(salao_id: int) -> Optional[str]:
+    return DB_SHARD_SALOES.get(salao_id)
+
+# Função salao_id -> nome do shard (None = banco padrão)
+roteador_shard = rotear_por_mapa
+
+def definir_roteador_shard(funcao):
+    """Troca o roteamento de salões para shards (ex.: por faixa de id ou consulta a um catálogo)."""
+    global roteador_shard
+    roteador_shard = funcao
+    return funcao
+
+def shard_do_salao(salao_id: Optional[int]) -> Optional[str]:
+    nome = roteador_shard(salao_id) if salao_id is not None else None
+    if nome is not None and nome not in _shards:
+        raise ShardDesconhecidoError(nome)
+    return nome
+
+def _escopar(db, salao_id: Optional[int], shard: Optional[str]):
+    # Lido por escopo.py: com salao_id, toda consulta da sessão fica restrita ao salão
+    if salao_id is not None:
+        db.info["salao_id"] = salao_id
+        db.info["shard"] = shard
+    return db
+
+def sessao_do_salao(salao_id: Optional[int] = None, replica: bool = False):
+    """Sessão no banco do salão (shard ou padrão), restrita a ele; sem salao_id, a sessão global.
+
+    Com replica=True e réplicas configuradas, a sessão do banco padrão vem de uma réplica.
+    """
+    shard = shard_do_salao(salao_id)
+    if shard is not None:
+        fabrica = _shards[shard]["sessionmaker"]
+    else:
+        fabrica = (replicas.escolher() if replica and replicas is not None else None) or SessionLocal
+    db = fabrica()
+    if fabrica is not SessionLocal and shard is None:
+        db.info["replica"] = True
+    return _escopar(db, salao_id, shard)
+
+def sessao_primaria(db):
+    """Sessão no primário com o mesmo escopo de `db`, para leituras que não podem vir atrasadas."""
+    return _escopar(SessionLocal(), db.info.get("salao_id"), db.info.get("shard"))
+
+# Trabalhos em segundo plano (tarefas.py, linhas de comando) não têm requisição nem
+# salão: percorrem o banco padrão e cada shard, com uma sessão global em cada um
+def bancos(salao_id: Optional[int] = None):
+    """Bancos a percorrer: só o do salão, ou todos (None é o banco padrão, depois os shards)."""
+    if salao_id is not None:
+        return [shard_do_salao(salao_id)]
+    return [None] + [nome for nome, shard in _shards.items() if "sessionmaker" in shard]
+
+def sessao_do_banco(nome: Optional[str] = None):
+    """Sessão sem escopo de salão no banco padrão (nome None) ou no shard `nome`."""
+    if nome is None:
+        return SessionLocal()
+    if nome not in _shards or "sessionmaker" not in _shards[nome]:
+        raise ShardDesconhecidoError(nome)
+    return _shards[nome]["sessionmaker"]()
+
+def sessoes_dos_bancos(salao_id: Optional[int] = None):
+    """Uma sessão por vez em cada banco de bancos(salao_id), fechada ao avançar (CLIs e manutenção)."""
+    for banco in bancos(salao_id):
+        db = sessao_do_banco(banco)
+        try:
+            yield db
+        finally:
+            db.close()
+
+METODOS_LEITURA = ("GET", "HEAD", "OPTIONS")
+
+def _ler_da_replica(request: Request, response: Response, conjunto) -> bool:
+    """Decide se a requisição pode ler de uma réplica; numa escrita, abre a janela read-your-writes."""
+    if conjunto is None:
+        return False
+    if request.method not in METODOS_LEITURA:
+        # O cookie faz as próximas leituras deste cliente irem ao primário até a réplica alcançá-lo
+        response.set_cookie(
+            COOKIE_ESCRITA, f"{time.time():.3f}", max_age=math.ceil(REPLICA_JANELA_ESCRITA), httponly=True
+        )
+        return False
+    try:
+        ultima_escrita = float(request.cookies.get(COOKIE_ESCRITA, "0"))
+    except ValueError:
+        ultima_escrita = 0.0
+    return time.time() - ultima_escrita >= REPLICA_JANELA_ESCRITA
+
+# O cabeçalho X-Salao-Id escolhe o banco do salão e restringe a requisição a ele.
+# Leituras do banco padrão vão para as réplicas, se houver.
+def get_db(request: Request, response: Response, x_salao_id: Optional[int] = Header(None)):
+    db = sessao_do_salao(x_salao_id, replica=_ler_da_replica(request, response, replicas))
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Para rotas GET que também gravam (ex.: extensão de séries recorrentes)
+def get_db_primario(x_salao_id: Optional[int] = Header(None)):
+    db = sessao_do_salao(x_salao_id)
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async_engine = None
+AsyncSessionLocal = None
+replicas_async = None
+if DB_MODO == "async":
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker # type: ignore
+
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL, **_opcoes_pool(ASYNC_DATABASE_URL, AsyncQueuePoolMedido)
+    )
+    # expire_on_commit=False: depois do commit os objetos continuam legíveis sem
+    # disparar lazy load (que não é permitido fora de um contexto await)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    if ASYNC_DATABASE_REPLICA_URLS:
+        replicas_async = Replicas(
+            [create_async_engine(url, **_opcoes_pool(url, AsyncQueuePoolMedido)) for url in ASYNC_DATABASE_REPLICA_URLS],
+            lambda engine_: async_sessionmaker(engine_, autoflush=False, expire_on_commit=False),
+        )
+
+async def get_async_db(request: Request, response: Response, x_salao_id: Optional[int] = Header(None)):
+    shard = shard_do_salao(x_salao_id)
+    fabrica = None
+    if shard is not None:
+        fabrica = _shards[shard]["async_sessionmaker"]
+    elif _ler_da_replica(request, response, replicas_async):
+        fabrica = await replicas_async.escolher_async()
+    async with (fabrica or AsyncSessionLocal)() as db:
+        if fabrica is not None and shard is None:
+            db.info["replica"] = True
+        yield _escopar(db, x_salao_id, shard)
+
+def sessao_primaria_async(db):
+    """Como sessao_primaria, para uma AsyncSession (usar com `async with`)."""
+    return _escopar(AsyncSessionLocal(), db.info.get("salao_id"), db.info.get("shard"))
+
+def estatisticas_replicas():
+    return {
+        nome: conjunto.estatisticas()
+        for nome, conjunto in (("sync", replicas), ("async", replicas_async))
+        if conjunto is not None
+    }
+
+def estatisticas_pools():
+    """Estatísticas dos pools instrumentados (engines SQLite usam o pool padrão e ficam de fora)."""
+    pools = {"sync": engine.pool}
+    if async_engine is not None:
+        pools["async"] = async_engine.sync_engine.pool
+    for nome, conjunto in (("sync", replicas), ("async", replicas_async)):
+        for i, item in enumerate(conjunto.itens if conjunto is not None else ()):
+            pools[f"{nome}:replica{i}"] = getattr(item["engine"], "sync_engine", item["engine"]).pool
+    for nome, shard in _shards.items():
+        if shard["engine"] is not None:
+            pools[f"sync:{nome}"] = shard["engine"].pool
+        if shard["async_engine"] is not None:
+            pools[f"async:{nome}"] = shard["async_engine"].sync_engine.pool
+    return {
+        nome: pool.estatisticas.resumo(pool)
+        for nome, pool in pools.items()
+        if hasattr(pool, "estatisticas")
+    }
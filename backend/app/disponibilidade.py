@@ -0,0 +1,89 @@
+# backend/app/disponibilidade.py
+# Cálculo de horários livres por profissional a partir de uma linha do tempo em memória.
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy.orm import Session # type: ignore
+from . import models
+from .crud import get_ocupacoes
+
+# Expediente padrão usado enquanto o salão não tem horário de funcionamento próprio
+HORARIO_ABERTURA = time(8, 0)
+HORARIO_FECHAMENTO = time(20, 0)
+# Intervalo entre os horários de início oferecidos ao cliente
+PASSO_HORARIOS = timedelta(minutes=15)
+
+Intervalo = Tuple[datetime, datetime]
+
+
+def minutos_expediente() -> int:
+    """Duração de um dia de expediente, em minutos (base da taxa de ocupação dos relatórios)."""
+    abertura = datetime.combine(date.min, HORARIO_ABERTURA)
+    return int((datetime.combine(date.min, HORARIO_FECHAMENTO) - abertura).total_seconds() // 60)
+
+
+def mesclar_intervalos(intervalos: List[Intervalo]) -> List[Intervalo]:
+    """Ordena e une intervalos sobrepostos ou encostados."""
+    mesclados: List[Intervalo] = []
+    for inicio, fim in sorted(intervalos):
+        if mesclados and inicio <= mesclados[-1][1]:
+            if fim > mesclados[-1][1]:
+                mesclados[-1] = (mesclados[-1][0], fim)
+        else:
+            mesclados.append((inicio, fim))
+    return mesclados
+
+
+def horarios_livres(ocupados: List[Intervalo], abertura: datetime, fechamento: datetime,
+                    duracao: timedelta, passo: timedelta = PASSO_HORARIOS) -> List[datetime]:
+    """Percorre os buracos entre intervalos ocupados (já mesclados) e gera os inícios possíveis."""
+    horarios = []
+    cursor = abertura
+    for ocupado_inicio, ocupado_fim in ocupados + [(fechamento, fechamento)]:
+        limite = min(ocupado_inicio, fechamento)
+        while cursor + duracao <= limite:
+            horarios.append(cursor)
+            cursor += passo
+        if ocupado_fim > cursor:
+            # Realinha o próximo início à grade de horários a partir da abertura
+            passos = -(-(ocupado_fim - abertura) // passo)
+            cursor = abertura + passos * passo
+        if cursor >= fechamento:
+            break
+    return horarios
+
+
+def calcular_disponibilidade(db: Session, salao_id: int, servico: models.Servico,
+                             data: date, dias: int = 1):
+    profissionais = db.query(models.Profissional.id, models.Profissional.nome).filter(
+        models.Profissional.salao_id == salao_id
+    ).order_by(models.Profissional.id).all()
+
+    periodo_inicio = datetime.combine(data, time.min)
+    periodo_fim = periodo_inicio + timedelta(days=dias)
+    linhas = get_ocupacoes(db, [p.id for p in profissionais], periodo_inicio, periodo_fim)
+
+    ocupacoes: Dict[int, List[Intervalo]] = {p.id: [] for p in profissionais}
+    for profissional_id, inicio, fim in linhas:
+        ocupacoes[profissional_id].append((inicio, fim))
+
+    duracao = timedelta(minutes=servico.duracao_minutos)
+    resultado = []
+    for profissional in profissionais:
+        linha_do_tempo = mesclar_intervalos(ocupacoes[profissional.id])
+        horarios = []
+        for deslocamento in range(dias):
+            dia = data + timedelta(days=deslocamento)
+            abertura = datetime.combine(dia, HORARIO_ABERTURA)
+            fechamento = datetime.combine(dia, HORARIO_FECHAMENTO)
+            ocupados_no_dia = [
+                (inicio, fim) for inicio, fim in linha_do_tempo
+                if inicio < fechamento and fim > abertura
+            ]
+            horarios.extend(horarios_livres(ocupados_no_dia, abertura, fechamento, duracao))
+        resultado.append({
+            "profissional_id": profissional.id,
+            "nome": profissional.nome,
+            "horarios": horarios,
+        })
+    return resultado
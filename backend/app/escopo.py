@@ -0,0 +1,106 @@
+# backend/app/escopo.py
+# Escopo por salão (multi-tenant). Uma sessão aberta para um salão
+# (database.sessao_do_salao ou o cabeçalho X-Salao-Id) leva salao_id em session.info,
+# e este módulo injeta `salao_id = ?` em toda consulta ORM dela:
+#   - SELECT, UPDATE e DELETE (inclusive relacionamentos carregados depois) ganham
+#     o critério em todos os modelos com salao_id, e Salao ganha `id = ?`;
+#   - objetos de outro salão não podem ser gravados pela sessão (flush).
+# INSERTs em lote do Core não passam pelo flush: a importação confere os salões
+# com uma consulta (que já tem o escopo) e as séries copiam o salao_id da série.
+# Consultas executadas fora da sessão também não passam pelo evento: a exportação
+# (exportacao.gerar_exportacao) roda numa conexão própria do engine, e a rota fixa o
+# salão do filtro com salao_do_filtro().
+# Uma consulta pode sair do escopo com .execution_options(sem_escopo_salao=True).
+from functools import lru_cache
+
+from sqlalchemy import event # type: ignore
+from sqlalchemy.orm import Session, with_loader_criteria # type: ignore
+
+from . import models
+
+# Modelos com coluna salao_id (Cliente é compartilhado entre salões). VersaoAgenda
+# fica de fora: o contador é interno e sempre acessado pela chave do próprio salão.
+MODELOS_DO_SALAO = (
+    models.Profissional,
+    models.Servico,
+    models.Agendamento,
+    models.AgendamentoArquivado,
+    models.AgendamentoRemovido,
+    models.SerieAgendamento,
+    models.ResumoDiario,
+)
+
+
+class SalaoForaDoEscopoError(Exception):
+    """Tentativa de gravar, numa sessão de um salão, um objeto de outro salão."""
+
+
+# AsyncSession e Session expõem o mesmo dicionário info
+def salao_da_sessao(db):
+    return db.info.get("salao_id")
+
+
+def salao_do_filtro(db, salao_id=None):
+    """salao_id de um filtro explícito, ou o da sessão quando não veio nenhum.
+
+    Para consultas que não passam pelo escopo da sessão. Um salão diferente do da
+    sessão levanta SalaoForaDoEscopoError.
+    """
+    salao_sessao = salao_da_sessao(db)
+    if salao_id is None:
+        return salao_sessao
+    if salao_sessao is not None and salao_id != salao_sessao:
+        raise SalaoForaDoEscopoError(f"Salão {salao_id} fora do escopo do salão {salao_sessao}")
+    return salao_id
+
+
+def shard_da_sessao(db):
+    return db.info.get("shard")
+
+
+def visivel(db, obj):
+    """Devolve `obj` se ele pertence ao salão da sessão (ou se ela não tem escopo); senão None.
+
+    Para objetos que não vieram de uma consulta da sessão, como os do cache de catálogo.
+    """
+    salao_id = salao_da_sessao(db)
+    if obj is None or salao_id is None:
+        return obj
+    dono = obj.id if isinstance(obj, models.Salao) else getattr(obj, "salao_id", salao_id)
+    return obj if dono == salao_id else None
+
+
+# As opções são montadas uma vez por salão: o salao_id da closure vira parâmetro, então
+# a chave do cache de compilação é a mesma para todos os salões
+@lru_cache(maxsize=1024)
+def _criterios(salao_id: int):
+    criterios = [
+        with_loader_criteria(modelo, lambda cls: cls.salao_id == salao_id, include_aliases=True)
+        for modelo in MODELOS_DO_SALAO
+    ]
+    criterios.append(with_loader_criteria(models.Salao, lambda cls: cls.id == salao_id, include_aliases=True))
+    return tuple(criterios)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _aplicar_escopo(estado):
+    salao_id = estado.session.info.get("salao_id")
+    if salao_id is None or estado.execution_options.get("sem_escopo_salao", False):
+        return
+    # Carregamentos de coluna e de relacionamento herdam o critério da consulta de origem
+    if estado.is_select and (estado.is_column_load or estado.is_relationship_load):
+        return
+    if estado.is_select or estado.is_update or estado.is_delete:
+        estado.statement = estado.statement.options(*_criterios(salao_id))
+
+
+@event.listens_for(Session, "before_flush")
+def _verificar_gravacoes(sessao, contexto, instancias):
+    salao_id = sessao.info.get("salao_id")
+    if salao_id is None:
+        return
+    for obj in list(sessao.new) + list(sessao.dirty):
+        if isinstance(obj, MODELOS_DO_SALAO) and obj.salao_id != salao_id:
+            raise SalaoForaDoEscopoError(
+                f"{type(obj).__name__} do salão {obj.salao_id} numa sessão do salão {salao_id}"
+            )
@@ -0,0 +1,61 @@
+# backend/app/exportacao.py
+# Exportação em streaming: as linhas vêm do banco por um cursor do lado do servidor
+# (stream_results) em blocos, são codificadas direto das tuplas e enviadas aos poucos.
+# O uso de memória fica constante, não importa o tamanho do resultado.
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+# Linhas buscadas do cursor (e enviadas ao cliente) por vez
+LINHAS_POR_BLOCO = 1000
+
+FORMATOS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _valor_json(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return valor
+
+
+def _bloco_ndjson(nomes, linhas) -> str:
+    return "".join(
+        json.dumps({nome: _valor_json(valor) for nome, valor in zip(nomes, linha)}, ensure_ascii=False) + "\n"
+        for linha in linhas
+    )
+
+
+def _bloco_csv(linhas) -> str:
+    saida = io.StringIO()
+    csv.writer(saida).writerows(
+        [valor.isoformat() if isinstance(valor, (datetime, date)) else valor for valor in linha]
+        for linha in linhas
+    )
+    return saida.getvalue()
+
+
+def gerar_exportacao(engine, stmt, formato: str):
+    """Gerador que executa `stmt` com cursor de servidor e devolve o resultado em blocos de texto.
+
+    Usa uma conexão própria do engine: o gerador roda enquanto a resposta é enviada,
+    depois que a sessão da requisição já pode ter sido fechada.
+    """
+    with engine.connect() as conexao:
+        resultado = conexao.execution_options(
+            stream_results=True, yield_per=LINHAS_POR_BLOCO
+        ).execute(stmt)
+        nomes = list(resultado.keys())
+        if formato == "csv":
+            yield _bloco_csv([nomes])
+        for linhas in resultado.partitions():
+            if formato == "csv":
+                yield _bloco_csv(linhas)
+            else:
+                yield _bloco_ndjson(nomes, linhas)
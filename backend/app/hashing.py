@@ -0,0 +1,150 @@
+# backend/app/hashing.py
+# Serviço de hash de senhas: o bcrypt roda em um pool de processos limitado,
+# fora do processo que atende as requisições, com fila máxima (backpressure).
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from dotenv import load_dotenv
+from passlib.context import CryptContext # type: ignore
+
+load_dotenv()
+
+# Custo do bcrypt (2^rounds iterações). 12 é o padrão do passlib.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Processos dedicados ao hash. 0 desliga o pool e faz o hash no próprio processo.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+# Quantos hashes podem estar em execução ou na fila ao mesmo tempo
+HASH_FILA_MAX = int(os.getenv("HASH_FILA_MAX", str(max(1, HASH_WORKERS) * 4)))
+# Tempo máximo (segundos) esperando vaga na fila antes de recusar a requisição
+HASH_ESPERA_MAX = float(os.getenv("HASH_ESPERA_MAX", "2"))
+# Prioridade (nice) dos processos de hash: acima de 0 cede CPU às requisições
+HASH_NICE = int(os.getenv("HASH_NICE", "10"))
+
+
+class HashingSobrecarregadoError(Exception):
+    """A fila de hash está cheia: a requisição deve ser recusada (503) em vez de esperar."""
+
+
+_contextos = {}
+
+def _contexto(rounds: int) -> CryptContext:
+    # Um CryptContext por processo (e por custo), reaproveitado entre chamadas
+    if rounds not in _contextos:
+        _contextos[rounds] = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+    return _contextos[rounds]
+
+def _gerar_hash(senha: str, rounds: int) -> str:
+    return _contexto(rounds).hash(senha)
+
+def _verificar(senha: str, senha_hash: str, rounds: int) -> bool:
+    return _contexto(rounds).verify(senha, senha_hash)
+
+
+def _inicializar_worker(nice: int):
+    if nice and hasattr(os, "nice"):
+        os.nice(nice)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_vagas = threading.BoundedSemaphore(HASH_FILA_MAX)
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: o processo da API tem threads ativas, e fork com threads pode travar
+            _executor = ProcessPoolExecutor(
+                max_workers=HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_inicializar_worker,
+                initargs=(HASH_NICE,),
+            )
+        return _executor
+
+def _submeter(funcao, *args):
+    if not _vagas.acquire(timeout=HASH_ESPERA_MAX):
+        raise HashingSobrecarregadoError()
+    try:
+        futuro = _get_executor().submit(funcao, *args)
+    except Exception:
+        _vagas.release()
+        raise
+    futuro.add_done_callback(lambda _: _vagas.release())
+    return futuro
+
+def _devolver_vaga_nao_usada(espera):
+    if not espera.cancelled() and espera.exception() is None and espera.result():
+        _vagas.release()
+
+async def _esperar_vaga() -> bool:
+    loop = asyncio.get_running_loop()
+    espera = loop.run_in_executor(None, _vagas.acquire, True, HASH_ESPERA_MAX)
+    try:
+        # shield: cancelar a requisição não descarta o resultado da thread, que continua esperando
+        return await asyncio.shield(espera)
+    except asyncio.CancelledError:
+        # Requisição cancelada (ex.: cliente desconectou): se a thread ainda conseguir
+        # a vaga, ninguém vai usá-la, então ela é devolvida
+        espera.add_done_callback(_devolver_vaga_nao_usada)
+        raise
+
+async def _submeter_async(funcao, *args):
+    # Tenta a vaga sem bloquear o event loop; se a fila estiver cheia, espera em uma thread
+    if not _vagas.acquire(blocking=False):
+        if not await _esperar_vaga():
+            raise HashingSobrecarregadoError()
+    try:
+        futuro = _get_executor().submit(funcao, *args)
+    except Exception:
+        _vagas.release()
+        raise
+    futuro.add_done_callback(lambda _: _vagas.release())
+    return await asyncio.wrap_future(futuro)
+
+
+def hash_senha(senha: str) -> str:
+    if HASH_WORKERS <= 0:
+        return _gerar_hash(senha, BCRYPT_ROUNDS)
+    return _submeter(_gerar_hash, senha, BCRYPT_ROUNDS).result()
+
+def verificar_senha(senha: str, senha_hash: str) -> bool:
+    if HASH_WORKERS <= 0:
+        return _verificar(senha, senha_hash, BCRYPT_ROUNDS)
+    return _submeter(_verificar, senha, senha_hash, BCRYPT_ROUNDS).result()
+
+async def _em_thread(funcao, *args):
+    # Sem pool dedicado: ao menos não bloqueia o event loop
+    return await asyncio.get_running_loop().run_in_executor(None, funcao, *args)
+
+async def hash_senha_async(senha: str) -> str:
+    if HASH_WORKERS <= 0:
+        return await _em_thread(_gerar_hash, senha, BCRYPT_ROUNDS)
+    return await _submeter_async(_gerar_hash, senha, BCRYPT_ROUNDS)
+
+async def verificar_senha_async(senha: str, senha_hash: str) -> bool:
+    if HASH_WORKERS <= 0:
+        return await _em_thread(_verificar, senha, senha_hash, BCRYPT_ROUNDS)
+    return await _submeter_async(_verificar, senha, senha_hash, BCRYPT_ROUNDS)
+
+def _aquecer(rounds: int) -> None:
+    _contexto(rounds)
+
+def iniciar():
+    """Sobe os processos de hash antecipadamente, para o primeiro cadastro não pagar o spawn."""
+    if HASH_WORKERS <= 0:
+        return
+    executor = _get_executor()
+    for futuro in [executor.submit(_aquecer, BCRYPT_ROUNDS) for _ in range(HASH_WORKERS)]:
+        futuro.result()
+
+def encerrar():
+    """Finaliza os processos de hash (chamado no shutdown da aplicação)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
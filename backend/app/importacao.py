@@ -0,0 +1,128 @@
+# backend/app/importacao.py
+# Leitura de importações em lote: JSON (array), NDJSON ou CSV, lidos do corpo da
+# requisição em streaming, validados pelos schemas e gravados em lotes.
+import codecs
+import csv
+import json
+from typing import Callable, List, Tuple
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+
+# Quantidade de linhas por INSERT / transação
+TAMANHO_LOTE = 1000
+
+
+class ErroLeitura(Exception):
+    """Linha que não pôde ser lida (JSON malformado, colunas demais no CSV...)."""
+
+
+async def _linhas(request: Request):
+    decodificador = codecs.getincrementaldecoder("utf-8")()
+    resto = ""
+    async for pedaco in request.stream():
+        resto += decodificador.decode(pedaco)
+        *completas, resto = resto.split("\n")
+        for linha in completas:
+            yield linha
+    resto += decodificador.decode(b"", final=True)
+    if resto:
+        yield resto
+
+
+async def _registros_ndjson(request: Request):
+    async for linha in _linhas(request):
+        if not linha.strip():
+            continue
+        try:
+            yield json.loads(linha)
+        except ValueError:
+            yield ErroLeitura("JSON inválido")
+
+
+async def _registros_csv(request: Request):
+    cabecalho = None
+    pendente = ""
+    async for linha in _linhas(request):
+        # Campo entre aspas com quebra de linha: junta até fechar as aspas
+        pendente = f"{pendente}\n{linha}" if pendente else linha
+        if pendente.count('"') % 2:
+            continue
+        texto, pendente = pendente.rstrip("\r"), ""
+        if not texto.strip():
+            continue
+        valores = next(csv.reader([texto]))
+        if cabecalho is None:
+            cabecalho = [coluna.strip() for coluna in valores]
+            continue
+        if len(valores) > len(cabecalho):
+            yield ErroLeitura("Linha com mais colunas que o cabeçalho")
+            continue
+        # Célula vazia no CSV equivale a campo não informado
+        yield {coluna: valor for coluna, valor in zip(cabecalho, valores) if valor != ""}
+    if pendente:
+        yield ErroLeitura("Aspas não fechadas")
+
+
+async def _registros_json(request: Request):
+    try:
+        dados = json.loads(await request.body())
+    except ValueError:
+        raise ErroLeitura("JSON inválido")
+    if not isinstance(dados, list):
+        raise ErroLeitura("O corpo deve ser um array JSON")
+    for registro in dados:
+        yield registro
+
+
+def ler_registros(request: Request):
+    tipo = request.headers.get("content-type", "application/json").split(";")[0].strip().lower()
+    if tipo in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        return _registros_ndjson(request)
+    if tipo in ("text/csv", "application/csv"):
+        return _registros_csv(request)
+    return _registros_json(request)
+
+
+def _mensagem_validacao(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(parte) for parte in erro['loc'])}: {erro['msg']}" for erro in exc.errors()
+    )
+
+
+async def importar(request: Request, schema, inserir_lote: Callable[[List], List[Tuple[int, str]]]):
+    """Valida cada registro com `schema` e chama `inserir_lote` (em thread) a cada TAMANHO_LOTE válidos."""
+    resultado = {"recebidos": 0, "inseridos": 0, "erros": []}
+    lote, linhas_do_lote = [], []
+
+    async def descarregar():
+        erros = await run_in_threadpool(inserir_lote, lote)
+        resultado["inseridos"] += len(lote) - len(erros)
+        resultado["erros"].extend({"linha": linhas_do_lote[indice], "erro": mensagem} for indice, mensagem in erros)
+        lote.clear()
+        linhas_do_lote.clear()
+
+    numero = 0
+    async for registro in ler_registros(request):
+        numero += 1
+        resultado["recebidos"] += 1
+        if isinstance(registro, ErroLeitura):
+            resultado["erros"].append({"linha": numero, "erro": str(registro)})
+            continue
+        if not isinstance(registro, dict):
+            resultado["erros"].append({"linha": numero, "erro": "Registro deve ser um objeto"})
+            continue
+        try:
+            objeto = schema(**registro)
+        except ValidationError as exc:
+            resultado["erros"].append({"linha": numero, "erro": _mensagem_validacao(exc)})
+            continue
+        lote.append(objeto)
+        linhas_do_lote.append(numero)
+        if len(lote) >= TAMANHO_LOTE:
+            await descarregar()
+    if lote:
+        await descarregar()
+    resultado["erros"].sort(key=lambda erro: erro["linha"])
+    return resultado
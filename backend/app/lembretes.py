@@ -0,0 +1,120 @@
+# backend/app/lembretes.py
+# Lembretes de agendamento, enviados pela fila de tarefas (tarefas.py).
+#
+# A tarefa periódica "lembretes.agendar" varre só a faixa de data_hora_inicio que
+# entra na antecedência do lembrete (índice ix_agendamentos_inicio_id), e enfileira
+# um "lembretes.enviar" por agendamento, com chave única: varreduras sobrepostas
+# ou vários workers não geram lembretes duplicados.
+# Agendamentos feitos já dentro da antecedência não recebem lembrete.
+#
+# O envio passa por um remetente plugável (LEMBRETE_REMETENTE):
+#   log (padrão) - escreve no log "agendanet.lembretes"
+#   arquivo      - acrescenta uma linha JSON por lembrete em LEMBRETE_ARQUIVO
+# Um remetente real (SMS, WhatsApp, e-mail) só precisa de um método enviar(lembrete).
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+from sqlalchemy import select # type: ignore
+
+from . import crud, models, tarefas
+
+load_dotenv()
+
+logger = logging.getLogger("agendanet.lembretes")
+
+# Horas antes do início em que o lembrete é enviado
+LEMBRETE_ANTECEDENCIA_HORAS = float(os.getenv("LEMBRETE_ANTECEDENCIA_HORAS", "24"))
+# Intervalo, em segundos, entre as varreduras de agendamentos
+LEMBRETE_VARREDURA_SEGUNDOS = int(os.getenv("LEMBRETE_VARREDURA_SEGUNDOS", "300"))
+LEMBRETE_REMETENTE = os.getenv("LEMBRETE_REMETENTE", "log").lower()
+LEMBRETE_ARQUIVO = os.getenv("LEMBRETE_ARQUIVO", "lembretes.jsonl")
+
+STATUS_LEMBRETE = ("agendado", "confirmado")
+
+
+class RemetenteLog:
+    def enviar(self, lembrete: dict):
+        logger.info("Lembrete para %s: %s", lembrete["destino"] or "(sem contato)", lembrete["mensagem"])
+
+
+class RemetenteArquivo:
+    """Acrescenta cada lembrete como uma linha JSON no arquivo (útil em desenvolvimento e testes)."""
+
+    def __init__(self, caminho: str = LEMBRETE_ARQUIVO):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+
+    def enviar(self, lembrete: dict):
+        with self._lock, open(self.caminho, "a", encoding="utf-8") as arquivo:
+            arquivo.write(json.dumps(lembrete, ensure_ascii=False) + "\n")
+
+
+def _criar_remetente():
+    if LEMBRETE_REMETENTE == "arquivo":
+        return RemetenteArquivo()
+    return RemetenteLog()
+
+
+remetente = _criar_remetente()
+
+
+def configurar(novo_remetente):
+    """Troca o remetente dos lembretes (ex.: um cliente de SMS ou um fake em testes)."""
+    global remetente
+    remetente = novo_remetente
+    return remetente
+
+
+def select_agendamentos_para_lembrar(desde: datetime, ate: datetime):
+    # Faixa de data_hora_inicio: lê só o trecho do índice (data_hora_inicio, id) da janela
+    return select(models.Agendamento.id, models.Agendamento.data_hora_inicio).where(
+        models.Agendamento.data_hora_inicio >= desde,
+        models.Agendamento.data_hora_inicio < ate,
+        models.Agendamento.status.in_(STATUS_LEMBRETE),
+    ).order_by(models.Agendamento.data_hora_inicio, models.Agendamento.id)
+
+
+@tarefas.tarefa("lembretes.agendar", periodica_a_cada=LEMBRETE_VARREDURA_SEGUNDOS)
+def agendar_lembretes(db, payload):
+    agora = datetime.now()
+    antecedencia = timedelta(hours=LEMBRETE_ANTECEDENCIA_HORAS)
+    # A janela cobre duas varreduras: um worker atrasado não deixa agendamentos para trás
+    desde = agora + antecedencia - timedelta(seconds=LEMBRETE_VARREDURA_SEGUNDOS)
+    ate = agora + antecedencia + timedelta(seconds=LEMBRETE_VARREDURA_SEGUNDOS)
+    for agendamento_id, inicio in db.execute(select_agendamentos_para_lembrar(desde, ate)):
+        # O horário entra na chave: um agendamento remarcado ganha um lembrete novo
+        tarefas.enfileirar(
+            db, "lembretes.enviar",
+            {"agendamento_id": agendamento_id, "data_hora_inicio": inicio.isoformat()},
+            chave=f"lembrete:{agendamento_id}:{inicio.isoformat()}",
+        )
+    db.commit()
+
+
+def montar_lembrete(agendamento) -> dict:
+    cliente = agendamento.cliente
+    mensagem = (
+        f"Olá, {cliente.nome}! Lembrete do seu horário de {agendamento.servico.nome} "
+        f"com {agendamento.profissional.nome} no {agendamento.salao.nome}, "
+        f"em {agendamento.data_hora_inicio:%d/%m/%Y} às {agendamento.data_hora_inicio:%H:%M}."
+    )
+    return {
+        "agendamento_id": agendamento.id,
+        "cliente_id": cliente.id,
+        "destino": cliente.telefone or cliente.email,
+        "mensagem": mensagem,
+    }
+
+
+@tarefas.tarefa("lembretes.enviar")
+def enviar_lembrete(db, payload):
+    agendamento = crud.get_agendamento(db, payload["agendamento_id"], expand=set(crud.RELACIONAMENTOS_AGENDAMENTO))
+    # Cancelado, excluído ou remarcado depois de enfileirado: este lembrete não vale mais
+    if (agendamento is None or agendamento.status not in STATUS_LEMBRETE
+            or agendamento.data_hora_inicio.isoformat() != payload["data_hora_inicio"]):
+        return
+    remetente.enviar(montar_lembrete(agendamento))
@@ -1,50 +1,178 @@
 # backend/app/main.py
-from fastapi import FastAPI, Depends, HTTPException, status
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session # type: ignore
-from typing import List
+from typing import List, Optional
+from datetime import date, datetime, timedelta
 
-from .database import get_db
-from . import models, schemas, crud # Importe o crud e os schemas
+from .database import DB_MODO, get_db, get_db_primario
+from . import admissao, cache, condicional, database, escopo, exportacao, hashing, importacao, metricas, models, schemas, crud, disponibilidade, paginacao, recorrencia, relatorios, sincronizacao, tarefas # Importe o crud e os schemas
+from .paginacao import definir_proximo_cursor
+from .serializacao import RespostaORJSON, responder_lista
+from .validacoes import validar_expand, validar_intervalo_agendamento, validar_patch
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Os processos do pool de hash sobem junto com a aplicação e encerram com ela
+    await run_in_threadpool(hashing.iniciar)
+    # TAREFAS_MODO=api: o worker da fila roda numa thread deste processo
+    trabalhador = None
+    if tarefas.TAREFAS_MODO == "api":
+        tarefas.carregar_tarefas()
+        trabalhador = tarefas.Trabalhador()
+        trabalhador.iniciar()
+    yield
+    if trabalhador is not None:
+        await run_in_threadpool(trabalhador.encerrar)
+    hashing.encerrar()
 
 app = FastAPI(
     title="API de Agendamento Salão de Beleza",
     description="API para gerenciar agendamentos, salões, profissionais, serviços e clientes.",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
+# Limite de taxa por salão e teto de concorrência (429/503 com Retry-After)
+app.add_middleware(admissao.MiddlewareAdmissao)
+# Latência, consultas SQL e tempo de banco por rota (GET /metrics). Adicionado por
+# último, fica por fora e também conta as recusas da admissão.
+app.add_middleware(metricas.MiddlewareMetricas)
+
+# Cursor de paginação malformado vira 400 em qualquer rota de listagem
+@app.exception_handler(paginacao.CursorInvalidoError)
+def cursor_invalido_handler(request: Request, exc: paginacao.CursorInvalidoError):
+    return JSONResponse(status_code=400, content={"detail": "Cursor de paginação inválido"})
+
+# Fila de hash de senhas cheia: recusa rápido em vez de segurar o worker
+@app.exception_handler(hashing.HashingSobrecarregadoError)
+def hashing_sobrecarregado_handler(request: Request, exc: hashing.HashingSobrecarregadoError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Serviço temporariamente sobrecarregado, tente novamente"},
+        headers={"Retry-After": "1"},
+    )
+
+# Requisição de um salão (X-Salao-Id) tentando gravar dados de outro
+@app.exception_handler(escopo.SalaoForaDoEscopoError)
+def salao_fora_do_escopo_handler(request: Request, exc: escopo.SalaoForaDoEscopoError):
+    return JSONResponse(status_code=403, content={"detail": "Salão fora do escopo da requisição"})
+
+# Token de sincronização anterior às lápides já apagadas: o tablet recomeça sem token
+@app.exception_handler(sincronizacao.TokenExpiradoError)
+def token_expirado_handler(request: Request, exc: sincronizacao.TokenExpiradoError):
+    return JSONResponse(status_code=410, content={"detail": "Token expirado, sincronize novamente sem since"})
+
+# Corpo de importação ilegível (ex.: JSON que não é um array)
+@app.exception_handler(importacao.ErroLeitura)
+def erro_leitura_handler(request: Request, exc: importacao.ErroLeitura):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
 @app.get("/")
 def read_root():
     return {"message": "Bem-vindo à API de Agendamento do Salão de Beleza!"}
 
+# Métricas no formato texto do Prometheus: latência por rota, consultas SQL por
+# requisição, consultas lentas, pool de conexões, cache de catálogo e admissão
+@app.get("/metrics", include_in_schema=False)
+def read_metricas():
+    return Response(
+        metricas.exportar(database.estatisticas_pools(), cache.catalogo.estatisticas(),
+                          admissao.controle.estatisticas()),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+# Endpoint interno com as estatísticas do pool de conexões
+@app.get("/metrics/pool", include_in_schema=False)
+def read_metricas_pool():
+    return database.estatisticas_pools()
+
+# Endpoint interno com a saúde e o atraso das réplicas de leitura
+@app.get("/metrics/replicas", include_in_schema=False)
+def read_metricas_replicas():
+    return database.estatisticas_replicas()
+
+# Endpoint interno com acertos/falhas do cache de catálogo (salões, serviços, profissionais)
+@app.get("/metrics/cache", include_in_schema=False)
+def read_metricas_cache():
+    return cache.catalogo.estatisticas()
+
+# Endpoint interno com as requisições admitidas e recusadas (429/503) pela admissão
+@app.get("/metrics/admissao", include_in_schema=False)
+def read_metricas_admissao():
+    return admissao.controle.estatisticas()
+
+# Endpoint interno com o tamanho e o atraso da fila de tarefas em segundo plano
+@app.get("/metrics/tarefas", include_in_schema=False)
+def read_metricas_tarefas(db: Session = Depends(get_db)):
+    return tarefas.estatisticas(db)
+
 # Endpoint para criar um salão
 @app.post("/saloes/", response_model=schemas.Salao, status_code=status.HTTP_201_CREATED)
-def create_salao(salao: schemas.SalaoCreate, db: Session = Depends(get_db)):
-    db_salao = crud.get_salao_by_email(db, email=salao.email)
+async def create_salao(salao: schemas.SalaoCreate, db: Session = Depends(get_db)):
+    db_salao = await run_in_threadpool(crud.get_salao_by_email, db, email=salao.email)
     if db_salao:
         raise HTTPException(status_code=400, detail="Email já registrado")
-    return crud.create_salao(db=db, salao=salao)
+    # Devolve a conexão ao pool e aguarda o bcrypt no event loop: durante o hash
+    # a requisição não segura nem thread nem conexão com o banco
+    await run_in_threadpool(db.close)
+    senha_hash = await hashing.hash_senha_async(salao.senha)
+    return await run_in_threadpool(crud.create_salao, db=db, salao=salao, senha_hash=senha_hash)
 
 # Endpoint para listar salões
-@app.get("/saloes/", response_model=List[schemas.Salao])
-def read_saloes(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    saloes = crud.get_saloes(db, skip=skip, limit=limit)
-    return saloes
+@app.get("/saloes/", response_model=List[schemas.Salao], response_class=RespostaORJSON)
+def read_saloes(request: Request, response: Response, skip: int = 0, limit: int = 100, cursor: str = None,
+                db: Session = Depends(get_db)):
+    nao_modificado = condicional.responder_colecao(
+        request, response, "saloes", models.Salao, crud.get_versao_tabela(db, models.Salao)
+    )
+    if nao_modificado is not None:
+        return nao_modificado
+    saloes = crud.get_listagem(db, models.Salao, skip=skip, limit=limit, cursor=cursor)
+    definir_proximo_cursor(response, saloes)
+    return responder_lista(response, saloes)
 
 # Endpoint para obter um salão por ID
 @app.get("/saloes/{salao_id}", response_model=schemas.Salao)
-def read_salao(salao_id: int, db: Session = Depends(get_db)):
+def read_salao(salao_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     db_salao = crud.get_salao(db, salao_id=salao_id)
     if db_salao is None:
         raise HTTPException(status_code=404, detail="Salão não encontrado")
-    return db_salao
+    return condicional.responder_objeto(request, response, "salao", db_salao) or db_salao
 
 # Endpoint para atualizar um salão
 @app.put("/saloes/{salao_id}", response_model=schemas.Salao)
-def update_salao(salao_id: int, salao: schemas.SalaoUpdate, db: Session = Depends(get_db)):
-    db_salao = crud.get_salao(db, salao_id=salao_id)
+async def update_salao(salao_id: int, salao: schemas.SalaoUpdate, db: Session = Depends(get_db)):
+    db_salao = await run_in_threadpool(crud.get_salao, db, salao_id=salao_id)
     if db_salao is None:
         raise HTTPException(status_code=404, detail="Salão não encontrado")
-    return crud.update_salao(db=db, salao_id=salao_id, salao=salao)
+    senha_hash = None
+    if salao.senha:
+        await run_in_threadpool(db.close)
+        senha_hash = await hashing.hash_senha_async(salao.senha)
+    return await run_in_threadpool(crud.update_salao, db=db, salao_id=salao_id, salao=salao,
+                                   senha_hash=senha_hash)
+
+# Endpoint para atualizar parcialmente um salão: grava só os campos enviados,
+# em um único UPDATE, sem ler o salão antes
+@app.patch("/saloes/{salao_id}", response_model=schemas.Salao)
+async def patch_salao(salao_id: int, salao: schemas.SalaoPatch, db: Session = Depends(get_db)):
+    dados = salao.dict(exclude_unset=True)
+    validar_patch(models.Salao, dados)
+    if dados.get("email"):
+        existente = await run_in_threadpool(crud.get_salao_by_email, db, email=dados["email"])
+        if existente and existente.id != salao_id:
+            raise HTTPException(status_code=400, detail="Email já registrado")
+    senha = dados.pop("senha", None)
+    if senha:
+        await run_in_threadpool(db.close)
+        dados["senha_hash"] = await hashing.hash_senha_async(senha)
+    db_salao = await run_in_threadpool(crud.patch_salao, db, salao_id, dados)
+    if db_salao is None:
+        raise HTTPException(status_code=404, detail="Salão não encontrado")
+    return db_salao
 
 # Endpoint para deletar um salão
 @app.delete("/saloes/{salao_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -55,6 +183,46 @@ def delete_salao(salao_id: int, db: Session = Depends(get_db)):
     crud.delete_salao(db=db, salao_id=salao_id)
     return {"detail": "Salão deletado com sucesso"}
 
+# Endpoint para consultar horários livres dos profissionais de um salão
+@app.get("/saloes/{salao_id}/disponibilidade", response_model=schemas.Disponibilidade)
+def read_disponibilidade(salao_id: int, servico_id: int, data: date,
+                         dias: int = Query(1, ge=1, le=7), db: Session = Depends(get_db)):
+    db_servico = crud.get_servico(db, servico_id=servico_id)
+    if db_servico is None or db_servico.salao_id != salao_id:
+        raise HTTPException(status_code=404, detail="Serviço não encontrado para este salão")
+    profissionais = disponibilidade.calcular_disponibilidade(db, salao_id, db_servico, data, dias)
+    return {
+        "salao_id": salao_id,
+        "servico_id": servico_id,
+        "data": data,
+        "dias": dias,
+        "duracao_minutos": db_servico.duracao_minutos,
+        "profissionais": profissionais,
+    }
+
+# Endpoint de relatórios do salão (faturamento, ocupação, cancelamentos e não comparecimento).
+# Lê só a tabela de resumos diários, então não depende do tamanho do histórico.
+@app.get("/saloes/{salao_id}/relatorios", response_model=schemas.Relatorio)
+def read_relatorio(salao_id: int, de: Optional[date] = None, ate: Optional[date] = None,
+                   agrupar: str = "dia", db: Session = Depends(get_db)):
+    if agrupar not in relatorios.AGRUPAMENTOS:
+        raise HTTPException(status_code=400, detail="agrupar deve ser dia, mes, profissional ou servico")
+    ate = ate or date.today()
+    de = de or ate - timedelta(days=29)
+    if de > ate:
+        raise HTTPException(status_code=400, detail="A data inicial deve ser anterior à final")
+    if crud.get_salao(db, salao_id=salao_id) is None:
+        raise HTTPException(status_code=404, detail="Salão não encontrado")
+    return {
+        "salao_id": salao_id,
+        "de": de,
+        "ate": ate,
+        "agrupar": agrupar,
+        "linhas": relatorios.gerar_relatorio(
+            db, salao_id, de, ate, agrupar, disponibilidade.minutos_expediente()
+        ),
+    }
+
 #endpoint para criar um profissional
 @app.post("/profissionais/", response_model=schemas.Profissional, status_code=status.HTTP_201_CREATED)
 def create_profissional(profissional: schemas.ProfissionalCreate, db: Session = Depends(get_db)):
@@ -64,18 +232,38 @@ def create_profissional(profissional: schemas.ProfissionalCreate, db: Session =
     return crud.create_profissional(db=db, profissional=profissional)
 
 # Endpoint para listar profissionais
-@app.get("/profissionais/", response_model=List[schemas.Profissional])
-def read_profissionais(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    profissionais = crud.get_profissionais(db, skip=skip, limit=limit)
-    return profissionais
+@app.get("/profissionais/", response_model=List[schemas.Profissional], response_class=RespostaORJSON)
+def read_profissionais(request: Request, response: Response, skip: int = 0, limit: int = 100,
+                       cursor: str = None, salao_id: Optional[int] = None, db: Session = Depends(get_db)):
+    nao_modificado = condicional.responder_colecao(
+        request, response, "profissionais", models.Profissional,
+        crud.get_versao_tabela(db, models.Profissional, salao_id),
+    )
+    if nao_modificado is not None:
+        return nao_modificado
+    profissionais = crud.get_listagem(db, models.Profissional, skip=skip, limit=limit, cursor=cursor,
+                                      salao_id=salao_id)
+    definir_proximo_cursor(response, profissionais)
+    return responder_lista(response, profissionais)
+
+# Endpoint de busca de profissionais por salão, especialidade e nome (ranqueada).
+# Precisa vir antes de /profissionais/{profissional_id} para "search" não ser lido como id.
+@app.get("/profissionais/search", response_model=List[schemas.Profissional])
+def search_profissionais(salao_id: Optional[int] = None, especialidade: Optional[str] = None,
+                         q: Optional[str] = None, skip: int = Query(0, ge=0),
+                         limit: int = Query(20, ge=1, le=crud.LIMITE_BUSCA_PROFISSIONAIS),
+                         db: Session = Depends(get_db)):
+    return crud.buscar_profissionais(db, salao_id=salao_id, especialidade=especialidade, q=q,
+                                     skip=skip, limit=limit)
 
 # Endpoint para obter um profissional por ID
 @app.get("/profissionais/{profissional_id}", response_model=schemas.Profissional)
-def read_profissional(profissional_id: int, db: Session = Depends(get_db)):
+def read_profissional(profissional_id: int, request: Request, response: Response,
+                      db: Session = Depends(get_db)):
     db_profissional = crud.get_profissional(db, profissional_id=profissional_id)
     if db_profissional is None:
         raise HTTPException(status_code=404, detail="Profissional não encontrado")
-    return db_profissional
+    return condicional.responder_objeto(request, response, "profissional", db_profissional) or db_profissional
 
 # Endpoint para atualizar um profissional
 @app.put("/profissionais/{profissional_id}", response_model=schemas.Profissional)
@@ -86,6 +274,17 @@ def update_profissional(profissional_id: int, profissional: schemas.Profissional
         raise HTTPException(status_code=404, detail="Profissional não encontrado")
     return crud.update_profissional(db=db, profissional_id=profissional_id, profissional=profissional)
 
+# Endpoint para atualizar parcialmente um profissional
+@app.patch("/profissionais/{profissional_id}", response_model=schemas.Profissional)
+def patch_profissional(profissional_id: int, profissional: schemas.ProfissionalPatch,
+                       db: Session = Depends(get_db)):
+    dados = profissional.dict(exclude_unset=True)
+    validar_patch(models.Profissional, dados)
+    db_profissional = crud.patch_profissional(db, profissional_id, dados)
+    if db_profissional is None:
+        raise HTTPException(status_code=404, detail="Profissional não encontrado")
+    return db_profissional
+
 # Endpoint para deletar um profissional
 @app.delete("/profissionais/{profissional_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_profissional(profissional_id: int, db: Session = Depends(get_db)):
@@ -100,20 +299,33 @@ def delete_profissional(profissional_id: int, db: Session = Depends(get_db)):
 def create_servico(servico: schemas.ServicoCreate, db: Session = Depends(get_db)):
     return crud.create_servico(db=db, servico=servico)
 
+# Endpoint para importar serviços em lote (JSON, NDJSON ou CSV)
+@app.post("/servicos/bulk", response_model=schemas.ResultadoImportacao)
+async def importar_servicos(request: Request, db: Session = Depends(get_db)):
+    return await importacao.importar(
+        request, schemas.ServicoCreate, lambda lote: crud.create_servicos_em_lote(db, lote)
+    )
+
 # Endpoint para listar serviços
-@app.get("/servicos/", response_model=List[schemas.Servico])
-def read_servicos(skip: int = 0, limit: int = 100, db
-: Session = Depends(get_db)):
-    servicos = crud.get_servicos(db, skip=skip, limit=limit)
-    return servicos
+@app.get("/servicos/", response_model=List[schemas.Servico], response_class=RespostaORJSON)
+def read_servicos(request: Request, response: Response, skip: int = 0, limit: int = 100, cursor: str = None,
+                  salao_id: Optional[int] = None, db: Session = Depends(get_db)):
+    nao_modificado = condicional.responder_colecao(
+        request, response, "servicos", models.Servico, crud.get_versao_tabela(db, models.Servico, salao_id)
+    )
+    if nao_modificado is not None:
+        return nao_modificado
+    servicos = crud.get_listagem(db, models.Servico, skip=skip, limit=limit, cursor=cursor, salao_id=salao_id)
+    definir_proximo_cursor(response, servicos)
+    return responder_lista(response, servicos)
 
 # Endpoint para obter um serviço por ID
 @app.get("/servicos/{servico_id}", response_model=schemas.Servico)
-def read_servico(servico_id: int, db: Session = Depends(get_db)):
+def read_servico(servico_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     db_servico = crud.get_servico(db, servico_id=servico_id)
     if db_servico is None:
         raise HTTPException(status_code=404, detail="Serviço não encontrado")
-    return db_servico
+    return condicional.responder_objeto(request, response, "servico", db_servico) or db_servico
 
 # Endpoint para atualizar um serviço
 @app.put("/servicos/{servico_id}", response_model=schemas.Servico)
@@ -124,6 +336,16 @@ def update_servico(servico_id: int, servico: schemas.ServicoUpdate, db
         raise HTTPException(status_code=404, detail="Serviço não encontrado")
     return crud.update_servico(db=db, servico_id=servico_id, servico=servico)
 
+# Endpoint para atualizar parcialmente um serviço
+@app.patch("/servicos/{servico_id}", response_model=schemas.Servico)
+def patch_servico(servico_id: int, servico: schemas.ServicoPatch, db: Session = Depends(get_db)):
+    dados = servico.dict(exclude_unset=True)
+    validar_patch(models.Servico, dados)
+    db_servico = crud.patch_servico(db, servico_id, dados)
+    if db_servico is None:
+        raise HTTPException(status_code=404, detail="Serviço não encontrado")
+    return db_servico
+
 # Endpoint para deletar um serviço
 @app.delete("/servicos/{servico_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_servico(servico_id: int, db: Session = Depends(get_db)):
@@ -137,11 +359,35 @@ def delete_servico(servico_id: int, db: Session = Depends(get_db)):
 @app.post("/clientes/", response_model=schemas.Cliente, status_code=status.HTTP_201_CREATED)
 def create_cliente(cliente: schemas.ClienteCreate, db: Session = Depends(get_db)):
     return crud.create_cliente(db=db, cliente=cliente)
+# Endpoint para importar clientes em lote (JSON, NDJSON ou CSV)
+@app.post("/clientes/bulk", response_model=schemas.ResultadoImportacao)
+async def importar_clientes(request: Request, db: Session = Depends(get_db)):
+    return await importacao.importar(
+        request, schemas.ClienteCreate, lambda lote: crud.create_clientes_em_lote(db, lote)
+    )
+
 # Endpoint para listar clientes
-@app.get("/clientes/", response_model=List[schemas.Cliente])
-def read_clientes(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    clientes = crud.get_clientes(db, skip=skip, limit=limit)
-    return clientes
+@app.get("/clientes/", response_model=List[schemas.Cliente], response_class=RespostaORJSON)
+def read_clientes(response: Response, skip: int = 0, limit: int = 100, cursor: str = None,
+                  db: Session = Depends(get_db)):
+    clientes = crud.get_listagem(db, models.Cliente, skip=skip, limit=limit, cursor=cursor)
+    definir_proximo_cursor(response, clientes)
+    return responder_lista(response, clientes)
+# Endpoint para buscar clientes por prefixo de telefone e/ou e-mail (balcão de atendimento).
+# Precisa vir antes de /clientes/{cliente_id} para "search" não ser lido como id.
+@app.get("/clientes/search", response_model=List[schemas.Cliente])
+def search_clientes(telefone: Optional[str] = None, email: Optional[str] = None,
+                    limit: int = Query(20, ge=1, le=crud.LIMITE_BUSCA_CLIENTES), db: Session = Depends(get_db)):
+    if not (telefone and telefone.strip()) and not (email and email.strip()):
+        raise HTTPException(status_code=400, detail="Informe telefone ou email")
+    return crud.buscar_clientes(db, telefone=telefone, email=email, limit=limit)
+# Endpoint para o fluxo de agendamento: devolve o cliente com o mesmo telefone (ou e-mail)
+# se já existir (200) ou cria um novo (201)
+@app.post("/clientes/find-or-create", response_model=schemas.Cliente)
+def find_or_create_cliente(cliente: schemas.ClienteCreate, response: Response, db: Session = Depends(get_db)):
+    db_cliente, criado = crud.find_or_create_cliente(db, cliente)
+    response.status_code = status.HTTP_201_CREATED if criado else status.HTTP_200_OK
+    return db_cliente
 # Endpoint para obter um cliente por ID
 @app.get("/clientes/{cliente_id}", response_model=schemas.Cliente)
 def read_cliente(cliente_id: int, db: Session = Depends(get_db)):
@@ -150,6 +396,19 @@ def read_cliente(cliente_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
     return db_cliente
 
+# Histórico de agendamentos do cliente, inclusive os arquivados (arquivamento.py),
+# do mais antigo para o mais recente, com paginação por cursor
+@app.get("/clientes/{cliente_id}/agendamentos", response_model=List[schemas.Agendamento],
+         response_class=RespostaORJSON)
+def read_historico_cliente(cliente_id: int, response: Response, skip: int = 0, limit: int = 100,
+                           cursor: str = None, salao_id: Optional[int] = None, db: Session = Depends(get_db)):
+    if crud.get_cliente(db, cliente_id=cliente_id) is None:
+        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+    agendamentos = crud.get_historico_cliente(db, cliente_id, skip=skip, limit=limit, cursor=cursor,
+                                              salao_id=salao_id)
+    definir_proximo_cursor(response, agendamentos)
+    return responder_lista(response, agendamentos)
+
 # Endpoint para atualizar um cliente
 @app.put("/clientes/{cliente_id}", response_model=schemas.Cliente)
 def update_cliente(cliente_id: int, cliente: schemas.ClienteUpdate, db: Session = Depends(get_db)):
@@ -158,6 +417,16 @@ def update_cliente(cliente_id: int, cliente: schemas.ClienteUpdate, db: Session
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
     return crud.update_cliente(db=db, cliente_id=cliente_id, cliente=cliente)
 
+# Endpoint para atualizar parcialmente um cliente
+@app.patch("/clientes/{cliente_id}", response_model=schemas.Cliente)
+def patch_cliente(cliente_id: int, cliente: schemas.ClientePatch, db: Session = Depends(get_db)):
+    dados = cliente.dict(exclude_unset=True)
+    validar_patch(models.Cliente, dados)
+    db_cliente = crud.patch_cliente(db, cliente_id, dados)
+    if db_cliente is None:
+        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+    return db_cliente
+
 # Endpoint para deletar um cliente
 @app.delete("/clientes/{cliente_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_cliente(cliente_id: int, db: Session = Depends(get_db)):
@@ -171,33 +440,161 @@ def delete_cliente(cliente_id: int, db: Session = Depends(get_db)):
 @app.post("/agendamentos/", response_model=schemas.Agendamento, status_code=status.HTTP_201_CREATED)
 def create_agendamento(agendamento: schemas.AgendamentoCreate, db: Session = Depends
 (get_db)):
-    return crud.create_agendamento(db=db, agendamento=agendamento)
+    validar_intervalo_agendamento(agendamento)
+    try:
+        return crud.create_agendamento(db=db, agendamento=agendamento)
+    except crud.HorarioIndisponivelError:
+        raise HTTPException(status_code=409, detail="Profissional já possui agendamento neste horário")
+
+# Endpoint para importar agendamentos em lote (JSON, NDJSON ou CSV).
+# O conflito de horário é verificado para o lote inteiro, inclusive entre as linhas enviadas.
+@app.post("/agendamentos/bulk", response_model=schemas.ResultadoImportacao)
+async def importar_agendamentos(request: Request, db: Session = Depends(get_db)):
+    return await importacao.importar(
+        request, schemas.AgendamentoCreate, lambda lote: crud.create_agendamentos_em_lote(db, lote)
+    )
+
+# Endpoint para criar uma série recorrente (ex.: toda semana no mesmo horário).
+# As ocorrências até o horizonte são gravadas em uma transação; se alguma conflita
+# com a agenda do profissional, nada é gravado e a resposta lista os horários.
+@app.post("/agendamentos/recorrentes", response_model=schemas.SerieAgendamentoDetalhe,
+          status_code=status.HTTP_201_CREATED)
+def create_serie_agendamento(serie: schemas.SerieAgendamentoCreate, db: Session = Depends(get_db)):
+    validar_intervalo_agendamento(serie)
+    try:
+        db_serie = crud.create_serie_agendamento(db, serie)
+    except recorrencia.RegraInvalidaError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except crud.SerieConflitanteError as exc:
+        raise HTTPException(status_code=409, detail=_detalhe_conflitos_serie(exc))
+    return _serie_com_ocorrencias(db_serie, crud.get_ocorrencias_serie(db, db_serie.id, db_serie.data_hora_inicio))
+
+def _serie_com_ocorrencias(db_serie, agendamentos) -> dict:
+    dados = {coluna.key: getattr(db_serie, coluna.key) for coluna in db_serie.__table__.columns}
+    return dict(dados, agendamentos=agendamentos)
+
+def _detalhe_conflitos_serie(exc: crud.SerieConflitanteError) -> str:
+    horarios = ", ".join(inicio.isoformat() for inicio in exc.conflitos)
+    return f"Profissional já possui agendamento nestes horários: {horarios}"
+
+# Endpoint para obter uma série com as ocorrências a partir de agora
+# (estende a série até o horizonte, se ainda não estiver: por isso lê do primário)
+@app.get("/agendamentos/recorrentes/{serie_id}", response_model=schemas.SerieAgendamentoDetalhe)
+def read_serie_agendamento(serie_id: int, db: Session = Depends(get_db_primario)):
+    db_serie = crud.get_serie_agendamento(db, serie_id)
+    if db_serie is None:
+        raise HTTPException(status_code=404, detail="Série não encontrada")
+    return _serie_com_ocorrencias(db_serie, crud.get_ocorrencias_serie(db, serie_id, datetime.now()))
+
+# Endpoint para editar em lote as ocorrências futuras de uma série (um único UPDATE)
+@app.patch("/agendamentos/recorrentes/{serie_id}", response_model=schemas.ResultadoSerie)
+def update_serie_agendamento(serie_id: int, serie: schemas.SerieAgendamentoPatch, db: Session = Depends(get_db)):
+    dados = serie.dict(exclude_unset=True)
+    a_partir_de = dados.pop("a_partir_de", None)
+    validar_patch(models.Agendamento, dados)
+    try:
+        alterados = crud.update_serie_agendamento(db, serie_id, dados, a_partir_de)
+    except crud.SerieConflitanteError as exc:
+        raise HTTPException(status_code=409, detail=_detalhe_conflitos_serie(exc))
+    if alterados is None:
+        raise HTTPException(status_code=404, detail="Série não encontrada")
+    return {"serie_id": serie_id, "alterados": alterados}
+
+# Endpoint para cancelar as ocorrências futuras de uma série e encerrá-la
+@app.delete("/agendamentos/recorrentes/{serie_id}", response_model=schemas.ResultadoSerie)
+def cancelar_serie_agendamento(serie_id: int, a_partir_de: Optional[datetime] = None,
+                               db: Session = Depends(get_db)):
+    cancelados = crud.cancelar_serie_agendamento(db, serie_id, a_partir_de)
+    if cancelados is None:
+        raise HTTPException(status_code=404, detail="Série não encontrada")
+    return {"serie_id": serie_id, "alterados": cancelados}
+
+# Endpoint para listar agendamentos.
+# ?expand=cliente,profissional,servico,salao inclui os relacionamentos com um número fixo de consultas;
+# só os relacionamentos pedidos ganham chave no JSON (formato de schemas.AgendamentoExpandido).
+@app.get("/agendamentos/", response_model=List[schemas.AgendamentoExpandido], response_class=RespostaORJSON)
+def read_agendamentos(response: Response, skip: int = 0, limit: int = 100, cursor: str = None,
+                      expand: str = None, salao_id: Optional[int] = None, db: Session = Depends(get_db)):
+    agendamentos = crud.get_listagem_agendamentos(db, skip=skip, limit=limit, cursor=cursor,
+                                                  expand=validar_expand(expand), salao_id=salao_id)
+    definir_proximo_cursor(response, agendamentos)
+    return responder_lista(response, agendamentos)
+# Endpoint para exportar agendamentos em streaming (NDJSON ou CSV), para relatórios.
+# Precisa vir antes de /agendamentos/{agendamento_id} para "export" não ser lido como id.
+@app.get("/agendamentos/export")
+def exportar_agendamentos(formato: str = Query("ndjson", alias="format"),
+                          desde: Optional[datetime] = None, ate: Optional[datetime] = None,
+                          salao_id: Optional[int] = None, db: Session = Depends(get_db)):
+    if formato not in exportacao.FORMATOS:
+        raise HTTPException(status_code=400, detail="Formato deve ser ndjson ou csv")
+    # A exportação roda numa conexão própria, fora do escopo da sessão (escopo.py)
+    salao_id = escopo.salao_do_filtro(db, salao_id)
+    stmt = crud.select_agendamentos_exportacao(desde=desde, ate=ate, salao_id=salao_id)
+    return StreamingResponse(
+        exportacao.gerar_exportacao(db.get_bind(), stmt, formato),
+        media_type=exportacao.FORMATOS[formato],
+        headers={"Content-Disposition": f'attachment; filename="agendamentos.{formato}"'},
+    )
+
+# Sincronização incremental da agenda de um salão (sincronizacao.py): só o que mudou
+# desde o token `since`; sem ele, a agenda inteira. Precisa vir antes de
+# /agendamentos/{agendamento_id} para "changes" não ser lido como id.
+@app.get("/agendamentos/changes", response_model=schemas.MudancasAgendamentos, response_class=RespostaORJSON)
+def read_mudancas_agendamentos(since: Optional[str] = None, salao_id: Optional[int] = None, limit: int = 500,
+                               db: Session = Depends(get_db)):
+    salao_id = salao_id if salao_id is not None else escopo.salao_da_sessao(db)
+    if salao_id is None:
+        raise HTTPException(status_code=400, detail="Informe salao_id ou o cabeçalho X-Salao-Id")
+    limit = max(1, min(limit, sincronizacao.SYNC_LIMITE_MAXIMO))
+    return RespostaORJSON(crud.get_mudancas_agendamentos(db, salao_id, token=since, limit=limit))
 
-# Endpoint para listar agendamentos
-@app.get("/agendamentos/", response_model=List[schemas.Agendamento])
-def read_agendamentos(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    agendamentos = crud.get_agendamentos(db, skip=skip, limit=limit)
-    return agendamentos
 # Endpoint para obter um agendamento por ID
-@app.get("/agendamentos/{agendamento_id}", response_model=schemas.Agendamento)
-def read_agendamento(agendamento_id: int, db: Session = Depends(get_db)):
-    db_agendamento = crud.get_agendamento(db, agendamento_id=agendamento_id)
+# ?expand= como na listagem; os relacionamentos não pedidos ficam fora do JSON
+@app.get("/agendamentos/{agendamento_id}", response_model=schemas.AgendamentoExpandido,
+         response_model_exclude_unset=True)
+def read_agendamento(agendamento_id: int, expand: str = None, db: Session = Depends(get_db)):
+    expand = validar_expand(expand)
+    db_agendamento = crud.get_agendamento(db, agendamento_id=agendamento_id, expand=expand)
     if db_agendamento is None:
         raise HTTPException(status_code=404, detail="Agendamento não encontrado")
-    return db_agendamento
+    return crud.expandir_agendamento(db_agendamento, expand)
 # Endpoint para atualizar um agendamento
 @app.put("/agendamentos/{agendamento_id}", response_model=schemas.Agendamento)
 def update_agendamento(agendamento_id: int, agendamento: schemas.AgendamentoUpdate
                         , db: Session = Depends(get_db)):
-    db_agendamento = crud.get_agendamento(db, agendamento_id=agendamento_id)
+    validar_intervalo_agendamento(agendamento)
+    try:
+        db_agendamento = crud.update_agendamento(db=db, agendamento_id=agendamento_id, agendamento=agendamento)
+    except crud.HorarioIndisponivelError:
+        raise HTTPException(status_code=409, detail="Profissional já possui agendamento neste horário")
+    if db_agendamento is None:
+        raise HTTPException(status_code=404, detail="Agendamento não encontrado")
+    return db_agendamento
+# Endpoint para atualizar parcialmente um agendamento. Mudanças de horário, profissional,
+# serviço ou status passam pela mesma verificação de conflito do PUT.
+@app.patch("/agendamentos/{agendamento_id}", response_model=schemas.Agendamento)
+def patch_agendamento(agendamento_id: int, agendamento: schemas.AgendamentoPatch,
+                      db: Session = Depends(get_db)):
+    dados = agendamento.dict(exclude_unset=True)
+    validar_patch(models.Agendamento, dados)
+    try:
+        db_agendamento = crud.patch_agendamento(db, agendamento_id, dados)
+    except crud.IntervaloInvalidoError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except crud.HorarioIndisponivelError:
+        raise HTTPException(status_code=409, detail="Profissional já possui agendamento neste horário")
     if db_agendamento is None:
         raise HTTPException(status_code=404, detail="Agendamento não encontrado")
-    return crud.update_agendamento(db=db, agendamento_id=agendamento_id, agendamento=agendamento)
+    return db_agendamento
 # Endpoint para deletar um agendamento
 @app.delete("/agendamentos/{agendamento_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_agendamento(agendamento_id: int, db: Session = Depends(get_db)):
-    db_agendamento = crud.get_agendamento(db, agendamento_id=agendamento_id)
-    if db_agendamento is None:
+    if crud.delete_agendamento(db=db, agendamento_id=agendamento_id) is None:
         raise HTTPException(status_code=404, detail="Agendamento não encontrado")
-    crud.delete_agendamento(db=db, agendamento_id=agendamento_id)
     return {"detail": "Agendamento deletado com sucesso"}
+
+# No modo assíncrono (DB_MODO=async) as rotas de CRUD acima são trocadas pelas
+# equivalentes com AsyncSession; rotas sem versão assíncrona continuam síncronas.
+if DB_MODO == "async":
+    from . import rotas_async
+    rotas_async.substituir_rotas(app)
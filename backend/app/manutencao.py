@@ -0,0 +1,16 @@
+# backend/app/manutencao.py
+# Tarefas de manutenção que antes só rodavam por linha de comando, agora também
+# pela fila (tarefas.py): o worker as executa periodicamente, fora dos handlers da API.
+from . import crud, relatorios, tarefas
+
+
+@tarefas.tarefa("recorrencia.estender", periodica_a_cada=24 * 3600)
+def estender_series(db, payload):
+    # Mesmo efeito de python -m app.recorrencia
+    crud.estender_series_agendamento(db)
+
+
+@tarefas.tarefa("relatorios.reconstruir")
+def reconstruir_relatorios(db, payload):
+    # Sob demanda: python -m app.tarefas --enfileirar relatorios.reconstruir --payload '{"salao_id": 1}'
+    relatorios.reconstruir(db, payload.get("salao_id"))
@@ -0,0 +1,313 @@
+# backend/app/metricas.py
+# Instrumentação por requisição, exposta em GET /metrics no formato texto do Prometheus:
+#   - latência por rota (histograma), com o caminho da rota (/servicos/{servico_id}),
+#     não o da URL, para o número de séries não crescer com os ids;
+#   - consultas SQL e tempo de banco por requisição (eventos before/after_cursor_execute
+#     de todas as engines, inclusive shards, réplicas e as do modo async);
+#   - log de consultas lentas (logger "agendanet.sql") com o SQL normalizado, também
+#     agregado em /metrics por consulta;
+#   - acertos e faltas do cache de compilação de SQL do SQLAlchemy (ver crud.select_por).
+# Com METRICAS_SERVER_TIMING=true, cada resposta leva o cabeçalho Server-Timing
+# (tempo total, tempo de banco e número de consultas), visível no DevTools do navegador.
+#
+# O custo por requisição é um ContextVar, duas leituras de relógio por consulta e uma
+# atualização de contadores sob lock; sem dependência externa (prometheus_client).
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from contextvars import ContextVar
+
+from dotenv import load_dotenv
+from sqlalchemy import event # type: ignore
+from sqlalchemy.engine import Engine, default # type: ignore
+
+load_dotenv()
+
+logger = logging.getLogger("agendanet.sql")
+
+METRICAS_HABILITADAS = os.getenv("METRICAS_HABILITADAS", "true").lower() in ("1", "true", "sim", "yes")
+METRICAS_SERVER_TIMING = os.getenv("METRICAS_SERVER_TIMING", "false").lower() in ("1", "true", "sim", "yes")
+# Consultas acima deste tempo vão para o log de consultas lentas
+METRICAS_CONSULTA_LENTA_MS = float(os.getenv("METRICAS_CONSULTA_LENTA_MS", "100"))
+# Consultas lentas distintas guardadas para /metrics (as mais antigas saem primeiro)
+METRICAS_MAX_CONSULTAS_LENTAS = int(os.getenv("METRICAS_MAX_CONSULTAS_LENTAS", "50"))
+
+# Limites dos baldes dos histogramas (segundos e número de consultas)
+BALDES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BALDES_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Rotas que não entram nas métricas (a própria coleta)
+PREFIXOS_IGNORADOS = ("/metrics",)
+
+# Situação da consulta no cache de compilação do engine (ExecutionContext.cache_hit).
+# "sem_cache": SQL textual, DDL e instruções que não geram chave de cache.
+RESULTADOS_CACHE_SQL = {
+    default.CACHE_HIT: "acerto",
+    default.CACHE_MISS: "falta",
+}
+
+
+class Medicao:
+    """Consultas e tempo de banco da requisição corrente."""
+
+    __slots__ = ("rota", "consultas", "tempo_db")
+
+    def __init__(self):
+        self.rota = None
+        self.consultas = 0
+        self.tempo_db = 0.0
+
+
+_medicao: ContextVar = ContextVar("medicao_requisicao", default=None)
+
+
+class Histograma:
+    def __init__(self, baldes):
+        self.baldes = baldes
+        self.contagens = [0] * (len(baldes) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float):
+        # bisect_left: um valor igual ao limite conta no balde dele (le="limite")
+        self.contagens[bisect_left(self.baldes, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+
+class Registro:
+    """Contadores e histogramas por (método, rota), e as consultas lentas."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencia = {}
+        self.consultas = {}
+        self.tempo_db = {}
+        self.respostas = {}
+        self.consultas_total = 0
+        self.tempo_db_total = 0.0
+        self.cache_sql = {}
+        self.lentas = OrderedDict()
+
+    def observar_requisicao(self, metodo: str, rota: str, status: int, duracao: float, medicao: Medicao):
+        chave = (metodo, rota)
+        with self._lock:
+            for tabela, baldes, valor in (
+                (self.latencia, BALDES_SEGUNDOS, duracao),
+                (self.consultas, BALDES_CONSULTAS, medicao.consultas),
+                (self.tempo_db, BALDES_SEGUNDOS, medicao.tempo_db),
+            ):
+                histograma = tabela.get(chave)
+                if histograma is None:
+                    histograma = tabela[chave] = Histograma(baldes)
+                histograma.observar(valor)
+            chave_resposta = (metodo, rota, str(status))
+            self.respostas[chave_resposta] = self.respostas.get(chave_resposta, 0) + 1
+
+    def observar_consulta(self, duracao: float, sql: str, rota: str, cache_sql: str = "sem_cache"):
+        lenta = duracao * 1000 >= METRICAS_CONSULTA_LENTA_MS
+        with self._lock:
+            self.consultas_total += 1
+            self.tempo_db_total += duracao
+            self.cache_sql[cache_sql] = self.cache_sql.get(cache_sql, 0) + 1
+            if not lenta:
+                return
+            normalizado = normalizar_sql(sql)
+            item = self.lentas.pop(normalizado, None) or {"total": 0, "soma": 0.0, "max": 0.0}
+            item["total"] += 1
+            item["soma"] += duracao
+            item["max"] = max(item["max"], duracao)
+            self.lentas[normalizado] = item
+            while len(self.lentas) > METRICAS_MAX_CONSULTAS_LENTAS:
+                self.lentas.popitem(last=False)
+        logger.warning("Consulta lenta (%.1f ms, rota %s): %s", duracao * 1000, rota or "-", normalizado)
+
+
+registro = Registro()
+
+
+def reiniciar():
+    """Zera as métricas acumuladas (ex.: entre rodadas de um benchmark)."""
+    global registro
+    registro = Registro()
+    return registro
+
+
+############################### SQL
+_ESPACOS = re.compile(r"\s+")
+_TEXTOS = re.compile(r"'(?:[^']|'')*'")
+_NUMEROS = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PARAMETROS = re.compile(r"%\(\w+\)s|%s|:\w+|\?")
+_LISTAS = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+_VALORES = re.compile(r"(VALUES\s*\([^()]*\))(?:\s*,\s*\([^()]*\))+", re.IGNORECASE)
+
+
+def normalizar_sql(sql: str) -> str:
+    """SQL com literais e parâmetros trocados por ?, listas IN e VALUES de várias linhas colapsadas.
+
+    Consultas que só diferem nos valores (ou no tamanho de um IN) viram a mesma linha.
+    """
+    sql = _ESPACOS.sub(" ", sql).strip()
+    sql = _TEXTOS.sub("?", sql)
+    sql = _PARAMETROS.sub("?", sql)
+    sql = _NUMEROS.sub("?", sql)
+    sql = _LISTAS.sub("(...)", sql)
+    return _VALORES.sub(r"\1, ...", sql)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._inicio_metricas = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _depois_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    inicio = getattr(context, "_inicio_metricas", None)
+    if inicio is None or not METRICAS_HABILITADAS:
+        return
+    duracao = time.perf_counter() - inicio
+    medicao = _medicao.get()
+    if medicao is not None:
+        medicao.consultas += 1
+        medicao.tempo_db += duracao
+    registro.observar_consulta(
+        duracao, statement, medicao.rota if medicao is not None else None,
+        RESULTADOS_CACHE_SQL.get(getattr(context, "cache_hit", None), "sem_cache"),
+    )
+
+
+############################### MIDDLEWARE
+def _caminho_rota(scope) -> str:
+    rota = scope.get("route")
+    # Sem rota (404): um rótulo só, para URLs arbitrárias não criarem séries novas
+    return getattr(rota, "path", None) or "(sem rota)"
+
+
+class MiddlewareMetricas:
+    """Middleware ASGI: mede a requisição e, se configurado, acrescenta Server-Timing."""
+
+    def __init__(self, app, server_timing: bool = None):
+        self.app = app
+        self.server_timing = METRICAS_SERVER_TIMING if server_timing is None else server_timing
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or not METRICAS_HABILITADAS
+                or scope["path"].startswith(PREFIXOS_IGNORADOS)):
+            await self.app(scope, receive, send)
+            return
+        medicao = Medicao()
+        token = _medicao.set(medicao)
+        inicio = time.perf_counter()
+        status = 500
+
+        async def enviar(mensagem):
+            nonlocal status
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+                medicao.rota = _caminho_rota(scope)
+                if self.server_timing:
+                    mensagem["headers"] = list(mensagem.get("headers", [])) + [
+                        (b"server-timing", _server_timing(time.perf_counter() - inicio, medicao).encode())
+                    ]
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _medicao.reset(token)
+            registro.observar_requisicao(
+                scope["method"], _caminho_rota(scope), status, time.perf_counter() - inicio, medicao
+            )
+
+
+def _server_timing(duracao: float, medicao: Medicao) -> str:
+    # Tempos até o início da resposta; o corpo de um streaming pode consultar depois disso
+    return (
+        f'app;dur={duracao * 1000:.1f}, '
+        f'db;dur={medicao.tempo_db * 1000:.1f};desc="{medicao.consultas} consultas"'
+    )
+
+
+############################### EXPOSIÇÃO
+def _rotulos(**rotulos) -> str:
+    partes = []
+    for nome, valor in rotulos.items():
+        valor = str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        partes.append(f'{nome}="{valor}"')
+    return "{" + ",".join(partes) + "}"
+
+
+def _numero(valor) -> str:
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def _histogramas(linhas, nome: str, ajuda: str, tabela: dict):
+    linhas += [f"# HELP {nome} {ajuda}", f"# TYPE {nome} histogram"]
+    for (metodo, rota), histograma in sorted(tabela.items()):
+        acumulado = 0
+        for limite, contagem in zip(histograma.baldes + ("+Inf",), histograma.contagens):
+            acumulado += contagem
+            linhas.append(f"{nome}_bucket{_rotulos(metodo=metodo, rota=rota, le=limite)} {acumulado}")
+        linhas.append(f"{nome}_sum{_rotulos(metodo=metodo, rota=rota)} {_numero(histograma.soma)}")
+        linhas.append(f"{nome}_count{_rotulos(metodo=metodo, rota=rota)} {histograma.total}")
+
+
+def _metrica(linhas, nome: str, tipo: str, ajuda: str, amostras):
+    linhas += [f"# HELP {nome} {ajuda}", f"# TYPE {nome} {tipo}"]
+    for rotulos, valor in amostras:
+        linhas.append(f"{nome}{_rotulos(**rotulos) if rotulos else ''} {_numero(valor)}")
+
+
+def exportar(pools: dict = None, cache: dict = None, admissao: dict = None) -> str:
+    """Texto no formato de exposição do Prometheus (versão 0.0.4)."""
+    atual = registro
+    linhas = []
+    with atual._lock:
+        _histogramas(linhas, "agendanet_requisicao_duracao_segundos",
+                     "Latência das requisições por rota.", atual.latencia)
+        _histogramas(linhas, "agendanet_requisicao_consultas",
+                     "Consultas SQL emitidas por requisição.", atual.consultas)
+        _histogramas(linhas, "agendanet_requisicao_db_segundos",
+                     "Tempo em consultas SQL por requisição.", atual.tempo_db)
+        _metrica(linhas, "agendanet_requisicoes_total", "counter", "Respostas por rota e status.", [
+            ({"metodo": metodo, "rota": rota, "status": status}, total)
+            for (metodo, rota, status), total in sorted(atual.respostas.items())
+        ])
+        _metrica(linhas, "agendanet_sql_consultas_total", "counter",
+                 "Consultas SQL executadas (dentro e fora de requisições).", [({}, atual.consultas_total)])
+        _metrica(linhas, "agendanet_sql_segundos_total", "counter",
+                 "Tempo total em consultas SQL.", [({}, atual.tempo_db_total)])
+        _metrica(linhas, "agendanet_sql_cache_compilacao_total", "counter",
+                 "Consultas por resultado no cache de compilação do SQLAlchemy.",
+                 [({"resultado": resultado}, total) for resultado, total in sorted(atual.cache_sql.items())])
+        lentas = list(atual.lentas.items())
+    _metrica(linhas, "agendanet_sql_lentas_total", "counter",
+             f"Consultas acima de {METRICAS_CONSULTA_LENTA_MS:g} ms, por SQL normalizado.",
+             [({"sql": sql}, item["total"]) for sql, item in lentas])
+    _metrica(linhas, "agendanet_sql_lentas_max_segundos", "gauge",
+             "Maior duração de cada consulta lenta.",
+             [({"sql": sql}, item["max"]) for sql, item in lentas])
+    if pools:
+        for campo, tipo, ajuda in (
+            ("em_uso", "gauge", "Conexões em uso no pool."),
+            ("checkouts", "counter", "Conexões retiradas do pool."),
+            ("espera_max_ms", "gauge", "Maior espera por uma conexão do pool, em ms."),
+        ):
+            _metrica(linhas, f"agendanet_pool_{campo}", tipo, ajuda,
+                     [({"pool": nome}, resumo[campo]) for nome, resumo in sorted(pools.items())])
+    if cache:
+        for campo in ("hits", "misses", "invalidacoes", "descartados", "erros"):
+            _metrica(linhas, f"agendanet_cache_{campo}_total", "counter",
+                     f"Cache de catálogo: {campo}.", [({}, cache[campo])])
+    if admissao:
+        _metrica(linhas, "agendanet_admissao_requisicoes_total", "counter",
+                 "Requisições admitidas e recusadas pelo controle de admissão.",
+                 [({"resultado": campo}, admissao[campo]) for campo in ("admitidas", "limitadas", "sobrecarregadas")])
+        _metrica(linhas, "agendanet_admissao_em_andamento", "gauge",
+                 "Requisições em andamento nas rotas com teto de concorrência.", [({}, admissao["em_andamento"])])
+    return "\n".join(linhas) + "\n"
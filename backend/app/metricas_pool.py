@@ -0,0 +1,117 @@
+# backend/app/metricas_pool.py
+# Pool de conexões instrumentado: mede espera por checkout e tempo de vida das
+# conexões, para dimensionar workers e pool com dados em vez de palpites.
+import threading
+import time
+
+from sqlalchemy import event # type: ignore
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool # type: ignore
+
+
+class EstatisticasPool:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.falhas = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+        self.conexoes_abertas = 0
+        self.conexoes_fechadas = 0
+        self.vida_total_fechadas = 0.0
+        self.vida_max_fechadas = 0.0
+        self._abertas_em = {}
+
+    def registrar_espera(self, segundos: float, falhou: bool = False):
+        with self._lock:
+            if falhou:
+                self.falhas += 1
+                return
+            self.checkouts += 1
+            self.espera_total += segundos
+            self.espera_max = max(self.espera_max, segundos)
+
+    def registrar_conexao(self, chave):
+        with self._lock:
+            self.conexoes_abertas += 1
+            self._abertas_em[chave] = time.monotonic()
+
+    def registrar_fechamento(self, chave):
+        with self._lock:
+            aberta_em = self._abertas_em.pop(chave, None)
+            if aberta_em is None:
+                return
+            vida = time.monotonic() - aberta_em
+            self.conexoes_fechadas += 1
+            self.vida_total_fechadas += vida
+            self.vida_max_fechadas = max(self.vida_max_fechadas, vida)
+
+    def resumo(self, pool) -> dict:
+        agora = time.monotonic()
+        with self._lock:
+            idades = [agora - aberta_em for aberta_em in self._abertas_em.values()]
+            return {
+                "tamanho": pool.size(),
+                "em_uso": pool.checkedout(),
+                "ociosas": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "checkouts": self.checkouts,
+                "falhas_checkout": self.falhas,
+                "espera_media_ms": self.espera_total * 1000 / self.checkouts if self.checkouts else 0.0,
+                "espera_max_ms": self.espera_max * 1000,
+                "conexoes_abertas_total": self.conexoes_abertas,
+                "conexoes_fechadas_total": self.conexoes_fechadas,
+                "vida_media_fechadas_s": (
+                    self.vida_total_fechadas / self.conexoes_fechadas if self.conexoes_fechadas else 0.0
+                ),
+                "vida_max_fechadas_s": self.vida_max_fechadas,
+                "idade_conexao_mais_antiga_s": max(idades, default=0.0),
+            }
+
+
+class _MedicaoPoolMixin:
+    """Cronometra `connect()` do pool: inclui a espera na fila e a abertura de conexões novas.
+
+    Falhas (timeout de espera ou erro ao conectar) são contadas à parte.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.estatisticas = EstatisticasPool()
+        if kwargs.get("_dispatch") is None:
+            # Em recreate() os listeners do pool anterior já são copiados via _dispatch
+            event.listen(self, "connect", self._ao_conectar)
+            event.listen(self, "close", self._ao_fechar)
+            event.listen(self, "close_detached", self._ao_fechar_destacada)
+
+    def recreate(self):
+        # O pool é recriado em dispose()/reconexão; as estatísticas seguem acumulando
+        novo = super().recreate()
+        novo.estatisticas = self.estatisticas
+        return novo
+
+    def connect(self):
+        comeco = time.perf_counter()
+        try:
+            conexao = super().connect()
+        except Exception:
+            self.estatisticas.registrar_espera(time.perf_counter() - comeco, falhou=True)
+            raise
+        self.estatisticas.registrar_espera(time.perf_counter() - comeco)
+        return conexao
+
+    def _ao_conectar(self, dbapi_connection, connection_record):
+        self.estatisticas.registrar_conexao(id(dbapi_connection))
+
+    def _ao_fechar(self, dbapi_connection, connection_record):
+        self.estatisticas.registrar_fechamento(id(dbapi_connection))
+
+    def _ao_fechar_destacada(self, dbapi_connection):
+        self.estatisticas.registrar_fechamento(id(dbapi_connection))
+
+
+class QueuePoolMedido(_MedicaoPoolMixin, QueuePool):
+    pass
+
+
+class AsyncQueuePoolMedido(_MedicaoPoolMixin, AsyncAdaptedQueuePool):
+    pass
@@ -1,10 +1,15 @@
 # backend/app/models.py
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, DECIMAL, Enum, ForeignKey# type: ignore
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, DECIMAL, Enum, ForeignKey, Index# type: ignore
+from sqlalchemy.dialects import mysql # type: ignore
 from sqlalchemy.orm import relationship # Importe para definir relacionamentos entre tabelas# type: ignore
 from .database import Base # Importa o 'Base' que você definiu em database.py
 from datetime import datetime
 
+# atualizado_em do catálogo é a versão das ETags (condicional.py): no MySQL com
+# microssegundos, para duas alterações no mesmo segundo não terem a mesma versão
+DataHoraPrecisa = DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql")
+
 class Salao(Base):
     __tablename__ = "saloes" # Define o nome da tabela no banco de dados
 
@@ -16,7 +21,7 @@ class Salao(Base):
     email = Column(String(255), unique=True, nullable=False)
     senha_hash = Column(String(255), nullable=False)
     criado_em = Column(DateTime, default=datetime.now)
-    atualizado_em = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    atualizado_em = Column(DataHoraPrecisa, default=datetime.now, onupdate=datetime.now)
 
     # Relacionamentos (opcional, mas muito útil para o ORM)
     # Isso permite que você acesse, por exemplo, 'salao.profissionais'
@@ -34,11 +39,20 @@ class Profissional(Base):
     telefone = Column(String(20))
     email = Column(String(255))
     criado_em = Column(DateTime, default=datetime.now)
-    atualizado_em = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    atualizado_em = Column(DataHoraPrecisa, default=datetime.now, onupdate=datetime.now)
 
     salao = relationship("Salao", back_populates="profissionais") # Relacionamento de volta para o Salão
     agendamentos = relationship("Agendamento", back_populates="profissional")
 
+    # Índices da busca de profissionais (crud.select_busca_profissionais).
+    # O de nome é FULLTEXT no MySQL; nos outros bancos vira um índice comum.
+    __table_args__ = (
+        Index("ix_profissionais_salao_especialidade", "salao_id", "especialidade"),
+        Index("ix_profissionais_nome_fulltext", "nome", mysql_prefix="FULLTEXT"),
+        # Listagem de um salão (?salao_id= ou X-Salao-Id), na ordem da paginação
+        Index("ix_profissionais_salao_id", "salao_id", "id"),
+    )
+
 # VOCÊ PRECISA CRIAR AS CLASSES PARA Servico, Cliente e Agendamento AQUI,
 # seguindo o mesmo padrão, mapeando as colunas e os relacionamentos.
 # Use o script SQL das tabelas como guia para as colunas e tipos de dados.
@@ -52,10 +66,15 @@ class Servico(Base):
     duracao_minutos = Column(Integer, nullable=False)
     preco = Column(DECIMAL(10, 2), nullable=False)
     criado_em = Column(DateTime, default=datetime.now)
-    atualizado_em = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    atualizado_em = Column(DataHoraPrecisa, default=datetime.now, onupdate=datetime.now)
 
     salao = relationship("Salao", back_populates="servicos")
     agendamentos = relationship("Agendamento", back_populates="servico") # Já pensando no relacionamento com Agendamento
+
+    __table_args__ = (
+        # Listagem de um salão (?salao_id= ou X-Salao-Id), na ordem da paginação
+        Index("ix_servicos_salao_id", "salao_id", "id"),
+    )
     
     
 class Cliente(Base):
@@ -64,6 +83,10 @@ class Cliente(Base):
     nome = Column(String(255), nullable=False)
     telefone = Column(String(20))
     email = Column(String(255))
+    # Colunas de busca mantidas pelo crud (normalizacao.py): telefone em E.164 só com
+    # dígitos e e-mail em minúsculas, indexadas para busca por prefixo e "find or create"
+    telefone_normalizado = Column(String(15), index=True)
+    email_normalizado = Column(String(255), index=True)
     criado_em = Column(DateTime, default=datetime.now)
     atualizado_em = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
@@ -80,6 +103,10 @@ class Agendamento(Base):
     data_hora_fim = Column(DateTime, nullable=False)
     status = Column(Enum('agendado', 'confirmado', 'cancelado', 'concluido'), default='agendado')
     observacoes = Column(Text)
+    # Série recorrente que gerou o agendamento (None para agendamentos avulsos)
+    serie_id = Column(Integer, ForeignKey("series_agendamentos.id"))
+    # Versão da última escrita, do contador do salão (sincronizacao.py); 0 = anterior à sincronização
+    versao = Column(Integer, nullable=False, default=0)
     criado_em = Column(DateTime, default=datetime.now)
     atualizado_em = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
@@ -88,3 +115,140 @@ class Agendamento(Base):
     cliente = relationship("Cliente", back_populates="agendamentos")
     profissional = relationship("Profissional", back_populates="agendamentos")
     servico = relationship("Servico", back_populates="agendamentos")
+
+    # Índice composto usado na verificação de conflito de horário:
+    # permite buscar só a janela de tempo do profissional, sem varrer o histórico
+    __table_args__ = (
+        Index("ix_agendamentos_profissional_periodo", "profissional_id", "data_hora_inicio", "data_hora_fim"),
+        # Chave de ordenação da paginação por cursor da listagem de agendamentos
+        Index("ix_agendamentos_inicio_id", "data_hora_inicio", "id"),
+        # Ocorrências futuras de uma série, para edição e cancelamento em lote
+        Index("ix_agendamentos_serie_inicio", "serie_id", "data_hora_inicio"),
+        # Agenda de um salão na ordem da paginação: um salão grande não pesa na leitura dos outros
+        Index("ix_agendamentos_salao_inicio_id", "salao_id", "data_hora_inicio", "id"),
+        # Mudanças de um salão desde um token (GET /agendamentos/changes), na ordem do token
+        Index("ix_agendamentos_salao_versao_id", "salao_id", "versao", "id"),
+    )
+
+
+# Agendamentos antigos já concluídos ou cancelados, movidos de agendamentos por
+# arquivamento.py para a tabela quente ficar só com a agenda viva. Mesmas colunas
+# (e o mesmo id) do agendamento original; as leituras de histórico (exportação,
+# histórico do cliente, reconstrução dos relatórios) leem as duas tabelas.
+class AgendamentoArquivado(Base):
+    __tablename__ = "agendamentos_arquivados"
+    id = Column(Integer, primary_key=True, autoincrement=False) # id que o agendamento tinha
+    salao_id = Column(Integer, ForeignKey("saloes.id"), nullable=False)
+    cliente_id = Column(Integer, ForeignKey("clientes.id"), nullable=False)
+    profissional_id = Column(Integer, ForeignKey("profissionais.id"), nullable=False)
+    servico_id = Column(Integer, ForeignKey("servicos.id"), nullable=False)
+    data_hora_inicio = Column(DateTime, nullable=False)
+    data_hora_fim = Column(DateTime, nullable=False)
+    status = Column(Enum('agendado', 'confirmado', 'cancelado', 'concluido'), nullable=False)
+    observacoes = Column(Text)
+    serie_id = Column(Integer, ForeignKey("series_agendamentos.id"))
+    criado_em = Column(DateTime)
+    atualizado_em = Column(DateTime)
+    arquivado_em = Column(DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (
+        # Histórico de um salão (exportação, reconstrução dos relatórios) por período
+        Index("ix_agendamentos_arquivados_salao_inicio_id", "salao_id", "data_hora_inicio", "id"),
+        # Histórico de um cliente
+        Index("ix_agendamentos_arquivados_cliente_inicio", "cliente_id", "data_hora_inicio"),
+    )
+
+
+# Contador de versões da agenda de cada salão (sincronizacao.py). removidos_ate é a
+# maior versão de lápide já apagada: tokens anteriores a ela expiraram.
+class VersaoAgenda(Base):
+    __tablename__ = "versoes_agenda"
+    salao_id = Column(Integer, primary_key=True, autoincrement=False)
+    versao = Column(Integer, nullable=False, default=0)
+    removidos_ate = Column(Integer, nullable=False, default=0)
+
+
+# Lápide de um agendamento excluído, para a sincronização incremental avisar os
+# tablets. Sem chaves estrangeiras: o agendamento já não existe.
+class AgendamentoRemovido(Base):
+    __tablename__ = "agendamentos_removidos"
+    id = Column(Integer, primary_key=True, index=True)
+    agendamento_id = Column(Integer, nullable=False)
+    salao_id = Column(Integer, nullable=False)
+    versao = Column(Integer, nullable=False)
+    removido_em = Column(DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (
+        # Mesma ordem de ix_agendamentos_salao_versao_id, para as duas leituras do token
+        Index("ix_agendamentos_removidos_salao_versao", "salao_id", "versao", "agendamento_id"),
+    )
+
+
+# Série de agendamentos recorrentes (ex.: toda terça às 10h). As ocorrências são
+# gravadas em agendamentos até materializada_ate, que avança com o horizonte
+# móvel de recorrencia.py; a regra é um RRULE (ex.: FREQ=WEEKLY;INTERVAL=2).
+class SerieAgendamento(Base):
+    __tablename__ = "series_agendamentos"
+    id = Column(Integer, primary_key=True, index=True)
+    salao_id = Column(Integer, ForeignKey("saloes.id"), nullable=False)
+    cliente_id = Column(Integer, ForeignKey("clientes.id"), nullable=False)
+    profissional_id = Column(Integer, ForeignKey("profissionais.id"), nullable=False)
+    servico_id = Column(Integer, ForeignKey("servicos.id"), nullable=False)
+    regra = Column(String(255), nullable=False)
+    data_hora_inicio = Column(DateTime, nullable=False) # Primeira ocorrência (DTSTART)
+    duracao_minutos = Column(Integer, nullable=False)
+    ate = Column(Date) # Último dia da série; None (e sem COUNT/UNTIL) = série aberta
+    materializada_ate = Column(DateTime) # Ocorrências que começam até aqui já estão em agendamentos
+    status = Column(Enum('ativa', 'encerrada', 'cancelada'), default='ativa')
+    observacoes = Column(Text)
+    criado_em = Column(DateTime, default=datetime.now)
+    atualizado_em = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+# Resumo diário de agendamentos por salão × profissional × serviço, mantido de forma
+# incremental pelo crud (relatorios.py) e lido pelos relatórios. É um dado derivado,
+# reconstruível a partir de agendamentos (python -m app.relatorios): por isso não tem
+# chaves estrangeiras, para não impedir a exclusão de profissionais e serviços.
+class ResumoDiario(Base):
+    __tablename__ = "resumos_diarios"
+    id = Column(Integer, primary_key=True, index=True)
+    salao_id = Column(Integer, nullable=False)
+    profissional_id = Column(Integer, nullable=False)
+    servico_id = Column(Integer, nullable=False)
+    data = Column(Date, nullable=False) # Dia de início do agendamento
+    # Quantidade de agendamentos em cada status
+    agendados = Column(Integer, nullable=False, default=0)
+    confirmados = Column(Integer, nullable=False, default=0)
+    cancelados = Column(Integer, nullable=False, default=0)
+    concluidos = Column(Integer, nullable=False, default=0)
+    # Soma da duração dos agendamentos não cancelados
+    minutos_ocupados = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Chave do resumo; começa por salão e data, que é como os relatórios filtram
+        Index("ux_resumos_diarios_chave", "salao_id", "data", "profissional_id", "servico_id", unique=True),
+    )
+
+
+# Fila de tarefas em segundo plano (tarefas.py), guardada no próprio banco para
+# funcionar em SQLite e MySQL sem broker externo.
+class Tarefa(Base):
+    __tablename__ = "tarefas"
+    id = Column(Integer, primary_key=True, index=True)
+    tipo = Column(String(100), nullable=False) # Nome registrado com @tarefas.tarefa
+    payload = Column(Text) # JSON com os argumentos
+    status = Column(Enum('pendente', 'executando', 'concluida', 'falhou'), nullable=False, default='pendente')
+    tentativas = Column(Integer, nullable=False, default=0)
+    max_tentativas = Column(Integer, nullable=False, default=5)
+    executar_em = Column(DateTime, nullable=False, default=datetime.now) # Próxima execução (inclui o backoff)
+    bloqueada_ate = Column(DateTime) # Fim da reserva do worker; depois disso outra pode pegar
+    # Chave de unicidade opcional (ex.: "lembrete:42:..."): enfileirar a mesma chave de novo é ignorado
+    chave = Column(String(255), unique=True)
+    erro = Column(Text) # Último erro
+    criado_em = Column(DateTime, default=datetime.now)
+    atualizado_em = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+    __table_args__ = (
+        # Busca das tarefas vencidas pelo worker
+        Index("ix_tarefas_status_executar_em", "status", "executar_em"),
+    )
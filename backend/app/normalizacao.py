@@ -0,0 +1,59 @@
+# backend/app/normalizacao.py
+# Normalização de telefone e e-mail de clientes para as colunas de busca
+# (telefone_normalizado / email_normalizado), usadas na busca por prefixo e no
+# "find or create" do fluxo de agendamento.
+import os
+import re
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Código do país assumido quando o telefone vem sem DDI (ex.: "(11) 99999-8888")
+TELEFONE_DDI_PADRAO = os.getenv("TELEFONE_DDI_PADRAO", "55")
+# E.164 permite no máximo 15 dígitos
+MAX_DIGITOS_E164 = 15
+
+
+def _digitos(valor: str) -> str:
+    return re.sub(r"\D", "", valor or "")
+
+
+def _internacional(valor: str) -> bool:
+    valor = (valor or "").strip()
+    return valor.startswith("+") or valor.startswith("00")
+
+
+def normalizar_telefone(telefone: str):
+    """Telefone em E.164 só com dígitos (sem o '+'), ex.: '5511999998888'. None se vazio ou inválido."""
+    digitos = _digitos(telefone)
+    if not digitos:
+        return None
+    if _internacional(telefone):
+        if telefone.strip().startswith("00"):
+            digitos = digitos[2:]
+    else:
+        # Número nacional: remove o 0 de longa distância e acrescenta o DDI padrão
+        digitos = TELEFONE_DDI_PADRAO + digitos.lstrip("0")
+    if len(digitos) > MAX_DIGITOS_E164:
+        return None
+    return digitos
+
+
+def prefixos_telefone(parcial: str):
+    """Prefixos de busca para um telefone digitado pela metade.
+
+    Sem '+'/00 não dá para saber se o usuário começou pelo DDI ou pelo DDD,
+    então as duas leituras são buscadas.
+    """
+    digitos = _digitos(parcial)
+    if not digitos:
+        return []
+    if _internacional(parcial):
+        return [digitos[2:] if parcial.strip().startswith("00") else digitos]
+    return [TELEFONE_DDI_PADRAO + digitos.lstrip("0"), digitos]
+
+
+def normalizar_email(email: str):
+    email = (email or "").strip().lower()
+    return email or None
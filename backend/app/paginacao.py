@@ -0,0 +1,84 @@
+# backend/app/paginacao.py
+# Paginação por cursor (keyset): em vez de OFFSET, a próxima página começa logo
+# após a chave de ordenação do último item da página anterior, usando o índice.
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import DateTime, and_, or_ # type: ignore
+
+
+class CursorInvalidoError(ValueError):
+    """O token de cursor recebido não pôde ser decodificado."""
+
+
+class Pagina(list):
+    """Lista de resultados que também carrega o cursor da próxima página (ou None)."""
+
+    def __init__(self, itens, next_cursor=None):
+        super().__init__(itens)
+        self.next_cursor = next_cursor
+
+
+def codificar_cursor(valores) -> str:
+    dados = [v.isoformat() if isinstance(v, datetime) else v for v in valores]
+    return base64.urlsafe_b64encode(json.dumps(dados).encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(token: str, colunas):
+    try:
+        preenchimento = "=" * (-len(token) % 4)
+        dados = json.loads(base64.urlsafe_b64decode(token + preenchimento))
+        if not isinstance(dados, list) or len(dados) != len(colunas):
+            raise ValueError(token)
+        return [
+            datetime.fromisoformat(valor) if isinstance(coluna.type, DateTime) else int(valor)
+            for coluna, valor in zip(colunas, dados)
+        ]
+    except (ValueError, TypeError) as exc:
+        raise CursorInvalidoError("Cursor inválido") from exc
+
+
+def filtro_apos(colunas, valores):
+    # (a, b) > (x, y) expandido para a >= x AND (a > x OR (a = x AND b > y)).
+    # O termo a >= x repetido na frente permite que MySQL e SQLite resolvam a
+    # condição como uma faixa no índice composto em vez de varrer a tabela.
+    if len(colunas) == 1:
+        return colunas[0] > valores[0]
+    condicoes = []
+    for i, coluna in enumerate(colunas):
+        iguais = [colunas[j] == valores[j] for j in range(i)]
+        condicoes.append(and_(*iguais, coluna > valores[i]))
+    return and_(colunas[0] >= valores[0], or_(*condicoes))
+
+
+def aplicar_paginacao(query, colunas, skip: int = 0, limit: int = 100, cursor: str = None):
+    """Aplica ordenação pelas `colunas` e pagina por cursor (se informado) ou por skip/limit.
+
+    Aceita tanto `Query` quanto `select()`, para ser usado pelo crud síncrono e assíncrono.
+    """
+    query = query.order_by(*colunas)
+    if cursor:
+        query = query.filter(filtro_apos(colunas, decodificar_cursor(cursor, colunas)))
+    else:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+
+def montar_pagina(itens, colunas, limit: int) -> Pagina:
+    next_cursor = None
+    if itens and len(itens) == limit:
+        ultimo = itens[-1]
+        next_cursor = codificar_cursor([getattr(ultimo, coluna.key) for coluna in colunas])
+    return Pagina(itens, next_cursor)
+
+
+def paginar(query, colunas, skip: int = 0, limit: int = 100, cursor: str = None) -> Pagina:
+    itens = aplicar_paginacao(query, colunas, skip, limit, cursor).all()
+    return montar_pagina(itens, colunas, limit)
+
+
+def definir_proximo_cursor(response, pagina: Pagina):
+    """Devolve o cursor da próxima página no cabeçalho, mantendo o corpo como lista."""
+    if pagina.next_cursor:
+        response.headers["X-Next-Cursor"] = pagina.next_cursor
@@ -0,0 +1,152 @@
+# backend/app/recorrencia.py
+# Regras de recorrência das séries de agendamentos (subconjunto do RRULE da RFC 5545):
+#   FREQ=DAILY|WEEKLY|MONTHLY (obrigatório), INTERVAL=n, BYDAY=MO,WE (só WEEKLY),
+#   COUNT=n ou UNTIL=AAAAMMDD[THHMMSS]
+# Ex.: "FREQ=WEEKLY;INTERVAL=2;BYDAY=TU" = toda terça, a cada duas semanas.
+#
+# As ocorrências são gravadas em agendamentos até um horizonte móvel
+# (RECORRENCIA_HORIZONTE_DIAS); séries sem fim são estendidas sob demanda pelo crud
+# e periodicamente pela tarefa "recorrencia.estender" (manutencao.py) ou por:
+# python -m app.recorrencia
+import os
+from calendar import monthrange
+from datetime import date, datetime, timedelta
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Até quantos dias à frente as ocorrências de uma série ficam gravadas em agendamentos
+RECORRENCIA_HORIZONTE_DIAS = int(os.getenv("RECORRENCIA_HORIZONTE_DIAS", "90"))
+HORIZONTE = timedelta(days=RECORRENCIA_HORIZONTE_DIAS)
+
+FREQUENCIAS = ("DAILY", "WEEKLY", "MONTHLY")
+DIAS_SEMANA = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+
+
+class RegraInvalidaError(ValueError):
+    """Regra de recorrência fora do subconjunto de RRULE suportado."""
+
+
+def _data_until(valor: str) -> datetime:
+    # UNTIL vem sem separadores; o "Z" é ignorado (os horários do sistema são locais)
+    valor = valor.rstrip("Z")
+    for formato in ("%Y%m%dT%H%M%S", "%Y%m%d"):
+        try:
+            momento = datetime.strptime(valor, formato)
+        except ValueError:
+            continue
+        # UNTIL só com data inclui o dia inteiro
+        return momento if "T" in valor else datetime.combine(momento.date(), datetime.max.time())
+    raise RegraInvalidaError(f"UNTIL inválido: {valor}")
+
+
+def _inteiro_positivo(nome: str, valor: str) -> int:
+    if not valor.isdigit() or int(valor) < 1:
+        raise RegraInvalidaError(f"{nome} deve ser um inteiro positivo")
+    return int(valor)
+
+
+def interpretar_regra(regra: str) -> dict:
+    """Valida a regra e devolve {freq, intervalo, dias, count, until}."""
+    partes = {}
+    for parte in (regra or "").strip().removeprefix("RRULE:").split(";"):
+        if not parte.strip():
+            continue
+        nome, separador, valor = parte.partition("=")
+        if not separador:
+            raise RegraInvalidaError(f"Parte inválida na regra: {parte}")
+        partes[nome.strip().upper()] = valor.strip().upper()
+
+    desconhecidas = set(partes) - {"FREQ", "INTERVAL", "BYDAY", "COUNT", "UNTIL"}
+    if desconhecidas:
+        raise RegraInvalidaError(f"Partes não suportadas: {', '.join(sorted(desconhecidas))}")
+    freq = partes.get("FREQ")
+    if freq not in FREQUENCIAS:
+        raise RegraInvalidaError(f"FREQ deve ser {', '.join(FREQUENCIAS)}")
+    if "COUNT" in partes and "UNTIL" in partes:
+        raise RegraInvalidaError("Use COUNT ou UNTIL, não os dois")
+    dias = ()
+    if "BYDAY" in partes:
+        if freq != "WEEKLY":
+            raise RegraInvalidaError("BYDAY só é suportado com FREQ=WEEKLY")
+        try:
+            dias = tuple(sorted({DIAS_SEMANA[dia.strip()] for dia in partes["BYDAY"].split(",")}))
+        except KeyError:
+            raise RegraInvalidaError("BYDAY deve listar dias como MO,TU,WE,TH,FR,SA,SU")
+    return {
+        "freq": freq,
+        "intervalo": _inteiro_positivo("INTERVAL", partes["INTERVAL"]) if "INTERVAL" in partes else 1,
+        "dias": dias,
+        "count": _inteiro_positivo("COUNT", partes["COUNT"]) if "COUNT" in partes else None,
+        "until": _data_until(partes["UNTIL"]) if "UNTIL" in partes else None,
+    }
+
+
+def _candidatas(regra: dict, inicio: datetime):
+    # Inícios que a frequência gera a partir de DTSTART, em ordem, sem fim
+    passo = regra["intervalo"]
+    if regra["freq"] == "DAILY":
+        k = 0
+        while True:
+            yield inicio + timedelta(days=k * passo)
+            k += 1
+    elif regra["freq"] == "WEEKLY":
+        dias = regra["dias"] or (inicio.weekday(),)
+        segunda = inicio.date() - timedelta(days=inicio.weekday())
+        k = 0
+        while True:
+            semana = segunda + timedelta(weeks=k * passo)
+            for dia in dias:
+                momento = datetime.combine(semana + timedelta(days=dia), inicio.time())
+                if momento >= inicio:
+                    yield momento
+            k += 1
+    else:
+        k = 0
+        while True:
+            ano, mes = divmod(inicio.month - 1 + k * passo, 12)
+            ano += inicio.year
+            # Meses sem o dia (ex.: 31) são pulados, como na RFC 5545
+            if inicio.day <= monthrange(ano, mes + 1)[1]:
+                yield datetime.combine(date(ano, mes + 1, inicio.day), inicio.time())
+            k += 1
+
+
+def ocorrencias(regra: str, inicio: datetime, desde: datetime = None, ate: datetime = None):
+    """Inícios das ocorrências com `desde` < início <= `ate` (limites opcionais), em ordem.
+
+    COUNT é contado desde DTSTART (`inicio`), então estender a série depois gera
+    exatamente as ocorrências que faltam.
+    """
+    interpretada = interpretar_regra(regra)
+    limite = min(filter(None, (interpretada["until"], ate)), default=None)
+    for numero, momento in enumerate(_candidatas(interpretada, inicio), start=1):
+        if interpretada["count"] is not None and numero > interpretada["count"]:
+            return
+        if limite is not None and momento > limite:
+            return
+        if desde is None or momento > desde:
+            yield momento
+
+
+def _main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Grava as ocorrências das séries ativas até o horizonte de recorrência."
+    )
+    parser.parse_args()
+
+    from . import crud, database
+    series = agendamentos = 0
+    # O banco padrão e cada shard
+    for db in database.sessoes_dos_bancos():
+        estendidas, gravados = crud.estender_series_agendamento(db)
+        series += estendidas
+        agendamentos += gravados
+    print(f"{series} séries estendidas, {agendamentos} agendamentos gravados")
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,210 @@
+# backend/app/relatorios.py
+# Relatórios de faturamento, ocupação e cancelamentos a partir de resumos_diarios.
+#
+# Cada agendamento contribui com +1 no contador do seu status e com a sua duração
+# (se não cancelado) na linha (salão, profissional, serviço, dia de início) do resumo.
+# O crud aplica essas contribuições na mesma transação da alteração do agendamento;
+# os relatórios leem só os resumos, então a latência não depende do histórico.
+# A receita não fica no resumo: é concluidos × preço atual do serviço, calculada na
+# leitura, para que uma mudança de preço não deixe os contadores inconsistentes.
+#
+# Reconstrução (backfill ou correção): python -m app.relatorios [--salao-id N]
+import argparse
+from collections import defaultdict
+from datetime import date
+from types import SimpleNamespace
+
+from sqlalchemy import and_, case, delete, func, select # type: ignore
+from sqlalchemy.dialects import mysql, sqlite # type: ignore
+
+from . import arquivamento, models
+
+# Coluna do resumo incrementada por cada status de agendamento
+COLUNA_POR_STATUS = {
+    "agendado": "agendados",
+    "confirmado": "confirmados",
+    "cancelado": "cancelados",
+    "concluido": "concluidos",
+}
+CONTADORES = ("agendados", "confirmados", "cancelados", "concluidos", "minutos_ocupados")
+AGRUPAMENTOS = ("dia", "mes", "profissional", "servico")
+# Colunas do agendamento lidas por contribuicao() na reconstrução
+COLUNAS_CONTRIBUICAO = ("salao_id", "profissional_id", "servico_id", "data_hora_inicio", "data_hora_fim", "status")
+# Agendamentos lidos por vez na reconstrução
+LOTE_RECONSTRUCAO = 10_000
+
+
+def contribuicao(agendamento):
+    """(chave, deltas) de um agendamento (modelo, schema ou dict) no resumo diário."""
+    if isinstance(agendamento, dict):
+        agendamento = SimpleNamespace(**agendamento)
+    chave = (
+        agendamento.salao_id,
+        agendamento.profissional_id,
+        agendamento.servico_id,
+        agendamento.data_hora_inicio.date(),
+    )
+    status = agendamento.status or "agendado"
+    deltas = dict.fromkeys(CONTADORES, 0)
+    deltas[COLUNA_POR_STATUS[status]] = 1
+    if status != "cancelado":
+        duracao = agendamento.data_hora_fim - agendamento.data_hora_inicio
+        deltas["minutos_ocupados"] = int(duracao.total_seconds() // 60)
+    return chave, deltas
+
+
+def _somar(removidas, adicionadas):
+    totais = defaultdict(lambda: dict.fromkeys(CONTADORES, 0))
+    for sinal, contribuicoes in ((-1, removidas), (1, adicionadas)):
+        for chave, deltas in contribuicoes:
+            for coluna, valor in deltas.items():
+                totais[chave][coluna] += sinal * valor
+    # Uma alteração que não muda o resumo (ex.: só observações) não gera escrita
+    return {chave: deltas for chave, deltas in totais.items() if any(deltas.values())}
+
+
+def _upsert(dialeto: str, totais: dict):
+    # Um único INSERT de várias linhas; as chaves já são únicas depois de _somar()
+    linhas = [
+        dict(deltas, salao_id=chave[0], profissional_id=chave[1], servico_id=chave[2], data=chave[3])
+        for chave, deltas in totais.items()
+    ]
+    resumo = models.ResumoDiario
+    if dialeto == "mysql":
+        stmt = mysql.insert(resumo).values(linhas)
+        return stmt.on_duplicate_key_update({
+            coluna: getattr(resumo, coluna) + stmt.inserted[coluna] for coluna in CONTADORES
+        })
+    stmt = sqlite.insert(resumo).values(linhas)
+    return stmt.on_conflict_do_update(
+        index_elements=["salao_id", "data", "profissional_id", "servico_id"],
+        set_={coluna: getattr(resumo, coluna) + stmt.excluded[coluna] for coluna in CONTADORES},
+    )
+
+
+def statements_resumo(dialeto: str, removidas=(), adicionadas=()):
+    """Upsert que aplica ao resumo a troca de `removidas` por `adicionadas` (listas de contribuicao())."""
+    totais = _somar(removidas, adicionadas)
+    return [_upsert(dialeto, totais)] if totais else []
+
+
+def registrar(db, removidas=(), adicionadas=()):
+    """Aplica as contribuições na transação corrente da sessão (o commit fica com quem chamou)."""
+    for stmt in statements_resumo(db.get_bind().dialect.name, removidas, adicionadas):
+        db.execute(stmt)
+
+
+def reconstruir(db, salao_id: int = None):
+    """Recalcula os resumos a partir dos agendamentos e do arquivo (todos ou de um salão) e faz commit.
+
+    Alterações de agendamentos feitas durante a reconstrução podem se perder no resumo:
+    rode fora do horário de movimento ou salão a salão.
+    """
+    resumo = models.ResumoDiario
+    apagar = delete(resumo)
+    if salao_id is not None:
+        apagar = apagar.where(resumo.salao_id == salao_id)
+    # Agendamentos arquivados continuam contando: lê a tabela quente e o arquivo
+    historico = arquivamento.select_historico(COLUNAS_CONTRIBUICAO, salao_id=salao_id)
+    consulta = select(*historico.c)
+
+    # Usa a mesma contribuicao() do caminho incremental, para os dois nunca divergirem
+    linhas = db.execute(consulta.execution_options(yield_per=LOTE_RECONSTRUCAO)).mappings()
+    totais = _somar((), (contribuicao(dict(linha)) for linha in linhas))
+    db.execute(apagar)
+    if totais:
+        db.execute(models.ResumoDiario.__table__.insert(), [
+            dict(deltas, salao_id=chave[0], profissional_id=chave[1], servico_id=chave[2], data=chave[3])
+            for chave, deltas in totais.items()
+        ])
+    db.commit()
+    return len(totais)
+
+
+def gerar_relatorio(db, salao_id: int, de: date, ate: date, agrupar: str, minutos_expediente: int):
+    """Linhas do relatório de `de` a `ate` (inclusive), agrupadas por dia, mês, profissional ou serviço.
+
+    `minutos_expediente` é a duração de um dia de trabalho, usada na taxa de ocupação
+    por profissional.
+    """
+    resumo = models.ResumoDiario
+    hoje = date.today()
+    # Agendamentos de dias passados que não foram concluídos nem cancelados: não comparecimento
+    pendentes = resumo.agendados + resumo.confirmados
+    colunas = [
+        func.sum(resumo.agendados + resumo.confirmados + resumo.cancelados + resumo.concluidos),
+        func.sum(resumo.concluidos),
+        func.sum(resumo.cancelados),
+        func.sum(case((resumo.data < hoje, pendentes), else_=0)),
+        func.sum(resumo.concluidos * models.Servico.preco),
+        func.sum(resumo.minutos_ocupados),
+    ]
+    if agrupar in ("dia", "mes"):
+        grupo = [resumo.data]
+    elif agrupar == "profissional":
+        grupo = [resumo.profissional_id, models.Profissional.nome]
+    else:
+        grupo = [resumo.servico_id, models.Servico.nome]
+
+    stmt = (
+        select(*grupo, *colunas)
+        .select_from(resumo)
+        .join(models.Servico, models.Servico.id == resumo.servico_id)
+        .where(and_(resumo.salao_id == salao_id, resumo.data >= de, resumo.data <= ate))
+        .group_by(*grupo)
+        .order_by(*grupo)
+    )
+    if agrupar == "profissional":
+        stmt = stmt.join(models.Profissional, models.Profissional.id == resumo.profissional_id)
+
+    # Mês: o banco agrupa por dia (no máximo 366 linhas por ano) e os meses saem daqui,
+    # sem depender de funções de data específicas de cada banco
+    acumulado = {}
+    for linha in db.execute(stmt):
+        if agrupar in ("dia", "mes"):
+            dia = linha[0]
+            chave, nome, valores = (dia.strftime("%Y-%m") if agrupar == "mes" else dia.isoformat()), None, linha[1:]
+        else:
+            chave, nome, valores = str(linha[0]), linha[1], linha[2:]
+        anterior = acumulado.get(chave, (nome, [0] * len(colunas)))[1]
+        acumulado[chave] = (nome, [a + (v or 0) for a, v in zip(anterior, valores)])
+
+    dias = (ate - de).days + 1
+    linhas = []
+    for chave, (nome, (total, concluidos, cancelados, nao_compareceu, receita, minutos)) in acumulado.items():
+        if not total:
+            # Linhas zeradas ficam no resumo depois de exclusões; não aparecem no relatório
+            continue
+        linhas.append({
+            "grupo": chave,
+            "nome": nome,
+            "agendamentos": total,
+            "concluidos": concluidos,
+            "cancelados": cancelados,
+            "nao_compareceu": nao_compareceu,
+            "taxa_cancelamento": cancelados / total if total else 0.0,
+            "taxa_nao_comparecimento": nao_compareceu / total if total else 0.0,
+            "receita": float(receita),
+            "minutos_ocupados": minutos,
+            "taxa_ocupacao": (
+                minutos / (dias * minutos_expediente) if agrupar == "profissional" and minutos_expediente else None
+            ),
+        })
+    return linhas
+
+
+def _main():
+    parser = argparse.ArgumentParser(description="Reconstrói a tabela resumos_diarios a partir de agendamentos.")
+    parser.add_argument("--salao-id", type=int, default=None, help="reconstrói só este salão")
+    args = parser.parse_args()
+
+    from . import database
+    linhas = 0
+    # O banco do salão, ou o padrão e cada shard
+    for db in database.sessoes_dos_bancos(args.salao_id):
+        linhas += reconstruir(db, salao_id=args.salao_id)
+    print(f"{linhas} linhas de resumo gravadas")
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,335 @@
+# backend/app/rotas_async.py
+# Rotas de CRUD em modo assíncrono (DB_MODO=async). Têm os mesmos caminhos,
+# schemas e respostas das rotas síncronas de main.py e as substituem na inicialização.
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession # type: ignore
+
+from .database import get_async_db
+from . import condicional, crud, crud_async, escopo, hashing, models, schemas, sincronizacao
+from .paginacao import definir_proximo_cursor
+from .serializacao import RespostaORJSON, responder_lista
+from .validacoes import validar_expand, validar_intervalo_agendamento, validar_patch
+
+router = APIRouter()
+
+
+def substituir_rotas(app):
+    """Remove do app as rotas síncronas que têm equivalente assíncrono e inclui o router."""
+    assincronas = {
+        (rota.path, method) for rota in router.routes for method in rota.methods
+    }
+    app.router.routes = [
+        rota for rota in app.router.routes
+        if not (isinstance(rota, APIRoute) and any((rota.path, m) in assincronas for m in rota.methods))
+    ]
+    app.include_router(router)
+
+
+############################### SALÕES
+@router.post("/saloes/", response_model=schemas.Salao, status_code=status.HTTP_201_CREATED)
+async def create_salao(salao: schemas.SalaoCreate, db: AsyncSession = Depends(get_async_db)):
+    if await crud_async.get_salao_by_email(db, email=salao.email):
+        raise HTTPException(status_code=400, detail="Email já registrado")
+    # Devolve a conexão ao pool enquanto o bcrypt roda no pool de processos
+    await db.close()
+    senha_hash = await hashing.hash_senha_async(salao.senha)
+    return await crud_async.create_salao(db=db, salao=salao, senha_hash=senha_hash)
+
+@router.get("/saloes/", response_model=List[schemas.Salao], response_class=RespostaORJSON)
+async def read_saloes(request: Request, response: Response, skip: int = 0, limit: int = 100, cursor: str = None,
+                      db: AsyncSession = Depends(get_async_db)):
+    nao_modificado = condicional.responder_colecao(
+        request, response, "saloes", models.Salao, await crud_async.get_versao_tabela(db, models.Salao)
+    )
+    if nao_modificado is not None:
+        return nao_modificado
+    saloes = await crud_async.get_listagem(db, models.Salao, skip=skip, limit=limit, cursor=cursor)
+    definir_proximo_cursor(response, saloes)
+    return responder_lista(response, saloes)
+
+@router.get("/saloes/{salao_id}", response_model=schemas.Salao)
+async def read_salao(salao_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    db_salao = await crud_async.get_salao(db, salao_id=salao_id)
+    if db_salao is None:
+        raise HTTPException(status_code=404, detail="Salão não encontrado")
+    return condicional.responder_objeto(request, response, "salao", db_salao) or db_salao
+
+@router.put("/saloes/{salao_id}", response_model=schemas.Salao)
+async def update_salao(salao_id: int, salao: schemas.SalaoUpdate, db: AsyncSession = Depends(get_async_db)):
+    senha_hash = None
+    if salao.senha:
+        if await crud_async.get_salao(db, salao_id=salao_id) is None:
+            raise HTTPException(status_code=404, detail="Salão não encontrado")
+        await db.close()
+        senha_hash = await hashing.hash_senha_async(salao.senha)
+    db_salao = await crud_async.update_salao(db=db, salao_id=salao_id, salao=salao, senha_hash=senha_hash)
+    if db_salao is None:
+        raise HTTPException(status_code=404, detail="Salão não encontrado")
+    return db_salao
+
+@router.patch("/saloes/{salao_id}", response_model=schemas.Salao)
+async def patch_salao(salao_id: int, salao: schemas.SalaoPatch, db: AsyncSession = Depends(get_async_db)):
+    dados = salao.dict(exclude_unset=True)
+    validar_patch(models.Salao, dados)
+    if dados.get("email"):
+        existente = await crud_async.get_salao_by_email(db, email=dados["email"])
+        if existente and existente.id != salao_id:
+            raise HTTPException(status_code=400, detail="Email já registrado")
+    senha = dados.pop("senha", None)
+    if senha:
+        await db.close()
+        dados["senha_hash"] = await hashing.hash_senha_async(senha)
+    db_salao = await crud_async.patch_salao(db, salao_id, dados)
+    if db_salao is None:
+        raise HTTPException(status_code=404, detail="Salão não encontrado")
+    return db_salao
+
+@router.delete("/saloes/{salao_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_salao(salao_id: int, db: AsyncSession = Depends(get_async_db)):
+    if await crud_async.delete_salao(db=db, salao_id=salao_id) is None:
+        raise HTTPException(status_code=404, detail="Salão não encontrado")
+    return {"detail": "Salão deletado com sucesso"}
+
+############################### PROFISSIONAIS
+@router.post("/profissionais/", response_model=schemas.Profissional, status_code=status.HTTP_201_CREATED)
+async def create_profissional(profissional: schemas.ProfissionalCreate, db: AsyncSession = Depends(get_async_db)):
+    if await crud_async.get_profissional_by_email(db, email=profissional.email):
+        raise HTTPException(status_code=400, detail="Email já registrado")
+    return await crud_async.create_profissional(db=db, profissional=profissional)
+
+@router.get("/profissionais/", response_model=List[schemas.Profissional], response_class=RespostaORJSON)
+async def read_profissionais(request: Request, response: Response, skip: int = 0, limit: int = 100,
+                             cursor: str = None, salao_id: Optional[int] = None,
+                             db: AsyncSession = Depends(get_async_db)):
+    nao_modificado = condicional.responder_colecao(
+        request, response, "profissionais", models.Profissional,
+        await crud_async.get_versao_tabela(db, models.Profissional, salao_id),
+    )
+    if nao_modificado is not None:
+        return nao_modificado
+    profissionais = await crud_async.get_listagem(db, models.Profissional, skip=skip, limit=limit, cursor=cursor,
+                                                  salao_id=salao_id)
+    definir_proximo_cursor(response, profissionais)
+    return responder_lista(response, profissionais)
+
+@router.get("/profissionais/search", response_model=List[schemas.Profissional])
+async def search_profissionais(salao_id: Optional[int] = None, especialidade: Optional[str] = None,
+                               q: Optional[str] = None, skip: int = Query(0, ge=0),
+                               limit: int = Query(20, ge=1, le=crud.LIMITE_BUSCA_PROFISSIONAIS),
+                               db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.buscar_profissionais(db, salao_id=salao_id, especialidade=especialidade, q=q,
+                                                 skip=skip, limit=limit)
+
+@router.get("/profissionais/{profissional_id}", response_model=schemas.Profissional)
+async def read_profissional(profissional_id: int, request: Request, response: Response,
+                            db: AsyncSession = Depends(get_async_db)):
+    db_profissional = await crud_async.get_profissional(db, profissional_id=profissional_id)
+    if db_profissional is None:
+        raise HTTPException(status_code=404, detail="Profissional não encontrado")
+    return condicional.responder_objeto(request, response, "profissional", db_profissional) or db_profissional
+
+@router.put("/profissionais/{profissional_id}", response_model=schemas.Profissional)
+async def update_profissional(profissional_id: int, profissional: schemas.ProfissionalUpdate,
+                              db: AsyncSession = Depends(get_async_db)):
+    db_profissional = await crud_async.update_profissional(
+        db=db, profissional_id=profissional_id, profissional=profissional
+    )
+    if db_profissional is None:
+        raise HTTPException(status_code=404, detail="Profissional não encontrado")
+    return db_profissional
+
+@router.patch("/profissionais/{profissional_id}", response_model=schemas.Profissional)
+async def patch_profissional(profissional_id: int, profissional: schemas.ProfissionalPatch,
+                             db: AsyncSession = Depends(get_async_db)):
+    dados = profissional.dict(exclude_unset=True)
+    validar_patch(models.Profissional, dados)
+    db_profissional = await crud_async.patch_profissional(db, profissional_id, dados)
+    if db_profissional is None:
+        raise HTTPException(status_code=404, detail="Profissional não encontrado")
+    return db_profissional
+
+@router.delete("/profissionais/{profissional_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_profissional(profissional_id: int, db: AsyncSession = Depends(get_async_db)):
+    if await crud_async.delete_profissional(db=db, profissional_id=profissional_id) is None:
+        raise HTTPException(status_code=404, detail="Profissional não encontrado")
+    return {"detail": "Profissional deletado com sucesso"}
+
+############################### SERVIÇOS
+@router.post("/servicos/", response_model=schemas.Servico, status_code=status.HTTP_201_CREATED)
+async def create_servico(servico: schemas.ServicoCreate, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.create_servico(db=db, servico=servico)
+
+@router.get("/servicos/", response_model=List[schemas.Servico], response_class=RespostaORJSON)
+async def read_servicos(request: Request, response: Response, skip: int = 0, limit: int = 100,
+                        cursor: str = None, salao_id: Optional[int] = None,
+                        db: AsyncSession = Depends(get_async_db)):
+    nao_modificado = condicional.responder_colecao(
+        request, response, "servicos", models.Servico,
+        await crud_async.get_versao_tabela(db, models.Servico, salao_id),
+    )
+    if nao_modificado is not None:
+        return nao_modificado
+    servicos = await crud_async.get_listagem(db, models.Servico, skip=skip, limit=limit, cursor=cursor,
+                                             salao_id=salao_id)
+    definir_proximo_cursor(response, servicos)
+    return responder_lista(response, servicos)
+
+@router.get("/servicos/{servico_id}", response_model=schemas.Servico)
+async def read_servico(servico_id: int, request: Request, response: Response,
+                       db: AsyncSession = Depends(get_async_db)):
+    db_servico = await crud_async.get_servico(db, servico_id=servico_id)
+    if db_servico is None:
+        raise HTTPException(status_code=404, detail="Serviço não encontrado")
+    return condicional.responder_objeto(request, response, "servico", db_servico) or db_servico
+
+@router.put("/servicos/{servico_id}", response_model=schemas.Servico)
+async def update_servico(servico_id: int, servico: schemas.ServicoUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_servico = await crud_async.update_servico(db=db, servico_id=servico_id, servico=servico)
+    if db_servico is None:
+        raise HTTPException(status_code=404, detail="Serviço não encontrado")
+    return db_servico
+
+@router.patch("/servicos/{servico_id}", response_model=schemas.Servico)
+async def patch_servico(servico_id: int, servico: schemas.ServicoPatch, db: AsyncSession = Depends(get_async_db)):
+    dados = servico.dict(exclude_unset=True)
+    validar_patch(models.Servico, dados)
+    db_servico = await crud_async.patch_servico(db, servico_id, dados)
+    if db_servico is None:
+        raise HTTPException(status_code=404, detail="Serviço não encontrado")
+    return db_servico
+
+@router.delete("/servicos/{servico_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_servico(servico_id: int, db: AsyncSession = Depends(get_async_db)):
+    if await crud_async.delete_servico(db=db, servico_id=servico_id) is None:
+        raise HTTPException(status_code=404, detail="Serviço não encontrado")
+    return {"detail": "Serviço deletado com sucesso"}
+
+############################### CLIENTES
+@router.post("/clientes/", response_model=schemas.Cliente, status_code=status.HTTP_201_CREATED)
+async def create_cliente(cliente: schemas.ClienteCreate, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.create_cliente(db=db, cliente=cliente)
+
+@router.get("/clientes/", response_model=List[schemas.Cliente], response_class=RespostaORJSON)
+async def read_clientes(response: Response, skip: int = 0, limit: int = 100, cursor: str = None,
+                        db: AsyncSession = Depends(get_async_db)):
+    clientes = await crud_async.get_listagem(db, models.Cliente, skip=skip, limit=limit, cursor=cursor)
+    definir_proximo_cursor(response, clientes)
+    return responder_lista(response, clientes)
+
+@router.get("/clientes/search", response_model=List[schemas.Cliente])
+async def search_clientes(telefone: Optional[str] = None, email: Optional[str] = None,
+                          limit: int = Query(20, ge=1, le=crud.LIMITE_BUSCA_CLIENTES),
+                          db: AsyncSession = Depends(get_async_db)):
+    if not (telefone and telefone.strip()) and not (email and email.strip()):
+        raise HTTPException(status_code=400, detail="Informe telefone ou email")
+    return await crud_async.buscar_clientes(db, telefone=telefone, email=email, limit=limit)
+
+@router.post("/clientes/find-or-create", response_model=schemas.Cliente)
+async def find_or_create_cliente(cliente: schemas.ClienteCreate, response: Response,
+                                 db: AsyncSession = Depends(get_async_db)):
+    db_cliente, criado = await crud_async.find_or_create_cliente(db, cliente)
+    response.status_code = status.HTTP_201_CREATED if criado else status.HTTP_200_OK
+    return db_cliente
+
+@router.get("/clientes/{cliente_id}", response_model=schemas.Cliente)
+async def read_cliente(cliente_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_cliente = await crud_async.get_cliente(db, cliente_id=cliente_id)
+    if db_cliente is None:
+        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+    return db_cliente
+
+@router.put("/clientes/{cliente_id}", response_model=schemas.Cliente)
+async def update_cliente(cliente_id: int, cliente: schemas.ClienteUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_cliente = await crud_async.update_cliente(db=db, cliente_id=cliente_id, cliente=cliente)
+    if db_cliente is None:
+        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+    return db_cliente
+
+@router.patch("/clientes/{cliente_id}", response_model=schemas.Cliente)
+async def patch_cliente(cliente_id: int, cliente: schemas.ClientePatch, db: AsyncSession = Depends(get_async_db)):
+    dados = cliente.dict(exclude_unset=True)
+    validar_patch(models.Cliente, dados)
+    db_cliente = await crud_async.patch_cliente(db, cliente_id, dados)
+    if db_cliente is None:
+        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+    return db_cliente
+
+@router.delete("/clientes/{cliente_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_cliente(cliente_id: int, db: AsyncSession = Depends(get_async_db)):
+    if await crud_async.delete_cliente(db=db, cliente_id=cliente_id) is None:
+        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+    return {"detail": "Cliente deletado com sucesso"}
+
+############################### AGENDAMENTOS
+@router.post("/agendamentos/", response_model=schemas.Agendamento, status_code=status.HTTP_201_CREATED)
+async def create_agendamento(agendamento: schemas.AgendamentoCreate, db: AsyncSession = Depends(get_async_db)):
+    validar_intervalo_agendamento(agendamento)
+    try:
+        return await crud_async.create_agendamento(db=db, agendamento=agendamento)
+    except crud.HorarioIndisponivelError:
+        raise HTTPException(status_code=409, detail="Profissional já possui agendamento neste horário")
+
+@router.get("/agendamentos/", response_model=List[schemas.AgendamentoExpandido], response_class=RespostaORJSON)
+async def read_agendamentos(response: Response, skip: int = 0, limit: int = 100, cursor: str = None,
+                            expand: str = None, salao_id: Optional[int] = None,
+                            db: AsyncSession = Depends(get_async_db)):
+    agendamentos = await crud_async.get_listagem_agendamentos(db, skip=skip, limit=limit, cursor=cursor,
+                                                              expand=validar_expand(expand), salao_id=salao_id)
+    definir_proximo_cursor(response, agendamentos)
+    return responder_lista(response, agendamentos)
+
+@router.get("/agendamentos/changes", response_model=schemas.MudancasAgendamentos, response_class=RespostaORJSON)
+async def read_mudancas_agendamentos(since: Optional[str] = None, salao_id: Optional[int] = None, limit: int = 500,
+                                     db: AsyncSession = Depends(get_async_db)):
+    salao_id = salao_id if salao_id is not None else escopo.salao_da_sessao(db)
+    if salao_id is None:
+        raise HTTPException(status_code=400, detail="Informe salao_id ou o cabeçalho X-Salao-Id")
+    limit = max(1, min(limit, sincronizacao.SYNC_LIMITE_MAXIMO))
+    return RespostaORJSON(await crud_async.get_mudancas_agendamentos(db, salao_id, token=since, limit=limit))
+
+@router.get("/agendamentos/{agendamento_id}", response_model=schemas.AgendamentoExpandido,
+            response_model_exclude_unset=True)
+async def read_agendamento(agendamento_id: int, expand: str = None, db: AsyncSession = Depends(get_async_db)):
+    expand = validar_expand(expand)
+    db_agendamento = await crud_async.get_agendamento(db, agendamento_id=agendamento_id, expand=expand)
+    if db_agendamento is None:
+        raise HTTPException(status_code=404, detail="Agendamento não encontrado")
+    return crud.expandir_agendamento(db_agendamento, expand)
+
+@router.put("/agendamentos/{agendamento_id}", response_model=schemas.Agendamento)
+async def update_agendamento(agendamento_id: int, agendamento: schemas.AgendamentoUpdate,
+                             db: AsyncSession = Depends(get_async_db)):
+    validar_intervalo_agendamento(agendamento)
+    try:
+        db_agendamento = await crud_async.update_agendamento(
+            db=db, agendamento_id=agendamento_id, agendamento=agendamento
+        )
+    except crud.HorarioIndisponivelError:
+        raise HTTPException(status_code=409, detail="Profissional já possui agendamento neste horário")
+    if db_agendamento is None:
+        raise HTTPException(status_code=404, detail="Agendamento não encontrado")
+    return db_agendamento
+
+@router.patch("/agendamentos/{agendamento_id}", response_model=schemas.Agendamento)
+async def patch_agendamento(agendamento_id: int, agendamento: schemas.AgendamentoPatch,
+                            db: AsyncSession = Depends(get_async_db)):
+    dados = agendamento.dict(exclude_unset=True)
+    validar_patch(models.Agendamento, dados)
+    try:
+        db_agendamento = await crud_async.patch_agendamento(db, agendamento_id, dados)
+    except crud.IntervaloInvalidoError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except crud.HorarioIndisponivelError:
+        raise HTTPException(status_code=409, detail="Profissional já possui agendamento neste horário")
+    if db_agendamento is None:
+        raise HTTPException(status_code=404, detail="Agendamento não encontrado")
+    return db_agendamento
+
+@router.delete("/agendamentos/{agendamento_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_agendamento(agendamento_id: int, db: AsyncSession = Depends(get_async_db)):
+    if await crud_async.delete_agendamento(db=db, agendamento_id=agendamento_id) is None:
+        raise HTTPException(status_code=404, detail="Agendamento não encontrado")
+    return {"detail": "Agendamento deletado com sucesso"}
@@ -1,7 +1,7 @@
 # backend/app/schemas.py
 from pydantic import BaseModel, EmailStr
-from typing import Optional
-from datetime import datetime
+from typing import List, Literal, Optional
+from datetime import date, datetime
 
 
 # Define os esquemas Pydantic para validação e serialização de dados
@@ -30,6 +30,14 @@ class SalaoUpdate(SalaoBase):
 class SalaoDelete(BaseModel):
     id: int
     message: str = "Salão deletado com sucesso"
+
+# Atualização parcial (PATCH): só os campos enviados no corpo são gravados
+class SalaoPatch(BaseModel):
+    nome: Optional[str] = None
+    endereco: Optional[str] = None
+    telefone: Optional[str] = None
+    email: Optional[EmailStr] = None
+    senha: Optional[str] = None
     
             
 # Classe Profissional
@@ -48,6 +56,12 @@ class ProfissionalUpdate(ProfissionalBase):
 class ProfissionalDelete(BaseModel):
     id: int
     message: str = "Profissional deletado com sucesso"
+
+class ProfissionalPatch(BaseModel):
+    nome: Optional[str] = None
+    especialidade: Optional[str] = None
+    telefone: Optional[str] = None
+    email: Optional[EmailStr] = None
     
 class Profissional(ProfissionalBase):
     id: int
@@ -89,6 +103,12 @@ class Servico(ServicoBase):
    
 class ServicoUpdate(ServicoBase):
     pass # Pode ser estendido se necessário
+
+class ServicoPatch(BaseModel):
+    nome: Optional[str] = None
+    descricao: Optional[str] = None
+    duracao_minutos: Optional[int] = None
+    preco: Optional[float] = None
     
 # Classe ServicoDelete
 class ServicoDelete(BaseModel):
@@ -116,11 +136,19 @@ class Cliente(ClienteBase):
 class ClienteUpdate(ClienteBase):
     pass # Pode ser estendido se necessário
 
+class ClientePatch(BaseModel):
+    nome: Optional[str] = None
+    telefone: Optional[str] = None
+    email: Optional[EmailStr] = None
+
 class ClienteDelete(BaseModel):
     id: int
     message: str = "Cliente deletado com sucesso" 
  
 
+# Valores da coluna agendamentos.status: outro valor no corpo é recusado com 422
+StatusAgendamento = Literal["agendado", "confirmado", "cancelado", "concluido"]
+
 # Schema Base para Agendamento - contém os campos comuns
 class AgendamentoBase(BaseModel):
     salao_id: int
@@ -130,7 +158,7 @@ class AgendamentoBase(BaseModel):
     # Inclua data_hora_inicio e data_hora_fim aqui
     data_hora_inicio: datetime # Deve corresponder ao tipo do seu modelo
     data_hora_fim: datetime   # Deve corresponder ao tipo do seu modelo
-    status: Optional[str] = "agendado" # Status pode ser opcional com um valor padrão
+    status: StatusAgendamento = "agendado" # Pode ser omitido (valor padrão), mas não null
     observacoes: Optional[str] = None
 
 # Schema para Criação - herda do Base
@@ -142,14 +170,37 @@ class Agendamento(AgendamentoBase):
     id: int
     criado_em: datetime
     atualizado_em: datetime
+    serie_id: Optional[int] = None # Série recorrente de origem, se houver
 
     class Config:
         orm_mode = True # Permite que o Pydantic leia dados de modelos SQLAlchemy
         
+# Schema para Leitura expandida: o formato das respostas com ?expand=cliente,profissional,servico,salao.
+# Só os relacionamentos pedidos entram no JSON; sem expand, a resposta é a de Agendamento.
+class AgendamentoExpandido(Agendamento):
+    salao: Optional[Salao] = None
+    cliente: Optional[Cliente] = None
+    profissional: Optional[Profissional] = None
+    servico: Optional[Servico] = None
+
+    class Config:
+        orm_mode = True # Permite que o Pydantic leia dados de modelos SQLAlchemy
+
 # Schema para Atualização - herda do Base
 class AgendamentoUpdate(AgendamentoBase):
     pass # Pode ser estendido se necessário
 
+# Schema para Atualização parcial (PATCH) - todos os campos opcionais
+class AgendamentoPatch(BaseModel):
+    salao_id: Optional[int] = None
+    cliente_id: Optional[int] = None
+    profissional_id: Optional[int] = None
+    servico_id: Optional[int] = None
+    data_hora_inicio: Optional[datetime] = None
+    data_hora_fim: Optional[datetime] = None
+    status: Optional[StatusAgendamento] = None
+    observacoes: Optional[str] = None
+
 # Schema para Exclusão
 class AgendamentoDelete(BaseModel):
     id: int
@@ -170,4 +221,112 @@ class AgendamentoList(BaseModel):
 
     class Config:
         orm_mode = True # Permite que o Pydantic leia dados de modelos SQLAlchemy
-        
\ No newline at end of file
+        
+
+
+# Schema da sincronização incremental (GET /agendamentos/changes)
+class MudancasAgendamentos(BaseModel):
+    alterados: List[Agendamento] # Criados ou alterados depois do token
+    removidos: List[int] # Ids excluídos depois do token
+    token: str # Passe em ?since= na próxima sincronização
+    tem_mais: bool # Há mais mudanças: peça de novo com o token já, sem esperar
+
+# Schemas de Séries recorrentes (POST /agendamentos/recorrentes)
+class SerieAgendamentoBase(BaseModel):
+    salao_id: int
+    cliente_id: int
+    profissional_id: int
+    servico_id: int
+    data_hora_inicio: datetime # Primeira ocorrência; o horário vale para todas
+    data_hora_fim: datetime # Término da primeira ocorrência (define a duração)
+    regra: str # RRULE, ex.: "FREQ=WEEKLY;INTERVAL=2;BYDAY=TU"
+    ate: Optional[date] = None # Último dia; sem ele (e sem COUNT/UNTIL) a série não termina
+    observacoes: Optional[str] = None
+
+class SerieAgendamentoCreate(SerieAgendamentoBase):
+    pass
+
+class SerieAgendamento(BaseModel):
+    id: int
+    salao_id: int
+    cliente_id: int
+    profissional_id: int
+    servico_id: int
+    regra: str
+    data_hora_inicio: datetime
+    duracao_minutos: int
+    ate: Optional[date] = None
+    materializada_ate: Optional[datetime] = None
+    status: str
+    observacoes: Optional[str] = None
+    criado_em: datetime
+    atualizado_em: datetime
+
+    class Config:
+        orm_mode = True # Permite que o Pydantic leia dados de modelos SQLAlchemy
+
+# Série com as ocorrências já gravadas a partir de agora
+class SerieAgendamentoDetalhe(SerieAgendamento):
+    agendamentos: List[Agendamento]
+
+# Edição em lote das ocorrências futuras (só os campos enviados são alterados)
+class SerieAgendamentoPatch(BaseModel):
+    a_partir_de: Optional[datetime] = None # Padrão: agora
+    profissional_id: Optional[int] = None
+    servico_id: Optional[int] = None
+    status: Optional[StatusAgendamento] = None
+    observacoes: Optional[str] = None
+
+class ResultadoSerie(BaseModel):
+    serie_id: int
+    alterados: int # Ocorrências alteradas (ou canceladas)
+
+
+# Schemas de Disponibilidade (horários livres por profissional)
+class HorariosProfissional(BaseModel):
+    profissional_id: int
+    nome: str
+    horarios: List[datetime]
+
+class Disponibilidade(BaseModel):
+    salao_id: int
+    servico_id: int
+    data: date
+    dias: int
+    duracao_minutos: int
+    profissionais: List[HorariosProfissional]
+
+
+
+# Schemas de Importação em lote
+class ErroImportacao(BaseModel):
+    linha: int # Posição do registro no corpo enviado, começando em 1
+    erro: str
+
+class ResultadoImportacao(BaseModel):
+    recebidos: int
+    inseridos: int
+    erros: List[ErroImportacao]
+
+
+
+# Schemas de Relatórios (lidos de resumos_diarios)
+class LinhaRelatorio(BaseModel):
+    grupo: str # Dia (AAAA-MM-DD), mês (AAAA-MM), profissional_id ou servico_id
+    nome: Optional[str] = None # Nome do profissional ou serviço, quando agrupado por eles
+    agendamentos: int
+    concluidos: int
+    cancelados: int
+    nao_compareceu: int # Agendamentos de dias passados não concluídos nem cancelados
+    taxa_cancelamento: float
+    taxa_nao_comparecimento: float
+    receita: float # Concluídos × preço do serviço
+    minutos_ocupados: int
+    taxa_ocupacao: Optional[float] = None # Só no agrupamento por profissional
+
+class Relatorio(BaseModel):
+    salao_id: int
+    de: date
+    ate: date
+    agrupar: str
+    linhas: List[LinhaRelatorio]
@@ -0,0 +1,28 @@
+# backend/app/serializacao.py
+# Resposta JSON das listagens codificada com orjson. As rotas de listagem devolvem os
+# dicts de crud.get_listagem* direto nesta resposta, sem passar pelo response_model
+# (que montaria e validaria um modelo Pydantic por linha e depois usaria o json da
+# biblioteca padrão). O JSON é o mesmo: mesmas chaves e ordem dos schemas de leitura,
+# datas em ISO 8601 e DECIMAL como número.
+from decimal import Decimal
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+
+def _padrao(valor):
+    # orjson já codifica datetime e date; DECIMAL (preço) sai como float, igual ao schema
+    if isinstance(valor, Decimal):
+        return float(valor)
+    raise TypeError(f"Tipo não serializável em JSON: {type(valor).__name__}")
+
+
+class RespostaORJSON(JSONResponse):
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_padrao)
+
+
+def responder_lista(response: Response, itens) -> RespostaORJSON:
+    """Resposta da listagem com os cabeçalhos que a rota já definiu em `response` (cursor, ETag...)."""
+    return RespostaORJSON(itens, headers=response.headers)
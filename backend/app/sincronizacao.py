@@ -0,0 +1,157 @@
+# backend/app/sincronizacao.py
+# Sincronização incremental da agenda (GET /agendamentos/changes): os tablets da
+# recepção pedem só o que mudou desde o último token, em vez de baixar a agenda toda.
+#
+# - Cada salão tem um contador em versoes_agenda. Toda escrita em agendamentos o
+#   incrementa na própria transação e grava o novo valor na coluna `versao` das
+#   linhas alteradas; exclusões gravam uma lápide em agendamentos_removidos.
+#   O UPDATE do contador trava a linha do salão até o commit, então as versões de um
+#   salão ficam visíveis na ordem em que foram dadas: quem já leu a versão N não perde
+#   depois uma escrita de versão menor (o que atualizado_em não garantiria).
+# - As mudanças saem na ordem (versao, id), pelos índices que começam por salao_id e
+#   com paginação por chave: o custo acompanha o número de mudanças, não o tamanho
+#   da agenda. O token é a chave da última mudança entregue (paginacao.codificar_cursor).
+# - Sem token a resposta é a agenda inteira do salão, nas mesmas páginas; o último
+#   token dela já serve para as próximas sincronizações.
+# - Lápides com mais de SYNC_RETENCAO_DIAS são apagadas pela tarefa periódica
+#   "sincronizacao.limpar"; um token anterior a elas recebe 410 e o tablet recomeça
+#   sem token.
+# - O arquivamento (arquivamento.py) não gera lápides: agendamentos arquivados não
+#   foram excluídos, só deixaram a agenda viva.
+import os
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+from sqlalchemy import delete, func, insert, select, update # type: ignore
+
+from . import models, tarefas
+from .paginacao import codificar_cursor, decodificar_cursor
+
+load_dotenv()
+
+# Mudanças por resposta (o parâmetro limit é limitado a este valor)
+SYNC_LIMITE_MAXIMO = int(os.getenv("SYNC_LIMITE_MAXIMO", "1000"))
+# Dias que as lápides de exclusões ficam guardadas; tokens mais velhos expiram
+SYNC_RETENCAO_DIAS = int(os.getenv("SYNC_RETENCAO_DIAS", "30"))
+
+# Chave de ordenação das mudanças e do token
+CHAVE = (models.Agendamento.versao, models.Agendamento.id)
+CHAVE_REMOVIDOS = (models.AgendamentoRemovido.versao, models.AgendamentoRemovido.agendamento_id)
+
+
+class TokenExpiradoError(Exception):
+    """O token é anterior às lápides já apagadas: o cliente precisa sincronizar sem token."""
+
+
+def statements_versao(salao_id: int):
+    """(incrementar, criar) do contador do salão, para crud e crud_async."""
+    contador = models.VersaoAgenda
+    incrementar = update(contador).where(contador.salao_id == salao_id).values(versao=contador.versao + 1)
+    criar = insert(contador).values(salao_id=salao_id, versao=0, removidos_ate=0).prefix_with(
+        "OR IGNORE", dialect="sqlite"
+    ).prefix_with("IGNORE", dialect="mysql")
+    return incrementar, criar
+
+
+def statement_incrementar_por_agendamento(agendamento_id: int):
+    # Incrementa o contador do salão do agendamento sem ler o salão antes
+    contador, agendamento = models.VersaoAgenda, models.Agendamento
+    salao_id = select(agendamento.salao_id).where(agendamento.id == agendamento_id).scalar_subquery()
+    return update(contador).where(contador.salao_id == salao_id).values(versao=contador.versao + 1)
+
+
+def versao_do_salao(salao_id: int):
+    """Versão corrente do salão como subconsulta, para gravar na própria escrita sem outra leitura."""
+    return select(models.VersaoAgenda.versao).where(models.VersaoAgenda.salao_id == salao_id).scalar_subquery()
+
+
+def versao_da_linha():
+    # Mesma subconsulta, ligada ao salão da linha atualizada (UPDATE agendamentos ... SET versao = ...)
+    contador = models.VersaoAgenda
+    return select(contador.versao).where(contador.salao_id == models.Agendamento.salao_id).scalar_subquery()
+
+
+def incrementar(db, salao_id: int) -> None:
+    """Incrementa o contador do salão na transação corrente; a linha fica travada até o commit."""
+    incrementar_, criar = statements_versao(salao_id)
+    if db.execute(incrementar_).rowcount == 0:
+        # Primeira escrita do salão: o IGNORE resolve duas transações criando ao mesmo tempo
+        db.execute(criar)
+        db.execute(incrementar_)
+
+
+def proxima_versao(db, salao_id: int) -> int:
+    """Incrementa o contador e devolve o valor, para escritas em lote com vários parâmetros."""
+    incrementar(db, salao_id)
+    return db.execute(select(versao_do_salao(salao_id))).scalar_one()
+
+
+def versoes_por_salao(db, salao_ids) -> dict:
+    # Em ordem de salao_id: duas transações com os mesmos salões não se travam em ordem inversa
+    return {salao_id: proxima_versao(db, salao_id) for salao_id in sorted(set(salao_ids))}
+
+
+def statement_remocao(agendamento_id: int, salao_id: int):
+    # Lápide com a versão corrente do salão (incremente antes, na mesma transação)
+    return insert(models.AgendamentoRemovido).values(
+        agendamento_id=agendamento_id, salao_id=salao_id, versao=versao_do_salao(salao_id)
+    )
+
+
+def registrar_remocao(db, agendamento_id: int, salao_id: int):
+    """Grava a lápide da exclusão na transação corrente (o commit fica com quem chamou)."""
+    incrementar(db, salao_id)
+    db.execute(statement_remocao(agendamento_id, salao_id))
+
+
+def decodificar_token(token: str = None):
+    """(versao, id) do token, ou None sem token. Token malformado levanta CursorInvalidoError."""
+    return tuple(decodificar_cursor(token, CHAVE)) if token else None
+
+
+def select_removidos_ate(salao_id: int):
+    return select(models.VersaoAgenda.removidos_ate).where(models.VersaoAgenda.salao_id == salao_id)
+
+
+def verificar_token(apos, removidos_ate) -> None:
+    # Lápides até removidos_ate já foram apagadas: quem parou antes pode ter perdido exclusões
+    if apos is not None and apos[0] < (removidos_ate or 0):
+        raise TokenExpiradoError("Token de sincronização expirado")
+
+
+def montar_mudancas(alterados, removidos, nomes, limit: int, token: str = None) -> dict:
+    """Junta as duas leituras (até limit + 1 linhas cada) na ordem da chave e corta em `limit`.
+
+    `alterados` são linhas (versao, *nomes) e `removidos`, (versao, agendamento_id).
+    """
+    posicao_id = nomes.index("id") + 1
+    eventos = sorted(
+        [((linha[0], linha[posicao_id]), linha) for linha in alterados]
+        + [((linha[0], linha[1]), None) for linha in removidos],
+        key=lambda evento: evento[0],
+    )
+    tem_mais = len(eventos) > limit
+    eventos = eventos[:limit]
+    if eventos:
+        token = codificar_cursor(eventos[-1][0])
+    return {
+        "alterados": [dict(zip(nomes, linha[1:])) for _, linha in eventos if linha is not None],
+        "removidos": [chave[1] for chave, linha in eventos if linha is None],
+        "token": token or codificar_cursor([0, 0]),
+        "tem_mais": tem_mais,
+    }
+
+
+@tarefas.tarefa("sincronizacao.limpar", periodica_a_cada=24 * 3600)
+def limpar_removidos(db, payload):
+    removido, contador = models.AgendamentoRemovido, models.VersaoAgenda
+    limite = datetime.now() - timedelta(days=SYNC_RETENCAO_DIAS)
+    maximos = db.execute(
+        select(removido.salao_id, func.max(removido.versao))
+        .where(removido.removido_em < limite).group_by(removido.salao_id)
+    ).all()
+    for salao_id, versao in maximos:
+        # Apaga um prefixo das versões do salão e registra até onde, para expirar os tokens
+        db.execute(update(contador).where(contador.salao_id == salao_id).values(removidos_ate=versao))
+        db.execute(delete(removido).where(removido.salao_id == salao_id, removido.versao <= versao))
+    db.commit()
@@ -0,0 +1,301 @@
+# backend/app/tarefas.py
+# Tarefas em segundo plano (lembretes, reconstrução de relatórios, limpezas) fora
+# dos handlers da API. A fila é a tabela `tarefas`, então funciona em SQLite e MySQL
+# sem broker externo.
+#
+# - Uma tarefa é uma função registrada com @tarefa("tipo") que recebe (db, payload).
+#   A entrega é "pelo menos uma vez": a função precisa ser idempotente.
+# - Falhas voltam para a fila com backoff exponencial até max_tentativas.
+# - Tarefas periódicas (periodica_a_cada=segundos) são enfileiradas pelo próprio worker,
+#   com uma chave por janela de tempo: vários workers não duplicam a execução.
+#
+# - Cada banco (o padrão e cada shard, database.bancos) tem a sua fila: o worker
+#   passa por todos a cada rodada, e as tarefas rodam com uma sessão do banco da fila.
+#
+# Execução:
+#   TAREFAS_MODO=worker (padrão) - processo separado: python -m app.tarefas
+#   TAREFAS_MODO=api             - uma thread dentro de cada processo da API
+import argparse
+import importlib
+import json
+import logging
+import os
+import random
+import threading
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+from sqlalchemy import and_, delete, func, insert, or_, select, update # type: ignore
+
+from . import models
+
+load_dotenv()
+
+logger = logging.getLogger("agendanet.tarefas")
+
+TAREFAS_MODO = os.getenv("TAREFAS_MODO", "worker").lower()
+# Segundos entre consultas à fila quando não há nada para fazer
+TAREFAS_INTERVALO = float(os.getenv("TAREFAS_INTERVALO", "5"))
+# Tarefas reservadas por consulta
+TAREFAS_LOTE = int(os.getenv("TAREFAS_LOTE", "10"))
+TAREFAS_MAX_TENTATIVAS = int(os.getenv("TAREFAS_MAX_TENTATIVAS", "5"))
+# Backoff entre tentativas: base * 2^(tentativa-1) segundos, até o máximo, com jitter
+TAREFAS_BACKOFF_BASE = float(os.getenv("TAREFAS_BACKOFF_BASE", "30"))
+TAREFAS_BACKOFF_MAX = float(os.getenv("TAREFAS_BACKOFF_MAX", "3600"))
+# Segundos que uma tarefa fica reservada; se o worker morrer, outra pode pegá-la depois disso
+TAREFAS_RESERVA = int(os.getenv("TAREFAS_RESERVA", "300"))
+# Dias que tarefas concluídas ficam na tabela (as que falharam ficam para análise)
+TAREFAS_RETENCAO_DIAS = int(os.getenv("TAREFAS_RETENCAO_DIAS", "7"))
+
+# Módulos com tarefas registradas, importados pelo worker
+MODULOS_TAREFAS = ("app.arquivamento", "app.lembretes", "app.manutencao", "app.sincronizacao")
+
+_tarefas = {}
+_periodicas = {}
+
+
+def tarefa(tipo: str, periodica_a_cada: int = None):
+    """Registra a função como tarefa `tipo`; com periodica_a_cada, roda a cada N segundos."""
+    def registrar(funcao):
+        _tarefas[tipo] = funcao
+        if periodica_a_cada:
+            _periodicas[tipo] = periodica_a_cada
+        return funcao
+    return registrar
+
+
+def carregar_tarefas():
+    for modulo in MODULOS_TAREFAS:
+        importlib.import_module(modulo)
+
+
+def enfileirar(db, tipo: str, payload: dict = None, executar_em: datetime = None, chave: str = None,
+               max_tentativas: int = TAREFAS_MAX_TENTATIVAS) -> bool:
+    """Insere a tarefa na transação corrente (o commit fica com quem chamou).
+
+    Com `chave`, se já existir uma tarefa com a mesma chave a inserção é ignorada
+    e a função devolve False.
+    """
+    stmt = insert(models.Tarefa).values(
+        tipo=tipo,
+        payload=json.dumps(payload or {}),
+        executar_em=executar_em or datetime.now(),
+        chave=chave,
+        max_tentativas=max_tentativas,
+    )
+    if chave is not None:
+        stmt = stmt.prefix_with("OR IGNORE", dialect="sqlite").prefix_with("IGNORE", dialect="mysql")
+    return db.execute(stmt).rowcount > 0
+
+
+def backoff(tentativas: int) -> timedelta:
+    atraso = min(TAREFAS_BACKOFF_BASE * 2 ** (tentativas - 1), TAREFAS_BACKOFF_MAX)
+    # Jitter: tarefas que falharam juntas não voltam todas no mesmo instante
+    return timedelta(seconds=atraso * random.uniform(0.5, 1.0))
+
+
+def _disponivel(agora: datetime):
+    tarefa_ = models.Tarefa
+    return or_(
+        and_(tarefa_.status == "pendente", tarefa_.executar_em <= agora),
+        # Reserva vencida: o worker que a pegou caiu no meio da execução
+        and_(tarefa_.status == "executando", tarefa_.bloqueada_ate < agora),
+    )
+
+
+def reservar(db, agora: datetime, lote: int = TAREFAS_LOTE):
+    """Reserva até `lote` tarefas vencidas para este worker e devolve os ids."""
+    tarefa_ = models.Tarefa
+    # SKIP LOCKED (MySQL 8): workers concorrentes pegam tarefas diferentes sem esperar
+    candidatas = db.execute(
+        select(tarefa_.id).where(_disponivel(agora)).order_by(tarefa_.executar_em)
+        .limit(lote).with_for_update(skip_locked=True)
+    ).scalars().all()
+    reservadas = []
+    for tarefa_id in candidatas:
+        # A condição repetida no UPDATE garante que só um worker fica com a tarefa
+        # mesmo sem FOR UPDATE (SQLite)
+        resultado = db.execute(
+            update(tarefa_).where(tarefa_.id == tarefa_id, _disponivel(agora)).values(
+                status="executando",
+                bloqueada_ate=agora + timedelta(seconds=TAREFAS_RESERVA),
+                tentativas=tarefa_.tentativas + 1,
+            )
+        )
+        if resultado.rowcount:
+            reservadas.append(tarefa_id)
+    db.commit()
+    return reservadas
+
+
+def executar(db, tarefa_id: int):
+    """Executa uma tarefa reservada e registra o resultado. Devolve True se concluiu."""
+    tarefa_ = db.get(models.Tarefa, tarefa_id)
+    tipo, tentativas, max_tentativas = tarefa_.tipo, tarefa_.tentativas, tarefa_.max_tentativas
+    payload = json.loads(tarefa_.payload or "{}")
+    try:
+        funcao = _tarefas.get(tipo)
+        if funcao is None:
+            raise LookupError(f"Tarefa não registrada: {tipo}")
+        funcao(db, payload)
+    except Exception as exc:
+        db.rollback()
+        agora = datetime.now()
+        valores = {"erro": f"{type(exc).__name__}: {exc}", "bloqueada_ate": None}
+        if tentativas >= max_tentativas:
+            valores["status"] = "falhou"
+            logger.error("Tarefa %s (%s) falhou após %d tentativas: %s", tarefa_id, tipo, tentativas, exc)
+        else:
+            valores.update(status="pendente", executar_em=agora + backoff(tentativas))
+            logger.warning("Tarefa %s (%s) falhou na tentativa %d: %s", tarefa_id, tipo, tentativas, exc)
+        db.execute(update(models.Tarefa).where(models.Tarefa.id == tarefa_id).values(**valores))
+        db.commit()
+        return False
+    db.execute(update(models.Tarefa).where(models.Tarefa.id == tarefa_id).values(
+        status="concluida", bloqueada_ate=None, erro=None
+    ))
+    db.commit()
+    return True
+
+
+@tarefa("tarefas.limpar", periodica_a_cada=24 * 3600)
+def limpar_concluidas(db, payload):
+    limite = datetime.now() - timedelta(days=TAREFAS_RETENCAO_DIAS)
+    db.execute(delete(models.Tarefa).where(
+        models.Tarefa.status == "concluida", models.Tarefa.atualizado_em < limite
+    ))
+    db.commit()
+
+
+def estatisticas(db) -> dict:
+    """Quantidade de tarefas por status e atraso da mais antiga pendente e vencida."""
+    tarefa_ = models.Tarefa
+    agora = datetime.now()
+    por_status = dict(db.execute(select(tarefa_.status, func.count()).group_by(tarefa_.status)).all())
+    mais_antiga = db.execute(select(func.min(tarefa_.executar_em)).where(
+        tarefa_.status == "pendente", tarefa_.executar_em <= agora
+    )).scalar()
+    return {
+        "por_status": por_status,
+        "atraso_segundos": (agora - mais_antiga).total_seconds() if mais_antiga else 0.0,
+        "registradas": sorted(_tarefas),
+    }
+
+
+class Trabalhador:
+    """Agenda as tarefas periódicas e executa as vencidas, em laço ou uma rodada por vez."""
+
+    def __init__(self, session_factory=None, intervalo: float = TAREFAS_INTERVALO, lote: int = TAREFAS_LOTE):
+        # Sem session_factory, cada rodada passa pelo banco padrão e por todos os shards
+        self.session_factory = session_factory
+        self.intervalo = intervalo
+        self.lote = lote
+        self._janelas = {}
+        self._parar = threading.Event()
+        self._thread = None
+
+    def _bancos(self):
+        # (nome, fábrica de sessões); a lista é lida a cada rodada, para shards registrados depois
+        if self.session_factory is not None:
+            return [(None, self.session_factory)]
+        from . import database
+        return [(nome, lambda nome=nome: database.sessao_do_banco(nome)) for nome in database.bancos()]
+
+    def agendar_periodicas(self, db, agora: datetime, banco: str = None):
+        for tipo, intervalo in _periodicas.items():
+            janela = int(agora.timestamp() // intervalo)
+            if self._janelas.get((banco, tipo)) == janela:
+                continue
+            # A chave por janela faz cada período rodar uma vez, qualquer que seja o número de workers
+            enfileirar(db, tipo, chave=f"periodica:{tipo}:{janela}", executar_em=agora)
+            self._janelas[(banco, tipo)] = janela
+        db.commit()
+
+    def executar_no_banco(self, banco: str, fabrica, agora: datetime) -> int:
+        db = fabrica()
+        try:
+            self.agendar_periodicas(db, agora, banco)
+            reservadas = reservar(db, agora, self.lote)
+            for tarefa_id in reservadas:
+                executar(db, tarefa_id)
+            return len(reservadas)
+        finally:
+            db.close()
+
+    def executar_uma_vez(self, agora: datetime = None) -> int:
+        """Uma rodada em cada banco: agenda periódicas, reserva um lote e o executa. Devolve quantas rodaram."""
+        agora = agora or datetime.now()
+        bancos = self._bancos()
+        executadas = 0
+        for banco, fabrica in bancos:
+            try:
+                executadas += self.executar_no_banco(banco, fabrica, agora)
+            except Exception:
+                if len(bancos) == 1:
+                    raise
+                # Um shard fora do ar não para a fila dos outros
+                logger.exception("Erro na fila de tarefas do banco %s", banco or "padrão")
+        return executadas
+
+    def rodar(self):
+        while not self._parar.is_set():
+            try:
+                executadas = self.executar_uma_vez()
+            except Exception:
+                # Banco fora do ar, por exemplo: tenta de novo na próxima rodada
+                logger.exception("Erro no laço de tarefas")
+                executadas = 0
+            if not executadas:
+                self._parar.wait(self.intervalo)
+
+    def iniciar(self):
+        """Roda o laço em uma thread (TAREFAS_MODO=api)."""
+        self._parar.clear()
+        self._thread = threading.Thread(target=self.rodar, name="tarefas", daemon=True)
+        self._thread.start()
+
+    def encerrar(self, espera: float = 10):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(espera)
+            self._thread = None
+
+
+def _main():
+    parser = argparse.ArgumentParser(description="Worker da fila de tarefas em segundo plano.")
+    parser.add_argument("--uma-vez", action="store_true", help="executa uma rodada e sai")
+    parser.add_argument("--enfileirar", metavar="TIPO", help="só enfileira uma tarefa deste tipo e sai")
+    parser.add_argument("--payload", default="{}", help="JSON com os argumentos da tarefa enfileirada")
+    parser.add_argument("--shard", default=None,
+                        help="fila do shard onde enfileirar (padrão: o do salao_id do payload, ou o banco padrão)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    carregar_tarefas()
+
+    if args.enfileirar:
+        from . import database
+        payload = json.loads(args.payload)
+        # A tarefa roda no banco da fila: uma tarefa de um salão vai para o banco dele
+        banco = args.shard if args.shard is not None else database.bancos(payload.get("salao_id"))[0]
+        db = database.sessao_do_banco(banco)
+        try:
+            enfileirar(db, args.enfileirar, payload)
+            db.commit()
+        finally:
+            db.close()
+        print(f"Tarefa {args.enfileirar} enfileirada")
+        return
+
+    trabalhador = Trabalhador()
+    if args.uma_vez:
+        print(f"{trabalhador.executar_uma_vez()} tarefas executadas")
+        return
+    logger.info("Worker de tarefas iniciado (%s)", ", ".join(sorted(_tarefas)))
+    try:
+        trabalhador.rodar()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    _main()
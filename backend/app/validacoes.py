@@ -0,0 +1,39 @@
+# backend/app/validacoes.py
+# Validações de requisição compartilhadas pelas rotas síncronas e assíncronas
+from fastapi import HTTPException
+
+from . import crud, schemas
+
+
+# Valida o intervalo de um agendamento antes de ir ao banco
+def validar_intervalo_agendamento(agendamento: schemas.AgendamentoBase):
+    try:
+        crud.verificar_intervalo_agendamento(agendamento.data_hora_inicio, agendamento.data_hora_fim)
+    except crud.IntervaloInvalidoError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+# Corpo de PATCH (exclude_unset) não pode mandar null para coluna obrigatória.
+# Coluna com default (agendamentos.status) também conta: o null pularia o default
+# e chegaria ao rollup diário como um status inexistente.
+def validar_patch(model, dados: dict):
+    nulos = sorted(
+        coluna.key for coluna in model.__table__.columns
+        if (not coluna.nullable or coluna.default is not None)
+        and coluna.key in dados and dados[coluna.key] is None
+    )
+    if nulos:
+        raise HTTPException(status_code=400, detail=f"Campos obrigatórios não podem ser nulos: {', '.join(nulos)}")
+
+
+# Converte ?expand=cliente,profissional em conjunto, recusando relacionamentos desconhecidos
+def validar_expand(expand: str = None) -> set:
+    nomes = {nome.strip() for nome in (expand or "").split(",") if nome.strip()}
+    desconhecidos = nomes - set(crud.RELACIONAMENTOS_AGENDAMENTO)
+    if desconhecidos:
+        raise HTTPException(
+            status_code=400,
+            detail=f"expand inválido: {', '.join(sorted(desconhecidos))}. "
+                   f"Use: {', '.join(crud.RELACIONAMENTOS_AGENDAMENTO)}",
+        )
+    return nomes
@@ -0,0 +1,173 @@
+# backend/benchmarks/bench_admissao.py
+# Um salão inundando a API (promoção) enquanto outros salões fazem uso normal.
+# Sobe o uvicorn em um subprocesso com o controle de admissão desligado e ligado e
+# mede a latência das requisições dos salões bem-comportados, e quantas do salão
+# que inunda foram recusadas (429/503). A inundação roda num processo separado, para
+# o laço de eventos dela não atrasar as medições dos bem-comportados.
+# Duas inundações: leituras com X-Salao-Id, e criações de agendamentos sem o cabeçalho,
+# com o salão só no corpo JSON (o salão é achado pelo corpo).
+# Termina com erro se, com a admissão ligada, o p99 dos bem-comportados passar de
+# P99_MAXIMO_MS, alguma requisição deles for recusada ou a inundação não for limitada.
+#   python -m benchmarks.bench_admissao [segundos]
+import asyncio
+import multiprocessing
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import httpx
+
+from app import models
+from benchmarks.comum import PORTA, criar_banco_sqlite, popular_historico, subir_servidor
+
+SALAO_INUNDANDO = 1
+SALOES_NORMAIS = (2, 3, 4)
+CONCORRENCIA_INUNDACAO = 48
+# Requisições por segundo de cada salão bem-comportado (abaixo do limite por salão)
+TAXA_NORMAL = 4
+P99_MAXIMO_MS = 300
+
+CONFIGURACAO = {
+    "ADMISSAO_TAXA": "20",
+    "ADMISSAO_RAJADA": "40",
+    "ADMISSAO_CONCORRENCIA_MAX": "8",
+    "ADMISSAO_ESPERA_MAX": "0.25",
+    "DB_POOL_SIZE": "5",
+    "DB_MAX_OVERFLOW": "3",
+    # Todos os clientes aqui saem de 127.0.0.1: o balde por IP juntaria a inundação e os
+    # bem-comportados, então só os baldes por salão ficam ligados
+    "ADMISSAO_TAXA_IP": "0",
+    "HASH_WORKERS": "0",
+    "METRICAS_CONSULTA_LENTA_MS": "100000",
+}
+
+
+def popular(engine, SessionLocal):
+    """Popula os salões e devolve os ids (serviço, cliente, profissional) do salão que inunda."""
+    db = SessionLocal()
+    for salao_id in (SALAO_INUNDANDO, *SALOES_NORMAIS):
+        db.add(models.Salao(id=salao_id, nome=f"Salão {salao_id}", email=f"salao{salao_id}@bench.com",
+                            senha_hash="x"))
+        db.flush()
+        servico = models.Servico(salao_id=salao_id, nome="Corte", duracao_minutos=30, preco=50)
+        cliente = models.Cliente(nome=f"Cliente {salao_id}")
+        profissional = models.Profissional(salao_id=salao_id, nome="Profissional")
+        db.add_all([servico, cliente, profissional])
+        db.commit()
+        popular_historico(engine, salao_id, servico.id, cliente.id, profissional.id, 2_000,
+                          datetime(2030, 1, 1, 8, 0))
+        if salao_id == SALAO_INUNDANDO:
+            ids = {"servico_id": servico.id, "cliente_id": cliente.id, "profissional_id": profissional.id}
+    db.close()
+    return ids
+
+
+async def inundar(segundos: float, modo: str, ids: dict):
+    status = Counter()
+    fim = time.perf_counter() + segundos
+    cabecalhos = {"X-Salao-Id": str(SALAO_INUNDANDO)}
+    rotas = ("/servicos/", "/agendamentos/?limit=200&expand=cliente,servico")
+
+    async def conexao(indice):
+        i = indice
+        while time.perf_counter() < fim:
+            if modo == "cabeçalho":
+                resposta = await cliente.get(rotas[i % len(rotas)], headers=cabecalhos)
+            else:
+                # Sem X-Salao-Id: o salão só aparece no corpo
+                comeco = datetime(2031, 1, 1) + timedelta(minutes=30 * (indice * 100_000 + i))
+                resposta = await cliente.post("/agendamentos/", json=dict(
+                    ids, salao_id=SALAO_INUNDANDO, data_hora_inicio=comeco.isoformat(),
+                    data_hora_fim=(comeco + timedelta(minutes=30)).isoformat(),
+                ))
+            status[resposta.status_code] += 1
+            i += 1
+
+    limites = httpx.Limits(max_connections=CONCORRENCIA_INUNDACAO)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORTA}", limits=limites, timeout=60) as cliente:
+        await asyncio.gather(*(conexao(i) for i in range(CONCORRENCIA_INUNDACAO)))
+    return status
+
+
+def _processo_inundacao(segundos: float, modo: str, ids: dict, resultado):
+    resultado.put(dict(asyncio.run(inundar(segundos, modo, ids))))
+
+
+async def usar_normalmente(cliente, salao_id, fim, latencias, status):
+    cabecalhos = {"X-Salao-Id": str(salao_id)}
+    rotas = ("/servicos/", "/agendamentos/?limit=20")
+    i = 0
+    while time.perf_counter() < fim:
+        comeco = time.perf_counter()
+        resposta = await cliente.get(rotas[i % len(rotas)], headers=cabecalhos)
+        latencias.append(time.perf_counter() - comeco)
+        status[resposta.status_code] += 1
+        i += 1
+        await asyncio.sleep(max(0.0, 1 / TAXA_NORMAL - (time.perf_counter() - comeco)))
+
+
+async def medir_normais(segundos: float):
+    latencias, status = [], Counter()
+    fim = time.perf_counter() + segundos
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORTA}", timeout=60) as cliente:
+        await asyncio.gather(
+            *(usar_normalmente(cliente, salao_id, fim, latencias, status) for salao_id in SALOES_NORMAIS)
+        )
+    return sorted(latencias), status
+
+
+def gerar_carga(segundos: float, modo: str, ids: dict):
+    contexto = multiprocessing.get_context("spawn")
+    resultado = contexto.Queue()
+    inundacao = contexto.Process(target=_processo_inundacao, args=(segundos + 1, modo, ids, resultado))
+    inundacao.start()
+    # Um segundo para a inundação chegar ao regime antes de medir
+    time.sleep(1)
+    latencias, status = asyncio.run(medir_normais(segundos))
+    status_inundacao = Counter(resultado.get())
+    inundacao.join()
+    return latencias, status, status_inundacao
+
+
+def executar(segundos: float = 10):
+    engine, SessionLocal = criar_banco_sqlite()
+    ids = popular(engine, SessionLocal)
+    engine.dispose()
+
+    falhas = []
+    print(f"salão {SALAO_INUNDANDO} com {CONCORRENCIA_INUNDACAO} conexões em laço; "
+          f"salões {SALOES_NORMAIS} a {TAXA_NORMAL} req/s cada; {segundos:g}s")
+    print(f"{'inundação':>9} | {'admissão':>8} | {'normais p50 ms':>14} | {'normais p99 ms':>14} | "
+          f"{'normais recusadas':>17} | {'inundação ok/429/503':>20}")
+    for modo, habilitada in (("cabeçalho", "false"), ("cabeçalho", "true"), ("corpo", "true")):
+        processo = subir_servidor(engine.url.database, ADMISSAO_HABILITADA=habilitada, **CONFIGURACAO)
+        try:
+            latencias, normais, inundacao = gerar_carga(segundos, modo, ids)
+        finally:
+            processo.terminate()
+            processo.wait()
+        p50 = latencias[len(latencias) // 2] * 1000
+        p99 = latencias[int(len(latencias) * 0.99)] * 1000
+        recusadas = sum(total for codigo, total in normais.items() if codigo != 200)
+        # Criações em horário já ocupado (409) também chegaram ao banco
+        atendidas = sum(total for codigo, total in inundacao.items() if codigo not in (429, 503))
+        print(f"{modo:>9} | {habilitada:>8} | {p50:>14.1f} | {p99:>14.1f} | {recusadas:>17} | "
+              f"{atendidas:>8}/{inundacao[429]}/{inundacao[503]}")
+        if habilitada == "true":
+            if p99 > P99_MAXIMO_MS:
+                falhas.append(f"{modo}: p99 dos salões bem-comportados {p99:.0f} ms > {P99_MAXIMO_MS} ms")
+            if recusadas:
+                falhas.append(f"{modo}: {recusadas} requisições dos salões bem-comportados recusadas: "
+                              f"{dict(normais)}")
+            if not inundacao[429]:
+                falhas.append(f"{modo}: inundação do salão {SALAO_INUNDANDO} não foi limitada: {dict(inundacao)}")
+
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    executar(float(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,144 @@
+# backend/benchmarks/bench_arquivamento.py
+# Latência das consultas da agenda viva antes e depois de arquivar o histórico
+# (arquivamento.py): anos de agendamentos concluídos e cancelados na tabela quente
+# contra a tabela quente só com o último mês e o futuro.
+# Também confere que as leituras de histórico não mudam com o arquivamento (relatório,
+# exportação, histórico do cliente) e termina com erro se alguma mudar.
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select, update # type: ignore
+
+from app import arquivamento, crud, models, relatorios, schemas
+from benchmarks.comum import criar_banco_sqlite, criar_catalogo, medir, popular_historico
+
+NUM_PROFISSIONAIS = 10
+# Agendamentos por profissional: histórico passado (30 min cada, ~14 meses) e agenda futura
+HISTORICO_POR_PROFISSIONAL = 20_000
+FUTURO_POR_PROFISSIONAL = 1_000
+HORIZONTE_DIAS = 30
+REPETICOES = 50
+MINUTOS_EXPEDIENTE = 12 * 60
+DURACAO = timedelta(minutes=30)
+
+
+def popular(engine, db):
+    salao, servico, cliente, profissionais = criar_catalogo(db, NUM_PROFISSIONAIS)
+    agora = datetime.combine(date.today(), datetime.min.time())
+    for profissional in profissionais:
+        popular_historico(engine, salao.id, servico.id, cliente.id, profissional.id,
+                          HISTORICO_POR_PROFISSIONAL, agora - HISTORICO_POR_PROFISSIONAL * DURACAO)
+        popular_historico(engine, salao.id, servico.id, cliente.id, profissional.id,
+                          FUTURO_POR_PROFISSIONAL, agora + timedelta(days=1))
+    agendamento = models.Agendamento
+    with engine.begin() as conn:
+        # Um em cada sete do passado foi cancelado; o futuro ainda está agendado
+        conn.execute(update(agendamento).where(agendamento.data_hora_inicio < agora, agendamento.id % 7 == 0)
+                     .values(status="cancelado"))
+        conn.execute(update(agendamento).where(agendamento.data_hora_inicio >= agora).values(status="agendado"))
+    relatorios.reconstruir(db)
+    return salao, servico, cliente, profissionais
+
+
+def consultas(db, salao, servico, cliente, profissionais):
+    amanha = datetime.combine(date.today(), datetime.min.time()) + timedelta(days=1)
+    ids = [profissional.id for profissional in profissionais]
+    agendamento = models.Agendamento
+    proximo = iter(range(10**6))
+
+    def criar():
+        # Horários livres depois da agenda futura, um novo a cada chamada
+        comeco = amanha + timedelta(days=60, minutes=30 * next(proximo))
+        crud.create_agendamento(db, schemas.AgendamentoCreate(
+            salao_id=salao.id, cliente_id=cliente.id, profissional_id=ids[0], servico_id=servico.id,
+            data_hora_inicio=comeco, data_hora_fim=comeco + DURACAO,
+        ))
+
+    return [
+        ("agenda da semana", lambda: db.execute(
+            select(agendamento.id, agendamento.status).where(
+                agendamento.salao_id == salao.id,
+                agendamento.data_hora_inicio >= amanha,
+                agendamento.data_hora_inicio < amanha + timedelta(days=7),
+            )
+        ).all()),
+        ("ocupações do dia", lambda: crud.get_ocupacoes(db, ids, amanha, amanha + timedelta(days=1))),
+        ("pendentes do salão", lambda: db.execute(
+            select(func.count()).select_from(agendamento).where(
+                agendamento.salao_id == salao.id, agendamento.status.in_(("agendado", "confirmado"))
+            )
+        ).scalar()),
+        ("versão da tabela", lambda: crud.get_versao_tabela(db, agendamento, salao.id)),
+        ("criar agendamento", criar),
+    ]
+
+
+def leituras_historico(db, salao, cliente):
+    ate = date.today()
+    de = ate - timedelta(days=364)
+    exportados = db.execute(
+        select(func.count()).select_from(crud.select_agendamentos_exportacao(salao_id=salao.id).subquery())
+    ).scalar()
+    historico_cliente = 0
+    cursor = None
+    while True:
+        pagina = crud.get_historico_cliente(db, cliente.id, limit=5_000, cursor=cursor)
+        historico_cliente += len(pagina)
+        cursor = pagina.next_cursor
+        if not cursor:
+            break
+    return {
+        "relatório": relatorios.gerar_relatorio(db, salao.id, de, ate, "mes", MINUTOS_EXPEDIENTE),
+        "exportação": exportados,
+        "histórico do cliente": historico_cliente,
+    }
+
+
+def medir_consultas(db, casos):
+    resultados = {}
+    for nome, funcao in casos:
+        funcao()
+        resultados[nome] = medir(funcao, REPETICOES)
+    return resultados
+
+
+def executar():
+    engine, SessionLocal = criar_banco_sqlite()
+    db = SessionLocal()
+    salao, servico, cliente, profissionais = popular(engine, db)
+    casos = consultas(db, salao, servico, cliente, profissionais)
+
+    total = db.query(func.count(models.Agendamento.id)).scalar()
+    antes = medir_consultas(db, casos)
+    historico_antes = leituras_historico(db, salao, cliente)
+
+    comeco = time.perf_counter()
+    arquivados = arquivamento.arquivar(db, horizonte_dias=HORIZONTE_DIAS)
+    segundos = time.perf_counter() - comeco
+    quente = db.query(func.count(models.Agendamento.id)).scalar()
+    print(f"{arquivados:,} de {total:,} agendamentos arquivados em {segundos:.1f}s "
+          f"(lotes de {arquivamento.ARQUIVAMENTO_LOTE}); {quente:,} na tabela quente")
+
+    # Antes de medir de novo: "criar agendamento" acrescenta linhas ao histórico
+    historico_depois = leituras_historico(db, salao, cliente)
+    depois = medir_consultas(db, casos)
+    db.close()
+
+    print(f"{'consulta':>20} | {'antes ms':>8} | {'depois ms':>9} | {'ganho':>6}")
+    for nome in antes:
+        print(f"{nome:>20} | {antes[nome]:>8.2f} | {depois[nome]:>9.2f} | {antes[nome] / depois[nome]:>5.1f}x")
+
+    falhas = [
+        f"{nome} diferente depois do arquivamento"
+        for nome in historico_antes
+        if historico_antes[nome] != historico_depois[nome]
+    ]
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    executar()
@@ -0,0 +1,50 @@
+# backend/benchmarks/bench_busca_clientes.py
+# Latência da busca de clientes por prefixo de telefone/e-mail e do "find or create"
+# com 1 milhão de clientes. Meta: menos de 10 ms por busca, graças aos índices em
+# telefone_normalizado e email_normalizado.
+import random
+
+from app import crud, models, schemas
+from benchmarks.comum import criar_banco, medir
+
+TOTAL_CLIENTES = 1_000_000
+LOTE = 50_000
+REPETICOES = 200
+
+
+def popular(engine):
+    aleatorio = random.Random(7)
+    with engine.begin() as conn:
+        for inicio in range(0, TOTAL_CLIENTES, LOTE):
+            linhas = []
+            for i in range(inicio, min(inicio + LOTE, TOTAL_CLIENTES)):
+                telefone = f"({aleatorio.randint(11, 99)}) 9{aleatorio.randint(0, 99_999_999):08d}"
+                email = f"Cliente{i}@Exemplo.com"
+                linhas.append({"nome": f"Cliente {i}", "telefone": telefone, "email": email,
+                               **crud.campos_busca_cliente(telefone, email)})
+            conn.execute(models.Cliente.__table__.insert(), linhas)
+
+
+def executar():
+    engine, SessionLocal = criar_banco("clientes.db")
+    popular(engine)
+    db = SessionLocal()
+    existente = db.get(models.Cliente, TOTAL_CLIENTES // 2)
+    contato = schemas.ClienteCreate(nome="Retorno", telefone=existente.telefone)
+
+    casos = [
+        ("telefone, 4 dígitos", lambda: crud.buscar_clientes(db, telefone="1198")),
+        ("telefone, 7 dígitos", lambda: crud.buscar_clientes(db, telefone=existente.telefone[:9])),
+        ("telefone com +DDI", lambda: crud.buscar_clientes(db, telefone="+55 21 9")),
+        ("e-mail, prefixo", lambda: crud.buscar_clientes(db, email="cliente4242")),
+        ("find or create (existente)", lambda: crud.find_or_create_cliente(db, contato)),
+    ]
+    print(f"{'consulta':>27} | {'ms':>7}")
+    for nome, consulta in casos:
+        db.expunge_all()
+        print(f"{nome:>27} | {medir(consulta, REPETICOES):>7.3f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    executar()
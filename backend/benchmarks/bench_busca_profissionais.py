@@ -0,0 +1,81 @@
+# backend/benchmarks/bench_busca_profissionais.py
+# Compara a busca de profissionais (crud.buscar_profissionais) com as funções
+# antigas baseadas em ilike('%nome%'), em 1 milhão de profissionais sintéticos,
+# com e sem os índices ix_profissionais_salao_especialidade / ix_profissionais_nome_fulltext.
+# Por padrão roda em SQLite (busca por prefixo com LIKE); para medir o caminho
+# FULLTEXT, aponte BENCH_DATABASE_URL para um MySQL descartável.
+import random
+
+from sqlalchemy import text # type: ignore
+
+from app import crud, models
+from benchmarks.comum import criar_banco, medir
+
+TOTAL_PROFISSIONAIS = 1_000_000
+NUM_SALOES = 1_000
+LOTE = 50_000
+REPETICOES = 5
+ESPECIALIDADES = ["Cabelo", "Unha", "Maquiagem", "Barba", "Estética", "Massagem", "Sobrancelha", "Depilação"]
+NOMES = ["Ana", "Bruno", "Carla", "Diego", "Elaine", "Felipe", "Gabriela", "Heitor", "Isabela", "João",
+         "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Rafael", "Sabrina", "Tiago", "Vanessa", "Wagner"]
+SOBRENOMES = ["Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima",
+              "Gomes", "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes"]
+INDICES = ["ix_profissionais_salao_especialidade", "ix_profissionais_nome_fulltext"]
+
+
+def popular(engine):
+    aleatorio = random.Random(42)
+    with engine.begin() as conn:
+        conn.execute(models.Salao.__table__.insert(), [
+            {"nome": f"Salão {i}", "email": f"salao{i}@bench.com", "senha_hash": "x"} for i in range(NUM_SALOES)
+        ])
+        for inicio in range(0, TOTAL_PROFISSIONAIS, LOTE):
+            conn.execute(models.Profissional.__table__.insert(), [
+                {
+                    "salao_id": aleatorio.randint(1, NUM_SALOES),
+                    "nome": f"{aleatorio.choice(NOMES)} {aleatorio.choice(SOBRENOMES)} {i}",
+                    "especialidade": aleatorio.choice(ESPECIALIDADES),
+                }
+                for i in range(inicio, min(inicio + LOTE, TOTAL_PROFISSIONAIS))
+            ])
+
+
+def remover_indices(engine):
+    with engine.begin() as conn:
+        for indice in INDICES:
+            if engine.dialect.name == "mysql":
+                conn.execute(text(f"DROP INDEX {indice} ON profissionais"))
+            else:
+                conn.execute(text(f"DROP INDEX {indice}"))
+
+
+def executar():
+    engine, SessionLocal = criar_banco("busca.db")
+    popular(engine)
+    db = SessionLocal()
+
+    casos = [
+        ("salão + especialidade + nome", "ilike (antigo)",
+         lambda: crud.get_profissionais_by_salao_and_especialidade_and_nome(db, 500, "Cabelo", "silva")),
+        ("salão + especialidade + nome", "busca",
+         lambda: crud.buscar_profissionais(db, salao_id=500, especialidade="Cabelo", q="silva")),
+        ("salão + especialidade", "filtro (antigo)",
+         lambda: crud.get_profissionais_by_salao_and_especialidade(db, 500, "Cabelo")),
+        ("salão + especialidade", "busca",
+         lambda: crud.buscar_profissionais(db, salao_id=500, especialidade="Cabelo")),
+        ("só nome", "ilike (antigo)", lambda: crud.get_profissionais_by_nome(db, "gabriela silva 7")),
+        ("só nome", "busca", lambda: crud.buscar_profissionais(db, q="gabriela silva 7")),
+    ]
+    print(f"{'indices':>7} | {'filtro':>28} | {'consulta':>15} | {'ms':>9}")
+    for com_indices in (True, False):
+        if not com_indices:
+            remover_indices(engine)
+        for filtro, modo, consulta in casos:
+            db.expunge_all()
+            ms = medir(consulta, REPETICOES)
+            print(f"{'sim' if com_indices else 'não':>7} | {filtro:>28} | {modo:>15} | {ms:>9.2f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    executar()
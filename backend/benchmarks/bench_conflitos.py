@@ -0,0 +1,43 @@
+# backend/benchmarks/bench_conflitos.py
+# Mede a latência de criação de agendamentos (com verificação de conflito)
+# conforme cresce o histórico de agendamentos do profissional.
+# A latência deve ficar estável: a consulta de conflito lê só a faixa de tempo
+# relevante do índice (profissional_id, data_hora_inicio, data_hora_fim).
+from datetime import datetime, timedelta
+
+from app import crud, schemas
+from benchmarks.comum import criar_banco_sqlite, criar_catalogo, popular_historico, medir
+
+TAMANHOS_HISTORICO = [0, 1_000, 10_000, 100_000]
+INSERCOES = 200
+
+
+def executar():
+    print(f"{'historico':>10} | {'ms por insercao':>15}")
+    for tamanho in TAMANHOS_HISTORICO:
+        engine, SessionLocal = criar_banco_sqlite()
+        db = SessionLocal()
+        salao, servico, cliente, (profissional,) = criar_catalogo(db)
+        inicio_historico = datetime(2020, 1, 1, 8, 0)
+        popular_historico(engine, salao.id, servico.id, cliente.id, profissional.id,
+                          tamanho, inicio_historico)
+
+        proximo = [datetime(2030, 1, 1, 8, 0)]
+
+        def inserir():
+            comeco = proximo[0]
+            proximo[0] = comeco + timedelta(minutes=30)
+            crud.create_agendamento(db, schemas.AgendamentoCreate(
+                salao_id=salao.id, cliente_id=cliente.id, profissional_id=profissional.id,
+                servico_id=servico.id, data_hora_inicio=comeco,
+                data_hora_fim=comeco + timedelta(minutes=30),
+            ))
+
+        ms = medir(inserir, INSERCOES)
+        print(f"{tamanho:>10} | {ms:>15.3f}")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    executar()
@@ -0,0 +1,92 @@
+# backend/benchmarks/bench_consultas.py
+# Custo em Python de cada busca por chave: a Query legada montada a cada chamada
+# (db.query(...).filter(...).first(), como era o crud) contra as instruções pré-montadas
+# de crud.select_por / select_agendamento / select_agendamento_conflitante.
+# O banco é pequeno e local, para o tempo medido ser quase todo do lado Python.
+# Também mede, pelos contadores de metricas.py (ExecutionContext.cache_hit), a taxa de
+# acerto do cache de compilação; termina com erro se ela ficar abaixo de TAXA_MINIMA.
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import joinedload # type: ignore
+
+from app import crud, metricas, models
+from benchmarks.comum import criar_banco_sqlite, criar_catalogo, medir, popular_historico
+
+REPETICOES = 3000
+TAXA_MINIMA = 0.99
+INICIO = datetime(2030, 1, 1, 8, 0)
+TODOS = frozenset(crud.RELACIONAMENTOS_AGENDAMENTO)
+
+
+def legado_conflito(db, profissional_id, inicio, fim):
+    return db.query(models.Agendamento.id).filter(
+        models.Agendamento.profissional_id == profissional_id,
+        models.Agendamento.data_hora_inicio > inicio - crud.DURACAO_MAXIMA_AGENDAMENTO,
+        models.Agendamento.data_hora_inicio < fim,
+        models.Agendamento.data_hora_fim > inicio,
+        models.Agendamento.status != "cancelado",
+    ).first()
+
+
+def casos(db, salao, cliente, profissional, agendamento_id):
+    fim = INICIO + timedelta(minutes=30)
+    return [
+        ("get_cliente",
+         lambda: db.query(models.Cliente).filter(models.Cliente.id == cliente.id).first(),
+         lambda: crud.get_cliente(db, cliente.id)),
+        ("get_salao_by_email",
+         lambda: db.query(models.Salao).filter(models.Salao.email == salao.email).first(),
+         lambda: crud.get_salao_by_email(db, salao.email)),
+        ("get_agendamento ?expand",
+         lambda: db.query(models.Agendamento).options(
+             *crud.opcoes_expansao_agendamento(TODOS, joinedload)
+         ).filter(models.Agendamento.id == agendamento_id).first(),
+         lambda: crud.get_agendamento(db, agendamento_id, expand=TODOS)),
+        ("conflito de horário",
+         lambda: legado_conflito(db, profissional.id, INICIO, fim),
+         lambda: crud.get_agendamento_conflitante(db, profissional.id, INICIO, fim)),
+    ]
+
+
+def taxa_acerto(contagem: dict) -> float:
+    acertos, faltas = contagem.get("acerto", 0), contagem.get("falta", 0)
+    return acertos / (acertos + faltas) if acertos + faltas else 0.0
+
+
+def executar():
+    engine, SessionLocal = criar_banco_sqlite()
+    db = SessionLocal()
+    salao, servico, cliente, profissionais = criar_catalogo(db)
+    popular_historico(engine, salao.id, servico.id, cliente.id, profissionais[0].id, 100, INICIO)
+    agendamento_id = db.query(models.Agendamento.id).first()[0]
+
+    falhas = []
+    for escopo, sessao_info in (("sem escopo", {}), ("escopo do salão", {"salao_id": salao.id})):
+        db.info.clear()
+        db.info.update(sessao_info)
+        print(f"\n{escopo}")
+        print(f"{'busca':>24} | {'legado µs':>9} | {'pronta µs':>9} | {'ganho':>6} | {'acerto cache':>12}")
+        for nome, legado, pronta in casos(db, salao, cliente, profissionais[0], agendamento_id):
+            # Aquecimento: a primeira execução de cada forma compila e preenche o cache
+            legado()
+            pronta()
+            db.expunge_all()
+            us_legado = medir(legado, REPETICOES) * 1000
+            metricas.reiniciar()
+            us_pronta = medir(pronta, REPETICOES) * 1000
+            taxa = taxa_acerto(metricas.registro.cache_sql)
+            print(f"{nome:>24} | {us_legado:>9.1f} | {us_pronta:>9.1f} | "
+                  f"{us_legado / us_pronta:>5.2f}x | {taxa:>11.1%}")
+            if taxa < TAXA_MINIMA:
+                falhas.append(f"{nome} ({escopo}): acerto no cache de compilação {taxa:.1%}")
+    db.close()
+
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    executar()
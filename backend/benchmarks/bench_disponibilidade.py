@@ -0,0 +1,52 @@
+# backend/benchmarks/bench_disponibilidade.py
+# Mede o tempo para calcular a disponibilidade de uma semana inteira de um salão
+# com 30 profissionais e agenda parcialmente ocupada (meta: bem abaixo de 50 ms).
+from datetime import date, datetime, timedelta
+
+from app import models, schemas
+from app.disponibilidade import calcular_disponibilidade
+from benchmarks.comum import criar_banco_sqlite, criar_catalogo, popular_historico, medir
+
+NUM_PROFISSIONAIS = 30
+DIAS = 7
+HISTORICO_POR_PROFISSIONAL = 20_000
+REPETICOES = 20
+
+
+def executar():
+    engine, SessionLocal = criar_banco_sqlite()
+    db = SessionLocal()
+    salao, servico, cliente, profissionais = criar_catalogo(db, NUM_PROFISSIONAIS)
+
+    semana = date(2030, 3, 4)
+    linhas = []
+    for profissional in profissionais:
+        # Histórico antigo, que não deve influenciar o tempo da consulta
+        popular_historico(engine, salao.id, servico.id, cliente.id, profissional.id,
+                          HISTORICO_POR_PROFISSIONAL, datetime(2025, 1, 1, 8, 0))
+        # Semana consultada: um atendimento de 30 minutos a cada hora do expediente
+        for dia in range(DIAS):
+            for hora in range(8, 20):
+                inicio = datetime.combine(semana + timedelta(days=dia), datetime.min.time()) + timedelta(hours=hora)
+                linhas.append(dict(
+                    salao_id=salao.id, cliente_id=cliente.id, profissional_id=profissional.id,
+                    servico_id=servico.id, data_hora_inicio=inicio,
+                    data_hora_fim=inicio + timedelta(minutes=30), status="agendado",
+                ))
+    with engine.begin() as conn:
+        conn.execute(models.Agendamento.__table__.insert(), linhas)
+
+    def consultar():
+        profissionais_livres = calcular_disponibilidade(db, salao.id, servico, semana, DIAS)
+        schemas.Disponibilidade(
+            salao_id=salao.id, servico_id=servico.id, data=semana, dias=DIAS,
+            duracao_minutos=servico.duracao_minutos, profissionais=profissionais_livres,
+        )
+
+    ms = medir(consultar, REPETICOES)
+    print(f"{NUM_PROFISSIONAIS} profissionais, {DIAS} dias: {ms:.2f} ms por consulta")
+    db.close()
+
+
+if __name__ == "__main__":
+    executar()
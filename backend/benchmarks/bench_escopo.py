@@ -0,0 +1,161 @@
+# backend/benchmarks/bench_escopo.py
+# Escopo por salão e shards, com dois bancos SQLite lado a lado:
+# 1. Isolamento: cada requisição com X-Salao-Id só enxerga e só grava o próprio
+#    salão, mesmo com ids repetidos entre shards e com o cache de catálogo ligado.
+#    Termina com erro se algum dado vazar de um salão para outro.
+# 2. Latência da agenda de um salão pequeno num banco com um salão grande, com e
+#    sem os índices que começam por salao_id, e com o salão pequeno num shard próprio.
+#    Termina com erro se a agenda com o índice (salao_id, data_hora_inicio, id) for
+#    mais lenta que sem ele.
+import sys
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text # type: ignore
+
+from app import admissao, cache, database, models
+from app.main import app
+from benchmarks.comum import criar_banco_sqlite, medir, popular_historico
+
+REPETICOES = 50
+AGENDAMENTOS_SALAO_GRANDE = 100_000
+AGENDAMENTOS_SALAO_PEQUENO = 50
+INICIO = datetime(2030, 1, 1, 8, 0)
+
+# Índices de agendamentos que começam por salao_id, removidos no caso "sem índice"
+INDICES_POR_SALAO = ("ix_agendamentos_salao_inicio_id", "ix_agendamentos_salao_versao_id")
+
+# Salões 1 e 2 no shard "norte", 3 no "sul"
+SHARD_POR_SALAO = {1: "norte", 2: "norte", 3: "sul"}
+
+
+def _criar_salao(SessionLocal, salao_id: int):
+    db = SessionLocal()
+    # Ids definidos pela aplicação: o roteamento precisa de ids únicos entre os shards
+    db.add(models.Salao(id=salao_id, nome=f"Salão {salao_id}", email=f"salao{salao_id}@bench.com", senha_hash="x"))
+    db.commit()
+    db.close()
+
+
+def _cabecalho(salao_id: int):
+    return {"X-Salao-Id": str(salao_id)}
+
+
+def verificar_isolamento(client):
+    falhas = []
+
+    def conferir(condicao, descricao):
+        if not condicao:
+            falhas.append(descricao)
+
+    servicos = {}
+    for salao_id in SHARD_POR_SALAO:
+        resposta = client.post("/servicos/", headers=_cabecalho(salao_id), json={
+            "salao_id": salao_id, "nome": f"Corte {salao_id}", "duracao_minutos": 30, "preco": 50,
+        })
+        conferir(resposta.status_code == 201, f"criar serviço do salão {salao_id}: {resposta.status_code}")
+        servicos[salao_id] = resposta.json()["id"]
+    # Primeiro serviço de cada shard: o mesmo id em bancos diferentes
+    conferir(servicos[1] == servicos[3], "ids de shards diferentes deveriam se repetir neste teste")
+
+    for salao_id in SHARD_POR_SALAO:
+        lista = client.get("/servicos/", headers=_cabecalho(salao_id)).json()
+        conferir([s["salao_id"] for s in lista] == [salao_id], f"listagem do salão {salao_id}: {lista}")
+        # Duas leituras: a segunda vem do cache, que também precisa respeitar shard e salão
+        for _ in range(2):
+            servico = client.get(f"/servicos/{servicos[salao_id]}", headers=_cabecalho(salao_id)).json()
+            conferir(servico.get("salao_id") == salao_id, f"serviço do salão {salao_id}: {servico}")
+
+    # Mesmo shard, outro salão: leitura, alteração e gravação recusadas
+    conferir(client.get(f"/servicos/{servicos[1]}", headers=_cabecalho(2)).status_code == 404,
+             "salão 2 leu um serviço do salão 1")
+    conferir(client.patch(f"/servicos/{servicos[1]}", headers=_cabecalho(2), json={"nome": "x"}).status_code == 404,
+             "salão 2 alterou um serviço do salão 1")
+    resposta = client.post("/servicos/", headers=_cabecalho(2), json={
+        "salao_id": 1, "nome": "Intruso", "duracao_minutos": 30, "preco": 1,
+    })
+    conferir(resposta.status_code == 403, f"salão 2 gravou no salão 1: {resposta.status_code}")
+    conferir(client.get("/saloes/1", headers=_cabecalho(2)).status_code == 404, "salão 2 leu o salão 1")
+    return falhas
+
+
+def medir_agenda_salao_pequeno():
+    engine, SessionLocal = criar_banco_sqlite("compartilhado.db")
+    _, SessionShard = criar_banco_sqlite("shard_pequeno.db")
+    # A agenda do salão pequeno começa no meio da do grande: sem o índice por salão,
+    # a listagem percorre metade dos agendamentos do grande antes de achar os seus
+    meio = INICIO + AGENDAMENTOS_SALAO_GRANDE // 2 * timedelta(minutes=30)
+    for salao_id, fabrica, quantidade, inicio in (
+        (1, SessionLocal, AGENDAMENTOS_SALAO_GRANDE, INICIO),
+        (2, SessionLocal, AGENDAMENTOS_SALAO_PEQUENO, meio),
+        (2, SessionShard, AGENDAMENTOS_SALAO_PEQUENO, meio),
+    ):
+        _criar_salao(fabrica, salao_id)
+        db = fabrica()
+        servico = models.Servico(salao_id=salao_id, nome="Corte", duracao_minutos=30, preco=50)
+        cliente = models.Cliente(nome="Cliente", email=f"cliente{salao_id}@bench.com")
+        profissional = models.Profissional(salao_id=salao_id, nome="Profissional")
+        db.add_all([servico, cliente, profissional])
+        db.commit()
+        popular_historico(db.get_bind(), salao_id, servico.id, cliente.id, profissional.id, quantidade, inicio)
+        db.close()
+
+    client = TestClient(app)
+
+    def agenda_salao_pequeno():
+        resposta = client.get("/agendamentos/?limit=20", headers=_cabecalho(2))
+        assert resposta.status_code == 200 and len(resposta.json()) == 20, resposta.text
+
+    def medir_agenda():
+        # Uma chamada antes, fora da medição: compilação das consultas, conexões e páginas do SQLite
+        agenda_salao_pequeno()
+        return medir(agenda_salao_pequeno, REPETICOES)
+
+    resultados = {}
+    database.registrar_shard("compartilhado", engine_=engine)
+    database.definir_roteador_shard(lambda salao_id: "compartilhado")
+    resultados["compartilhado, com índice"] = medir_agenda()
+    with engine.begin() as conn:
+        # Também o índice da sincronização (salao_id, versao, id), que serviria o filtro por salão
+        for indice in INDICES_POR_SALAO:
+            conn.execute(text(f"DROP INDEX {indice}"))
+    resultados["compartilhado, sem índice"] = medir_agenda()
+    database.registrar_shard("pequeno", engine_=SessionShard.kw["bind"])
+    database.definir_roteador_shard(lambda salao_id: "pequeno" if salao_id == 2 else "compartilhado")
+    resultados["shard próprio"] = medir_agenda()
+    return resultados
+
+
+def executar():
+    cache.configurar(cache.CacheMemoria())
+    # As medições repetem a mesma consulta de um salão bem acima do limite de taxa
+    admissao.configurar(None)
+    for nome in ("norte", "sul"):
+        engine, _ = criar_banco_sqlite(f"{nome}.db")
+        database.registrar_shard(nome, engine_=engine)
+    database.definir_roteador_shard(SHARD_POR_SALAO.get)
+    for salao_id, nome in SHARD_POR_SALAO.items():
+        _criar_salao(database._shards[nome]["sessionmaker"], salao_id)
+
+    falhas = verificar_isolamento(TestClient(app))
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    print(f"isolamento entre salões e shards: {'ok' if not falhas else f'{len(falhas)} falhas'}")
+
+    print(f"\nagenda do salão pequeno ({AGENDAMENTOS_SALAO_PEQUENO} agendamentos) "
+          f"ao lado de um grande ({AGENDAMENTOS_SALAO_GRANDE})")
+    print(f"{'banco':>26} | {'ms':>8}")
+    agenda = medir_agenda_salao_pequeno()
+    for descricao, ms in agenda.items():
+        print(f"{descricao:>26} | {ms:>8.2f}")
+    if agenda["compartilhado, com índice"] > agenda["compartilhado, sem índice"]:
+        falhas.append("agenda do salão pequeno mais lenta com o índice por salão do que sem ele")
+        print(f"FALHA: {falhas[-1]}")
+
+    database.definir_roteador_shard(database.rotear_por_mapa)
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    executar()
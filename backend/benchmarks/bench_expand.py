@@ -0,0 +1,80 @@
+# backend/benchmarks/bench_expand.py
+# Conta as consultas SQL para montar uma página de 100 agendamentos expandidos
+# (cliente, profissional, serviço e salão): lazy load por linha vs ?expand=.
+# Termina com erro se o caminho com expand passar de CONSULTAS_MAXIMAS, para servir
+# também de verificação de regressão (N+1 voltando).
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import event # type: ignore
+
+from app import crud, models
+from benchmarks.comum import criar_banco_sqlite, criar_catalogo, medir
+
+TAMANHO_PAGINA = 100
+NUM_PROFISSIONAIS = 10
+NUM_CLIENTES = TAMANHO_PAGINA
+# 1 consulta da página + 1 por relacionamento expandido
+CONSULTAS_MAXIMAS = 1 + len(crud.RELACIONAMENTOS_AGENDAMENTO)
+REPETICOES = 20
+
+
+class ContadorConsultas:
+    def __init__(self, engine):
+        self.total = 0
+        event.listen(engine, "before_cursor_execute", self._contar)
+
+    def _contar(self, *args):
+        self.total += 1
+
+
+def popular(db, salao, servico, profissionais):
+    clientes = [models.Cliente(nome=f"Cliente {i}") for i in range(NUM_CLIENTES)]
+    db.add_all(clientes)
+    db.flush()
+    inicio = datetime(2024, 1, 1, 8, 0)
+    for i, cliente in enumerate(clientes):
+        comeco = inicio + timedelta(hours=i)
+        db.add(models.Agendamento(
+            salao_id=salao.id, cliente_id=cliente.id, servico_id=servico.id,
+            profissional_id=profissionais[i % len(profissionais)].id,
+            data_hora_inicio=comeco, data_hora_fim=comeco + timedelta(minutes=30),
+        ))
+    db.commit()
+
+
+def serializar(agendamentos):
+    # O que a serialização de schemas.AgendamentoExpandido faz: lê cada relacionamento
+    return [[getattr(a, nome) for nome in crud.RELACIONAMENTOS_AGENDAMENTO] for a in agendamentos]
+
+
+def executar():
+    engine, SessionLocal = criar_banco_sqlite()
+    db = SessionLocal()
+    salao, servico, _, profissionais = criar_catalogo(db, NUM_PROFISSIONAIS)
+    popular(db, salao, servico, profissionais)
+    contador = ContadorConsultas(engine)
+    todos = set(crud.RELACIONAMENTOS_AGENDAMENTO)
+
+    casos = [
+        ("lazy load", lambda: serializar(crud.get_agendamentos(db, limit=TAMANHO_PAGINA))),
+        ("expand", lambda: serializar(crud.get_agendamentos(db, limit=TAMANHO_PAGINA, expand=todos))),
+    ]
+    print(f"{'modo':>10} | {'consultas':>9} | {'ms':>8}")
+    consultas = {}
+    for modo, consulta in casos:
+        db.expunge_all()
+        contador.total = 0
+        consulta()
+        consultas[modo] = contador.total
+        ms = medir(lambda: (db.expunge_all(), consulta()), REPETICOES)
+        print(f"{modo:>10} | {consultas[modo]:>9} | {ms:>8.2f}")
+    db.close()
+
+    if consultas["expand"] > CONSULTAS_MAXIMAS:
+        print(f"ERRO: expand usou {consultas['expand']} consultas (máximo {CONSULTAS_MAXIMAS})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    executar()
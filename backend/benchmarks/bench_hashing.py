@@ -0,0 +1,82 @@
+# backend/benchmarks/bench_hashing.py
+# Latência de um endpoint leve (GET /servicos/1) durante uma rajada de cadastros
+# de salão (POST /saloes/, que faz bcrypt). Compara o hash em threads do próprio
+# processo (HASH_WORKERS=0, comportamento antigo) com o pool de processos dedicado.
+#   python -m benchmarks.bench_hashing [cadastros_simultaneos] [segundos]
+import asyncio
+import itertools
+import sys
+import time
+
+import httpx
+
+from benchmarks.comum import PORTA, criar_banco_sqlite, criar_catalogo, subir_servidor
+
+PROBE = "/servicos/1"
+MODOS = [("sem pool", {"HASH_WORKERS": "0"}), ("pool de processos", {})]
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))] * 1000 if valores else float("nan")
+
+
+async def medir_durante_rajada(cadastros_simultaneos: int, segundos: float):
+    latencias = []
+    recusados = 0
+    contador = itertools.count()
+    fim = time.perf_counter() + segundos
+
+    async def cadastrar(cliente):
+        nonlocal recusados
+        while time.perf_counter() < fim:
+            n = next(contador)
+            resposta = await cliente.post("/saloes/", json={
+                "nome": f"Salão {n}", "email": f"salao{n}@bench.com", "senha": "senha-forte",
+            })
+            if resposta.status_code == 503:
+                recusados += 1
+                await asyncio.sleep(float(resposta.headers.get("Retry-After", "1")))
+
+    async def sondar(cliente):
+        while time.perf_counter() < fim:
+            comeco = time.perf_counter()
+            (await cliente.get(PROBE)).raise_for_status()
+            latencias.append(time.perf_counter() - comeco)
+            await asyncio.sleep(0.01)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORTA}", timeout=60) as cliente:
+        sondas = [sondar(cliente)]
+        await sondar_sem_carga(cliente, latencias_base := [])
+        await asyncio.gather(*sondas, *(cadastrar(cliente) for _ in range(cadastros_simultaneos)))
+    return latencias_base, latencias, recusados
+
+
+async def sondar_sem_carga(cliente, latencias, quantidade: int = 100):
+    for _ in range(quantidade):
+        comeco = time.perf_counter()
+        (await cliente.get(PROBE)).raise_for_status()
+        latencias.append(time.perf_counter() - comeco)
+
+
+def executar(cadastros_simultaneos: int = 50, segundos: float = 10):
+    print(f"{cadastros_simultaneos} cadastros simultâneos por {segundos}s")
+    print(f"{'modo':>18} | {'p50 ocioso':>10} | {'p50 rajada':>10} | {'p99 rajada':>10} | {'503s':>5}")
+    for nome, env in MODOS:
+        engine, SessionLocal = criar_banco_sqlite()
+        db = SessionLocal()
+        criar_catalogo(db)
+        db.close()
+        processo = subir_servidor(engine.url.database, **env)
+        try:
+            base, rajada, recusados = asyncio.run(medir_durante_rajada(cadastros_simultaneos, segundos))
+        finally:
+            processo.terminate()
+            processo.wait()
+        print(f"{nome:>18} | {percentil(base, 0.5):>10.2f} | {percentil(rajada, 0.5):>10.2f} | "
+              f"{percentil(rajada, 0.99):>10.2f} | {recusados:>5}")
+
+
+if __name__ == "__main__":
+    argumentos = [float(a) for a in sys.argv[1:3]]
+    executar(int(argumentos[0]) if argumentos else 50, argumentos[1] if len(argumentos) > 1 else 10)
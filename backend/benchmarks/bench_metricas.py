@@ -0,0 +1,56 @@
+# backend/benchmarks/bench_metricas.py
+# Custo da instrumentação de app/metricas.py: latência das mesmas requisições com as
+# métricas ligadas e desligadas (METRICAS_HABILITADAS), e o tempo de gerar /metrics.
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from app import cache, metricas
+from app.database import get_db
+from app.main import app
+from benchmarks.comum import criar_banco_sqlite, criar_catalogo, medir, popular_historico
+
+REPETICOES = 500
+
+
+def executar():
+    engine, SessionLocal = criar_banco_sqlite()
+    db = SessionLocal()
+    salao, servico, cliente, profissionais = criar_catalogo(db)
+    ids = {"servico": servico.id}
+    popular_historico(engine, salao.id, servico.id, cliente.id, profissionais[0].id, 200, datetime(2030, 1, 1))
+    db.close()
+
+    def _get_db():
+        sessao = SessionLocal()
+        try:
+            yield sessao
+        finally:
+            sessao.close()
+
+    app.dependency_overrides[get_db] = _get_db
+    cache.configurar(None)
+    client = TestClient(app)
+    rotas = {
+        "servico": f"/servicos/{ids['servico']}",
+        "agendamentos": "/agendamentos/?limit=50&expand=cliente,profissional,servico",
+    }
+
+    print(f"{'rota':>14} | {'sem métricas ms':>15} | {'com métricas ms':>15} | {'custo':>7}")
+    for nome, url in rotas.items():
+        resultados = {}
+        for habilitadas in (False, True):
+            metricas.METRICAS_HABILITADAS = habilitadas
+            client.get(url)
+            resultados[habilitadas] = medir(lambda: client.get(url), REPETICOES)
+        custo = (resultados[True] - resultados[False]) / resultados[False] * 100
+        print(f"{nome:>14} | {resultados[False]:>15.3f} | {resultados[True]:>15.3f} | {custo:>6.1f}%")
+
+    ms = medir(lambda: client.get("/metrics"), 50)
+    series = sum(1 for linha in client.get("/metrics").text.splitlines() if not linha.startswith("#"))
+    print(f"\nGET /metrics: {ms:.2f} ms ({series} amostras)")
+    app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    executar()
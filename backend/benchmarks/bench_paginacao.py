@@ -0,0 +1,43 @@
+# backend/benchmarks/bench_paginacao.py
+# Compara a latência da página 1 e da página 10.000 da listagem de agendamentos
+# no modo legado (skip/limit) e no modo por cursor.
+from datetime import datetime
+
+from app import crud
+from benchmarks.comum import criar_banco_sqlite, criar_catalogo, popular_historico, medir
+
+TAMANHO_PAGINA = 100
+PAGINA_PROFUNDA = 10_000
+TOTAL_AGENDAMENTOS = TAMANHO_PAGINA * PAGINA_PROFUNDA
+REPETICOES = 20
+
+
+def executar():
+    engine, SessionLocal = criar_banco_sqlite()
+    db = SessionLocal()
+    salao, servico, cliente, (profissional,) = criar_catalogo(db)
+    popular_historico(engine, salao.id, servico.id, cliente.id, profissional.id,
+                      TOTAL_AGENDAMENTOS, datetime(2000, 1, 1, 8, 0))
+
+    # Cursor que aponta para o início da página 10.000 (obtido fora da medição)
+    skip_profundo = (PAGINA_PROFUNDA - 1) * TAMANHO_PAGINA
+    cursor_profundo = crud.get_agendamentos(db, skip=skip_profundo - TAMANHO_PAGINA,
+                                            limit=TAMANHO_PAGINA).next_cursor
+
+    casos = [
+        ("skip/limit", "página 1", lambda: crud.get_agendamentos(db, skip=0, limit=TAMANHO_PAGINA)),
+        ("skip/limit", f"página {PAGINA_PROFUNDA}",
+         lambda: crud.get_agendamentos(db, skip=skip_profundo, limit=TAMANHO_PAGINA)),
+        ("cursor", "página 1", lambda: crud.get_agendamentos(db, limit=TAMANHO_PAGINA)),
+        ("cursor", f"página {PAGINA_PROFUNDA}",
+         lambda: crud.get_agendamentos(db, limit=TAMANHO_PAGINA, cursor=cursor_profundo)),
+    ]
+    print(f"{'modo':>10} | {'pagina':>13} | {'ms':>8}")
+    for modo, pagina, consulta in casos:
+        db.expunge_all()
+        print(f"{modo:>10} | {pagina:>13} | {medir(consulta, REPETICOES):>8.2f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    executar()
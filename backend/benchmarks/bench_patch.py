@@ -0,0 +1,97 @@
+# backend/benchmarks/bench_patch.py
+# Conta as consultas SQL de uma alteração de um campo via PUT (lê, altera o objeto,
+# grava e relê) e via PATCH (um único UPDATE ... WHERE id, com RETURNING no SQLite),
+# passando pelas rotas de main.py. Termina com erro se algum PATCH passar do
+# máximo esperado, para servir também de verificação de regressão.
+import sys
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app import admissao, cache, models
+from app.database import get_db
+from app.main import app
+from benchmarks.bench_expand import ContadorConsultas
+from benchmarks.comum import criar_banco_sqlite, criar_catalogo, medir
+
+REPETICOES = 200
+INICIO = datetime(2030, 1, 1, 10, 0)
+
+
+def executar():
+    # As medições repetem as requisições de um só cliente bem acima do limite de taxa
+    admissao.configurar(None)
+    engine, SessionLocal = criar_banco_sqlite()
+    db = SessionLocal()
+    salao, servico, cliente, profissionais = criar_catalogo(db)
+    profissional = profissionais[0]
+    agendamento = models.Agendamento(
+        salao_id=salao.id, cliente_id=cliente.id, profissional_id=profissional.id, servico_id=servico.id,
+        data_hora_inicio=INICIO, data_hora_fim=INICIO + timedelta(minutes=30),
+    )
+    db.add(agendamento)
+    db.commit()
+    ids = {
+        "servico": servico.id, "cliente": cliente.id, "agendamento": agendamento.id,
+        "salao": salao.id, "profissional": profissional.id,
+    }
+    db.close()
+
+    def _get_db():
+        sessao = SessionLocal()
+        try:
+            yield sessao
+        finally:
+            sessao.close()
+
+    app.dependency_overrides[get_db] = _get_db
+    # Sem cache, para o PUT não ganhar a leitura inicial de graça
+    cache.configurar(None)
+    client = TestClient(app)
+    contador = ContadorConsultas(engine)
+    agenda = {
+        "salao_id": ids["salao"], "cliente_id": ids["cliente"], "profissional_id": ids["profissional"],
+        "servico_id": ids["servico"], "data_hora_inicio": INICIO.isoformat(),
+        "data_hora_fim": (INICIO + timedelta(minutes=30)).isoformat(),
+    }
+
+    # (caso, url, corpo do PUT, corpo do PATCH, máximo de consultas do PATCH)
+    casos = [
+        ("servico.preco", f"/servicos/{ids['servico']}",
+         {"nome": "Corte", "duracao_minutos": 30, "preco": 60}, {"preco": 60}, 1),
+        ("cliente.telefone", f"/clientes/{ids['cliente']}",
+         {"nome": "Cliente Benchmark", "telefone": "11999998888"}, {"telefone": "11999998888"}, 1),
+        # Escritas em agendamentos também incrementam o contador de versão do salão
+        # (sincronizacao.py): um UPDATE a mais, na mesma transação
+        ("agendamento.obs", f"/agendamentos/{ids['agendamento']}",
+         dict(agenda, observacoes="ok"), {"observacoes": "ok"}, 2),
+        # Mudança de horário: trava e lê a linha, trava o profissional, procura conflito,
+        # ajusta o resumo diário, incrementa a versão e faz o UPDATE
+        ("agendamento.fim", f"/agendamentos/{ids['agendamento']}",
+         dict(agenda, data_hora_fim=(INICIO + timedelta(minutes=45)).isoformat()),
+         {"data_hora_fim": (INICIO + timedelta(minutes=45)).isoformat()}, 5),
+    ]
+    print(f"{'caso':>18} | {'PUT consultas':>13} | {'PATCH consultas':>15} | {'PUT ms':>7} | {'PATCH ms':>8}")
+    excedidos = []
+    for caso, url, corpo_put, corpo_patch, maximo in casos:
+        resultado = {}
+        for metodo, corpo in (("put", corpo_put), ("patch", corpo_patch)):
+            contador.total = 0
+            resposta = client.request(metodo.upper(), url, json=corpo)
+            assert resposta.status_code == 200, resposta.text
+            consultas = contador.total
+            ms = medir(lambda: client.request(metodo.upper(), url, json=corpo), REPETICOES)
+            resultado[metodo] = (consultas, ms)
+        print(f"{caso:>18} | {resultado['put'][0]:>13} | {resultado['patch'][0]:>15} | "
+              f"{resultado['put'][1]:>7.2f} | {resultado['patch'][1]:>8.2f}")
+        if resultado["patch"][0] > maximo:
+            excedidos.append(f"{caso}: {resultado['patch'][0]} consultas (máximo {maximo})")
+
+    app.dependency_overrides.clear()
+    if excedidos:
+        print("ERRO: " + "; ".join(excedidos))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    executar()
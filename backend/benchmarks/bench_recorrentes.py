@@ -0,0 +1,73 @@
+# backend/benchmarks/bench_recorrentes.py
+# Agendar um cliente semanal pelo horizonte de recorrência: um POST /agendamentos/
+# por semana (uma transação e uma verificação de conflito cada) vs um único
+# POST /agendamentos/recorrentes, que grava todas as ocorrências em uma transação.
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app import admissao, recorrencia
+from app.database import get_db
+from app.main import app
+from benchmarks.bench_expand import ContadorConsultas
+from benchmarks.comum import criar_banco_sqlite, criar_catalogo, medir
+
+REPETICOES = 5
+DURACAO = timedelta(minutes=45)
+
+
+def executar():
+    # As medições repetem as requisições de um só cliente bem acima do limite de taxa
+    admissao.configurar(None)
+    engine, SessionLocal = criar_banco_sqlite()
+    db = SessionLocal()
+    salao, servico, cliente, profissionais = criar_catalogo(db, num_profissionais=2 * REPETICOES + 2)
+    ids = [profissional.id for profissional in profissionais]
+    corpo = {"salao_id": salao.id, "cliente_id": cliente.id, "servico_id": servico.id}
+    db.close()
+
+    def _get_db():
+        sessao = SessionLocal()
+        try:
+            yield sessao
+        finally:
+            sessao.close()
+
+    app.dependency_overrides[get_db] = _get_db
+    client = TestClient(app)
+    contador = ContadorConsultas(engine)
+    amanha = datetime.now().replace(hour=10, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    semanas = recorrencia.RECORRENCIA_HORIZONTE_DIAS // 7
+    # Cada repetição usa um profissional diferente, para não conflitar com a anterior
+    livres = iter(ids)
+
+    def individuais():
+        profissional_id = next(livres)
+        for semana in range(semanas):
+            inicio = amanha + timedelta(weeks=semana)
+            resposta = client.post("/agendamentos/", json=dict(
+                corpo, profissional_id=profissional_id,
+                data_hora_inicio=inicio.isoformat(), data_hora_fim=(inicio + DURACAO).isoformat(),
+            ))
+            assert resposta.status_code == 201, resposta.text
+
+    def serie():
+        resposta = client.post("/agendamentos/recorrentes", json=dict(
+            corpo, profissional_id=next(livres), regra="FREQ=WEEKLY",
+            data_hora_inicio=amanha.isoformat(), data_hora_fim=(amanha + DURACAO).isoformat(),
+        ))
+        assert resposta.status_code == 201, resposta.text
+
+    print(f"{semanas} ocorrências semanais ({recorrencia.RECORRENCIA_HORIZONTE_DIAS} dias de horizonte)")
+    print(f"{'modo':>12} | {'consultas':>9} | {'ms':>8}")
+    for modo, funcao in (("individuais", individuais), ("serie", serie)):
+        contador.total = 0
+        funcao()
+        consultas = contador.total
+        ms = medir(funcao, REPETICOES)
+        print(f"{modo:>12} | {consultas:>9} | {ms:>8.2f}")
+    app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    executar()
@@ -0,0 +1,52 @@
+# backend/benchmarks/bench_relatorios.py
+# Latência do relatório mensal de um ano (GET /saloes/{id}/relatorios?agrupar=mes)
+# conforme cresce o histórico de agendamentos: lendo os resumos diários vs. o cálculo
+# antigo (todos os agendamentos do período com o preço do serviço).
+# A primeira coluna deve ficar estável; a segunda cresce com o histórico.
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select # type: ignore
+
+from app import models, relatorios
+from benchmarks.comum import criar_banco_sqlite, criar_catalogo, popular_historico, medir
+
+TAMANHOS_HISTORICO = [10_000, 100_000, 500_000]
+REPETICOES = 10
+MINUTOS_EXPEDIENTE = 12 * 60
+
+
+def relatorio_direto(db, salao_id, de, ate):
+    # O que os donos faziam antes: ler os agendamentos do período com o preço do serviço
+    return db.execute(
+        select(models.Agendamento.data_hora_inicio, models.Agendamento.status, models.Servico.preco)
+        .join(models.Servico, models.Servico.id == models.Agendamento.servico_id)
+        .where(models.Agendamento.salao_id == salao_id,
+               func.date(models.Agendamento.data_hora_inicio) >= de.isoformat(),
+               func.date(models.Agendamento.data_hora_inicio) <= ate.isoformat())
+    ).all()
+
+
+def executar():
+    print(f"{'historico':>10} | {'resumos ms':>10} | {'agendamentos ms':>15}")
+    for tamanho in TAMANHOS_HISTORICO:
+        engine, SessionLocal = criar_banco_sqlite()
+        db = SessionLocal()
+        salao, servico, cliente, (profissional,) = criar_catalogo(db)
+        # Histórico terminando hoje: o relatório cobre o último ano
+        duracao = timedelta(minutes=30)
+        inicio = datetime.combine(date.today(), datetime.min.time()) - tamanho * duracao
+        popular_historico(engine, salao.id, servico.id, cliente.id, profissional.id, tamanho, inicio, duracao)
+        relatorios.reconstruir(db)
+
+        ate = date.today()
+        de = ate - timedelta(days=364)
+        resumos = medir(
+            lambda: relatorios.gerar_relatorio(db, salao.id, de, ate, "mes", MINUTOS_EXPEDIENTE), REPETICOES
+        )
+        direto = medir(lambda: relatorio_direto(db, salao.id, de, ate), REPETICOES)
+        print(f"{tamanho:>10} | {resumos:>10.2f} | {direto:>15.2f}")
+        db.close()
+
+
+if __name__ == "__main__":
+    executar()
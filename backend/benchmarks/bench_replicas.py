@@ -0,0 +1,104 @@
+# backend/benchmarks/bench_replicas.py
+# Primário e réplicas de leitura com arquivos SQLite locais. A "replicação" é uma
+# cópia do arquivo do primário, feita em momentos escolhidos, para simular réplicas
+# atrasadas. Verifica e mostra:
+#   - rodízio das leituras entre as réplicas, pulando a que está fora do ar;
+#   - escritas sempre no primário;
+#   - read-your-writes: logo após uma escrita, as leituras do mesmo cliente vão ao
+#     primário; as de outros clientes (e as dele, depois da janela) vão às réplicas.
+# Termina com erro se alguma verificação falhar.
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+
+PASTA = tempfile.mkdtemp(prefix="agendanet_")
+PRIMARIO = os.path.join(PASTA, "primario.db")
+REPLICAS = [os.path.join(PASTA, f"replica{i}.db") for i in range(2)]
+# Réplica num diretório inexistente: a conexão falha e ela sai do rodízio
+REPLICA_FORA_DO_AR = os.path.join(PASTA, "inexistente", "replica.db")
+JANELA_ESCRITA = 0.5
+
+# As URLs são lidas por app.database na importação
+os.environ["DATABASE_URL"] = f"sqlite:///{PRIMARIO}"
+os.environ["DATABASE_REPLICA_URLS"] = ",".join(f"sqlite:///{caminho}" for caminho in REPLICAS + [REPLICA_FORA_DO_AR])
+os.environ["REPLICA_JANELA_ESCRITA"] = str(JANELA_ESCRITA)
+
+from fastapi.testclient import TestClient # noqa: E402
+from sqlalchemy import event # noqa: E402 # type: ignore
+
+from app import database # noqa: E402
+from app.database import Base # noqa: E402
+from app.main import app # noqa: E402
+
+LEITURAS = 30
+
+
+def replicar():
+    """Copia o primário para as réplicas (que passam a estar em dia)."""
+    for caminho, item in zip(REPLICAS, database.replicas.itens):
+        item["engine"].dispose()
+        shutil.copyfile(PRIMARIO, caminho)
+
+
+def contar_consultas():
+    contagem = Counter()
+    engines = {"primario": database.engine}
+    engines.update({f"replica{i}": item["engine"] for i, item in enumerate(database.replicas.itens)})
+    for nome, engine in engines.items():
+        event.listen(engine, "before_cursor_execute", lambda *args, nome=nome: contagem.update([nome]))
+    return contagem
+
+
+def nomes_servicos(client):
+    resposta = client.get("/servicos/")
+    assert resposta.status_code == 200, resposta.text
+    return {servico["nome"] for servico in resposta.json()}
+
+
+def executar():
+    falhas = []
+
+    def conferir(condicao, descricao):
+        print(f"{'ok   ' if condicao else 'FALHA'} {descricao}")
+        if not condicao:
+            falhas.append(descricao)
+
+    Base.metadata.create_all(bind=database.engine)
+    contagem = contar_consultas()
+    cliente_a = TestClient(app)
+    cliente_b = TestClient(app)
+
+    resposta = cliente_a.post("/saloes/", json={"nome": "Salão", "email": "salao@bench.com", "senha": "segredo123"})
+    salao_id = resposta.json()["id"]
+    cliente_a.post("/servicos/", json={"salao_id": salao_id, "nome": "Corte", "duracao_minutos": 30, "preco": 50})
+    conferir(not any(nome.startswith("replica") for nome in contagem), "escritas só no primário")
+    replicar()
+    time.sleep(JANELA_ESCRITA)
+
+    contagem.clear()
+    for _ in range(LEITURAS):
+        nomes_servicos(cliente_b)
+    print(f"\n{LEITURAS} leituras: {dict(sorted(contagem.items()))}")
+    conferir(contagem["primario"] == 0, "leituras fora da janela não vão ao primário")
+    conferir(abs(contagem["replica0"] - contagem["replica1"]) <= 2, "rodízio equilibrado entre as réplicas")
+    estado = database.estatisticas_replicas()["sync"]
+    conferir(not estado[2]["saudavel"] and estado[2]["falhas"] >= 1, "réplica fora do ar marcada e pulada")
+
+    # Escrita nova que as réplicas ainda não receberam
+    cliente_a.post("/servicos/", json={"salao_id": salao_id, "nome": "Escova", "duracao_minutos": 45, "preco": 70})
+    conferir("Escova" in nomes_servicos(cliente_a), "quem escreveu lê a própria escrita (primário)")
+    conferir("Escova" not in nomes_servicos(cliente_b), "outro cliente lê da réplica (ainda atrasada)")
+    time.sleep(JANELA_ESCRITA)
+    conferir("Escova" not in nomes_servicos(cliente_a), "passada a janela, quem escreveu volta às réplicas")
+    replicar()
+    conferir("Escova" in nomes_servicos(cliente_b), "réplica em dia depois da replicação")
+
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    executar()
@@ -0,0 +1,103 @@
+# backend/benchmarks/bench_serializacao.py
+# Linhas por segundo nas listagens: o caminho anterior (objetos ORM convertidos pelo
+# response_model e codificados com json) contra o atual (colunas lidas como tuplas e
+# codificadas direto com orjson, serializacao.py). O caminho anterior é montado numa
+# rota só do benchmark, com os mesmos parâmetros da rota real.
+# Termina com erro se os dois caminhos devolverem JSON diferente.
+import sys
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi import Depends, Response
+from fastapi.testclient import TestClient
+
+from app import crud, models, schemas
+from app.database import get_db
+from app.main import app
+from app.paginacao import definir_proximo_cursor
+from app.validacoes import validar_expand
+from benchmarks.comum import criar_banco_sqlite, criar_catalogo, medir
+
+NUM_AGENDAMENTOS = 5000
+NUM_CLIENTES = 200
+NUM_PROFISSIONAIS = 10
+TAMANHOS_PAGINA = (100, 1000)
+REPETICOES = 20
+
+
+def popular(engine, db):
+    salao, servico, _, profissionais = criar_catalogo(db, NUM_PROFISSIONAIS)
+    clientes = [models.Cliente(nome=f"Cliente {i}", telefone=f"1199999{i:04d}") for i in range(NUM_CLIENTES)]
+    db.add_all(clientes)
+    db.commit()
+    inicio = datetime(2030, 1, 1, 8, 0)
+    linhas = []
+    for i in range(NUM_AGENDAMENTOS):
+        comeco = inicio + i * timedelta(minutes=30)
+        linhas.append({
+            "salao_id": salao.id,
+            "cliente_id": clientes[i % NUM_CLIENTES].id,
+            "profissional_id": profissionais[i % NUM_PROFISSIONAIS].id,
+            "servico_id": servico.id,
+            "data_hora_inicio": comeco,
+            "data_hora_fim": comeco + timedelta(minutes=30),
+            "status": "agendado",
+            "observacoes": "Cliente prefere a tarde" if i % 3 == 0 else None,
+        })
+    with engine.begin() as conn:
+        conn.execute(models.Agendamento.__table__.insert(), linhas)
+
+
+def agendamentos_orm(response: Response, skip: int = 0, limit: int = 100, cursor: str = None, expand: str = None,
+                     db=Depends(get_db)):
+    # O caminho anterior: objetos ORM devolvidos para o response_model serializar
+    agendamentos = crud.get_agendamentos(db, skip=skip, limit=limit, cursor=cursor, expand=validar_expand(expand))
+    definir_proximo_cursor(response, agendamentos)
+    return agendamentos
+
+
+def executar():
+    engine, SessionLocal = criar_banco_sqlite()
+    db = SessionLocal()
+    popular(engine, db)
+    db.close()
+
+    def _get_db():
+        sessao = SessionLocal()
+        try:
+            yield sessao
+        finally:
+            sessao.close()
+
+    app.dependency_overrides[get_db] = _get_db
+    app.add_api_route("/bench/agendamentos-orm", agendamentos_orm,
+                      response_model=List[schemas.AgendamentoExpandido])
+    client = TestClient(app)
+
+    falhas = []
+    print(f"{'página':>6} | {'expand':>6} | {'ORM + response_model':>20} | {'colunas + orjson':>16} | {'ganho':>6}")
+    for limit in TAMANHOS_PAGINA:
+        for expand in ("", "cliente,profissional,servico,salao"):
+            consulta = f"?limit={limit}&expand={expand}"
+            anterior = client.get(f"/bench/agendamentos-orm{consulta}")
+            atual = client.get(f"/agendamentos/{consulta}")
+            # Mesmo conteúdo e mesma ordem de chaves
+            if anterior.json() != atual.json() or [list(a) for a in anterior.json()] != [list(a) for a in atual.json()]:
+                falhas.append(f"JSON diferente em {consulta}")
+            if anterior.headers.get("x-next-cursor") != atual.headers.get("x-next-cursor"):
+                falhas.append(f"cursor diferente em {consulta}")
+            ms_anterior = medir(lambda: client.get(f"/bench/agendamentos-orm{consulta}"), REPETICOES)
+            ms_atual = medir(lambda: client.get(f"/agendamentos/{consulta}"), REPETICOES)
+            print(f"{limit:>6} | {'sim' if expand else 'não':>6} | "
+                  f"{limit * 1000 / ms_anterior:>14,.0f} lin/s | {limit * 1000 / ms_atual:>10,.0f} lin/s | "
+                  f"{ms_anterior / ms_atual:>5.1f}x")
+
+    app.dependency_overrides.clear()
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    executar()
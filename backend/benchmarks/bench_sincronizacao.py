@@ -0,0 +1,119 @@
+# backend/benchmarks/bench_sincronizacao.py
+# Um tablet da recepção mantendo a agenda de um salão grande em dia: baixar a agenda
+# inteira a cada rodada (GET /agendamentos/, todas as páginas) contra pedir só as
+# mudanças desde o último token (GET /agendamentos/changes, sincronizacao.py).
+# A cada rodada algumas escritas mudam a agenda (criações, alterações e exclusões).
+# Termina com erro se a agenda do tablet, montada só com as mudanças, ficar diferente
+# da agenda baixada por inteiro.
+import sys
+import time
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app import admissao, crud, models, schemas
+from app.database import get_db
+from app.main import app
+from benchmarks.comum import criar_banco_sqlite, criar_catalogo, popular_historico
+
+AGENDAMENTOS = 20_000
+RODADAS = 5
+# Escritas entre duas sincronizações: (criações, alterações, exclusões)
+ESCRITAS_POR_RODADA = (3, 5, 2)
+PAGINA = 1000
+INICIO = datetime(2030, 1, 1, 8, 0)
+CAMPOS = crud.CAMPOS_LISTAGEM[models.Agendamento]
+
+
+def baixar_tudo(client, salao_id):
+    agenda, bytes_, cursor = {}, 0, None
+    while True:
+        consulta = f"/agendamentos/?salao_id={salao_id}&limit={PAGINA}"
+        resposta = client.get(consulta + (f"&cursor={cursor}" if cursor else ""))
+        bytes_ += len(resposta.content)
+        # Sem os relacionamentos do ?expand (null aqui), para comparar com as mudanças
+        agenda.update((item["id"], {campo: item[campo] for campo in CAMPOS}) for item in resposta.json())
+        cursor = resposta.headers.get("x-next-cursor")
+        if not cursor:
+            return agenda, bytes_
+
+
+def sincronizar(client, salao_id, agenda, token=None):
+    """Aplica as mudanças desde `token` em `agenda` e devolve (token novo, bytes recebidos)."""
+    bytes_ = 0
+    while True:
+        consulta = f"/agendamentos/changes?salao_id={salao_id}&limit={PAGINA}"
+        resposta = client.get(consulta + (f"&since={token}" if token else ""))
+        bytes_ += len(resposta.content)
+        mudancas = resposta.json()
+        agenda.update((item["id"], item) for item in mudancas["alterados"])
+        for agendamento_id in mudancas["removidos"]:
+            agenda.pop(agendamento_id, None)
+        token = mudancas["token"]
+        if not mudancas["tem_mais"]:
+            return token, bytes_
+
+
+def escrever(db, salao, servico, cliente, profissional, rodada, ids):
+    criacoes, alteracoes, exclusoes = ESCRITAS_POR_RODADA
+    for i in range(criacoes):
+        comeco = INICIO + timedelta(days=500 + rodada, minutes=30 * i)
+        novo = crud.create_agendamento(db, schemas.AgendamentoCreate(
+            salao_id=salao.id, cliente_id=cliente.id, profissional_id=profissional.id, servico_id=servico.id,
+            data_hora_inicio=comeco, data_hora_fim=comeco + timedelta(minutes=30),
+        ))
+        ids.append(novo.id)
+    for i in range(alteracoes):
+        crud.patch_agendamento(db, ids[rodada * 100 + i], {"status": "confirmado", "observacoes": f"rodada {rodada}"})
+    for i in range(exclusoes):
+        crud.delete_agendamento(db, ids.pop(rodada * 100 + alteracoes + i))
+
+
+def executar():
+    admissao.configurar(None)
+    engine, SessionLocal = criar_banco_sqlite()
+    db = SessionLocal()
+    salao, servico, cliente, (profissional,) = criar_catalogo(db)
+    popular_historico(engine, salao.id, servico.id, cliente.id, profissional.id, AGENDAMENTOS, INICIO)
+
+    def _get_db():
+        sessao = SessionLocal()
+        try:
+            yield sessao
+        finally:
+            sessao.close()
+
+    app.dependency_overrides[get_db] = _get_db
+    client = TestClient(app)
+
+    ids = sorted(baixar_tudo(client, salao.id)[0])
+    agenda_tablet = {}
+    token, bytes_inicial = sincronizar(client, salao.id, agenda_tablet)
+    print(f"agenda de {len(agenda_tablet):,} agendamentos; sincronização inicial: {bytes_inicial / 1024:,.0f} KiB")
+    print(f"{'rodada':>6} | {'inteira ms':>10} | {'inteira KiB':>11} | {'mudanças ms':>11} | "
+          f"{'mudanças KiB':>12} | {'ganho':>6}")
+
+    falhas = []
+    for rodada in range(RODADAS):
+        escrever(db, salao, servico, cliente, profissional, rodada, ids)
+        comeco = time.perf_counter()
+        agenda, bytes_inteira = baixar_tudo(client, salao.id)
+        ms_inteira = (time.perf_counter() - comeco) * 1000
+        comeco = time.perf_counter()
+        token, bytes_mudancas = sincronizar(client, salao.id, agenda_tablet, token)
+        ms_mudancas = (time.perf_counter() - comeco) * 1000
+        print(f"{rodada:>6} | {ms_inteira:>10.1f} | {bytes_inteira / 1024:>11,.0f} | {ms_mudancas:>11.1f} | "
+              f"{bytes_mudancas / 1024:>12.1f} | {ms_inteira / ms_mudancas:>5.0f}x")
+        if agenda_tablet != agenda:
+            falhas.append(f"rodada {rodada}: agenda sincronizada difere da agenda inteira")
+
+    db.close()
+    app.dependency_overrides.clear()
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    executar()
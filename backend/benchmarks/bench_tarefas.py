@@ -0,0 +1,298 @@
+# backend/benchmarks/bench_tarefas.py
+# Confere a fila de tarefas (tarefas.py) e os lembretes (lembretes.py), cada caso num
+# banco SQLite novo:
+# - reserva: workers concorrentes executam cada tarefa uma única vez, e uma reserva
+#   vencida (worker que caiu) volta para a fila;
+# - falhas: nova tentativa com backoff exponencial (com jitter) até `falhou`;
+# - periódicas: vários workers na mesma janela enfileiram uma tarefa por tipo;
+# - lembretes: só os agendamentos na janela da antecedência recebem lembrete, uma vez,
+#   e cancelados ou remarcados depois de enfileirados não recebem o lembrete antigo.
+#   O envio passa por um RemetenteArquivo, lido de volta no fim.
+# Mostra a vazão da fila com vários workers e termina com erro se alguma conferência falhar.
+#   python -m benchmarks.bench_tarefas [tarefas] [workers]
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select # type: ignore
+
+from app import lembretes, models, tarefas
+from benchmarks.comum import criar_banco_sqlite, criar_catalogo
+
+_executadas = Counter()
+_lock = threading.Lock()
+
+
+@tarefas.tarefa("bench.contar")
+def contar(db, payload):
+    with _lock:
+        _executadas[payload["n"]] += 1
+
+
+@tarefas.tarefa("bench.falhar")
+def falhar(db, payload):
+    with _lock:
+        _executadas[payload["n"]] += 1
+        tentativa = _executadas[payload["n"]]
+    if tentativa <= payload["falhas"]:
+        raise RuntimeError(f"falha simulada {tentativa}")
+
+
+def _tarefa(db, tarefa_id):
+    db.expire_all()
+    return db.get(models.Tarefa, tarefa_id)
+
+
+def _id_por_chave(db, chave):
+    return db.execute(select(models.Tarefa.id).where(models.Tarefa.chave == chave)).scalar_one()
+
+
+def conferir_reserva(total: int, workers: int, falhas: list):
+    _, SessionLocal = criar_banco_sqlite()
+    db = SessionLocal()
+    for n in range(total):
+        tarefas.enfileirar(db, "bench.contar", {"n": n})
+    db.commit()
+    _executadas.clear()
+
+    def trabalhar():
+        trabalhador = tarefas.Trabalhador(SessionLocal, lote=10)
+        while trabalhador.executar_uma_vez():
+            pass
+
+    threads = [threading.Thread(target=trabalhar) for _ in range(workers)]
+    comeco = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    segundos = time.perf_counter() - comeco
+    print(f"{total} tarefas com {workers} workers em {segundos:.2f}s ({total / segundos:,.0f} tarefas/s)")
+
+    faltando = total - len(_executadas)
+    repetidas = sum(1 for vezes in _executadas.values() if vezes > 1)
+    if faltando or repetidas:
+        falhas.append(f"reserva: {faltando} tarefas não executadas, {repetidas} executadas mais de uma vez")
+    pendentes = db.execute(select(func.count()).select_from(models.Tarefa).where(
+        models.Tarefa.tipo == "bench.contar", models.Tarefa.status != "concluida"
+    )).scalar()
+    if pendentes:
+        falhas.append(f"reserva: {pendentes} tarefas não ficaram como concluida")
+
+    # Worker que reserva e cai: a tarefa só volta para a fila depois de TAREFAS_RESERVA
+    tarefas.enfileirar(db, "bench.contar", {"n": total}, chave="bench:abandonada")
+    db.commit()
+    tarefa_id = _id_por_chave(db, "bench:abandonada")
+    agora = datetime.now()
+    if tarefas.reservar(db, agora) != [tarefa_id]:
+        falhas.append("reserva: tarefa nova não foi reservada")
+    if tarefas.reservar(SessionLocal(), agora + timedelta(seconds=1)):
+        falhas.append("reserva: tarefa reservada foi entregue a outro worker antes de a reserva vencer")
+    vencida = agora + timedelta(seconds=tarefas.TAREFAS_RESERVA + 1)
+    if tarefas.reservar(SessionLocal(), vencida) != [tarefa_id]:
+        falhas.append("reserva: tarefa com a reserva vencida não voltou para a fila")
+    elif _tarefa(db, tarefa_id).tentativas != 2:
+        falhas.append("reserva: a nova reserva não contou uma tentativa")
+    db.close()
+
+
+def conferir_backoff(falhas: list):
+    # Jitter: o atraso fica entre metade e o total de base * 2^(tentativa-1), limitado ao máximo
+    for tentativa in (1, 3, 30):
+        esperado = min(tarefas.TAREFAS_BACKOFF_BASE * 2 ** (tentativa - 1), tarefas.TAREFAS_BACKOFF_MAX)
+        atrasos = [tarefas.backoff(tentativa).total_seconds() for _ in range(200)]
+        if min(atrasos) < esperado * 0.5 or max(atrasos) > esperado:
+            falhas.append(f"backoff da tentativa {tentativa} fora de [{esperado * 0.5:g}, {esperado:g}]s")
+        if len(set(atrasos)) == 1:
+            falhas.append(f"backoff da tentativa {tentativa} sem jitter")
+
+    _, SessionLocal = criar_banco_sqlite()
+    db = SessionLocal()
+    _executadas.clear()
+    # Falha sempre (vai a `falhou`) e falha uma vez (conclui na segunda tentativa)
+    tarefas.enfileirar(db, "bench.falhar", {"n": 0, "falhas": 99}, chave="bench:sempre", max_tentativas=3)
+    tarefas.enfileirar(db, "bench.falhar", {"n": 1, "falhas": 1}, chave="bench:uma-vez", max_tentativas=3)
+    db.commit()
+    sempre, uma_vez = _id_por_chave(db, "bench:sempre"), _id_por_chave(db, "bench:uma-vez")
+
+    agora = datetime.now()
+    for tentativa in (1, 2, 3):
+        reservadas = tarefas.reservar(db, agora)
+        if sempre not in reservadas:
+            falhas.append(f"falhas: tentativa {tentativa} não foi reservada")
+            break
+        for tarefa_id in reservadas:
+            antes = datetime.now()
+            tarefas.executar(db, tarefa_id)
+            depois = datetime.now()
+            if tarefa_id != sempre:
+                continue
+            tarefa_ = _tarefa(db, sempre)
+            if tentativa < 3:
+                esperado = min(tarefas.TAREFAS_BACKOFF_BASE * 2 ** (tentativa - 1), tarefas.TAREFAS_BACKOFF_MAX)
+                if tarefa_.status != "pendente" or tarefa_.tentativas != tentativa or not tarefa_.erro:
+                    falhas.append(f"falhas: tentativa {tentativa} deixou {tarefa_.status}/{tarefa_.tentativas}")
+                if not (antes + timedelta(seconds=esperado * 0.5) <= tarefa_.executar_em
+                        <= depois + timedelta(seconds=esperado)):
+                    falhas.append(f"falhas: nova tentativa {tentativa + 1} em {tarefa_.executar_em - depois}, "
+                                  f"esperado até {esperado:g}s")
+                # Antes do backoff vencer a tarefa não é entregue (a outra, se vencida, roda aqui)
+                cedo = tarefas.reservar(db, tarefa_.executar_em - timedelta(seconds=1))
+                if sempre in cedo:
+                    falhas.append(f"falhas: tentativa {tentativa + 1} entregue antes do backoff")
+                for outra_id in cedo:
+                    tarefas.executar(db, outra_id)
+                agora = tarefa_.executar_em
+    tarefa_ = _tarefa(db, sempre)
+    if (tarefa_.status, tarefa_.tentativas, tarefa_.bloqueada_ate) != ("falhou", 3, None):
+        falhas.append(f"falhas: depois de 3 tentativas ficou {tarefa_.status}/{tarefa_.tentativas}")
+    if not (tarefa_.erro or "").startswith("RuntimeError"):
+        falhas.append(f"falhas: erro não registrado: {tarefa_.erro!r}")
+    if tarefas.reservar(db, datetime.now() + timedelta(days=365)):
+        falhas.append("falhas: tarefa que falhou voltou para a fila")
+    tarefa_ = _tarefa(db, uma_vez)
+    if (tarefa_.status, tarefa_.tentativas, tarefa_.erro) != ("concluida", 2, None):
+        falhas.append(f"falhas: tarefa que falhou uma vez ficou {tarefa_.status}/{tarefa_.tentativas}")
+    db.close()
+
+
+def conferir_periodicas(workers: int, falhas: list):
+    _, SessionLocal = criar_banco_sqlite()
+    agora = datetime.now()
+    barreira = threading.Barrier(workers)
+
+    def agendar(momento):
+        trabalhador = tarefas.Trabalhador(SessionLocal)
+        db = SessionLocal()
+        try:
+            barreira.wait()
+            trabalhador.agendar_periodicas(db, momento)
+            # O mesmo worker de novo na mesma janela
+            trabalhador.agendar_periodicas(db, momento)
+        finally:
+            db.close()
+
+    # Uma rodada na janela de agora e outra na janela seguinte de todas as periódicas
+    proxima = agora + timedelta(seconds=max(tarefas._periodicas.values()))
+    for momento in (agora, proxima):
+        threads = [threading.Thread(target=agendar, args=(momento,)) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    db = SessionLocal()
+    por_tipo = Counter(db.execute(select(models.Tarefa.tipo)).scalars())
+    db.close()
+    esperado = {tipo: 2 for tipo in tarefas._periodicas}
+    print(f"periódicas com {workers} workers em duas janelas: {dict(por_tipo)}")
+    if dict(por_tipo) != esperado:
+        falhas.append(f"periódicas: esperado {esperado}, enfileiradas {dict(por_tipo)}")
+
+
+def conferir_lembretes(falhas: list):
+    _, SessionLocal = criar_banco_sqlite()
+    db = SessionLocal()
+    salao, servico, cliente, profissionais = criar_catalogo(db, 1)
+    agora = datetime.now().replace(microsecond=0)
+    alvo = agora + timedelta(hours=lembretes.LEMBRETE_ANTECEDENCIA_HORAS)
+    varredura = timedelta(seconds=lembretes.LEMBRETE_VARREDURA_SEGUNDOS)
+    inicios = {
+        "na janela": (alvo + timedelta(minutes=1), "agendado"),
+        "confirmado": (alvo + timedelta(minutes=2), "confirmado"),
+        "antes da janela": (alvo - 2 * varredura, "agendado"),
+        "depois da janela": (alvo + 2 * varredura, "agendado"),
+        "já cancelado": (alvo + timedelta(minutes=3), "cancelado"),
+        "cancelado depois": (alvo + timedelta(minutes=1), "agendado"),
+        "remarcado depois": (alvo + timedelta(minutes=1), "agendado"),
+    }
+    agendamentos = {}
+    for nome, (inicio, status) in inicios.items():
+        agendamento = models.Agendamento(
+            salao_id=salao.id, cliente_id=cliente.id, profissional_id=profissionais[0].id,
+            servico_id=servico.id, data_hora_inicio=inicio, data_hora_fim=inicio + timedelta(minutes=30),
+            status=status,
+        )
+        db.add(agendamento)
+        agendamentos[nome] = agendamento
+    db.commit()
+    ids = {nome: agendamento.id for nome, agendamento in agendamentos.items()}
+    contato = {"cliente_id": cliente.id, "destino": cliente.email}
+
+    # Duas varreduras sobrepostas, como duas janelas seguidas ou dois workers
+    lembretes.agendar_lembretes(db, {})
+    lembretes.agendar_lembretes(db, {})
+    enfileirados = Counter(
+        json.loads(payload)["agendamento_id"]
+        for payload in db.execute(select(models.Tarefa.payload).where(models.Tarefa.tipo == "lembretes.enviar"))
+        .scalars()
+    )
+    esperados = {ids[nome]: 1 for nome in ("na janela", "confirmado", "cancelado depois", "remarcado depois")}
+    if dict(enfileirados) != esperados:
+        falhas.append(f"lembretes: enfileirados {dict(enfileirados)}, esperado {esperados}")
+
+    # Depois de enfileirados e antes do envio
+    novo_inicio = alvo + timedelta(minutes=4)
+    agendamentos["cancelado depois"].status = "cancelado"
+    agendamentos["remarcado depois"].data_hora_inicio = novo_inicio
+    agendamentos["remarcado depois"].data_hora_fim = novo_inicio + timedelta(minutes=30)
+    db.commit()
+
+    caminho = os.path.join(tempfile.mkdtemp(prefix="agendanet_"), "lembretes.jsonl")
+    remetente_anterior = lembretes.remetente
+    lembretes.configurar(lembretes.RemetenteArquivo(caminho))
+    try:
+        # O worker roda a varredura periódica (que acha o horário novo) e os envios;
+        # a segunda leva de rodadas não pode reenviar nada
+        trabalhador = tarefas.Trabalhador(SessionLocal)
+        for _ in range(2):
+            while trabalhador.executar_uma_vez():
+                pass
+            lembretes.agendar_lembretes(db, {})
+    finally:
+        lembretes.configurar(remetente_anterior)
+    while tarefas.Trabalhador(SessionLocal).executar_uma_vez():
+        pass
+    db.close()
+
+    enviados = []
+    if os.path.exists(caminho):
+        with open(caminho, encoding="utf-8") as arquivo:
+            enviados = [json.loads(linha) for linha in arquivo]
+    por_agendamento = Counter(lembrete["agendamento_id"] for lembrete in enviados)
+    esperados = {ids[nome]: 1 for nome in ("na janela", "confirmado", "remarcado depois")}
+    print(f"lembretes: {len(enviados)} enviados para {len(inicios)} agendamentos")
+    if dict(por_agendamento) != esperados:
+        nomes = {agendamento_id: nome for nome, agendamento_id in ids.items()}
+        falhas.append("lembretes: enviados " + str({nomes[i]: vezes for i, vezes in por_agendamento.items()}))
+    for lembrete in enviados:
+        if {chave: lembrete[chave] for chave in contato} != contato:
+            falhas.append(f"lembretes: destino errado {lembrete}")
+        if lembrete["agendamento_id"] == ids["remarcado depois"] and f"{novo_inicio:%H:%M}" not in lembrete["mensagem"]:
+            falhas.append(f"lembretes: remarcado com o horário antigo: {lembrete['mensagem']}")
+
+
+def executar(total: int = 2_000, workers: int = 4):
+    # As falhas simuladas escreveriam avisos a cada tentativa
+    logging.getLogger("agendanet.tarefas").setLevel(logging.CRITICAL)
+    falhas = []
+    conferir_reserva(total, workers, falhas)
+    conferir_backoff(falhas)
+    conferir_periodicas(workers, falhas)
+    conferir_lembretes(falhas)
+
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    if falhas:
+        sys.exit(1)
+    print("fila de tarefas e lembretes ok")
+
+
+if __name__ == "__main__":
+    executar(*(int(argumento) for argumento in sys.argv[1:3]))
@@ -0,0 +1,64 @@
+# backend/benchmarks/carga_sync_async.py
+# Teste de carga comparando DB_MODO=sync e DB_MODO=async.
+# Sobe o uvicorn em um subprocesso para cada modo, apontando para o mesmo banco
+# SQLite, dispara requisições concorrentes com httpx e mede req/s e latência p99.
+#   python -m benchmarks.carga_sync_async [concorrencia] [segundos]
+import asyncio
+import sys
+import time
+from datetime import datetime
+
+import httpx
+
+from benchmarks.comum import PORTA, criar_banco_sqlite, criar_catalogo, popular_historico, subir_servidor
+
+ROTAS = ["/agendamentos/?limit=20", "/saloes/1", "/profissionais/?limit=20", "/servicos/1"]
+
+
+async def gerar_carga(concorrencia: int, segundos: float):
+    latencias = []
+    fim = time.perf_counter() + segundos
+
+    async def trabalhador(cliente, indice):
+        i = indice
+        while time.perf_counter() < fim:
+            comeco = time.perf_counter()
+            resposta = await cliente.get(ROTAS[i % len(ROTAS)])
+            resposta.raise_for_status()
+            latencias.append(time.perf_counter() - comeco)
+            i += 1
+
+    limites = httpx.Limits(max_connections=concorrencia)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORTA}", limits=limites) as cliente:
+        await asyncio.gather(*(trabalhador(cliente, i) for i in range(concorrencia)))
+    return latencias
+
+
+def executar(concorrencia: int = 64, segundos: float = 10):
+    engine, SessionLocal = criar_banco_sqlite()
+    caminho_banco = engine.url.database
+    db = SessionLocal()
+    salao, servico, cliente, profissionais = criar_catalogo(db, 30)
+    for profissional in profissionais:
+        popular_historico(engine, salao.id, servico.id, cliente.id, profissional.id,
+                          1_000, datetime(2025, 1, 1, 8, 0))
+    db.close()
+    engine.dispose()
+
+    print(f"concorrência={concorrencia}, duração={segundos}s")
+    print(f"{'modo':>6} | {'req/s':>8} | {'p50 ms':>8} | {'p99 ms':>8}")
+    for modo in ("sync", "async"):
+        processo = subir_servidor(caminho_banco, DB_MODO=modo)
+        try:
+            latencias = sorted(asyncio.run(gerar_carga(concorrencia, segundos)))
+        finally:
+            processo.terminate()
+            processo.wait()
+        p50 = latencias[len(latencias) // 2] * 1000
+        p99 = latencias[int(len(latencias) * 0.99)] * 1000
+        print(f"{modo:>6} | {len(latencias) / segundos:>8.0f} | {p50:>8.2f} | {p99:>8.2f}")
+
+
+if __name__ == "__main__":
+    argumentos = [float(a) for a in sys.argv[1:3]]
+    executar(int(argumentos[0]) if argumentos else 64, argumentos[1] if len(argumentos) > 1 else 10)
@@ -0,0 +1,113 @@
+# backend/benchmarks/comum.py
+# Utilitários compartilhados pelos benchmarks: banco SQLite local e dados sintéticos.
+# Rode os benchmarks a partir da pasta backend, por exemplo:
+#   python -m benchmarks.bench_conflitos
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine # type: ignore
+from sqlalchemy.orm import sessionmaker # type: ignore
+
+from app.database import Base
+from app import models
+
+
+def criar_banco_sqlite(nome: str = "bench.db"):
+    """Cria um banco SQLite novo em um diretório temporário e devolve (engine, SessionLocal)."""
+    caminho = os.path.join(tempfile.mkdtemp(prefix="agendanet_"), nome)
+    engine = create_engine(f"sqlite:///{caminho}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def criar_banco(nome: str = "bench.db"):
+    """Como criar_banco_sqlite, mas usa BENCH_DATABASE_URL se definida (ex.: um MySQL descartável).
+
+    As tabelas do banco informado são apagadas e recriadas.
+    """
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        return criar_banco_sqlite(nome)
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def criar_catalogo(db, num_profissionais: int = 1, duracao_minutos: int = 30):
+    """Cria um salão, um serviço, um cliente e `num_profissionais` profissionais."""
+    salao = models.Salao(nome="Salão Benchmark", email="bench@salao.com", senha_hash="x")
+    db.add(salao)
+    db.flush()
+    servico = models.Servico(salao_id=salao.id, nome="Corte", duracao_minutos=duracao_minutos, preco=50)
+    cliente = models.Cliente(nome="Cliente Benchmark", email="cliente@bench.com")
+    profissionais = [
+        models.Profissional(salao_id=salao.id, nome=f"Profissional {i}", especialidade="Cabelo")
+        for i in range(num_profissionais)
+    ]
+    db.add_all([servico, cliente, *profissionais])
+    db.commit()
+    return salao, servico, cliente, profissionais
+
+
+def popular_historico(engine, salao_id, servico_id, cliente_id, profissional_id,
+                      quantidade: int, inicio: datetime, duracao=timedelta(minutes=30)):
+    """Insere `quantidade` agendamentos consecutivos para o profissional a partir de `inicio`."""
+    linhas = []
+    for i in range(quantidade):
+        comeco = inicio + i * duracao
+        linhas.append({
+            "salao_id": salao_id,
+            "cliente_id": cliente_id,
+            "profissional_id": profissional_id,
+            "servico_id": servico_id,
+            "data_hora_inicio": comeco,
+            "data_hora_fim": comeco + duracao,
+            "status": "concluido",
+        })
+    if not linhas:
+        return
+    with engine.begin() as conn:
+        conn.execute(models.Agendamento.__table__.insert(), linhas)
+
+
+def medir(funcao, repeticoes: int):
+    """Executa `funcao` `repeticoes` vezes e devolve a latência média em milissegundos."""
+    comeco = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - comeco) * 1000 / repeticoes
+
+
+PORTA = 8765
+
+
+def subir_servidor(caminho_banco: str, **env_extra):
+    """Sobe `uvicorn app.main:app` em um subprocesso usando o banco SQLite informado."""
+    import httpx
+
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{caminho_banco}",
+        ASYNC_DATABASE_URL=f"sqlite+aiosqlite:///{caminho_banco}",
+        # A carga sai toda de um cliente (127.0.0.1): com a admissão ligada, o limite por
+        # IP recusaria a própria medição. bench_admissao a liga explicitamente.
+        ADMISSAO_HABILITADA="false",
+    )
+    env.update(env_extra)
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(PORTA), "--log-level", "warning"],
+        env=env,
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{PORTA}/")
+            return processo
+        except httpx.TransportError:
+            time.sleep(0.1)
+    processo.terminate()
+    raise RuntimeError("uvicorn não iniciou")